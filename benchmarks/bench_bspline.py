@@ -0,0 +1,55 @@
+"""
+Benchmarks of the b-spline fitting used by the sky subtraction, flat
+fielding and profile fits.
+"""
+import numpy as np
+
+from pypeit import utils
+from pypeit.core import pydl
+
+from . import synthetic
+
+
+def sky_pixels(nspec):
+    """ Sorted sky pixels of a synthetic slit, as fit by global_skysub"""
+    slit = synthetic.slit_image(nspec=nspec, obj_counts=0.)
+    thismask = slit['thismask']
+    piximg = slit['tilts'][thismask]*(nspec-1)
+    isrt = np.argsort(piximg)
+    return piximg[isrt], slit['sciimg'][thismask][isrt], slit['ivar'][thismask][isrt]
+
+
+class BsplineProfile(object):
+    """ utils.bspline_profile with rejection and a polynomial basis"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.x, self.y, self.ivar = sky_pixels(nspec)
+        self.basis = pydl.flegendre(np.linspace(-1., 1., self.x.size), 2).T
+
+    def time_bspline_profile(self, nspec):
+        utils.bspline_profile(self.x, self.y, self.ivar, self.basis, nord=4, upper=3., lower=3.,
+                              kwargs_bspline={'bkspace': 0.6},
+                              kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+
+    def peakmem_bspline_profile(self, nspec):
+        self.time_bspline_profile(nspec)
+
+
+class PydlBspline(object):
+    """ pydl.bspline fit and evaluation without rejection"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.x, self.y, self.ivar = sky_pixels(nspec)
+        self.sset = pydl.bspline(self.x, nord=4, bkspace=0.6)
+        self.sset.fit(self.x, self.y, self.ivar)
+
+    def time_fit(self, nspec):
+        sset = pydl.bspline(self.x, nord=4, bkspace=0.6)
+        sset.fit(self.x, self.y, self.ivar)
+
+    def time_value(self, nspec):
+        self.sset.value(self.x)
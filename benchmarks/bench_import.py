@@ -0,0 +1,15 @@
+"""
+Benchmarks of the start-up time of PypeIt.
+"""
+
+# Modules imported by run_pypeit and the helper scripts before any data
+# are read; see pypeit/tests/test_import.py
+startup_modules = ['pypeit.pypeit', 'pypeit.scripts.run_pypeit', 'pypeit.core.load',
+                   'pypeit.spectrographs.util', 'pypeit.ginga']
+
+
+class Import(object):
+    """ Import of the start-up modules in a fresh interpreter"""
+
+    def timeraw_import_startup(self):
+        return '\n'.join(['import {0}'.format(m) for m in startup_modules])
@@ -0,0 +1,68 @@
+"""
+Benchmarks of the image processing: cosmic-ray detection, frame
+combination and the amplifier layout of raw frames.
+"""
+import tempfile
+
+from pypeit.core import procimg
+from pypeit.core import combine
+from pypeit.spectrographs.util import load_spectrograph
+
+from . import synthetic
+from . import dataset
+
+
+class Lacosmic(object):
+    """ procimg.lacosmic of a sky-dominated frame"""
+    params = [512, 1024]
+    param_names = ['npix']
+    timeout = 120
+
+    def setup(self, npix):
+        self.frame, self.var = synthetic.science_frame(shape=(npix, npix), ncosmics=npix//2)
+
+    def time_lacosmic(self, npix):
+        procimg.lacosmic(1, self.frame, 65535., 0.9, varframe=self.var, maxiter=1)
+
+    def peakmem_lacosmic(self, npix):
+        self.time_lacosmic(npix)
+
+
+class CombFrames(object):
+    """ combine.comb_frames with the default rejection parameters"""
+    params = [3, 10]
+    param_names = ['nframes']
+
+    def setup(self, nframes):
+        self.stack = synthetic.frame_stack(nframes=nframes)
+
+    # comb_frames masks the input array in place, so it is given a copy
+    def time_weightmean(self, nframes):
+        combine.comb_frames(self.stack.copy(), frametype='bias', saturation=65535.,
+                            method='weightmean', cosmics=20.)
+
+    def time_median(self, nframes):
+        combine.comb_frames(self.stack.copy(), frametype='bias', saturation=65535.,
+                            method='median', cosmics=20.)
+
+    def peakmem_weightmean(self, nframes):
+        self.time_weightmean(nframes)
+
+
+class DatasecImg(object):
+    """ Spectrograph.get_datasec_img of the frames of a raw dataset,
+    called once or for each of the steps of ProcessImages"""
+    params = [1, 5]
+    param_names = ['ncalls']
+    timeout = 120
+
+    def setup_cache(self):
+        return dataset.make_dataset('shane_kast_blue', tempfile.mkdtemp())
+
+    def setup(self, files, ncalls):
+        self.spectrograph = load_spectrograph('shane_kast_blue')
+
+    def time_get_datasec_img(self, files, ncalls):
+        for raw_file in files:
+            for i in range(ncalls):
+                self.spectrograph.get_datasec_img(raw_file, det=1, trim=i > 0)
@@ -0,0 +1,60 @@
+"""
+Benchmarks of the sky subtraction and extraction of a single slit.
+"""
+import numpy as np
+
+from pypeit.core import skysub
+from pypeit.core import extract
+
+from . import synthetic
+
+
+class GlobalSkysub(object):
+    """ skysub.global_skysub of one slit"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.slit = synthetic.slit_image(nspec=nspec)
+
+    def time_global_skysub(self, nspec):
+        s = self.slit
+        skysub.global_skysub(s['sciimg'], s['ivar'], s['tilts'], s['thismask'], s['slit_left'],
+                             s['slit_righ'])
+
+    def peakmem_global_skysub(self, nspec):
+        self.time_global_skysub(nspec)
+
+
+class FitProfile(object):
+    """ extract.fit_profile of a bright point source"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.slit = synthetic.slit_image(nspec=nspec, obj_counts=500.)
+        self.wave, self.flux, self.fluxivar = synthetic.boxcar_spectrum(self.slit)
+
+    def time_fit_profile(self, nspec):
+        s = self.slit
+        extract.fit_profile(s['sciimg'] - s['skyimg'], s['ivar'], s['waveimg'], s['thismask'],
+                            s['spat_img'], s['trace'], self.wave, self.flux, self.fluxivar,
+                            thisfwhm=s['fwhm'])
+
+
+class ExtractOptimal(object):
+    """ extract.extract_optimal given the object profile"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.slit = synthetic.slit_image(nspec=nspec)
+        s = self.slit
+        # The true profile, normalized along the spatial direction
+        self.oprof = s['objimg']/np.sum(s['objimg'], axis=1)[:,None]
+        self.mask = s['thismask'] & (s['ivar'] > 0)
+
+    def time_extract_optimal(self, nspec):
+        s = self.slit
+        extract.extract_optimal(s['sciimg'], s['ivar'], self.mask, s['waveimg'], s['skyimg'],
+                                s['rn2img'], self.oprof, 5., synthetic.specobj(s))
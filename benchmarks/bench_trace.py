@@ -0,0 +1,121 @@
+"""
+Benchmarks of the trace centroiding, slit-edge labelling and tracing,
+slit-mask registration, and arc-line tilt tracing.
+"""
+import warnings
+
+import numpy as np
+
+from pypeit.core import extract
+from pypeit.core import trace_slits
+from pypeit.core import tracewave
+from pypeit import traceslits
+from pypeit.spectrographs.util import load_spectrograph
+from pypeit.spectrographs.opticalmodel import ReflectionGrating
+from pypeit.spectrographs.slitmask import SlitMask, SlitRegister
+
+from . import synthetic
+
+
+class TraceCentroid(object):
+    """ Flux- and Gaussian-weighted recentering of many traces"""
+    params = [1, 50]
+    param_names = ['ntrace']
+
+    def setup(self, ntrace):
+        self.image, self.ivar, self.xtrue, self.xinit = synthetic.trace_image(ntrace=ntrace)
+        # Compile outside of the timing
+        trace_slits.trace_fweight(self.image[:100], self.xinit[:100], invvar=self.ivar[:100])
+        trace_slits.trace_gweight(self.image[:100], self.xinit[:100], invvar=self.ivar[:100])
+        trace_slits.trace_crude_init(self.image[:100], self.xinit[50], 50, invvar=self.ivar[:100])
+
+    def time_trace_fweight(self, ntrace):
+        trace_slits.trace_fweight(self.image, self.xinit, radius=3., invvar=self.ivar)
+
+    def time_trace_gweight(self, ntrace):
+        trace_slits.trace_gweight(self.image, self.xinit, sigma=1.3, invvar=self.ivar)
+
+    def time_trace_crude_init(self, ntrace):
+        ypass = self.image.shape[0]//2
+        trace_slits.trace_crude_init(self.image, self.xinit[ypass], ypass, invvar=self.ivar)
+
+
+class MatchEdges(object):
+    """ trace_slits.match_edges of the edges of a multi-slit mask"""
+    params = [10, 60]
+    param_names = ['nslit']
+
+    def setup(self, nslit):
+        self.edgearr = synthetic.edge_image(nslit=nslit)
+        # Compile outside of the timing
+        trace_slits.match_edges(self.edgearr.copy(), 100000)
+
+    def time_match_edges(self, nslit):
+        trace_slits.match_edges(self.edgearr.copy(), 100000)
+
+
+class TraceSlits(object):
+    """ traceslits.TraceSlits.run of a multi-slit trace flat"""
+    params = [20, 100]
+    param_names = ['nslit']
+    timeout = 300
+
+    def setup(self, nslit):
+        self.mstrace = synthetic.slit_flat(nslit=nslit)
+        self.spectrograph = load_spectrograph('keck_deimos')
+        self.par = self.spectrograph.default_pypeit_par()['calibrations']['slits']
+        # Compile outside of the timing
+        trace_slits.trace_crude_init(self.mstrace[:100], np.array([50.]), 50)
+        extract.extract_asymbox2(self.mstrace[:100], np.full(100, 10.), np.full(100, 14.))
+
+    def time_traceslits_run(self, nslit):
+        traceSlits = traceslits.TraceSlits(self.spectrograph, self.par, det=1)
+        traceSlits.run(self.mstrace, '1,1', write_qa=False, plate_scale=0.5)
+
+
+class SlitMaskRegister(object):
+    """ Positions of the slits of a DEIMOS mask on the detectors and
+    their registration to the slit traces"""
+    params = [30, 120]
+    param_names = ['nslit']
+
+    def setup(self, nslit):
+        self.spectrograph = load_spectrograph('keck_deimos')
+        roll, yaw, tilt = self.spectrograph._grating_orientation(3, 831.90, 0.)
+        self.spectrograph.grating = ReflectionGrating(831.90, tilt, roll, yaw, central_wave=8500.)
+        self.spectrograph.slitmask = SlitMask(synthetic.slitmask_corners(nslit=nslit))
+        self.wave = np.linspace(6500., 10000., 50)
+        # Traces of the slits that land on one detector
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            _, _, ccd, xpix, _ = self.spectrograph.mask_to_pixel_coordinates()
+        self.mask_spat = self.spectrograph.slitmask.center[:,0]
+        on_det = ccd == 7
+        self.scale, self.offset = np.polyfit(self.mask_spat[on_det], xpix[on_det], 1)
+        self.trace_spat = np.sort(xpix[on_det] + 5.)[1:]
+
+    def time_mask_to_pixel_coordinates(self, nslit):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.spectrograph.mask_to_pixel_coordinates(wave=self.wave, corners=True)
+
+    def time_slit_register(self, nslit):
+        SlitRegister(self.trace_spat, self.mask_spat, guess_offset=self.offset+20.,
+                     guess_scale=self.scale*1.01, penalty=True, fit=True)
+
+
+class TraceTilts(object):
+    """ tracewave.trace_tilts_work of the sky lines in one slit"""
+    params = [512, 2048]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.slit = synthetic.slit_image(nspec=nspec, obj_counts=0.)
+        centers, _ = synthetic.sky_lines(nspec)
+        self.lines_spec = centers
+        self.lines_spat = np.interp(centers, np.arange(nspec), self.slit['slit_cen'])
+
+    def time_trace_tilts_work(self, nspec):
+        s = self.slit
+        tracewave.trace_tilts_work(s['sciimg'], self.lines_spec, self.lines_spat, s['thismask'],
+                                   s['slit_cen'], inmask=s['ivar'] > 0, fwhm=s['fwhm'])
@@ -0,0 +1,93 @@
+"""
+Benchmarks of the arc line detection, wavelength calibration, model
+sky spectra and 2d coadding.
+"""
+import numpy as np
+
+from pypeit.core import arc
+from pypeit.core import coadd2d
+from pypeit.core.wavecal import wvutils
+from pypeit import wavemodel
+
+from . import synthetic
+
+
+class DetectLines(object):
+    """ arc.detect_lines of a sparse and a dense (ThAr-like) arc"""
+    params = [60, 500]
+    param_names = ['nlines']
+
+    def setup(self, nlines):
+        self.spec = synthetic.arc_spectrum(nspec=4096, nlines=nlines)
+
+    def time_detect_lines(self, nlines):
+        arc.detect_lines(self.spec)
+
+
+class XcorrShiftStretch(object):
+    """ wvutils.xcorr_shift_stretch of a shifted and stretched arc"""
+    params = [1024, 4096]
+    param_names = ['nspec']
+
+    def setup(self, nspec):
+        self.arc1 = synthetic.arc_spectrum(nspec=nspec)
+        self.arc2 = synthetic.arc_spectrum(nspec=nspec, shift=12.3, stretch=1.01)
+
+    def time_xcorr_shift_stretch(self, nspec):
+        wvutils.xcorr_shift_stretch(self.arc1, self.arc2, seed=1)
+
+
+class Fit2dArc(object):
+    """ arc.fit2darc of the lines of a synthetic echelle arc"""
+    params = [500, 5000]
+    param_names = ['nlines']
+
+    def setup(self, nlines):
+        rstate = np.random.RandomState(1)
+        self.nspec = 4096
+        self.orders = rstate.randint(30, 70, nlines).astype(float)
+        self.pix = rstate.uniform(0., self.nspec-1., nlines)
+        xn = self.pix/(self.nspec-1)
+        self.wave = (5.5e5 + 3e4*xn + 500.*xn**2)/self.orders + rstate.normal(0, 0.01, nlines)
+        bad = rstate.uniform(size=nlines) < 0.05
+        self.wave[bad] += rstate.normal(0, 1., np.sum(bad))
+
+    def time_fit2darc(self, nlines):
+        arc.fit2darc(self.wave, self.pix, self.orders, self.nspec)
+
+
+class ModelSky(object):
+    """ wavemodel.nearIR_modelsky (OH lines and continuum) at a low and
+    a high resolution"""
+    params = [300, 3000]
+    param_names = ['resolution']
+
+    def time_nearIR_modelsky(self, resolution):
+        # The H2O lines are only added above 2.3 microns
+        wavemodel.nearIR_modelsky(resolution, waveminmax=(0.8, 2.2), dlam=10.)
+
+
+class Rebin2d(object):
+    """ coadd2d.rebin2d of a stack of rectified slits"""
+    params = [3, 10]
+    param_names = ['nimgs']
+
+    def setup(self, nimgs):
+        slit = synthetic.slit_image(nspec=2048)
+        shape = (nimgs,) + slit['sciimg'].shape
+        rstate = np.random.RandomState(1)
+        self.waveimg_stack = np.broadcast_to(slit['waveimg'], shape) \
+                                + rstate.uniform(-0.5, 0.5, size=(nimgs, 1, 1))
+        self.spatimg_stack = np.broadcast_to(slit['spat_img'] - slit['trace'][:,None], shape)
+        self.thismask_stack = np.broadcast_to(slit['thismask'], shape)
+        self.inmask_stack = np.broadcast_to(slit['ivar'] > 0, shape)
+        self.sci_list = [np.broadcast_to(slit['sciimg'], shape),
+                         np.broadcast_to(slit['sciimg'] - slit['skyimg'], shape)]
+        self.var_list = [np.broadcast_to(1./(slit['ivar'] + (slit['ivar'] == 0)), shape)]
+        wave = slit['waveimg'][slit['thismask']]
+        self.spec_bins = np.arange(wave.min(), wave.max(), 2.)
+        self.spat_bins = np.arange(-30., 31., 1.)
+
+    def time_rebin2d(self, nimgs):
+        coadd2d.rebin2d(self.spec_bins, self.spat_bins, self.waveimg_stack, self.spatimg_stack,
+                        self.thismask_stack, self.inmask_stack, self.sci_list, self.var_list)
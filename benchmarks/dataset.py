@@ -0,0 +1,453 @@
+"""
+Synthetic raw datasets for end-to-end benchmarks of PypeIt.
+
+The generator writes bias, arc, flat and science frames for
+``shane_kast_blue`` and ``keck_deimos`` in the raw format of the
+instrument, i.e. with the header keywords used by the spectrograph
+class for the frame typing and configuration and with the same layout
+of the data and overscan sections.  The frames are built from a simple
+model of each detector:
+
+    - the wavelength solution is taken from the ``reid_arxiv`` template
+      used by the wavelength calibration,
+    - arcs are built from the line lists in ``pypeit/data/arc_lines``,
+    - the sky is the archived sky spectrum used for the flexure
+      correction,
+    - the science targets are point sources with a flat continuum,
+    - all illuminated frames are multiplied by the same pixel-to-pixel
+      variations and slit illumination, and have Poisson and read noise.
+
+Usage::
+
+    python -m benchmarks.dataset shane_kast_blue /tmp/kast_blue
+"""
+import os
+import argparse
+
+import numpy as np
+
+from scipy import ndimage
+from scipy import special
+
+from astropy.io import fits
+from astropy.time import Time
+
+from pypeit import msgs
+from pypeit.core.wave import load_sky_spectrum
+from pypeit.core.wavecal import waveio
+from pypeit.spectrographs.util import load_spectrograph
+
+
+def valid_spectrographs():
+    """ The spectrographs for which data can be generated"""
+    return list(instruments.keys())
+
+
+class DetectorModel(object):
+    """
+    Model of a single detector in the PypeIt orientation, i.e. with
+    shape (nspec, nspat).
+
+    Args:
+        wave (`numpy.ndarray`_):
+            Wavelength at each spectral pixel along the center of the
+            slits.
+        nspat (:obj:`int`):
+            Number of spatial pixels.
+        slits (:obj:`list`):
+            Left and right edge of each slit at the first and last
+            spectral pixel; the edges are linear in between.
+        fwhm (:obj:`float`):
+            FWHM of the arc and sky lines in pixels.
+        seeing (:obj:`float`):
+            FWHM of the point sources in pixels.
+        tilt (:obj:`float`):
+            Spectral shift of the lines per spatial pixel from the slit
+            center.
+        seed (:obj:`int`):
+            Seed for the pixel-to-pixel variations.
+    """
+    def __init__(self, wave, nspat, slits, fwhm=3., seeing=3., tilt=0.01, seed=1):
+        self.wave = wave
+        self.nspec = wave.size
+        self.nspat = nspat
+        self.fwhm = fwhm
+        self.seeing = seeing
+
+        spec = np.arange(self.nspec, dtype=float)
+        spat_img = np.outer(np.ones(self.nspec), np.arange(nspat, dtype=float))
+        self.slit_left = np.array([s[0][0] + (s[0][1]-s[0][0])*spec/(self.nspec-1) for s in slits])
+        self.slit_righ = np.array([s[1][0] + (s[1][1]-s[1][0])*spec/(self.nspec-1) for s in slits])
+
+        # Illumination with edges smoothed over a pixel, and the
+        # spectral position of each pixel along the tilted lines
+        self.illum = np.zeros((self.nspec, nspat))
+        self.piximg = np.zeros((self.nspec, nspat))
+        for left, righ in zip(self.slit_left, self.slit_righ):
+            illum = 0.25*(1 + special.erf(spat_img - left[:,None])) \
+                        * (1 + special.erf(righ[:,None] - spat_img))
+            center = (left + righ)/2
+            self.piximg += (spec[:,None] + tilt*(spat_img - center[:,None]))*(illum > 0.01)
+            self.illum += illum
+
+        rstate = np.random.RandomState(seed)
+        self.pixflat = 1. + 0.01*rstate.normal(size=self.illum.shape)
+
+    def lines(self, wave, amplitude, fwhm=None):
+        """
+        Image of emission lines at the given wavelengths.
+        """
+        pix = np.interp(wave, self.wave, np.arange(self.nspec), left=-1, right=-1)
+        indx = pix > 0
+        sigma = (self.fwhm if fwhm is None else fwhm)/2.3548
+        # Render each line on a spectral grid finer than the pixels
+        # and interpolate onto the tilted pixel positions
+        fine = np.arange(-10., self.nspec+10., 0.1)
+        spec = np.zeros_like(fine)
+        for p, a in zip(pix[indx], amplitude[indx]):
+            near = np.absolute(fine - p) < 6*sigma
+            spec[near] += a*np.exp(-0.5*((fine[near] - p)/sigma)**2)
+        return np.interp(self.piximg, fine, spec)*self.illum
+
+    def spectrum(self, wave, flux):
+        """
+        Image of a continuous spectrum, given at high resolution, along
+        the slits.
+        """
+        # Smooth to the resolution of the detector
+        dwave = np.median(np.absolute(np.diff(self.wave)))
+        sigma = self.fwhm*dwave/2.3548/np.median(np.diff(wave))
+        spec = np.interp(self.wave, wave, ndimage.gaussian_filter1d(flux, sigma))
+        return np.interp(self.piximg, np.arange(self.nspec), spec)*self.illum
+
+    def point_sources(self, positions, counts):
+        """
+        Image of point sources at the fractional positions along each
+        slit.
+        """
+        spat = np.arange(self.nspat, dtype=float)
+        sigma = self.seeing/2.3548
+        image = np.zeros((self.nspec, self.nspat))
+        for left, righ, pos, cnt in zip(self.slit_left, self.slit_righ, positions, counts):
+            for p, c in zip(np.atleast_1d(pos), np.atleast_1d(cnt)):
+                trace = left + p*(righ - left)
+                image += c*np.exp(-0.5*((spat[None,:] - trace[:,None])/sigma)**2)
+        return image*(self.illum > 0.01)
+
+
+def arc_lines(lamps, wave, peak=20000.):
+    """
+    Wavelengths and relative amplitudes of the lamp lines in the range
+    covered by `wave`.
+    """
+    line_list = waveio.load_line_lists(lamps)
+    indx = (line_list['wave'] > wave.min()) & (line_list['wave'] < wave.max())
+    amp = np.asarray(line_list['amplitude'][indx], dtype=float)
+    return np.asarray(line_list['wave'][indx]), peak*amp/amp.max()
+
+
+def sky_spectrum(sky_file):
+    """
+    Read an archived sky spectrum.
+    """
+    sky = load_sky_spectrum(sky_file)
+    return sky.wavelength.value, sky.flux.value
+
+
+def template_wave(reid_arxiv, det, nspec, offset):
+    """
+    Wavelength solution taken from a ``reid_arxiv`` template.
+    """
+    wave, _, _ = waveio.load_template(reid_arxiv, det)
+    return np.interp(np.arange(nspec) + offset, np.arange(wave.size), wave)
+
+
+def electrons(model, frametype, sky=None, lamps=None, exptime=1., rstate=None,
+              nobj_per_slit=1, ncosmics=0):
+    """
+    Expected number of electrons in each pixel of a frame.
+    """
+    if frametype == 'bias':
+        return np.zeros((model.nspec, model.nspat))
+    if frametype == 'arc':
+        image = model.lines(*arc_lines(lamps, model.wave))
+    elif frametype == 'flat':
+        # Smooth lamp spectrum peaking at 20000 e
+        x = (model.wave - model.wave.mean())/(model.wave.max() - model.wave.min())
+        image = model.spectrum(model.wave, 20000.*(1 - 0.5*x**2))
+    elif frametype == 'science':
+        image = model.spectrum(*sky)
+        image *= 200./np.median(image[model.illum > 0.5])*exptime/1200.
+        nslit = model.slit_left.shape[0]
+        positions = [np.linspace(0.3, 0.7, nobj_per_slit)]*nslit
+        counts = [rstate.uniform(100., 2000., size=nobj_per_slit)*exptime/1200.
+                  for i in range(nslit)]
+        image += model.point_sources(positions, counts)
+    else:
+        raise ValueError('Unknown frame type: {0}'.format(frametype))
+    image *= model.pixflat
+    if ncosmics > 0:
+        x = rstate.randint(0, model.nspec, size=ncosmics)
+        y = rstate.randint(0, model.nspat, size=ncosmics)
+        image[x, y] += rstate.uniform(1000., 20000., size=ncosmics)
+    return image
+
+
+def readout(image, gain, ronoise, bias, rstate):
+    """
+    Convert electrons to ADU with Poisson and read noise.
+    """
+    counts = rstate.poisson(np.fmax(image, 0.)) + ronoise*rstate.normal(size=image.shape)
+    return np.clip(np.round(counts/gain + bias), 0, 65535).astype(np.uint16)
+
+
+def overscan(shape, gain, ronoise, bias, rstate):
+    """
+    Overscan region with only the bias level and read noise.
+    """
+    return readout(np.zeros(shape), gain, ronoise, bias, rstate)
+
+
+# ----------------------------------------------------------------------
+# Shane/Kast blue
+
+def kast_blue_models(seed=1):
+    """
+    Model of the single Kast blue detector with the 600/4310 grism and
+    a long slit.
+    """
+    wave = template_wave('shane_kast_blue_600.fits', 1, 2048, 150.)
+    return {1: DetectorModel(wave, 350, [[(30., 33.), (320., 323.)]], fwhm=3.5, seeing=4.,
+                             tilt=0.01, seed=seed)}
+
+
+def kast_blue_header(frametype, exptime, date, target, ra, dec, airmass):
+    """
+    Primary header of a Kast blue frame.
+    """
+    lamps = dict([('LAMPSTA{0}'.format(l), 'off') for l in '12345ABCDEFGHIJK'])
+    if frametype == 'arc':
+        # Hg-Cd and He
+        lamps['LAMPSTAG'] = 'on'
+        lamps['LAMPSTAF'] = 'on'
+    elif frametype == 'flat':
+        # Blue dome lamp
+        lamps['LAMPSTA1'] = 'on'
+    cards = [('OBSTYPE', 'OBJECT', 'IMAGE TYPE'),
+             ('EXPTIME', exptime, 'Exp time (not counting shutter error)'),
+             ('PROGRAM', 'NEWCAM', 'New Lick Camera'),
+             ('VERSION', 'kastb', 'Data acquisition version'),
+             ('DATE', date, 'UT of CCD readout & descramble'),
+             ('DATASEC', '[1:2048,1:350]', 'IRAF/NOAO-style data section'),
+             ('AMPSROW', 2, 'AMPLIFIERS PER ROW'),
+             ('AMPSCOL', 1, 'AMPLIFIERS PER COLUMN'),
+             ('ROVER', 0, 'NUMBER OF OVERSCAN ROWS'),
+             ('COVER', 32, 'NUMBER OF OVERSCAN COLUMNS'),
+             ('DATE-OBS', date, 'observation date (begin)'),
+             ('OBJECT', target, None),
+             ('RA', ra, 'RIGHT ASCENSION'),
+             ('DEC', dec, 'DECLINATION'),
+             ('AIRMASS', airmass, 'AIRMASS AT START OF OBSERVATION'),
+             ('SLIT_N', '2.0 arcsec', 'SLIT POSITION NAME'),
+             ('GRISM_N', '600/4310', 'GRISM POSITION NAME'),
+             ('BSPLIT_N', 'd55', 'BEAM SPLITTER POSITION NAME'),
+             ('DSENSOR', 'Fairchild CCD 3041 2Kx2K', 'SENSOR DESCRIPTION')]
+    cards += [(k, v, 'Shane lamp status') for k, v in lamps.items()]
+    return fits.Header(cards)
+
+
+def write_kast_blue(ofile, images, header, spectrograph, rstate):
+    """
+    Write a Kast blue frame: the spectral direction runs along the
+    columns and the two amplifiers each read half of them, followed by
+    their overscan columns.
+    """
+    det = spectrograph.detector[0]
+    image = images[1].T
+    nspat = image.shape[0]
+    raw = np.zeros((nspat, 2112), dtype=np.uint16)
+    bias = [1100., 1050.]
+    for amp, (dsec, osec) in enumerate([(np.s_[:,0:1024], np.s_[:,2049:2080]),
+                                         (np.s_[:,1024:2048], np.s_[:,2080:2111])]):
+        raw[dsec] = readout(image[dsec], det['gain'][amp], det['ronoise'][amp], bias[amp],
+                            rstate)
+        raw[osec] = overscan(raw[osec].shape, det['gain'][amp], det['ronoise'][amp], bias[amp],
+                             rstate)
+    fits.PrimaryHDU(data=raw, header=header).writeto(ofile, overwrite=True)
+
+
+# ----------------------------------------------------------------------
+# Keck/DEIMOS
+
+def deimos_models(dets=None, seed=1):
+    """
+    Models of the DEIMOS detectors with the 830G grating and a mask of
+    evenly spaced slits.
+    """
+    dets = range(1, 9) if dets is None else dets
+    models = {}
+    for det in dets:
+        # Six 7 arcsec slits across each detector, slightly tilted
+        edges = np.linspace(60., 1990., 7)
+        slits = [[(l+5., l), (l+65., l+60.)] for l in edges[:-1] + 100.]
+        wave = template_wave('keck_deimos_830G.fits', det, 4096, 200.)
+        models[det] = DetectorModel(wave, 2048, slits, fwhm=6., seeing=6., tilt=0.02,
+                                    seed=seed+det)
+    return models
+
+
+def deimos_header(frametype, exptime, date, target, ra, dec, airmass):
+    """
+    Primary header of a DEIMOS frame.
+    """
+    lamps = {'bias': 'Off', 'arc': 'Kr Xe Ar Ne', 'flat': 'Qz', 'science': 'Off'}[frametype]
+    cards = [('INSTRUME', 'DEIMOS: real science mosaic CCD subsystem with PowerPC in VME crate',
+              None),
+             ('TARGNAME', target, 'KCS: target name'),
+             ('OBJECT', target, 'Object name'),
+             ('RA', ra, 'Right ascension'),
+             ('DEC', dec, 'Declination'),
+             ('AIRMASS', airmass, 'KCS: air mass'),
+             ('ELAPTIME', exptime, 'Elapsed time of exposure (sec)'),
+             ('EXPTIME', exptime, 'Exposure time (sec)'),
+             ('DATE-OBS', date.split('T')[0], 'Date of observation'),
+             ('UT', date.split('T')[1], 'Universal time'),
+             ('MJD-OBS', Time(date, format='isot').mjd, 'Modified Julian day'),
+             ('SLMSKNAM', 'synth830', 'Slitmask name'),
+             ('GRATENAM', '830G', 'Grating name'),
+             ('GRATEPOS', 3, 'Grating position'),
+             ('G3TLTWAV', 7500.0, 'Grating 3 tilt wavelength'),
+             ('G4TLTWAV', 0.0, 'Grating 4 tilt wavelength'),
+             ('HATCHPOS', 'open' if frametype == 'science' else 'closed', 'Hatch position'),
+             ('LAMPS', lamps, 'Lamps on'),
+             ('BINNING', '1,1', 'Binning: serial, parallel'),
+             ('PRECOL', 12, 'Prescan columns'),
+             ('POSTPIX', 80, 'Postscan pixels'),
+             ('PRELINE', 0, 'Prescan lines'),
+             ('POSTLINE', 0, 'Postscan lines'),
+             ('DETLSIZE', '[1:8192,1:8192]', 'Detector mosaic size')]
+    return fits.Header(cards)
+
+
+def write_deimos(ofile, images, header, spectrograph, rstate):
+    """
+    Write a DEIMOS frame: one image extension per detector, with the
+    spectral direction along the rows followed by the overscan columns.
+    Detectors without a model only contain the bias level.
+    """
+    hdus = [fits.PrimaryHDU(header=header)]
+    for det in range(1, 9):
+        par = spectrograph.detector[det-1]
+        bias = 1000. + 10.*det
+        raw = np.zeros((4096, 12+2048+80), dtype=np.uint16)
+        data = np.zeros((4096, 2048)) if det not in images else images[det]
+        raw[:,12:2060] = readout(data, par['gain'], par['ronoise'], bias, rstate)
+        raw[:,:12] = overscan((4096, 12), par['gain'], par['ronoise'], bias, rstate)
+        raw[:,2060:] = overscan((4096, 80), par['gain'], par['ronoise'], bias, rstate)
+        x0 = 1 + ((det-1) % 4)*2048
+        y0 = 1 if det < 5 else 4097
+        hdr = fits.Header([('DATASEC', '[13:2060,1:4096]', 'Data section'),
+                           ('DETSEC', '[{0}:{1},{2}:{3}]'.format(x0, x0+2047, y0, y0+4095),
+                            'Detector section'),
+                           ('CCDNAME', 'synth{0:02d}'.format(det), 'CCD name')])
+        hdus.append(fits.ImageHDU(data=raw, header=hdr, name='CCD{0}'.format(det)))
+    fits.HDUList(hdus).writeto(ofile, overwrite=True)
+
+
+# Per-instrument settings: the detector models, header and file
+# writers, the prefix of the file names, and the default sequence of
+# frames as (frame type, number, exposure time)
+instruments = {'shane_kast_blue': dict(models=kast_blue_models, header=kast_blue_header,
+                                       write=write_kast_blue, prefix='b', nobj_per_slit=2,
+                                       frames=[('bias', 5, 0.), ('arc', 1, 30.),
+                                               ('flat', 5, 15.), ('science', 2, 1200.)]),
+               'keck_deimos': dict(models=deimos_models, header=deimos_header,
+                                   write=write_deimos, prefix='d', nobj_per_slit=1,
+                                   frames=[('arc', 1, 1.), ('flat', 3, 4.),
+                                           ('science', 2, 1200.)])}
+
+
+def make_dataset(spectrograph, outdir, nscience=None, dets=None, seed=1, overwrite=False):
+    """
+    Write a synthetic raw dataset.
+
+    Args:
+        spectrograph (:obj:`str`):
+            One of :func:`valid_spectrographs`.
+        outdir (:obj:`str`):
+            Directory for the raw frames; created if it does not exist.
+        nscience (:obj:`int`, optional):
+            Number of science frames.  Defaults to the number in
+            :attr:`instruments`.
+        dets (:obj:`list`, optional):
+            DEIMOS detectors to illuminate; the others only contain the
+            bias level.  Default is all of them.
+        seed (:obj:`int`, optional):
+            Seed for the noise, cosmic rays and object fluxes.
+        overwrite (:obj:`bool`, optional):
+            Rewrite existing frames.
+
+    Returns:
+        :obj:`list`: The names of the files written.
+    """
+    if spectrograph not in instruments:
+        msgs.error('No synthetic data for {0}; options are: {1}'.format(
+                   spectrograph, ', '.join(valid_spectrographs())))
+    inst = instruments[spectrograph]
+    spec = load_spectrograph(spectrograph)
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    models = inst['models'](seed=seed) if spectrograph != 'keck_deimos' \
+                else inst['models'](dets=dets, seed=seed)
+    # The sky is the spectrum used for the flexure correction
+    sky = sky_spectrum(spec.default_pypeit_par()['flexure']['spectrum'])
+    lamps = spec.default_pypeit_par()['calibrations']['wavelengths']['lamps']
+
+    rstate = np.random.RandomState(seed)
+    t0 = Time('2018-11-05T02:00:00', format='isot')
+    files = []
+    for frametype, number, exptime in inst['frames']:
+        if frametype == 'science' and nscience is not None:
+            number = nscience
+        for i in range(number):
+            ofile = os.path.join(outdir, '{0}{1}.fits'.format(inst['prefix'], len(files)+1))
+            files.append(ofile)
+            if os.path.isfile(ofile) and not overwrite:
+                continue
+            date = (t0 + 600.*len(files)/86400.).isot
+            target = {'bias': 'Bias', 'arc': 'Arcs', 'flat': 'Dome Flat'}.get(frametype,
+                                                                             'SYNTH{0}'.format(i))
+            header = inst['header'](frametype, exptime, date, target, '09:21:46.0', '37:25:56.0',
+                                    1.1)
+            images = dict([(det, electrons(model, frametype, sky=sky, lamps=lamps,
+                                           exptime=exptime, rstate=rstate,
+                                           nobj_per_slit=inst['nobj_per_slit'],
+                                           ncosmics=200 if frametype == 'science' else 0))
+                           for det, model in models.items()])
+            inst['write'](ofile, images, header, spec, rstate)
+            msgs.info('Wrote {0} frame {1}'.format(frametype, ofile))
+    return files
+
+
+def parser(options=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic raw dataset')
+    parser.add_argument('spectrograph', type=str,
+                        help='One of: {0}'.format(', '.join(valid_spectrographs())))
+    parser.add_argument('outdir', type=str, help='Output directory for the raw frames')
+    parser.add_argument('--nscience', type=int, default=None, help='Number of science frames')
+    parser.add_argument('--dets', type=int, nargs='+', default=None,
+                        help='DEIMOS detectors to illuminate (default all)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('-o', '--overwrite', default=False, action='store_true',
+                        help='Overwrite existing frames')
+    return parser.parse_args() if options is None else parser.parse_args(options)
+
+
+def main(args):
+    make_dataset(args.spectrograph, args.outdir, nscience=args.nscience, dets=args.dets,
+                 seed=args.seed, overwrite=args.overwrite)
+
+
+if __name__ == '__main__':
+    main(parser())
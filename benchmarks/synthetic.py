@@ -0,0 +1,237 @@
+"""
+Synthetic data for the benchmarks.
+
+Everything is generated from a fixed seed so that the timings of
+different commits are measured on identical inputs.
+"""
+import numpy as np
+
+from pypeit.core import extract
+from pypeit import specobjs
+
+# Read noise in electrons
+readnoise = 4.0
+
+
+def sky_lines(nspec, nlines=40, seed=1):
+    """
+    Return the pixel centers and amplitudes of a set of sky/arc lines.
+    """
+    rstate = np.random.RandomState(seed)
+    centers = np.sort(rstate.uniform(10, nspec-10, size=nlines))
+    amplitudes = 10**rstate.uniform(2., 4., size=nlines)
+    return centers, amplitudes
+
+
+def line_spectrum(pix, centers, amplitudes, fwhm=3.0, continuum=0.):
+    """
+    Evaluate a spectrum of Gaussian lines at the pixel positions `pix`.
+    """
+    sigma = fwhm/2.3548
+    spec = np.full(pix.shape, continuum, dtype=float)
+    for center, amplitude in zip(centers, amplitudes):
+        # Only evaluate pixels near the line
+        near = np.absolute(pix - center) < 8*sigma
+        spec[near] += amplitude*np.exp(-0.5*((pix[near] - center)/sigma)**2)
+    return spec
+
+
+def slit_image(nspec=1024, nspat=64, tilt=0.02, fwhm=3.0, obj_counts=200., seed=1):
+    """
+    Build a single-slit science image with tilted sky lines and one
+    point source.
+
+    Returns:
+        dict: The science image, its noise model and calibrations, with
+        the keys `sciimg`, `ivar`, `skyimg`, `objimg`, `rn2img`,
+        `tilts`, `waveimg`, `spat_img`, `thismask`, `slit_left`,
+        `slit_righ`, `slit_cen`, `trace` and `fwhm`.
+    """
+    rstate = np.random.RandomState(seed)
+    spec = np.arange(nspec, dtype=float)
+    spat_img = np.outer(np.ones(nspec), np.arange(nspat, dtype=float))
+    # Gently curved slit
+    slit_left = 4. + 2.*spec/nspec
+    slit_righ = slit_left + nspat - 10.
+    slit_cen = (slit_left + slit_righ)/2.
+    thismask = (spat_img > slit_left[:,None]) & (spat_img < slit_righ[:,None])
+
+    # Tilted lines
+    piximg = spec[:,None] + tilt*(spat_img - slit_cen[:,None])
+    tilts = piximg/(nspec-1)
+    waveimg = (4000. + 2.*piximg)*thismask
+
+    centers, amplitudes = sky_lines(nspec, seed=seed)
+    skyimg = line_spectrum(piximg, centers, amplitudes, continuum=100.)*thismask
+
+    trace = slit_cen + 3.*np.sin(np.pi*spec/nspec)
+    objimg = obj_counts*np.exp(-0.5*((spat_img - trace[:,None])/(fwhm/2.3548))**2)*thismask
+
+    rn2img = np.full((nspec, nspat), readnoise**2)
+    var = skyimg + objimg + rn2img
+    sciimg = skyimg + objimg + np.sqrt(var)*rstate.normal(size=var.shape)
+    ivar = thismask/var
+
+    return dict(sciimg=sciimg, ivar=ivar, skyimg=skyimg, objimg=objimg, rn2img=rn2img,
+                tilts=tilts, waveimg=waveimg, spat_img=spat_img, thismask=thismask,
+                slit_left=slit_left, slit_righ=slit_righ, slit_cen=slit_cen, trace=trace,
+                fwhm=fwhm)
+
+
+def boxcar_spectrum(slit, box_radius=5.):
+    """
+    Boxcar extract the object in a :func:`slit_image` as the starting
+    point for the profile fit.
+    """
+    img_minsky = slit['sciimg'] - slit['skyimg']
+    mask = slit['thismask'].astype(float)
+    flux = extract.extract_boxcar(img_minsky*mask, slit['trace'], box_radius)
+    var = extract.extract_boxcar(mask/(slit['ivar'] + (slit['ivar'] == 0)), slit['trace'],
+                                 box_radius)
+    wave = extract.extract_boxcar(slit['waveimg'], slit['trace'], box_radius) \
+                / extract.extract_boxcar(mask, slit['trace'], box_radius)
+    return wave, flux, 1./var
+
+
+def specobj(slit):
+    """
+    Build the :class:`pypeit.specobjs.SpecObj` for the object in a
+    :func:`slit_image`.
+    """
+    nspec, nspat = slit['sciimg'].shape
+    sobj = specobjs.SpecObj((nspec, nspat), [slit['slit_left'][nspec//2],
+                                             slit['slit_righ'][nspec//2]],
+                            [0, nspec-1], slitid=0, objtype='science')
+    sobj.trace_spat = slit['trace']
+    sobj.trace_spec = np.arange(nspec)
+    sobj.fwhm = slit['fwhm']
+    return sobj
+
+
+def arc_spectrum(nspec=2048, shift=0., stretch=1., nlines=60, seed=1):
+    """
+    Build an arc spectrum, optionally shifted and stretched.
+    """
+    rstate = np.random.RandomState(seed+100)
+    centers, amplitudes = sky_lines(nspec, nlines=nlines, seed=seed)
+    pix = (np.arange(nspec) - shift)/stretch
+    arc = line_spectrum(pix, centers, amplitudes, continuum=20.)
+    return arc + np.sqrt(arc)*rstate.normal(size=nspec)
+
+
+def trace_image(nspec=2048, nspat=512, ntrace=20, fwhm=3.0, seed=1):
+    """
+    Build an image of `ntrace` curved traces.
+
+    Returns:
+        tuple: The image, its inverse variance, and the true and
+        perturbed trace positions, both with shape (nspec, ntrace).
+    """
+    rstate = np.random.RandomState(seed)
+    spec = np.arange(nspec, dtype=float)
+    x0 = np.linspace(20., nspat-20., ntrace)
+    xtrue = x0[None,:] + 5.*np.sin(np.pi*spec/nspec)[:,None]
+    spat = np.arange(nspat, dtype=float)
+    sigma = fwhm/2.3548
+    image = np.full((nspec, nspat), 10.)
+    for itrace in range(ntrace):
+        image += 1000.*np.exp(-0.5*((spat[None,:] - xtrue[:,itrace,None])/sigma)**2)
+    image += np.sqrt(image)*rstate.normal(size=image.shape)
+    xinit = xtrue + rstate.uniform(-0.5, 0.5, size=xtrue.shape)
+    return image, 1./np.fmax(image, 1.), xtrue, xinit
+
+
+def edge_image(nspec=4096, nspat=2048, nslit=60, nspurious=20000, seed=1):
+    """
+    Build the array of left (-1) and right (+1) slit-edge pixels of a
+    multi-slit mask, as input to :func:`pypeit.core.trace_slits.match_edges`.
+    The edges have gaps and there are many spurious edge pixels.
+    """
+    rstate = np.random.RandomState(seed)
+    edgearr = np.zeros((nspec, nspat), dtype=int)
+    spec = np.arange(nspec)
+    for x0 in np.linspace(20., nspat-50., nslit):
+        for side, dx in zip([-1, 1], [0., 25.]):
+            col = np.round(x0 + dx + 4.*np.sin(np.pi*spec/nspec)).astype(int)
+            keep = rstate.uniform(size=nspec) > 0.1
+            edgearr[spec[keep], col[keep]] = side
+    edgearr[rstate.randint(nspec, size=nspurious), rstate.randint(nspat, size=nspurious)] \
+            = rstate.choice([-1, 1], size=nspurious)
+    return edgearr
+
+
+def slit_flat(nspec=2048, nspat=2048, nslit=100, seed=1):
+    """
+    Build a trace flat of a multi-slit mask with `nslit` curved slits of
+    equal width, spread across the detector.
+    """
+    rstate = np.random.RandomState(seed)
+    spec = np.arange(nspec, dtype=float)[:,None]
+    spat = np.arange(nspat, dtype=float)[None,:]
+    width = (nspat - 30.)/nslit
+    curve = 8.*(spec/nspec - 0.5)**2
+    image = np.zeros((nspec, nspat))
+    for islit in range(nslit):
+        left = 10. + islit*width + curve
+        lo = max(int(10. + islit*width) - 10, 0)
+        hi = min(int(10. + (islit+1)*width) + 10, nspat)
+        image[:,lo:hi] += 1000./(1. + np.exp(-(spat[:,lo:hi] - left)/0.7)) \
+                                / (1. + np.exp((spat[:,lo:hi] - left - width + 4.)/0.7))
+    return image + rstate.normal(0., 10., size=image.shape)
+
+
+def slitmask_corners(nslit=120, length=4.5, width=0.7, seed=1):
+    """
+    Corners, in mm on the mask, of the slits of a DEIMOS-like multi-slit
+    mask, in the order expected by
+    :class:`pypeit.spectrographs.slitmask.SlitMask`.
+    """
+    rstate = np.random.RandomState(seed)
+    x = np.linspace(-350., 350., nslit)
+    y = rstate.uniform(-30., 30., nslit)
+    return np.stack([np.stack([x+length/2, y-width/2], axis=-1),
+                     np.stack([x-length/2, y-width/2], axis=-1),
+                     np.stack([x-length/2, y+width/2], axis=-1),
+                     np.stack([x+length/2, y+width/2], axis=-1)], axis=1)
+
+
+def frame_stack(nframes=5, shape=(1024, 1024), ncosmics=500, seed=1):
+    """
+    Build a stack of bias-like frames with cosmic rays, shaped (nx, ny,
+    nframes) as expected by :func:`pypeit.core.combine.comb_frames`.
+    """
+    rstate = np.random.RandomState(seed)
+    stack = 1000. + 10.*rstate.normal(size=shape + (nframes,))
+    for iframe in range(nframes):
+        stack[...,iframe] += cosmic_rays(shape, ncosmics, rstate)
+    return stack
+
+
+def cosmic_rays(shape, ncosmics, rstate):
+    """
+    Return an image of single-pixel and short-track cosmic rays.
+    """
+    crs = np.zeros(shape)
+    x = rstate.randint(1, shape[0]-2, size=ncosmics)
+    y = rstate.randint(1, shape[1]-2, size=ncosmics)
+    amp = rstate.uniform(500., 5000., size=ncosmics)
+    crs[x, y] += amp
+    # Half of them are short tracks
+    half = ncosmics//2
+    crs[x[:half]+1, y[:half]+1] += amp[:half]/2
+    return crs
+
+
+def science_frame(shape=(1024, 1024), ncosmics=500, seed=1):
+    """
+    Build a sky-dominated science frame with cosmic rays and its
+    variance, as input to :func:`pypeit.core.procimg.lacosmic`.
+    """
+    rstate = np.random.RandomState(seed)
+    centers, amplitudes = sky_lines(shape[0], seed=seed)
+    sky = line_spectrum(np.arange(shape[0], dtype=float), centers, amplitudes/10.,
+                        continuum=200.)
+    frame = np.outer(sky, np.ones(shape[1]))
+    var = frame + readnoise**2
+    frame += np.sqrt(var)*rstate.normal(size=shape) + cosmic_rays(shape, ncosmics, rstate)
+    return frame, var
@@ -0,0 +1,194 @@
+"""
+End-to-end throughput benchmark of PypeIt on a synthetic dataset.
+
+The driver writes a synthetic raw dataset with :mod:`benchmarks.dataset`
+(unless it already exists), runs the setup to type and group the
+frames, and runs :func:`pypeit.pypeit.PypeIt.reduce_all`.  It reports
+the number of frames reduced per hour and the time spent in each step,
+as recorded by :mod:`pypeit.timing`.
+
+Parameters can be changed to compare, e.g., parallel or caching modes::
+
+    python -m benchmarks.throughput shane_kast_blue /tmp/bench --par rdx.qa_mode=off
+    python -m benchmarks.throughput keck_deimos /tmp/bench --dets 3 7
+"""
+import os
+import json
+import time
+import argparse
+
+from collections import OrderedDict
+
+from configobj import ConfigObj
+
+from pypeit import timing
+
+from . import dataset
+
+
+def cfg_lines(spectrograph, dets=None, pars=None):
+    """
+    Configuration lines for the PypeIt file.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        dets (:obj:`list`, optional):
+            Detectors to reduce.
+        pars (:obj:`list`, optional):
+            Parameters to set, each as ``section.key=value`` with
+            nested sections separated by periods, e.g.
+            ``scienceframe.process.sigclip=4.5``.
+
+    Returns:
+        :obj:`list`: The configuration lines.
+    """
+    cfg = ConfigObj()
+    cfg['rdx'] = {'spectrograph': spectrograph}
+    if dets is not None:
+        cfg['rdx']['detnum'] = dets if len(dets) > 1 else dets[0]
+    for par in [] if pars is None else pars:
+        key, value = par.split('=', 1)
+        keys = key.split('.')
+        sect = cfg
+        for k in keys[:-1]:
+            if k not in sect:
+                sect[k] = {}
+            sect = sect[k]
+        sect[keys[-1]] = value
+    return cfg.write()
+
+
+def setup(spectrograph, rawdir, outdir, lines):
+    """
+    Type and group the raw frames and write the PypeIt file.
+
+    Returns:
+        :obj:`str`: The name of the PypeIt file.
+    """
+    from pypeit.pypeitsetup import PypeItSetup
+
+    prefix = dataset.instruments[spectrograph]['prefix']
+    setup_dir = os.path.join(outdir, 'setup_files')
+    ps = PypeItSetup.from_file_root(os.path.join(rawdir, prefix), spectrograph,
+                                    output_path=setup_dir)
+    ps.run(setup_only=True, sort_dir=setup_dir)
+    ps.fitstbl.write_pypeit(os.path.join(outdir, spectrograph), cfg_lines=lines, configs=['A'])
+    return os.path.join(outdir, '{0}_A'.format(spectrograph), '{0}_A.pypeit'.format(spectrograph))
+
+
+def run(spectrograph, outdir, rawdir=None, nscience=None, dets=None, pars=None, verbosity=1):
+    """
+    Reduce a synthetic dataset and measure the throughput.
+
+    Args:
+        spectrograph (:obj:`str`):
+            One of :func:`benchmarks.dataset.valid_spectrographs`.
+        outdir (:obj:`str`):
+            Top-level directory for the reduction.
+        rawdir (:obj:`str`, optional):
+            Directory with the raw frames.  Defaults to ``raw`` in
+            `outdir`.  The dataset is generated if it does not exist.
+        nscience (:obj:`int`, optional):
+            Number of science frames to generate.
+        dets (:obj:`list`, optional):
+            Detectors to illuminate and reduce.
+        pars (:obj:`list`, optional):
+            Parameters to set; see :func:`cfg_lines`.
+        verbosity (:obj:`int`, optional):
+            Verbosity of the reduction.
+
+    Returns:
+        :obj:`OrderedDict`: The throughput report, which is also
+        written to ``throughput.json`` in the reduction directory.
+    """
+    from pypeit import pypeit
+    from pypeit.core import qa
+
+    rawdir = os.path.join(outdir, 'raw') if rawdir is None else rawdir
+    t0 = time.perf_counter()
+    dataset.make_dataset(spectrograph, rawdir, nscience=nscience, dets=dets)
+    t_generate = time.perf_counter() - t0
+
+    pypeit_file = setup(spectrograph, rawdir, outdir, cfg_lines(spectrograph, dets=dets,
+                                                                pars=pars))
+    redux_path = os.path.dirname(pypeit_file)
+    logname = os.path.splitext(pypeit_file)[0] + '.log'
+    t0 = time.perf_counter()
+    pypeIt = pypeit.PypeIt(pypeit_file, verbosity=verbosity, overwrite=True, logname=logname,
+                           redux_path=redux_path)
+    cwd = os.getcwd()
+    try:
+        pypeIt.reduce_all()
+        # As in run_pypeit, wait for the QA plots and write the QA pages;
+        # the pages are written relative to the reduction directory
+        os.chdir(redux_path)
+        pypeIt.build_qa()
+    finally:
+        os.chdir(cwd)
+        # Shut down the QA rendering pool, even if the reduction failed
+        qa.finish_qa()
+    t_reduce = time.perf_counter() - t0
+
+    # Frames reduced, counting each detector of a science or standard
+    # exposure once
+    is_target = pypeIt.fitstbl.find_frames('science') | pypeIt.fitstbl.find_frames('standard')
+    ndet = len(pypeIt.select_detectors(detnum=pypeIt.par['rdx']['detnum'],
+                                       ndet=pypeIt.spectrograph.ndet))
+    nframes = int(is_target.sum())
+
+    report = OrderedDict([('spectrograph', spectrograph),
+                          ('pars', [] if pars is None else pars),
+                          ('nframes', nframes),
+                          ('ndet', ndet),
+                          ('generate', t_generate),
+                          ('wall', t_reduce),
+                          ('frames_per_hour', 3600.*nframes/t_reduce),
+                          ('detector_frames_per_hour', 3600.*nframes*ndet/t_reduce),
+                          ('steps', timing.timer.summary())])
+    with open(os.path.join(redux_path, 'throughput.json'), 'w') as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+def print_report(report):
+    """
+    Print the throughput and the breakdown by step.
+    """
+    print('{0}: {1} frame(s) x {2} detector(s) in {3:.1f}s'.format(
+          report['spectrograph'], report['nframes'], report['ndet'], report['wall']))
+    print('Frames/hour: {0:.1f}  Detector-frames/hour: {1:.1f}'.format(
+          report['frames_per_hour'], report['detector_frames_per_hour']))
+    print('{0:<40s} {1:>6s} {2:>10s} {3:>7s}'.format('Step', 'Calls', 'Wall (s)', '%'))
+    for name, s in report['steps'].items():
+        print('{0:<40s} {1:6d} {2:10.2f} {3:7.1f}'.format(name, s['calls'], s['wall'],
+                                                          100*s['wall']/report['wall']))
+
+
+def parser(options=None):
+    parser = argparse.ArgumentParser(description='Benchmark the throughput of PypeIt on a '
+                                                 'synthetic dataset')
+    parser.add_argument('spectrograph', type=str,
+                        help='One of: {0}'.format(', '.join(dataset.valid_spectrographs())))
+    parser.add_argument('outdir', type=str, help='Top-level directory for the reduction')
+    parser.add_argument('--rawdir', type=str, default=None,
+                        help='Directory with the raw frames; default is <outdir>/raw')
+    parser.add_argument('--nscience', type=int, default=None, help='Number of science frames')
+    parser.add_argument('--dets', type=int, nargs='+', default=None,
+                        help='Detectors to reduce (default all)')
+    parser.add_argument('--par', type=str, action='append', default=None,
+                        help='Parameter to set as section.key=value, e.g. rdx.qa_mode=off; '
+                             'can be repeated')
+    parser.add_argument('-v', '--verbosity', type=int, default=1,
+                        help='Verbosity level between 0 and 2')
+    return parser.parse_args() if options is None else parser.parse_args(options)
+
+
+def main(args):
+    report = run(args.spectrograph, args.outdir, rawdir=args.rawdir, nscience=args.nscience,
+                 dets=args.dets, pars=args.par, verbosity=args.verbosity)
+    print_report(report)
+
+
+if __name__ == '__main__':
+    main(parser())
@@ -86,6 +86,9 @@ class BitMask:
             List of bit descriptions
         max_value (int):
             The maximum valid bitmask value given the number of bits.
+        flag_values (dict):
+            Lookup table with the combined bit value of each set of
+            flags used so far; see :func:`flag_value`.
     """
     prefix = 'BIT'
     def __init__(self, keys, descr=None):
@@ -117,7 +120,8 @@ class BitMask:
         self.bits = { k:i for i,k in enumerate(_keys) }
         self.max_value = (1 << self.nbits)-1
         self.descr = _descr
-        
+        self.flag_values = {}
+
     def _prep_flags(self, flag):
         """Prep the flags for use."""
         # Flags must be a numpy array
@@ -133,6 +137,50 @@ class BitMask:
 #            raise TypeError('Provided bit names must be strings!')
         return _flag
 
+    def flag_value(self, flag=None):
+        """
+        Return the integer with the bits of all the provided flags
+        turned on.
+
+        The values are kept in :attr:`flag_values` so that the flag
+        names are only checked and combined the first time a set of
+        flags is used.
+
+        Args:
+            flag (str, array-like, optional):
+                One or more bit names.  If None, all bits are used.
+
+        Returns:
+            int: The combined bit value.
+
+        Raises:
+            ValueError:
+                Raised if any flag is NULL or not one of the bit names.
+        """
+        key = flag if flag is None or isinstance(flag, str) \
+                    else tuple(numpy.atleast_1d(flag).ravel())
+        try:
+            return self.flag_values[key]
+        except KeyError:
+            pass
+        _flag = self._prep_flags(flag)
+        out = 0
+        for f in _flag:
+            out |= (1 << self.bits[f])
+        self.flag_values[key] = out
+        return out
+
+    @staticmethod
+    def _value_as(value, flag_value):
+        """
+        Return the flag value with the integer type of `value`, if it is
+        an array, so that bitwise operations with it keep the type of
+        the mask array.
+        """
+        if isinstance(value, numpy.ndarray) and numpy.issubdtype(value.dtype, numpy.integer):
+            return numpy.array(flag_value, dtype=numpy.uint64).astype(value.dtype)
+        return flag_value
+
     @staticmethod
     def _fill_sequence(keys, vals, descr=None):
         r"""
@@ -227,19 +275,27 @@ class BitMask:
             asuint=False because of issue astropy.io.fits has writing
             int8 values.
         """
-        if self.nbits < 8:
-            return numpy.uint8 if asuint else numpy.int16
+        if asuint:
+            # The top bit is available for unsigned types
+            if self.nbits <= 8:
+                return numpy.uint8
+            if self.nbits <= 16:
+                return numpy.uint16
+            if self.nbits <= 32:
+                return numpy.uint32
+            return numpy.uint64
         if self.nbits < 16:
-            return numpy.uint16 if asuint else numpy.int16
+            return numpy.int16
         if self.nbits < 32:
-            return numpy.uint32 if asuint else numpy.int32
-        return numpy.uint64 if asuint else numpy.int64
+            return numpy.int32
+        return numpy.int64
 
     def flagged(self, value, flag=None):
         """
         Determine if a bit is on in the provided bitmask value.  The
         function can be used to determine if any individual bit is on or
-        any one of many bits is on.
+        any one of many bits is on.  The latter is done with a single
+        bitwise operation using the combined value of the flags.
 
         Args:
             value (int, array-like):
@@ -260,16 +316,7 @@ class BitMask:
             TypeError: Raised if the provided *flag* does not contain
                 one or more strings.
         """
-        _flag = self._prep_flags(flag)
-
-        out = value & (1 << self.bits[_flag[0]]) != 0
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (value & (1 << self.bits[_flag[i]]) != 0)
-        return out
+        return value & self._value_as(value, self.flag_value(flag)) != 0
 
     def flagged_bits(self, value):
         """
@@ -326,16 +373,7 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value ^ (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out ^= (1 << self.bits[_flag[i]])
-        return out
+        return value ^ self._value_as(value, self.flag_value(flag))
 
     def turn_on(self, value, flag):
         """
@@ -358,16 +396,7 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value | (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (1 << self.bits[_flag[i]])
-        return out
+        return value | self._value_as(value, self.flag_value(flag))
 
     def turn_off(self, value, flag):
         """
@@ -390,24 +419,78 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
+        return value & ~self._value_as(value, self.flag_value(flag))
+
+    def turn_on_inplace(self, value, flag, where=None):
+        """
+        Turn on bits in a bitmask array in place.
 
-        out = value & ~(1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
+        This is equivalent to ``value[where] = self.turn_on(value[where],
+        flag)``, but no copies of the selected elements are made.
 
-        nn = len(_flag)
-        for i in range(1,nn):
-            out &= ~(1 << self.bits[_flag[i]])
-        return out
+        Args:
+            value (numpy.ndarray):
+                Integer bitmask array.  Modified in place.
+            flag (list, numpy.ndarray, or str):
+                Bit name(s) to turn on.
+            where (numpy.ndarray, optional):
+                Boolean array selecting the elements to change.  If
+                None, all elements are changed.
+
+        Returns:
+            numpy.ndarray: The modified `value` array.
+
+        Raises:
+            ValueError:
+                Raised if `flag` is None.
+            TypeError:
+                Raised if `value` is not an integer array.
+        """
+        if flag is None:
+            raise ValueError('Provided bit name cannot be None.')
+        if not isinstance(value, numpy.ndarray) or not numpy.issubdtype(value.dtype, numpy.integer):
+            raise TypeError('Bits can only be turned on in place in an integer array.')
+        return numpy.bitwise_or(value, self._value_as(value, self.flag_value(flag)), out=value,
+                                where=True if where is None else where)
+
+    def turn_off_inplace(self, value, flag, where=None):
+        """
+        Turn off bits in a bitmask array in place.
+
+        This is equivalent to ``value[where] = self.turn_off(value[where],
+        flag)``, but no copies of the selected elements are made.
+
+        Args:
+            value (numpy.ndarray):
+                Integer bitmask array.  Modified in place.
+            flag (list, numpy.ndarray, or str):
+                Bit name(s) to turn off.
+            where (numpy.ndarray, optional):
+                Boolean array selecting the elements to change.  If
+                None, all elements are changed.
+
+        Returns:
+            numpy.ndarray: The modified `value` array.
+
+        Raises:
+            ValueError:
+                Raised if `flag` is None.
+            TypeError:
+                Raised if `value` is not an integer array.
+        """
+        if flag is None:
+            raise ValueError('Provided bit name cannot be None.')
+        if not isinstance(value, numpy.ndarray) or not numpy.issubdtype(value.dtype, numpy.integer):
+            raise TypeError('Bits can only be turned off in place in an integer array.')
+        return numpy.bitwise_and(value, ~self._value_as(value, self.flag_value(flag)), out=value,
+                                 where=True if where is None else where)
 
     def consolidate(self, value, flag_set, consolidated_flag):
         """
         Consolidate a set of flags into a single flag.
         """
-        indx = self.flagged(value, flag=flag_set)
-        value[indx] = self.turn_on(value[indx], consolidated_flag)
-        return value
+        return self.turn_on_inplace(value, consolidated_flag,
+                                    where=self.flagged(value, flag=flag_set))
 
     def unpack(self, value, flag=None):
         """
@@ -11,9 +11,9 @@ from abc import ABCMeta
 
 from astropy.io import fits
 from astropy.table import Table
-import IPython
 
 from pypeit import msgs
+from pypeit import timing
 from pypeit import masterframe
 from pypeit import arcimage
 from pypeit import biasframe
@@ -26,7 +26,6 @@ from pypeit import waveimage
 
 from pypeit.metadata import PypeItMetaData
 
-from pypeit.core import procimg
 from pypeit.core import parse
 from pypeit.core import trace_slits
 
@@ -265,6 +264,7 @@ class Calibrations(object):
         # Initialize the master key dict for this science/standard frame
         self.master_key_dict['frame'] = self.fitstbl.master_key(frame, det=det)
 
+    @timing.timed()
     def get_arc(self):
         """
         Load or generate the Arc image
@@ -314,6 +314,7 @@ class Calibrations(object):
         self._update_cache('arc', 'arc', self.msarc)
         return self.msarc
 
+    @timing.timed()
     def get_bias(self):
         """
         Load or generate the bias frame/command
@@ -362,6 +363,7 @@ class Calibrations(object):
         self._update_cache('bias', 'bias', self.msbias)
         return self.msbias
 
+    @timing.timed()
     def get_bpm(self):
         """
         Load or generate the bad pixel mask
@@ -390,12 +392,12 @@ class Calibrations(object):
 
         # Build the data-section image
         sci_image_file = self.fitstbl.frame_paths(self.frame)
-        dsec_img = self.spectrograph.get_datasec_img(sci_image_file, det=self.det)
+        dsec_img = self.spectrograph.get_datasec_img(sci_image_file, det=self.det, trim=True)
 
         # Instantiate the shape here, based on the shape of the science
         # image. This is the shape of most calibrations, although we are
         # allowing for arcs of different shape because of X-shooter etc.
-        self.shape = procimg.trim_frame(dsec_img, dsec_img < 1).shape
+        self.shape = dsec_img.shape
 
         # Build it
         self.msbpm = self.spectrograph.bpm(shape=self.shape, filename=sci_image_file, det=self.det)
@@ -405,6 +407,7 @@ class Calibrations(object):
         # Return
         return self.msbpm
 
+    @timing.timed()
     def get_flats(self):
         """
         Load or generate a normalized pixel flat and slit illumination
@@ -552,6 +555,7 @@ class Calibrations(object):
 
     # TODO: if write_qa need to provide qa_path!
     # TODO: why do we allow redo here?
+    @timing.timed()
     def get_slits(self, redo=False, write_qa=True):
         """
         Load or generate the definition of the slit boundaries.
@@ -647,6 +651,7 @@ class Calibrations(object):
         self._update_cache('trace', 'trace', self.tslits_dict)
         return self.tslits_dict
 
+    @timing.timed()
     def get_wave(self):
         """
         Load or generate a wavelength image
@@ -699,6 +704,7 @@ class Calibrations(object):
         self._update_cache('arc', 'wave', self.mswave)
         return self.mswave
 
+    @timing.timed()
     def get_wv_calib(self):
         """
         Load or generate the 1D wavelength calibrations
@@ -768,6 +774,7 @@ class Calibrations(object):
         # Return
         return self.wv_calib
 
+    @timing.timed()
     def get_tilts(self):
         """
         Load or generate the tilts image
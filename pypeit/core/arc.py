@@ -1,8 +1,6 @@
 import inspect
 
 import numpy as np
-from matplotlib import gridspec
-from matplotlib import pyplot as plt
 
 
 import scipy
@@ -59,6 +57,7 @@ def fit2darc(all_wv,all_pix,all_orders,nspec, nspec_coeff=4,norder_coeff=4,sigre
 
     if debug:
         # set some plotting parameters
+        from matplotlib import pyplot as plt
         utils.pyplot_rcparams()
         plt.figure(figsize=(7,5))
         msgs.info("Plot identified lines")
@@ -75,10 +74,10 @@ def fit2darc(all_wv,all_pix,all_orders,nspec, nspec_coeff=4,norder_coeff=4,sigre
 
     # Fit the product of wavelength and order number with a 2d legendre polynomial
     all_wv_order = all_wv * all_orders
-    fitmask, coeff2 = utils.robust_polyfit_djs(all_pix/xnspecmin1, all_wv_order, (nspec_coeff, norder_coeff),x2=all_orders,
-                                               function=func2d, maxiter=100, lower=sigrej, upper=sigrej,
-                                               minx=min_spec,maxx=max_spec, minx2=min_order, maxx2=max_order,
-                                               use_mad=True, sticky=False)
+    fitmask, coeff2 = utils.robust_polyfit2d(all_pix/xnspecmin1, all_orders, all_wv_order,
+                                             (nspec_coeff, norder_coeff), function=func2d, maxiter=100,
+                                             lower=sigrej, upper=sigrej, minx=min_spec, maxx=max_spec,
+                                             minx2=min_order, maxx2=max_order, use_mad=True)
     wv_order_mod = utils.func_val(coeff2, all_pix/xnspecmin1, func2d, x2=all_orders,
                                                minx=min_spec, maxx=max_spec, minx2=min_order, maxx2=max_order)
     resid = (wv_order_mod[fitmask]-all_wv_order[fitmask])
@@ -116,6 +115,7 @@ def fit2darc_global_qa(fit_dict, outfile=None):
     Returns
     -------
     """
+    from matplotlib import pyplot as plt
 
     msgs.info("Creating QA for 2D wavelength solution")
 
@@ -142,6 +142,10 @@ def fit2darc_global_qa(fit_dict, outfile=None):
     # Define pixels array
     spec_vec_norm = np.arange(nspec)/xnorm
 
+    # Evaluate the solution for all orders
+    wv_order_grid = utils.func_val_grid(coeffs, spec_vec_norm, orders, func2d, minx=min_spec,
+                                        maxx=max_spec, minx2=min_order, maxx2=max_order)
+
     # Define figure properties
     plt.figure(figsize=(8, 5))
 
@@ -150,7 +154,7 @@ def fit2darc_global_qa(fit_dict, outfile=None):
     mx = 0.
 
     # Loop over orders
-    for ii in orders:
+    for iord, ii in enumerate(orders):
 
         # define the color
         rr = (ii - np.max(orders)) / (np.min(orders) - np.max(orders))
@@ -158,8 +162,7 @@ def fit2darc_global_qa(fit_dict, outfile=None):
         bb = (ii - np.min(orders)) / (np.max(orders) - np.min(orders))
 
         # evaluate solution
-        wv_order_mod = utils.func_val(coeffs, spec_vec_norm, func2d, x2=np.ones_like(spec_vec_norm)*ii,
-                                               minx=min_spec, maxx=max_spec, minx2=min_order, maxx2=max_order)
+        wv_order_mod = wv_order_grid[:,iord]
         # Plot solution
         plt.plot(wv_order_mod / ii, spec_vec_norm*xnorm, color=(rr, gg, bb),
                  linestyle='-', linewidth=2.5)
@@ -218,6 +221,8 @@ def fit2darc_orders_qa(fit_dict, outfile=None):
     Returns
     -------
     """
+    from matplotlib import pyplot as plt
+    from matplotlib import gridspec
 
     msgs.info("Creating QA for 2D wavelength solution")
 
@@ -245,6 +250,10 @@ def fit2darc_orders_qa(fit_dict, outfile=None):
     # Define pixels array
     spec_vec_norm = np.arange(nspec)/xnorm
 
+    # Evaluate the solution for all orders
+    wv_order_grid = utils.func_val_grid(coeffs, spec_vec_norm, orders, func2d, minx=min_spec,
+                                        maxx=max_spec, minx2=min_order, maxx2=max_order)
+
     # set the size of the plot
     nrow = np.int(2)
     ncol = np.int(np.ceil(len(orders) / 2.))
@@ -272,8 +281,7 @@ def fit2darc_orders_qa(fit_dict, outfile=None):
 
                 # Evaluate function
                 # evaluate solution
-                wv_order_mod = utils.func_val(coeffs, spec_vec_norm, func2d, x2=ii*np.ones_like(spec_vec_norm),
-                                              minx=min_spec, maxx=max_spec, minx2=min_order, maxx2=max_order)
+                wv_order_mod = wv_order_grid[:,ii_row * ncol + ii_col]
                 # Evaluate delta lambda
                 dwl = (wv_order_mod[-1] - wv_order_mod[0])/ii/xnorm/(spec_vec_norm[-1] - spec_vec_norm[0])
 
@@ -667,6 +675,7 @@ def detect_peaks(x, mph=None, mpd=1, threshold=0, edge='rising',
 
 def _plot(x, mph, mpd, threshold, edge, valley, ax, ind):
     """Plot results of the detect_peaks function, see its help."""
+    from matplotlib import pyplot as plt
 
 
     if ax is None:
@@ -777,6 +786,7 @@ def iter_continuum(spec, inmask=None, fwhm=4.0, sigthresh = 2.0, sigrej=3.0, nit
             cont_now = np.interp(spec_vec,spec_vec[cont_mask],cont_med)
 
         if debug & (iter == (niter_cont-1)):
+            from matplotlib import pyplot as plt
             plt.plot(spec_vec, spec,'k', label='Spectrum')
             #plt.plot(spec_vec, spec*cont_mask,'k', label='Spectrum*cont_mask')
             plt.plot(spec_vec, cont_now,'g',label='continuum')
@@ -947,6 +957,7 @@ def detect_lines(censpec, sigdetect=5.0, fwhm=4.0, fit_frac_fwhm=1.25, input_thr
             good = good[ikeep]
 
     if debug:
+        from matplotlib import pyplot as plt
         plt.figure(figsize=(14, 6))
         plt.plot(xrng, arc, color='black', drawstyle = 'steps-mid', lw=3, label = 'arc', linewidth = 1.0)
         plt.plot(tcent[np.invert(good)], tampl[np.invert(good)],'r+', markersize =6.0, label = 'bad peaks')
@@ -992,36 +1003,40 @@ def fit_arcspec(xarray, yarray, pixt, fitp):
     widt   = -1.0*np.ones(sz_p, dtype=np.float)
     centerr = -1.0*np.ones(sz_p, dtype=np.float)
 
-    for p in range(sz_p):
-        # This interval is always symmetric about the peak
-        pmin = pixt[p] - fit_interval
-        pmax = pixt[p] + fit_interval + 1
-        if pmin < 0:
-            pmin = 0
-        if pmax > sz_a:
-            pmax = sz_a
-        if pmin == pmax:
-            continue
-        if (pmax - pmin) < (fit_interval):
-            continue # Probably won't be a good solution
-#       JFH Removed below
-#       if pixt[p]-pmin <= 1 or pmax-pixt[p] <= 1:
-#            continue  # Probably won't be a good solution
-        # Fit the gaussian
-        try:
-            popt, pcov = utils.func_fit(xarray[pmin:pmax], yarray[pmin:pmax], "gaussian", 3, return_errors=True)
+    # The interval is always symmetric about the peak, unless it falls
+    # off the end of the spectrum
+    pmin = np.clip(pixt - fit_interval, 0, None)
+    pmax = np.clip(pixt + fit_interval + 1, None, sz_a)
+    # Skip short intervals; probably won't be a good solution
+    usable = (pmax > pmin) & ((pmax - pmin) >= fit_interval)
+
+    # Fit the gaussians, all peaks with the same number of pixels at once
+    npix = pmax - pmin
+    for n in np.unique(npix[usable]):
+        indx = np.where(usable & (npix == n))[0]
+        pix = pmin[indx,None] + np.arange(n)[None,:]
+        popt, pcov, success = utils.gauss_lsqfit_batch(xarray[pix], yarray[pix])
+        # Only keep the batched fits of resolved peaks within the fit
+        # interval.  For the other peaks (e.g. very narrow lines), the
+        # result depends on the path of the minimization, so they are
+        # refit one at a time with func_fit
+        sigma = np.absolute(popt[:,2])
+        success &= (popt[:,1] > xarray[pix[:,0]]) & (popt[:,1] < xarray[pix[:,-1]]) \
+                        & (sigma > 0.5) & (sigma < n)
+        ampl[indx[success]] = popt[success,0]
+        cent[indx[success]] = popt[success,1]
+        widt[indx[success]] = popt[success,2]
+        centerr[indx[success]] = pcov[success,1,1]
+        for p in indx[np.invert(success)]:
+            try:
+                popt, pcov = utils.func_fit(xarray[pmin[p]:pmax[p]], yarray[pmin[p]:pmax[p]],
+                                            "gaussian", 3, return_errors=True)
+            except RuntimeError:
+                continue
             ampl[p] = popt[0]
             cent[p] = popt[1]
             widt[p] = popt[2]
             centerr[p] = pcov[1, 1]
-            #popt, pcov = utils.func_fit(xarray[pmin:pmax], yarray[pmin:pmax], "gaussian", 4, return_errors=True)
-            #b[p]    = popt[0]
-            #ampl[p] = popt[1]
-            #cent[p] = popt[2]
-            #widt[p] = popt[3]
-            #centerr[p] = pcov[2, 2]
-        except RuntimeError:
-            pass
     return ampl, cent, widt, centerr
 
 
@@ -4,20 +4,14 @@ import numpy as np
 from numpy.ma.core import MaskedArray
 import scipy
 
-from matplotlib import pyplot as plt
-from matplotlib import gridspec
-from matplotlib.backends.backend_pdf import PdfPages
-
 from astropy.io import fits
 from astropy import units, constants, stats, convolution
 c_kms = constants.c.to('km/s').value
 
-from linetools.spectra.xspectrum1d import XSpectrum1D
-from linetools.spectra.utils import collate
-
 from pypeit import msgs
 from pypeit.core import load
 from pypeit.core import flux
+from pypeit.core import qa
 from pypeit import utils
 from pypeit.core.wavecal import wvutils
 from pypeit import debugger
@@ -32,19 +26,6 @@ from pkg_resources import resource_filename
     # QA
     # Should we get rid of masked array?
 
-## Plotting parameters
-plt.rcdefaults()
-plt.rcParams['font.family'] = 'times new roman'
-plt.rcParams["xtick.top"] = True
-plt.rcParams["ytick.right"] = True
-plt.rcParams["xtick.minor.visible"] = True
-plt.rcParams["ytick.minor.visible"] = True
-plt.rcParams["ytick.direction"] = 'in'
-plt.rcParams["xtick.direction"] = 'in'
-plt.rcParams["xtick.labelsize"] = 17
-plt.rcParams["ytick.labelsize"] = 17
-plt.rcParams["axes.labelsize"] = 17
-
 def new_wave_grid(waves, wave_method='iref', iref=0, wave_grid_min=None, wave_grid_max=None,
                   A_pix=None, v_pix=None, **kwargs):
     """ Create a new wavelength grid for the
@@ -281,28 +262,48 @@ def sn_weights(flux, sig, mask, wave, dv_smooth=10000.0, const_weights=False, de
     else:
         if verbose:
             msgs.info("Using wavelength dependent weights for coadding")
-        weights = np.ones_like(flux_stack) #((fluxes.shape[0], fluxes.shape[1]))
-        spec_vec = np.arange(nspec)
-        for ispec in range(nstack):
-            imask = mask_stack[ispec,:]
-            wave_now = wave_stack[ispec, imask]
-            spec_now = spec_vec[imask]
-            dwave = (wave_now - np.roll(wave_now,1))[1:]
-            dv = (dwave/wave_now[1:])*c_kms
-            dv_pix = np.median(dv)
-            med_width = int(np.round(dv_smooth/dv_pix))
-            sn_med1 = scipy.ndimage.filters.median_filter(sn_val[ispec,imask]**2, size=med_width, mode='reflect')
-            sn_med2 = np.interp(spec_vec, spec_now, sn_med1)
-            #sn_med2 = np.interp(wave_stack[ispec,:], wave_now,sn_med1)
-            sig_res = np.fmax(med_width/10.0, 3.0)
-            gauss_kernel = convolution.Gaussian1DKernel(sig_res)
-            sn_conv = convolution.convolve(sn_med2, gauss_kernel)
-            weights[ispec,:] = sn_conv
+        weights = smooth_sn_weights(sn_val, mask_stack, wave_stack, dv_smooth=dv_smooth)
 
         # Finish
         return rms_sn, weights
 
 
+def smooth_sn_weights(sn_val, mask, wave, dv_smooth=10000.0):
+    """ Wavelength-dependent (S/N)^2 weights of a stack of spectra
+
+    The (S/N)^2 of the good pixels of each spectrum is smoothed with a
+    running median of width ``dv_smooth``, interpolated over the
+    masked pixels and convolved with a Gaussian.
+
+    Args:
+        sn_val (ndarray): S/N of each pixel, shape (nexp, nspec).
+        mask (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        wave (ndarray): Wavelengths, shape (nexp, nspec).
+        dv_smooth (float, optional): Velocity smoothing (km/s).
+
+    Returns:
+        ndarray: The weights, shape (nexp, nspec).
+    """
+    nstack, nspec = sn_val.shape
+    weights = np.ones_like(sn_val)
+    spec_vec = np.arange(nspec)
+    for ispec in range(nstack):
+        imask = mask[ispec,:]
+        wave_now = wave[ispec, imask]
+        spec_now = spec_vec[imask]
+        dwave = (wave_now - np.roll(wave_now,1))[1:]
+        dv = (dwave/wave_now[1:])*c_kms
+        dv_pix = np.median(dv)
+        med_width = int(np.round(dv_smooth/dv_pix))
+        sn_med1 = scipy.ndimage.filters.median_filter(sn_val[ispec,imask]**2, size=med_width, mode='reflect')
+        sn_med2 = np.interp(spec_vec, spec_now, sn_med1)
+        sig_res = np.fmax(med_width/10.0, 3.0)
+        gauss_kernel = convolution.Gaussian1DKernel(sig_res)
+        weights[ispec,:] = convolution.convolve(sn_med2, gauss_kernel)
+    return weights
+
+
 def grow_mask(initial_mask, n_grow=1):
     """ Grows sigma-clipped mask by n_grow pixels on each side
 
@@ -714,6 +715,7 @@ def one_d_coadd(spectra, smask, weights, debug=False, **kwargs):
     coadd : XSpectrum1D
 
     """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
     # Setup
     fluxes, sigs, wave = unpack_spec(spectra)
     variances = (sigs > 0.) * sigs**2
@@ -764,6 +766,7 @@ def load_spec(files, iextensions=None, extract='OPT', flux=True):
     spectra : XSpectrum1D
       -- All spectra are collated in this one object
     """
+    from linetools.spectra.utils import collate
     # Extensions
     if iextensions is None:
         msgs.warn("Extensions not provided.  Assuming first extension for all")
@@ -1053,7 +1056,10 @@ def coadd_spectra(spectra, wave_grid_method='concatenate', niter=5,
     # QA
     if qafile is not None:
         msgs.info("Writing QA file: {:s}".format(qafile))
-        coaddspec_qa(spectra, rspec, rmask, spec1d, qafile=qafile,debug=debug)
+        if debug:
+            coaddspec_qa(spectra, rspec, rmask, spec1d, qafile=qafile, debug=debug)
+        else:
+            qa.render_qa(coaddspec_qa, spectra, rspec, rmask, spec1d, qafile=qafile)
 
     # Scale the flux??
     if flux_scale is not None:
@@ -1092,6 +1098,21 @@ def coaddspec_qa(ispectra, rspec, rmask, spec1d, qafile=None, yscale=8.,debug=Fa
       Scale median flux by this parameter for the spectral plot
 
     """
+    from matplotlib import pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    # Plotting parameters
+    plt.rcdefaults()
+    plt.rcParams['font.family'] = 'times new roman'
+    plt.rcParams["xtick.top"] = True
+    plt.rcParams["ytick.right"] = True
+    plt.rcParams["xtick.minor.visible"] = True
+    plt.rcParams["ytick.minor.visible"] = True
+    plt.rcParams["ytick.direction"] = 'in'
+    plt.rcParams["xtick.direction"] = 'in'
+    plt.rcParams["xtick.labelsize"] = 17
+    plt.rcParams["ytick.labelsize"] = 17
+    plt.rcParams["axes.labelsize"] = 17
 
     plt.figure(figsize=(12,6))
     ax1 = plt.axes([0.07, 0.13, 0.6, 0.4])
@@ -1174,6 +1195,545 @@ def coaddspec_qa(ispectra, rspec, rmask, spec1d, qafile=None, yscale=8.,debug=Fa
     return
 
 
+### Array-based coadd engine
+#   These routines operate on plain (nexp, npix) arrays of the
+#   exposures and avoid the XSpectrum1D machinery above, which
+#   loops over the exposures at nearly every step.
+
+def _interp_rows(xnew, x, y, gpm):
+    """ Linearly interpolate every row of a stack of tabulated functions
+
+    All rows are interpolated with a single call to np.interp by
+    offsetting each row along the abscissa so that the rows do not
+    overlap.  Like np.interp, values beyond the tabulated range of a
+    row are set to the first/last good value of that row.
+
+    Args:
+        xnew (ndarray): Abscissa at which to evaluate the functions;
+            shape (nnew,) for a common abscissa or (nrow, nnew).
+        x (ndarray): Abscissa of the tabulated functions, shape (nrow,
+            n).  The good values in each row must be monotonically
+            increasing.
+        y (ndarray): Ordinate of the tabulated functions, shape (nrow,
+            n).
+        gpm (ndarray): Good-pixel mask for the tabulated values,
+            shape (nrow, n).  True = Good.
+
+    Returns:
+        ndarray: Interpolated values with shape (nrow, nnew).  Rows
+        without any good values are set to 0.
+    """
+    nrow = x.shape[0]
+    xnew = np.broadcast_to(xnew, (nrow, np.shape(xnew)[-1]))
+    has_data = np.any(gpm, axis=1)
+    xmin = np.where(has_data, np.amin(np.where(gpm, x, np.inf), axis=1), 0.)
+    xmax = np.where(has_data, np.amax(np.where(gpm, x, -np.inf), axis=1), 0.)
+    # Offset each row beyond the end of the previous one
+    offset = np.arange(nrow)*(np.amax(xmax-xmin) + 1.) - xmin
+    xs = (x + offset[:,None])[gpm]
+    q = np.clip(xnew, xmin[:,None], xmax[:,None]) + offset[:,None]
+    if xs.size == 0:
+        return np.zeros(q.shape, dtype=float)
+    out = np.interp(q.ravel(), xs, y[gpm]).reshape(q.shape)
+    out[np.invert(has_data),:] = 0.
+    return out
+
+
+def _grow_mask_stack(bpm, n_grow=1):
+    """ Grow the bad pixels of each row of a stack by n_grow pixels on each side
+
+    Args:
+        bpm (ndarray): Bad-pixel mask, shape (nexp, npix).  True = Bad.
+        n_grow (int, optional): Number of pixels to grow by.
+
+    Returns:
+        ndarray: The grown bad-pixel mask.
+    """
+    if n_grow <= 0 or not np.any(bpm):
+        return bpm
+    return scipy.ndimage.binary_dilation(bpm, structure=np.ones((1, 2*n_grow+1), dtype=bool))
+
+
+def rebin_arrays(waves, fluxes, sigs, new_wave):
+    """ Flux-conserving rebinning of a stack of spectra onto a common wavelength grid
+
+    This is the array analog of XSpectrum1D.rebin(..., all=True,
+    do_sig=True, grow_bad_sig=True), performed for all exposures at
+    once.  Cumulative sums of flux and variance are interpolated at
+    the edges of the new pixels and differenced.  New pixels that
+    overlap a rejected input pixel or that are not fully covered by
+    an input spectrum are returned with sig = 0.
+
+    Args:
+        waves (ndarray): Wavelengths of the input spectra, shape (nexp,
+            npix).  Values <= 1 are treated as padding.
+        fluxes (ndarray): Fluxes, shape (nexp, npix).
+        sigs (ndarray): 1-sigma errors, shape (nexp, npix).  Values <=
+            0 flag rejected pixels.
+        new_wave (ndarray): New wavelength grid, shape (nnew,).
+
+    Returns:
+        tuple: Rebinned fluxes and sigs, each with shape (nexp, nnew).
+    """
+    waves = np.atleast_2d(np.asarray(waves, dtype=float))
+    fluxes = np.atleast_2d(np.asarray(fluxes, dtype=float))
+    sigs = np.atleast_2d(np.asarray(sigs, dtype=float))
+    new_wave = np.asarray(new_wave, dtype=float)
+    nexp = waves.shape[0]
+
+    # Edges of the input pixels; padded pixels are excluded and the
+    # half-width is mirrored at the ends of each spectrum
+    wgpm = waves > 1.0
+    prev_ok = np.zeros_like(wgpm)
+    prev_ok[:,1:] = wgpm[:,:-1]
+    next_ok = np.zeros_like(wgpm)
+    next_ok[:,:-1] = wgpm[:,1:]
+    mid = (waves[:,1:] + waves[:,:-1])/2.
+    left = np.full_like(waves, np.nan)
+    left[:,1:] = mid
+    right = np.full_like(waves, np.nan)
+    right[:,:-1] = mid
+    left = np.where(prev_ok, left, np.nan)
+    right = np.where(next_ok, right, np.nan)
+    left = np.where(prev_ok, left, 2*waves - right)
+    right = np.where(next_ok, right, 2*waves - left)
+    wgpm &= np.isfinite(left) & np.isfinite(right)
+    dwv = np.where(wgpm, right - left, 0.)
+
+    # Rejected pixels
+    bpm = np.invert(wgpm) | np.invert(np.isfinite(fluxes)) | np.invert(np.isfinite(sigs)) \
+            | (sigs <= 0.) | (np.abs(np.nan_to_num(fluxes)) > 1e30)
+    flux_dwv = np.where(bpm, 0., fluxes)*dwv
+    var_dwv = np.where(bpm, 0., sigs**2)*dwv
+    bad_dwv = (bpm & wgpm)*dwv
+
+    # Cumulative sums tabulated at the right edge of each pixel, plus
+    # the left edge of the first good pixel
+    has_data = np.any(wgpm, axis=1)
+    first = np.argmax(wgpm, axis=1)
+    last = wgpm.shape[1] - 1 - np.argmax(wgpm[:,::-1], axis=1)
+    rows = np.arange(nexp)
+    wv_min = left[rows,first]
+    wv_max = right[rows,last]
+    knot_x = np.concatenate([wv_min[:,None], right], axis=1)
+    knot_gpm = np.concatenate([has_data[:,None], wgpm], axis=1)
+    zero = np.zeros((nexp,1), dtype=float)
+    cumflux = np.concatenate([zero, np.cumsum(flux_dwv, axis=1)], axis=1)
+    cumvar = np.concatenate([zero, np.cumsum(var_dwv, axis=1)], axis=1)
+    cumbad = np.concatenate([zero, np.cumsum(bad_dwv, axis=1)], axis=1)
+
+    # Edges of the new pixels
+    nnew = new_wave.size
+    bwv = np.empty(nnew+1, dtype=float)
+    bwv[0] = new_wave[0] - (new_wave[1] - new_wave[0])/2.
+    bwv[1:-1] = (new_wave[1:] + new_wave[:-1])/2.
+    bwv[-1] = new_wave[-1] + (new_wave[-1] - new_wave[-2])/2.
+    new_dwv = np.diff(bwv)
+
+    # Interpolate and difference
+    new_flux = np.diff(_interp_rows(bwv, knot_x, cumflux, knot_gpm), axis=1)/new_dwv[None,:]
+    new_var = np.diff(_interp_rows(bwv, knot_x, cumvar, knot_gpm), axis=1)/new_dwv[None,:]
+    new_bad = np.diff(_interp_rows(bwv, knot_x, cumbad, knot_gpm), axis=1) > 1e-6*new_dwv[None,:]
+    # Preserve S/N (crudely), as done by linetools
+    med_dwv = np.ma.median(np.ma.array(dwv, mask=np.invert(wgpm)), axis=1).filled(1.)
+    new_var *= (med_dwv/np.median(new_dwv))[:,None]
+
+    # Only trust the new pixels fully covered by each spectrum
+    covered = (bwv[None,:-1] >= wv_min[:,None]) & (bwv[None,1:] <= wv_max[:,None]) & has_data[:,None]
+    gpm = covered & np.invert(new_bad) & (new_var > 0.)
+    new_sig = np.zeros_like(new_var)
+    new_sig[gpm] = np.sqrt(new_var[gpm])
+    new_flux[np.invert(covered)] = 0.
+    return new_flux, new_sig
+
+
+def sn_weights_stack(fluxes, sigs, masks, wave, dv_smooth=10000.0, const_weights=False, verbose=False):
+    """ Calculate the S/N and the (S/N)^2 weights for a registered stack of spectra
+
+    Batched version of :func:`sn_weights` for spectra that share the
+    wavelength grid ``wave``.  The S/N of all exposures is measured at
+    once; the smoothly varying weights are the same as those of
+    :func:`sn_weights` (see :func:`smooth_sn_weights`).
+
+    Args:
+        fluxes (ndarray): Fluxes, shape (nexp, nspec).
+        sigs (ndarray): 1-sigma errors, shape (nexp, nspec).
+        masks (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        wave (ndarray): Common wavelength grid, shape (nspec,).
+        dv_smooth (float, optional): Velocity smoothing (km/s) used
+            for the wavelength-dependent weights.
+        const_weights (bool, optional): Use constant weights.
+        verbose (bool, optional): Report the weighting scheme adopted.
+
+    Returns:
+        tuple: Root mean square S/N of each spectrum, shape (nexp,),
+        and the weights, shape (nexp, nspec).
+    """
+    nexp, nspec = fluxes.shape
+    ivar = utils.calc_ivar(sigs**2)
+    sn_val = fluxes*np.sqrt(ivar)
+    sn_sigclip = stats.sigma_clip(np.ma.array(sn_val, mask=np.invert(masks)), sigma=3, maxiters=5)
+    sn2 = sn_sigclip.mean(axis=1).filled(0.)**2
+    rms_sn = np.sqrt(sn2)
+    rms_sn_stack = np.sqrt(np.mean(sn2))
+
+    if rms_sn_stack <= 3.0 or const_weights:
+        if verbose:
+            msgs.info("Using constant weights for coadding, RMS S/N = {:g}".format(rms_sn_stack))
+        return rms_sn, np.outer(sn2, np.ones(nspec))
+
+    if verbose:
+        msgs.info("Using wavelength dependent weights for coadding")
+    weights = smooth_sn_weights(sn_val, masks, np.broadcast_to(wave, (nexp, nspec)),
+                                dv_smooth=dv_smooth)
+    return rms_sn, weights
+
+
+def scale_stack(fluxes, sigs, masks, rms_sn, iref=0, scale_method='auto', hand_scale=None,
+                SN_MAX_MEDSCALE=2., SN_MIN_MEDSCALE=0.5, nsig=3., niter=5, **kwargs):
+    """ Scale a registered stack of spectra to the reference exposure
+
+    Array analog of :func:`scale_spectra`.  The median flux ratios
+    to the reference spectrum are measured for all exposures at once.
+    The fluxes and sigs are modified in place.
+
+    Args:
+        fluxes (ndarray): Fluxes, shape (nexp, nspec).
+        sigs (ndarray): 1-sigma errors, shape (nexp, nspec).
+        masks (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        rms_sn (ndarray): RMS S/N of each exposure; see
+            :func:`sn_weights_stack`.
+        iref (int, optional): Index of the reference spectrum.
+        scale_method (str, optional): 'auto', 'hand', 'median' or
+            'poly'; see :func:`scale_spectra`.
+        hand_scale (list, optional): Scale factors for 'hand', one per
+            spectrum.
+        SN_MAX_MEDSCALE (float, optional): Maximum RMS S/N allowed to
+            automatically apply median scaling.
+        SN_MIN_MEDSCALE (float, optional): Minimum RMS S/N allowed to
+            automatically apply median scaling.
+        nsig (float, optional): Clipping threshold for the median
+            ratio.
+        niter (int, optional): Number of clipping iterations.
+
+    Returns:
+        tuple: The scale factors applied, shape (nexp,), and the method
+        adopted ('hand', 'median_flux' or 'none_SN').
+    """
+    if scale_method not in ['auto', 'hand', 'median', 'poly']:
+        msgs.error("Scale method not recognized! Check documentation for available options")
+    nexp = fluxes.shape[0]
+    rms_sn_stack = np.sqrt(np.mean(rms_sn**2))
+
+    if scale_method == 'hand':
+        if hand_scale is None:
+            msgs.error("Need to provide hand_scale parameter, one value per spectrum")
+        scales = np.asarray(hand_scale, dtype=float)
+        omethod = 'hand'
+    elif ((rms_sn_stack <= SN_MAX_MEDSCALE) and (rms_sn_stack > SN_MIN_MEDSCALE)) \
+            or scale_method == 'median' or rms_sn_stack > SN_MAX_MEDSCALE or scale_method == 'poly':
+        if rms_sn_stack > SN_MAX_MEDSCALE and scale_method != 'median':
+            msgs.work("Should be using poly here, not median")
+        omethod = 'median_flux'
+        # Median ratio (reference to spectrum)
+        ok = masks & masks[iref,:][None,:] & (fluxes > 0.) & (fluxes[iref,:][None,:] > 0.)
+        ratio = np.ma.array(fluxes[iref,:][None,:]/np.where(ok, fluxes, 1.), mask=np.invert(ok))
+        _, med_scale, _ = stats.sigma_clipped_stats(ratio, sigma=nsig, maxiters=niter, axis=1)
+        scales = np.minimum(np.ma.filled(med_scale, 1.), 10.0)
+        scales[iref] = 1.
+    else:
+        return np.ones(nexp, dtype=float), 'none_SN'
+
+    fluxes *= scales[:,None]
+    sigs *= scales[:,None]
+    return scales, omethod
+
+
+def clean_cr_stack(fluxes, sigs, masks, n_grow_mask=1, cr_nsig=7., **kwargs):
+    """ Sigma-clip a registered stack of spectra to remove obvious CRs
+
+    Array analog of :func:`clean_cr`; the good-pixel mask is modified
+    in place.  With three or more exposures each spectrum is compared
+    to the median spectrum, looking for single- and dual-pixel
+    events.  With two exposures the difference of the spectra is
+    clipped (the 'diff' algorithm of :func:`clean_cr`).
+
+    Args:
+        fluxes (ndarray): Fluxes, shape (nexp, nspec).
+        sigs (ndarray): 1-sigma errors, shape (nexp, nspec).
+        masks (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        n_grow_mask (int, optional): Number of pixels to grow each
+            rejected pixel by on each side.
+        cr_nsig (float, optional): Rejection threshold in sigma.
+    """
+    nexp = fluxes.shape[0]
+    if nexp == 2:
+        msgs.info("Only 2 exposures.  Using custom procedure")
+        diff = fluxes[0,:] - fluxes[1,:]
+        med, mad = utils.robust_meanstd(diff)
+        crs = np.array([diff - med, med - diff]) > cr_nsig*mad
+    else:
+        # Median of the masked array -- Best for 3 or more spectra
+        refflux = np.ma.median(np.ma.array(fluxes, mask=np.invert(masks)), axis=0).filled(0.)
+        ivar = np.zeros_like(sigs)
+        gds = masks & (sigs > 0.)
+        ivar[gds] = 1./sigs[gds]**2
+        # Single pixel events
+        chi2 = (fluxes - refflux[None,:])**2 * ivar
+        crs = (ivar > 0.0) & (chi2 > cr_nsig**2)
+        # Dual pixels [CRs usually affect 2 (or more) pixels]
+        crs |= (ivar > 0.0) & (chi2 + np.roll(chi2, 1, axis=1) > 2*cr_nsig**2)
+    crs = _grow_mask_stack(crs, n_grow=n_grow_mask)
+    masks &= np.invert(crs)
+    msgs.info("Rejecting {:d} CR pixels in {:d} exposures".format(np.sum(crs), nexp))
+
+
+def one_d_coadd_stack(fluxes, sigs, masks, weights):
+    """ Weighted coadd of a registered stack of spectra
+
+    Array analog of :func:`one_d_coadd`.
+
+    Args:
+        fluxes (ndarray): Fluxes, shape (nexp, nspec).
+        sigs (ndarray): 1-sigma errors, shape (nexp, nspec).
+        masks (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        weights (ndarray): Weights, shape (nexp, nspec).
+
+    Returns:
+        tuple: Coadded flux and 1-sigma error, each with shape (nspec,).
+        Pixels without any good data are set to 0.
+    """
+    mweights = np.where(masks, weights, 0.)
+    sum_weights = np.sum(mweights, axis=0)
+    norm = sum_weights + (sum_weights == 0.0)
+    new_flux = np.sum(mweights*fluxes, axis=0) / norm
+    var = np.where(sigs > 0., sigs**2, 0.)
+    new_var = np.sum(mweights**2*var, axis=0) / norm**2
+    return new_flux, np.sqrt(new_var)
+
+
+def get_std_dev_stack(fluxes, sigs, masks, new_flux, new_sig, wave, s2n_min=2., wvmnx=None, **kwargs):
+    """ Standard deviation of the stack of spectra relative to their coadd
+
+    Array analog of :func:`get_std_dev`.
+
+    Args:
+        fluxes (ndarray): Fluxes, shape (nexp, nspec).
+        sigs (ndarray): 1-sigma errors, shape (nexp, nspec).
+        masks (ndarray): Good-pixel mask, shape (nexp, nspec).  True =
+            Good.
+        new_flux (ndarray): Coadded flux, shape (nspec,).
+        new_sig (ndarray): Coadded 1-sigma error, shape (nspec,).
+        wave (ndarray): Common wavelength grid, shape (nspec,).
+        s2n_min (float, optional): Minimum S/N for calculating
+            std_dev.
+        wvmnx (tuple, optional): Limit analysis to a wavelength
+            interval.
+
+    Returns:
+        tuple: Standard deviation in good pixels and the deviates
+        relative to sigma (None if there are no good pixels).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmask = masks & np.invert(fluxes/sigs < s2n_min)
+    if wvmnx is not None:
+        msgs.info("Restricting std_dev calculation to wavelengths {}".format(wvmnx))
+        cmask &= ((wave >= wvmnx[0]) & (wave <= wvmnx[1]))[None,:]
+    # Only calculate on regions with 2 or more spectra
+    gdp = (np.sum(cmask, axis=0) > 1) & (new_sig > 0.)
+    if not np.any(gdp):
+        msgs.warn("No pixels satisfying s2n_min in std_dev")
+        return 1., None
+    dev_sig = (fluxes[:,gdp] - new_flux[gdp]) / np.sqrt(sigs[:,gdp]**2 + new_sig[gdp]**2)
+    std_dev = np.std(stats.sigma_clip(dev_sig, sigma=5, maxiters=2))
+    return std_dev, dev_sig
+
+
+def load_spec_arrays(files, iextensions=None, extract='OPT', flux=True):
+    """ Load a list of 1D spectra into (nexp, npix) arrays
+
+    Array analog of :func:`load_spec`.  Spectra with fewer pixels are
+    padded with zeros.
+
+    Args:
+        files (list): List of spec1d filenames.
+        iextensions (int, list, optional): Extension of the object in
+            each file, or one extension for all files.
+        extract (str, optional): Extraction method ('OPT', 'BOX').
+        flux (bool, optional): Load the fluxed spectra?
+
+    Returns:
+        tuple: waves, fluxes and sigs, each with shape (nexp, npix).
+    """
+    if iextensions is None:
+        msgs.warn("Extensions not provided.  Assuming first extension for all")
+        extensions = np.ones(len(files), dtype=int)
+    elif isinstance(iextensions, int):
+        extensions = np.full(len(files), iextensions, dtype=int)
+    else:
+        extensions = np.array(iextensions)
+    extract = extract.upper()
+    flux_tag = '{:s}_FLAM'.format(extract) if flux else '{:s}_COUNTS'.format(extract)
+
+    spec_list = []
+    for ii, fname in enumerate(files):
+        msgs.info("Loading extension {:d} of spectrum {:s}".format(extensions[ii], fname))
+        with fits.open(fname) as hdulist:
+            data = hdulist[extensions[ii]].data
+            # Use the WAVE_GRID (for 2d coadds) if it exists, otherwise use WAVE
+            wave_tag = '{:s}_WAVE_GRID'.format(extract)
+            if wave_tag not in data.names:
+                wave_tag = '{:s}_WAVE'.format(extract)
+            spec_list.append((np.asarray(data[wave_tag], dtype=float),
+                              np.asarray(data[flux_tag], dtype=float),
+                              np.asarray(data[flux_tag+'_SIG'], dtype=float)))
+
+    npix = np.amax([len(spec[0]) for spec in spec_list])
+    waves, fluxes, sigs = np.zeros((3, len(spec_list), npix), dtype=float)
+    for ii, (wave, iflux, sig) in enumerate(spec_list):
+        waves[ii,:wave.size] = wave
+        fluxes[ii,:wave.size] = iflux
+        sigs[ii,:wave.size] = sig
+    # Deal with NAN, inf, and *very* large values
+    bad_flux = np.invert(np.isfinite(fluxes)) | np.invert(np.isfinite(sigs)) \
+                    | (np.abs(np.nan_to_num(fluxes)) > 1e30) | (np.nan_to_num(sigs)**2 > 1e10)
+    if np.any(bad_flux):
+        msgs.warn("There are some bad flux values in the spectra.  Will zero them out and mask them")
+        fluxes[bad_flux] = 0.
+        sigs[bad_flux] = 0.
+    return waves, fluxes, sigs
+
+
+def coadd_spectra_arrays(waves, fluxes, sigs, wave_grid_method='concatenate', niter=5,
+                         flux_scale=None, scale_method='auto', sigrej_final=3., do_var_corr=True,
+                         qafile=None, outfile=None, do_cr=True, debug=False, **kwargs):
+    """ Coadd a set of 1D spectra held in plain arrays
+
+    Array analog of :func:`coadd_spectra`: the spectra are rebinned
+    onto a common grid, weighted by their S/N, scaled, cleaned of CRs
+    and combined with iterative rejection, with each step performed
+    for all exposures at once.
+
+    Args:
+        waves (ndarray): Wavelengths of the input spectra, shape (nexp,
+            npix).  Values <= 1 are treated as padding.
+        fluxes (ndarray): Fluxes, shape (nexp, npix).
+        sigs (ndarray): 1-sigma errors, shape (nexp, npix).
+        wave_grid_method (str, optional): Method used to construct the
+            output grid; see :func:`new_wave_grid`.
+        niter (int, optional): Maximum number of rejection iterations.
+        flux_scale (dict, optional): Use input info to scale the final
+            spectrum to a photometric magnitude.
+        scale_method (str, optional): See :func:`scale_stack`.
+        sigrej_final (float, optional): Rejection threshold.
+        do_var_corr (bool, optional): Correct the input variances by
+            the measured standard deviation.
+        qafile (str, optional): Name of the QA file to write.
+        outfile (str, optional): Name of the output file.
+        do_cr (bool, optional): Clean CRs before the coadd.
+        debug (bool, optional): Show the QA plot.
+        **kwargs: Passed to :func:`new_wave_grid`,
+            :func:`scale_stack`, :func:`clean_cr_stack` and
+            :func:`get_std_dev_stack`.
+
+    Returns:
+        tuple: The wavelength grid, coadded flux and coadded 1-sigma
+        error, each with shape (nspec,).
+    """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
+    if niter <= 0:
+        msgs.error('Not prepared for zero iterations')
+    waves = np.atleast_2d(waves)
+
+    # Final wavelength array
+    new_wave = new_wave_grid(np.ma.array(waves, mask=waves <= 1.0), wave_method=wave_grid_method,
+                             **kwargs)
+    new_wave = np.asarray(new_wave, dtype=float)
+
+    # Rebin
+    rfluxes, rsigs = rebin_arrays(waves, fluxes, sigs, new_wave)
+    # Define mask -- THIS IS THE ONLY ONE TO USE
+    rmask = rsigs > 0.
+
+    # S/N**2, weights
+    rms_sn, weights = sn_weights_stack(rfluxes, rsigs, rmask, new_wave)
+    # Scale (modifies rfluxes, rsigs in place)
+    scales, omethod = scale_stack(rfluxes, rsigs, rmask, rms_sn, scale_method=scale_method, **kwargs)
+    msgs.info("Scaled the spectra using method: {:s}".format(omethod))
+    # Clean bad CR :: Should be run *after* scaling
+    if do_cr and rfluxes.shape[0] > 1:
+        clean_cr_stack(rfluxes, rsigs, rmask, **kwargs)
+
+    # Initial coadd
+    new_flux, new_sig = one_d_coadd_stack(rfluxes, rsigs, rmask, weights)
+
+    iters = 0
+    std_dev = 0.
+    gauss_prob = 1.0 - 2.0*(1.-scipy.stats.norm.cdf(1.))
+    # Cap S/N ratio at SN_MAX to prevent overly aggressive rejection
+    SN_MAX = 20.0
+    while np.absolute(std_dev - 1.) >= 0.1 and iters < niter:
+        iters += 1
+        msgs.info("Iterating on coadding... iter={:d}".format(iters))
+        # Update the noise model for all exposures
+        var_tot = (new_sig**2)[None,:] + utils.calc_ivar(utils.calc_ivar(rsigs**2))
+        ivar_real = utils.calc_ivar(var_tot)
+        # Conservatively always take the largest variance of the smoothed noise
+        var_final = np.maximum(scipy.ndimage.median_filter(var_tot, size=(1,5), mode='reflect'),
+                               scipy.ndimage.median_filter(var_tot, size=(1,99), mode='reflect'))
+        ivar_cap = np.minimum(utils.calc_ivar(var_final),
+                              ((SN_MAX/(new_flux + (new_flux <= 0.0)))**2)[None,:])
+        # Adjust the rejection to the statistics of the distribution of
+        # errors: chi^2 at 1-sigma of the good pixels, excluding extreme
+        # 6-sigma outliers
+        chi2 = (rfluxes - new_flux[None,:])**2 * ivar_real
+        goodchi = rmask & (ivar_real > 0.0) & (chi2 <= 36.0)
+        ngd = np.sum(goodchi, axis=1)
+        goodchi[ngd == 0,:] = True
+        chi2_srt = np.sort(np.where(goodchi, chi2, np.inf), axis=1)
+        sigind = np.round(gauss_prob*ngd).astype(int)
+        chi2_sigrej = np.take_along_axis(chi2_srt, sigind[:,None], axis=1)[:,0]
+        sigrej_eff = sigrej_final*np.clip(np.sqrt(chi2_sigrej), 1.0, 5.0)
+        chi2_cap = (rfluxes - new_flux[None,:])**2 * ivar_cap
+        chi_mask = (chi2_cap > (sigrej_eff**2)[:,None]) & rmask
+        msgs.info("Rejecting {:d} pixels in {:d} exposures".format(np.sum(chi_mask), rfluxes.shape[0]))
+        rmask &= np.invert(chi_mask)
+
+        # Coadd anew
+        new_flux, new_sig = one_d_coadd_stack(rfluxes, rsigs, rmask, weights)
+        std_dev, _ = get_std_dev_stack(rfluxes, rsigs, rmask, new_flux, new_sig, new_wave, **kwargs)
+        msgs.info("New standard deviation: {:g}".format(std_dev))
+        if do_var_corr:
+            msgs.info("Correcting variance")
+            rsigs *= np.sqrt(std_dev)
+            new_flux, new_sig = one_d_coadd_stack(rfluxes, rsigs, rmask, weights)
+
+    if qafile is not None or outfile is not None or flux_scale is not None:
+        spec1d = XSpectrum1D.from_tuple((new_wave*units.AA, new_flux, new_sig), masking='none')
+    # QA
+    if qafile is not None:
+        msgs.info("Writing QA file: {:s}".format(qafile))
+        rspec = XSpectrum1D(np.tile(new_wave, (rfluxes.shape[0],1))*units.AA, rfluxes, rsigs,
+                            masking='none')
+        if debug:
+            coaddspec_qa(None, rspec, rmask, spec1d, qafile=qafile, debug=debug)
+        else:
+            qa.render_qa(coaddspec_qa, None, rspec, rmask, spec1d, qafile=qafile)
+    # Scale the flux??
+    if flux_scale is not None:
+        spec1d, _ = flux.scale_in_filter(spec1d, flux_scale)
+        new_flux = spec1d.flux.value
+        new_sig = spec1d.sig.value
+    # Write to disk?
+    if outfile is not None:
+        write_to_disk(spec1d, outfile)
+    return new_wave, new_flux, new_sig
+
+
 ### Start Echelle functionality
 
 def spec_from_array(wave,flux,sig,**kwargs):
@@ -1186,6 +1746,7 @@ def spec_from_array(wave,flux,sig,**kwargs):
         The units for sig and co are taken from flux.
     Return spectrum from arrays of wave, flux and sigma
     """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
 
     # Get rid of 0 wavelength
     good_wave = (wave>1.0*units.AA)
@@ -1219,6 +1780,8 @@ def order_phot_scale(spectra, phot_scale_dicts, nsig=3.0, niter=5, debug=False):
       Show QA plot if debug=True
     Return a new scaled XSpectrum1D spectra
     '''
+    from linetools.spectra.utils import collate
+    from matplotlib import pyplot as plt
 
     from pypeit.core.flux import scale_in_filter
 
@@ -1329,6 +1892,7 @@ def order_median_scale(wave, wave_mask, fluxes_in, ivar_in, sigrej=3.0, niter=5,
     Return:
         No return, but the spectra is already scaled after executing this function.
     '''
+    from matplotlib import pyplot as plt
 
     fluxes_out = np.zeros_like(fluxes_in)
     ivar_out = np.zeros_like(ivar_in)
@@ -1421,6 +1985,7 @@ def merge_order(spectra, wave_grid, extract='OPT', orderscale='median', niter=5,
     returns:
         spec1d: XSpectrum1D after order merging.
     """
+    from matplotlib import pyplot as plt
 
     ## Scaling different orders
     if orderscale == 'photometry':
@@ -1556,6 +2121,7 @@ def ech_coadd(files,objids=None,extract='OPT',flux=True,giantcoadd=False,ordersc
     returns:
         spec1d: coadded XSpectrum1D
     """
+    from linetools.spectra.utils import collate
 
     nfile = len(files)
 
@@ -5,6 +5,10 @@ Module for performing two-dimensional coaddition of spectra.
 
 """
 import os
+import functools
+import threading
+from collections import OrderedDict
+from concurrent import futures
 
 import numpy as np
 import scipy
@@ -134,7 +138,7 @@ def det_error_msg(exten, sdet):
                " Maybe you chose the wrong detector to coadd? "
                "Set with --det= or check file contents with pypeit_show_2dspec Science/spec2d_XXX --list".format(sdet))
 
-def load_coadd2d_stacks(spec2d_files, det):
+def load_coadd2d_stacks(spec2d_files, det, memmap=False):
     """
 
     Args:
@@ -142,10 +146,21 @@ def load_coadd2d_stacks(spec2d_files, det):
            List of spec2d filenames
         det: int
            detector in question
+        memmap: bool, default = False
+           Do not read the images into full (nimgs, nspec, nspat)
+           stacks.  Instead, the spec2d and master extensions are
+           memory-mapped and only the cut-outs around each slit are
+           read when they are coadded (see :func:`get_slit_stacks`).
+           Tile-compressed spec2d images cannot be memory mapped; they
+           are decompressed each time a cut-out is read.
 
     Returns:
         stack_dict: dict
            Dictionary containing all the images and keys required for perfomring 2d coadds.
+           If memmap is True, the image stacks are None and the
+           'hdu_stacks' item holds the lists of memory-mapped HDUs.
+           Their files are kept open, in the 'hdulists' item, until
+           :func:`close_coadd2d_stacks` is called.
 
     """
 
@@ -182,12 +197,13 @@ def load_coadd2d_stacks(spec2d_files, det):
 
     specobjs_list = []
     head1d_list=[]
+    hdu_stacks = dict(sciimg=[], sciivar=[], skymodel=[], mask=[], tilts=[], waveimg=[]) \
+                        if memmap else None
+    hdulists = []
     # TODO Sort this out with the correct detector extensions etc.
     # Read in the image stacks
     for ifile in range(nfiles):
-        waveimg = WaveImage.load_from_file(waveimgfiles[ifile])
-        tilts = WaveTilts.load_from_file(tiltfiles[ifile])
-        hdu = fits.open(spec2d_files[ifile])
+        hdu = fits.open(spec2d_files[ifile], memmap=memmap)
         # One detector, sky sub for now
         names = [hdu[i].name for i in range(len(hdu))]
         # science image
@@ -195,25 +211,55 @@ def load_coadd2d_stacks(spec2d_files, det):
             exten = names.index('DET{:s}-PROCESSED'.format(sdet))
         except:  # Backwards compatability
             det_error_msg(exten, sdet)
-        sciimg = hdu[exten].data
+        sciimg_hdu = hdu[exten]
         # skymodel
         try:
             exten = names.index('DET{:s}-SKY'.format(sdet))
         except:  # Backwards compatability
             det_error_msg(exten, sdet)
-        skymodel = hdu[exten].data
+        skymodel_hdu = hdu[exten]
         # Inverse variance model
         try:
             exten = names.index('DET{:s}-IVARMODEL'.format(sdet))
         except ValueError:  # Backwards compatability
             det_error_msg(exten, sdet)
-        sciivar = hdu[exten].data
+        sciivar_hdu = hdu[exten]
         # Mask
         try:
             exten = names.index('DET{:s}-MASK'.format(sdet))
         except ValueError:  # Backwards compatability
             det_error_msg(exten, sdet)
-        mask = hdu[exten].data
+        mask_hdu = hdu[exten]
+
+        sobjs, head = load.load_specobjs(spec1d_files[ifile])
+        head1d_list.append(head)
+        specobjs_list.append(sobjs)
+
+        if memmap:
+            # Keep the memory-mapped extensions; the data are only
+            # read slit by slit
+            hdu_stacks['sciimg'].append(sciimg_hdu)
+            hdu_stacks['skymodel'].append(skymodel_hdu)
+            hdu_stacks['sciivar'].append(sciivar_hdu)
+            hdu_stacks['mask'].append(mask_hdu)
+            wave_hdul = fits.open(waveimgfiles[ifile], memmap=True)
+            tilts_hdul = fits.open(tiltfiles[ifile], memmap=True)
+            hdu_stacks['waveimg'].append(wave_hdul['WAVE'])
+            hdu_stacks['tilts'].append(tilts_hdul['TILTS'])
+            hdulists += [hdu, wave_hdul, tilts_hdul]
+            continue
+
+        sciimg = sciimg_hdu.data
+        skymodel = skymodel_hdu.data
+        sciivar = sciivar_hdu.data
+        mask = mask_hdu.data
+        hdu.close()
+        waveimg = WaveImage.load_from_file(waveimgfiles[ifile])
+        tilts = WaveTilts.load_from_file(tiltfiles[ifile])
+        # NOTE: The spec2d images may have been written in single
+        # precision and/or tile compressed (see
+        # pypeit.core.save.save_2d_images); the stacks below are always
+        # double precision.
         if ifile == 0:
             # the two shapes accomodate the possibility that waveimg and tilts are binned differently
             shape_wave = (nfiles,waveimg.shape[0],waveimg.shape[1])
@@ -232,9 +278,9 @@ def load_coadd2d_stacks(spec2d_files, det):
         mask_stack[ifile,:,:] = mask
         skymodel_stack[ifile,:,:] = skymodel
 
-        sobjs, head = load.load_specobjs(spec1d_files[ifile])
-        head1d_list.append(head)
-        specobjs_list.append(sobjs)
+    if memmap:
+        sciimg_stack = sciivar_stack = skymodel_stack = mask_stack = tilts_stack \
+                = waveimg_stack = None
 
     # Right now we assume there is a single tslits_dict for all images and read in the first one
     # TODO this needs to become a tslits_dict for each file to accomodate slits defined by flats taken on different
@@ -242,7 +288,7 @@ def load_coadd2d_stacks(spec2d_files, det):
     tslits_dict, _ = TraceSlits.load_from_file(tracefiles[0])
     spectrograph = util.load_spectrograph(tslits_dict['spectrograph'])
     slitmask = pixels.tslits2mask(tslits_dict)
-    slitmask_stack = np.einsum('i,jk->ijk', np.ones(nfiles), slitmask)
+    slitmask_stack = None if memmap else np.einsum('i,jk->ijk', np.ones(nfiles), slitmask)
 
     # Fill the master key dict
     head2d = head2d_list[0]
@@ -254,7 +300,8 @@ def load_coadd2d_stacks(spec2d_files, det):
     master_key_dict['trace'] = head2d['TRACMKEY']  + '_{:02d}'.format(det)
     master_key_dict['flat']  = head2d['FLATMKEY']  + '_{:02d}'.format(det)
     stack_dict = dict(specobjs_list=specobjs_list, tslits_dict=tslits_dict,
-                      slitmask_stack=slitmask_stack,
+                      slitmask=slitmask, slitmask_stack=slitmask_stack, hdu_stacks=hdu_stacks,
+                      hdulists=hdulists,
                       sciimg_stack=sciimg_stack, sciivar_stack=sciivar_stack,
                       skymodel_stack=skymodel_stack, mask_stack=mask_stack,
                       tilts_stack=tilts_stack, waveimg_stack=waveimg_stack,
@@ -268,6 +315,102 @@ def load_coadd2d_stacks(spec2d_files, det):
 
 
 
+def close_coadd2d_stacks(stack_dict):
+    """
+    Close the files kept open by :func:`load_coadd2d_stacks` with
+    memmap=True.
+
+    Args:
+        stack_dict (dict):
+            Dictionary returned by :func:`load_coadd2d_stacks`.
+    """
+    for hdul in stack_dict.get('hdulists', []):
+        hdul.close()
+    stack_dict['hdulists'] = []
+
+
+# Serializes the first access of the data of an image extension, which
+# maps the file, and the decompression of tile-compressed images in
+# read_cutout
+_cutout_lock = threading.Lock()
+
+
+def read_cutout(hdu, spec_slice, spat_slice):
+    """
+    Read a cut-out of an image extension as a double precision array.
+
+    For memory-mapped extensions only the requested section is read.
+    Tile-compressed extensions have to be decompressed in full; the
+    decompressed image is released again after the cut-out is copied.
+
+    Args:
+        hdu (`astropy.io.fits.ImageHDU`_, `astropy.io.fits.CompImageHDU`_):
+            Image extension.
+        spec_slice (slice):
+            Spectral (first axis) extent of the cut-out.
+        spat_slice (slice):
+            Spatial (second axis) extent of the cut-out.
+
+    Returns:
+        `numpy.ndarray`_: The cut-out.
+    """
+    # Slits may be read concurrently (see extract_coadd2d)
+    if not isinstance(hdu, fits.CompImageHDU):
+        # The data are loaded lazily on their first access
+        with _cutout_lock:
+            data = hdu.data
+        return np.array(data[spec_slice, spat_slice], dtype=float)
+    with _cutout_lock:
+        cutout = np.array(hdu.data[spec_slice, spat_slice], dtype=float)
+        del hdu.data
+    return cutout
+
+
+def get_slit_stacks(stack_dict, islit):
+    """
+    Construct the image stacks of the bounding box of a single slit.
+
+    The 2d coadd of a slit only depends on the pixels on the slit, so
+    the stacks passed to :func:`coadd2d` only need to cover the
+    rectangle enclosing the slit.  For stacks loaded with memmap=True
+    (see :func:`load_coadd2d_stacks`) the cut-outs are read directly
+    from the memory-mapped files, such that the memory needed scales
+    with the size of the slit instead of the size of the detector.
+
+    Args:
+        stack_dict (dict):
+            Dictionary returned by :func:`load_coadd2d_stacks`.
+        islit (int):
+            Slit to cut out.
+
+    Returns:
+        tuple: The spectral and spatial slices of the cut-out on the
+        detector, and a dictionary with the sciimg_stack,
+        sciivar_stack, skymodel_stack, mask_stack, tilts_stack,
+        waveimg_stack and thismask_stack cut-outs, each with shape
+        (nimgs, nspec_slit, nspat_slit).
+    """
+    thismask = stack_dict['slitmask'] == islit
+    spec_indx = np.where(np.any(thismask, axis=1))[0]
+    spat_indx = np.where(np.any(thismask, axis=0))[0]
+    if spec_indx.size == 0:
+        msgs.error('Slit {:d} does not cover any pixels on the detector'.format(islit))
+    spec_slice = slice(spec_indx[0], spec_indx[-1]+1)
+    spat_slice = slice(spat_indx[0], spat_indx[-1]+1)
+
+    slit_stacks = {}
+    for key in ['sciimg', 'sciivar', 'skymodel', 'mask', 'tilts', 'waveimg']:
+        if stack_dict['hdu_stacks'] is None:
+            slit_stacks[key+'_stack'] = stack_dict[key+'_stack'][:,spec_slice,spat_slice]
+        else:
+            slit_stacks[key+'_stack'] = np.stack([read_cutout(hdu, spec_slice, spat_slice)
+                                                  for hdu in stack_dict['hdu_stacks'][key]])
+    nimgs = slit_stacks['sciimg_stack'].shape[0]
+    slit_stacks['thismask_stack'] = np.broadcast_to(thismask[spec_slice,spat_slice],
+                                                    (nimgs,) + thismask[spec_slice,spat_slice].shape)
+    return spec_slice, spat_slice, slit_stacks
+
+
 def get_wave_ind(wave_grid, wave_min, wave_max):
     """
     Utility routine used by coadd2d to determine the starting and ending indices of a wavelength grid.
@@ -661,8 +804,47 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
 
     return sci_list_out, var_list_out, norm_rebin_stack.astype(int), nsmp_rebin_stack.astype(int)
 
+def coadd_slit(stack_dict, islit, objid, wave_grid):
+    """
+    Perform the 2d coadd of a single slit.
+
+    Args:
+        stack_dict (dict):
+            Dictionary returned by :func:`load_coadd2d_stacks`.
+        islit (int):
+            Slit to coadd.
+        objid (`numpy.ndarray`_):
+            The objid of the brightest object in each exposure, used to
+            determine the weights (see :func:`get_brightest_obj`).
+        wave_grid (`numpy.ndarray`_):
+            Wavelength grid onto which the slit is rectified.
+
+    Returns:
+        dict: The rectified and coadded images of the slit; see
+        :func:`coadd2d`.
+    """
+    nslits = stack_dict['tslits_dict']['slit_left'].shape[1]
+    msgs.info('Performing 2d coadd for slit: {:d}/{:d}'.format(islit,nslits-1))
+    # Determine the wavelength dependent optimal weights and grab the reference trace
+    rms_sn, weights, trace_stack, wave_stack = optimal_weights(stack_dict['specobjs_list'],
+                                                               islit, objid)
+    # Only the cut-out enclosing the slit enters the coadd; shift
+    # the traces and weights to the cut-out
+    spec_slice, spat_slice, slit_stacks = get_slit_stacks(stack_dict, islit)
+    trace_stack = trace_stack[:,spec_slice] - spat_slice.start
+    if weights.ndim == 2:
+        weights = weights[:,spec_slice]
+
+    # Perform the 2d coadd
+    return coadd2d(trace_stack, slit_stacks['sciimg_stack'], slit_stacks['sciivar_stack'],
+                   slit_stacks['skymodel_stack'], slit_stacks['mask_stack'] == 0,
+                   slit_stacks['tilts_stack'], slit_stacks['waveimg_stack'],
+                   slit_stacks['thismask_stack'], weights=weights, wave_grid=wave_grid)
+
+
 # TODO Break up into separate methods?
-def extract_coadd2d(stack_dict, master_dir, samp_fact = 1.0,ir_redux=False, par=None, std=False, show=False, show_peaks=False):
+def extract_coadd2d(stack_dict, master_dir, samp_fact = 1.0,ir_redux=False, par=None, std=False, show=False, show_peaks=False,
+                    nproc=1):
     """
     Main routine to run the extraction for 2d coadds.
 
@@ -683,6 +865,8 @@ def extract_coadd2d(stack_dict, master_dir, samp_fact = 1.0,ir_redux=False, par=
         par:
         show:
         show_peaks:
+        nproc: int, default = 1
+           Number of threads used to coadd the slits concurrently.
 
     Returns:
 
@@ -701,28 +885,16 @@ def extract_coadd2d(stack_dict, master_dir, samp_fact = 1.0,ir_redux=False, par=
     wave_grid = spectrograph.wavegrid(binning=binning,samp_fact=samp_fact)
     wave_grid_mid = spectrograph.wavegrid(midpoint=True,binning=binning,samp_fact=samp_fact)
 
-    coadd_list = []
-    nspec_vec = np.zeros(nslits,dtype=int)
-    nspat_vec = np.zeros(nslits,dtype=int)
-
-    # TODO: Generalize this to be a loop over detectors, such tha the
-    # coadd_list is an ordered dict (perhaps) with all the slits on all
-    # detectors
-    for islit in range(nslits):
-        msgs.info('Performing 2d coadd for slit: {:d}/{:d}'.format(islit,nslits-1))
-        # Determine the wavelength dependent optimal weights and grab the reference trace
-        rms_sn, weights, trace_stack, wave_stack = optimal_weights(stack_dict['specobjs_list'],
-                                                                   islit, objid)
-        thismask_stack = stack_dict['slitmask_stack'] == islit
-
-        # Perform the 2d coadd
-        coadd_dict = coadd2d(trace_stack, stack_dict['sciimg_stack'], stack_dict['sciivar_stack'],
-                             stack_dict['skymodel_stack'], stack_dict['mask_stack'] == 0,
-                             stack_dict['tilts_stack'], stack_dict['waveimg_stack'],
-                             thismask_stack, weights=weights, wave_grid=wave_grid)
-        coadd_list.append(coadd_dict)
-        nspec_vec[islit]=coadd_dict['nspec']
-        nspat_vec[islit]=coadd_dict['nspat']
+    # Coadd the slits; the slits are independent, and the numpy
+    # operations dominating the coadds release the GIL
+    _coadd_slit = functools.partial(coadd_slit, stack_dict, objid=objid, wave_grid=wave_grid)
+    if nproc > 1 and nslits > 1:
+        with futures.ThreadPoolExecutor(max_workers=min(nproc, nslits)) as executor:
+            coadd_list = list(executor.map(_coadd_slit, range(nslits)))
+    else:
+        coadd_list = [_coadd_slit(islit) for islit in range(nslits)]
+    nspec_vec = np.array([coadd_dict['nspec'] for coadd_dict in coadd_list], dtype=int)
+    nspat_vec = np.array([coadd_dict['nspat'] for coadd_dict in coadd_list], dtype=int)
 
     # Determine the size of the psuedo image
     nspat_pad = 10
@@ -866,6 +1038,84 @@ def extract_coadd2d(stack_dict, master_dir, samp_fact = 1.0,ir_redux=False, par=
     return imgminsky_psuedo, sciivar_psuedo, skymodel_psuedo, objmodel_psuedo, ivarmodel_psuedo, outmask_psuedo, sobjs
 
 
+def coadd2d_detector(spec2d_files, det, master_dir, memmap=False, **kwargs):
+    """
+    Load the stacks of a single detector and perform its 2d coadd.
+
+    Args:
+        spec2d_files (list):
+            List of spec2d filenames.
+        det (int):
+            Detector to coadd.
+        master_dir (str):
+            Directory for the master files of the coadd.
+        memmap (bool, optional):
+            See :func:`load_coadd2d_stacks`.
+        **kwargs:
+            Passed to :func:`extract_coadd2d`.
+
+    Returns:
+        tuple: The master_key_dict of the detector and a dictionary
+        with the sciimg, sciivar, skymodel, objmodel, ivarmodel,
+        outmask and specobjs of the coadd.
+    """
+    msgs.info("Working on detector {0}".format(det))
+    # Read in the images stacks and other clibration/meta data for this detector
+    stack_dict = load_coadd2d_stacks(spec2d_files, det, memmap=memmap)
+    keys = ['sciimg', 'sciivar', 'skymodel', 'objmodel', 'ivarmodel', 'outmask', 'specobjs']
+    try:
+        det_dict = dict(zip(keys, extract_coadd2d(stack_dict, master_dir, **kwargs)))
+    finally:
+        close_coadd2d_stacks(stack_dict)
+    return stack_dict['master_key_dict'], det_dict
+
+
+def coadd2d_detectors(spec2d_files, detectors, master_dir, nproc=1, **kwargs):
+    """
+    Perform the 2d coadds of a set of detectors, possibly in parallel.
+
+    The detectors are distributed over up to ``nproc`` processes and
+    the processors left are used to coadd the slits of each detector
+    concurrently (see :func:`extract_coadd2d`).
+
+    Args:
+        spec2d_files (list):
+            List of spec2d filenames.
+        detectors (list):
+            Detectors to coadd.
+        master_dir (str):
+            Directory for the master files of the coadd.
+        nproc (int, optional):
+            Number of processors to use.
+        **kwargs:
+            Passed to :func:`coadd2d_detector`.
+
+    Returns:
+        tuple: The master_key_dict of the last detector and an
+        OrderedDict with the output of :func:`coadd2d_detector` for
+        each detector, in the order of ``detectors``.
+    """
+    if len(detectors) == 0:
+        msgs.error('No detectors to coadd.')
+    if nproc > 1 and (kwargs.get('show', False) or kwargs.get('show_peaks', False)):
+        msgs.warn('Cannot show the reduction steps when coadding in parallel.  Using nproc=1.')
+        nproc = 1
+    ndet_proc = min(nproc, len(detectors))
+    kwargs['nproc'] = max(nproc // max(ndet_proc, 1), 1)
+    _coadd2d_detector = functools.partial(coadd2d_detector, spec2d_files,
+                                          master_dir=master_dir, **kwargs)
+    if ndet_proc > 1:
+        with futures.ProcessPoolExecutor(max_workers=ndet_proc) as executor:
+            results = list(executor.map(_coadd2d_detector, detectors))
+    else:
+        results = [_coadd2d_detector(det) for det in detectors]
+
+    det_dicts = OrderedDict()
+    for det, (master_key_dict, det_dict) in zip(detectors, results):
+        det_dicts[det] = det_dict
+    return master_key_dict, det_dicts
+
+
 # TODO make weights optional and do uniform weighting without.
 def weighted_combine(weights, sci_list, var_list, inmask_stack,
                      sigma_clip=False, sigma_clip_stack = None, sigrej=None, maxiters=5):
@@ -17,11 +17,8 @@ from pypeit.core import pydl
 from pypeit import utils
 from pypeit.core import pixels
 from pypeit import ginga
-from matplotlib import pyplot as plt
 from pypeit.core import trace_slits
 from pypeit.core import arc
-
-from sklearn.decomposition import PCA
 from pypeit import specobjs
 from pypeit.core.pydl import spheregroup
 
@@ -108,45 +105,24 @@ def extract_asymbox2(image,left_in,right_in,ycen = None,weight_image = None):
     if ((np.size(left) != np.size(ycen_out)) | (np.shape(left) != np.shape(ycen_out))):
         raise ValueError('Number of elements and left of trace and ycen must be equal')
 
-    idims = image.shape
-    nspat = idims[1]
-    nspec = idims[0]
-
     maxwindow = np.max(right - left)
     tempx = np.int(maxwindow + 3.0)
 
-    bigleft = np.outer(left[:], np.ones(tempx))
-    bigright = np.outer(right[:], np.ones(tempx))
-    spot = np.outer(np.ones(npix * nTrace), np.arange(tempx)) + bigleft - 1
-    bigy = np.outer(ycen_out[:], np.ones(tempx, dtype='int'))
-
-    fullspot = np.array(np.fmin(np.fmax(np.round(spot + 1) - 1, 0), nspat - 1), int)
-    fracleft = np.fmax(np.fmin(fullspot - bigleft, 0.5), -0.5)
-    fracright = np.fmax(np.fmin(bigright - fullspot, 0.5), -0.5)
-    del bigleft
-    del bigright
-    bool_mask1 = (spot >= -0.5) & (spot < (nspat - 0.5))
-    bool_mask2 = (bigy >= 0) & (bigy <= (nspec - 1))
-    weight = (np.fmin(np.fmax(fracleft + fracright, 0), 1)) * bool_mask1 * bool_mask2
-    del spot
-    del fracleft
-    del fracright
-    bigy = np.fmin(np.fmax(bigy, 0), nspec - 1)
-
-    if weight_image != None:
-        temp = np.array([weight_image[x1, y1] * image[x1, y1] for (x1, y1) in zip(bigy.flatten(), fullspot.flatten())])
-        temp2 = np.reshape(weight.flatten() * temp, (nTrace, npix, tempx))
-        fextract = np.sum(temp2, axis=2)
-        temp_wi = np.array([weight_image[x1, y1] for (x1, y1) in zip(bigy.flatten(), fullspot.flatten())])
-        temp2_wi = np.reshape(weight.flatten() * temp_wi, (nTrace, npix, tempx))
-        f_ivar = np.sum(temp2_wi, axis=2)
+    # Work in the (nspec, nTrace) order of the input so that the image
+    # is read row by row
+    from pypeit.core import trace_kernels
+    _left = np.asarray(left.T, dtype=float).ravel()
+    _right = np.asarray(right.T, dtype=float).ravel()
+    _ycen = np.asarray(ycen_out.T, dtype=np.int64).ravel()
+    _image = np.asarray(image, dtype=float)
+    if weight_image is not None:
+        _weight_image = np.asarray(weight_image, dtype=float)
+        fextract = trace_kernels.asymbox(_weight_image*_image, _left, _right, _ycen, tempx)
+        f_ivar = trace_kernels.asymbox(_weight_image, _left, _right, _ycen, tempx)
         fextract = fextract / (f_ivar + (f_ivar == 0)) * (f_ivar > 0)
     else:
-        # Might be more pythonic way to code this. I needed to switch the flattening order in order to get
-        # this to work
-        temp = np.array([image[x1, y1] for (x1, y1) in zip(bigy.flatten(), fullspot.flatten())])
-        temp2 = np.reshape(weight.flatten() * temp, (nTrace, npix, tempx))
-        fextract = np.sum(temp2, axis=2)
+        fextract = trace_kernels.asymbox(_image, _left, _right, _ycen, tempx)
+    fextract = fextract.reshape(left.T.shape).T
 
     # IDL version model functionality not implemented yet
     # At the moment I'm not reutnring the f_ivar for the weight_image mode. I'm not sure that this functionality is even
@@ -484,6 +460,7 @@ def qa_fit_profile(x_tot,y_tot, model_tot, l_limit = None, r_limit = None, ind =
                    title =' ', xtrunc = 1e6, xlim = None, ylim = None, qafile = None):
 
     # Plotting pre-amble
+    from matplotlib import pyplot as plt
     plt.close("all")
     #plt.clf()
 #    plt.rc('text', usetex=True)
@@ -777,7 +754,7 @@ def fit_profile(image, ivar, waveimg, thismask, spat_img, trace_in, wave, flux,
     else:
         msgs.warn('All pixels are masked')
 
-    msgs.info('sqrt(med(S/N)^2) = ' + "{:5.2f}".format(np.sqrt(med_sn2)))
+    msgs.info('sqrt(med(S/N)^2) = {:5.2f}', np.sqrt(med_sn2))
 
     # TODO -- JFH document this
     if(med_sn2 <= 2.0):
@@ -828,7 +805,7 @@ def fit_profile(image, ivar, waveimg, thismask, spat_img, trace_in, wave, flux,
     sigma = np.full(nspec, thisfwhm/2.3548)
     fwhmfit = sigma*2.3548
     trace_corr = np.zeros(nspec)
-    msgs.info("Gaussian vs b-spline of width " + "{:6.2f}".format(thisfwhm) + " pixels")
+    msgs.info("Gaussian vs b-spline of width {:6.2f} pixels", thisfwhm)
     area = 1.0
     # sigma_x represents the profile argument, i.e. (x-x0)/sigma
     sigma_x = (dspat/(np.outer(sigma, np.ones(nspat))) - np.outer(trace_corr, np.ones(nspat)))
@@ -894,7 +871,7 @@ def fit_profile(image, ivar, waveimg, thismask, spat_img, trace_in, wave, flux,
     min_level = peak*np.exp(-0.5*limit**2)
 
     bspline_fwhm = (rwhm - lwhm)*thisfwhm/2.3548
-    msgs.info("Bspline FWHM: " + "{:7.4f}".format(bspline_fwhm) + ", compared to initial object finding FWHM: " + "{:7.4f}".format(thisfwhm) )
+    msgs.info("Bspline FWHM: {:7.4f}, compared to initial object finding FWHM: {:7.4f}", bspline_fwhm, thisfwhm)
     sigma = sigma * (rwhm-lwhm)/2.3548
 
     limit = limit * (rwhm-lwhm)/2.3548
@@ -993,9 +970,12 @@ def fit_profile(image, ivar, waveimg, thismask, spat_img, trace_in, wave, flux,
         ratio_20 = (h2 / (h0 + (h0 == 0.0)))
         sigma_factor = 0.3 * ratio_20 / (1.0 + np.abs(ratio_20))
 
-        msgs.info("Iteration# " + "{:3d}".format(iiter))
-        msgs.info("Median abs value of trace correction = " + "{:8.3f}".format(np.median(np.abs(delta_trace_corr))))
-        msgs.info("Median abs value of width correction = " + "{:8.3f}".format(np.median(np.abs(sigma_factor))))
+        if msgs.debug_enabled():
+            msgs.debug("Iteration# {:3d}", iiter)
+            msgs.debug("Median abs value of trace correction = {:8.3f}",
+                       np.median(np.abs(delta_trace_corr)))
+            msgs.debug("Median abs value of width correction = {:8.3f}",
+                       np.median(np.abs(sigma_factor)))
 
         sigma = sigma*(1.0 + sigma_factor)
         area = area * h0/(1.0 + sigma_factor)
@@ -1298,12 +1278,15 @@ def iter_tracefit(image, xinit_in, ncoeff, inmask = None, trc_inmask = None, fwh
         title_text = 'Flux Weighted'
 
     xfit1 = np.copy(xinit)
+    # The masked image is the same for all iterations
+    image_mask = image*inmask
+    invvar_mask = inmask.astype(float)
 
     for iiter in range(niter):
         if gweight:
-            xpos1, xerr1 = trace_slits.trace_gweight(image*inmask,xfit1, invvar=inmask.astype(float),sigma=fwhm/2.3548)
+            xpos1, xerr1 = trace_slits.trace_gweight(image_mask,xfit1, invvar=invvar_mask,sigma=fwhm/2.3548)
         else:
-            xpos1, xerr1 = trace_slits.trace_fweight(image*inmask,xfit1, invvar = inmask.astype(float), radius = fwhm_vec[iiter])
+            xpos1, xerr1 = trace_slits.trace_fweight(image_mask,xfit1, invvar = invvar_mask, radius = fwhm_vec[iiter])
 
         # Do not do any kind of masking based on xerr1. Trace fitting is much more robust when masked pixels are simply
         # replaced by the tracing crutch
@@ -1316,6 +1299,7 @@ def iter_tracefit(image, xinit_in, ncoeff, inmask = None, trc_inmask = None, fwh
         tracemask1 = (xerr1 > 990.0)  # bad pixels have errors set to 999 and are returned to lie on the input trace
         # Plot all the points that were not masked initially
         if(show_fits) & (iiter == niter - 1):
+            from matplotlib import pyplot as plt
             for iobj in range(nobj):
                 nomask = (tracemask1[:,iobj]==0)
                 plt.plot(spec_vec[nomask],xpos1[nomask,iobj],marker='o', c='k', markersize=3.0,linestyle='None',label=title_text + ' Centroid')
@@ -1611,6 +1595,7 @@ def objfind(image, thismask, slit_left, slit_righ, inmask=None, fwhm=3.0,
 
     # ToDo Also plot the edge trimming boundaries on the QA here.
     if show_peaks:
+        from matplotlib import pyplot as plt
         spat_approx_vec = slit_left[specmid] + xsize[specmid]*np.arange(nsamp)/nsamp
         spat_approx = slit_left[specmid] + xsize[specmid]*xcen/nsamp
 
@@ -1899,6 +1884,7 @@ def pca_trace(xinit, predict = None, npca = None, pca_explained_var=99.0,
     pca_fit:  ndarray, float (nspec, norders)
         Array with the same size as xinit, which contains the pca fitted orders.
     """
+    from sklearn.decomposition import PCA
 
     nspec = xinit.shape[0]
     norders = xinit.shape[1]
@@ -1982,6 +1968,7 @@ def pca_trace(xinit, predict = None, npca = None, pca_explained_var=99.0,
         fit_dict[str(idim)]['maxv'] = maxv
         if debug:
             # Evaluate the fit
+            from matplotlib import pyplot as plt
             xvec = np.linspace(order_vec.min(),order_vec.max(),num=100)
             robust_mask_new = msk_new == 1
             plt.plot(xfit, yfit, 'ko', mfc='None', markersize=8.0, label='pca coeff')
@@ -2247,6 +2234,7 @@ def ech_objfind(image, ivar, slitmask, slit_left, slit_righ, inmask=None, fof_li
                                                      minx = order_vec.min(),maxx=order_vec.max())
             frac_mean_new[goodorder] = frac_mean_good
             if debug:
+                from matplotlib import pyplot as plt
                 frac_mean_fit = utils.func_val(poly_coeff_frac, iord_vec, 'polynomial')
                 plt.plot(iord_vec[goodorder][msk_frac], frac_mean_new[goodorder][msk_frac], 'ko', mfc='k', markersize=8.0, label='Good Orders Kept')
                 plt.plot(iord_vec[goodorder][~msk_frac], frac_mean_new[goodorder][~msk_frac], 'ro', mfc='k', markersize=8.0, label='Good Orders Rejected')
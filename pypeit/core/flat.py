@@ -16,7 +16,6 @@ from pypeit.core import tracewave
 from pypeit import debugger
 from pypeit import utils
 from pypeit.core import pydl
-from matplotlib import pyplot as plt
 import copy
 
 import scipy
@@ -244,6 +243,7 @@ def fit_flat(flat, tilts_dict, tslits_dict_in, slit, inmask = None,
 
     # Debugging/checking spectral fit
     if debug:
+        from matplotlib import pyplot as plt
         goodbk = spec_set_fine.mask
         specfit_bkpt, _ = spec_set_fine.value(spec_set_fine.breakpoints[goodbk])
         was_fit_and_masked = (outmask_spec == False)
@@ -333,6 +333,7 @@ def fit_flat(flat, tilts_dict, tslits_dict_in, slit, inmask = None,
 
     # Add an approximate pixel axis at the top
     if debug:
+        from matplotlib import pyplot as plt
         plt.clf()
         ax = plt.gca()
         ax.plot(ximg_fit, norm_spec_fit, color='k', marker='o', markersize=0.4, mfc='k', fillstyle='full',linestyle='None',
@@ -390,6 +391,7 @@ def fit_flat(flat, tilts_dict, tslits_dict_in, slit, inmask = None,
         kwargs_bspline = {'bkspace':spec_samp_coarse},kwargs_reject={'groupbadpix':True, 'maxrej': 10})
 
     if debug:
+        from matplotlib import pyplot as plt
         resid = (norm_twod  - twodfit)
         badpix = np.invert(outmask_twod) & fitmask
         goodpix = outmask_twod & fitmask
@@ -1,24 +1,22 @@
 """ Module for fluxing routines
 """
 import glob
+import functools
 import numpy as np
 import os
 import scipy
+from scipy.spatial import cKDTree
 
 from pkg_resources import resource_filename
 
 from astropy import units
 from astropy import constants
 from astropy import coordinates
-from astropy.table import Table, Column
+from astropy.table import Table, Column, vstack
 from astropy.io import ascii
 from astropy.io import fits
 from astropy.stats import sigma_clipped_stats
 
-from matplotlib import pyplot as plt
-
-from linetools.spectra.xspectrum1d import XSpectrum1D
-
 from pypeit.core import pydl
 from pypeit import msgs
 from pypeit import utils
@@ -271,6 +269,7 @@ def generate_sensfunc(wave, counts, counts_ivar, airmass, exptime, longitude, la
         #flux_true[mask_model] = star_poly[mask_model]
         flux_true = star_poly.copy()
         if debug:
+            from matplotlib import pyplot as plt
             plt.plot(std_dict['wave'], std_dict['flux'],'bo',label='Raw Star Model')
             plt.plot(std_dict['wave'],  utils.func_val(poly_coeff, std_dict['wave'].value, 'polynomial'), 'k-',label='robust_poly_fit')
             plt.plot(wave_star,flux_true,'r-',label='Your Final Star Model used for sensfunc')
@@ -292,6 +291,7 @@ def generate_sensfunc(wave, counts, counts_ivar, airmass, exptime, longitude, la
                                 polycorrect= polycorrect, debug=debug, show_QA=False)
 
     if debug:
+        from matplotlib import pyplot as plt
         plt.plot(wave_star.value[mask_sens], flux_true[mask_sens], color='k',lw=2,label='Reference Star')
         plt.plot(wave_star.value[mask_sens], flux_star[mask_sens]*sensfunc[mask_sens], color='r',label='Fluxed Observed Star')
         plt.xlabel(r'Wavelength [$\AA$]')
@@ -600,6 +600,7 @@ def standard_sensfunc(wave, flux, ivar, flux_std, msk_bad=None, msk_star=None, m
 
         if debug:
             # Check for calibration
+            from matplotlib import pyplot as plt
             plt.figure(1)
             plt.plot(wave_obs, magfunc, drawstyle='steps-mid', color='black', label='magfunc')
             plt.plot(wave_obs, logfit1, color='cornflowerblue', label='logfit1')
@@ -633,6 +634,7 @@ def standard_sensfunc(wave, flux, ivar, flux_std, msk_bad=None, msk_star=None, m
     sensfunc = 10.0 ** (0.4 * magfunc)
 
     if debug:
+        from matplotlib import pyplot as plt
         plt.figure()
         magfunc_raw = logflux_std - logflux_obs
         plt.plot(wave_obs[masktot],magfunc_raw[masktot] , 'k-',lw=3,label='Raw Magfunc')
@@ -727,43 +729,34 @@ def find_standard_file(ra, dec, toler=20.*units.arcmin, check=False):
             - 'ra': str -- RA(J2000)
             - 'dec': str -- DEC(J2000)
     """
-    # Priority
-    std_sets = [load_calspec, load_esofil, load_xshooter]
-    std_file_fmt = [1, 2, 3]  # 1=Calspec style FITS binary table; 2=ESO ASCII format; 3= XSHOOTER ASCII format.
+    # Catalogue of all archived standards
+    std_tbl, std_tree = load_standards_catalog()
 
-    # SkyCoord
+    # Unit vector of the object
     obj_coord = coordinates.SkyCoord(ra, dec, unit=(units.hourangle, units.deg))
-    # Loop on standard sets
-    closest = dict(sep=999 * units.deg)
-    for qq, sset in enumerate(std_sets):
-        # Stars
-        path, star_tbl = sset()
-        star_coords = coordinates.SkyCoord(star_tbl['RA_2000'], star_tbl['DEC_2000'],
-                                           unit=(units.hourangle, units.deg))
-        # Match
-        idx, d2d, d3d = coordinates.match_coordinates_sky(obj_coord, star_coords, nthneighbor=1)
-        if d2d < toler:
-            if check:
-                return True
-            else:
-                # Generate a dict
-                _idx = int(idx)
-                std_dict = dict(cal_file=os.path.join(path,star_tbl[_idx]['File']),
-                                name=star_tbl[_idx]['Name'], fmt=std_file_fmt[qq],
-                                std_ra=star_tbl[_idx]['RA_2000'],
-                                std_dec=star_tbl[_idx]['DEC_2000'])
-                # Return
-                msgs.info("Using standard star {:s}".format(std_dict['name']))
-                return std_dict
-        else:
-            # Save closest found so far
-            imind2d = np.argmin(d2d)
-            mind2d = d2d[imind2d]
-            if mind2d < closest['sep']:
-                closest['sep'] = mind2d
-                closest.update(dict(name=star_tbl[int(idx)]['Name'],
-                                    ra=star_tbl[int(idx)]['RA_2000'],
-                                    dec=star_tbl[int(idx)]['DEC_2000']))
+    obj_xyz = obj_coord.cartesian.xyz.value
+
+    # Match; priority is by the order of the standard sets, then
+    # separation
+    max_chord = 2*np.sin(toler.to('rad').value/2)
+    match = np.array(std_tree.query_ball_point(obj_xyz, max_chord), dtype=int)
+    if match.size > 0:
+        if check:
+            return True
+        chord = np.sqrt(np.sum((std_tbl['xyz'][match] - obj_xyz[None,:])**2, axis=1))
+        _idx = match[np.lexsort((chord, std_tbl['fmt'][match]))[0]]
+        # Generate a dict
+        std_dict = dict(cal_file=os.path.join(std_tbl[_idx]['path'], std_tbl[_idx]['File']),
+                        name=std_tbl[_idx]['Name'], fmt=int(std_tbl[_idx]['fmt']),
+                        std_ra=std_tbl[_idx]['RA_2000'], std_dec=std_tbl[_idx]['DEC_2000'])
+        # Return
+        msgs.info("Using standard star {:s}".format(std_dict['name']))
+        return std_dict
+
+    # Closest standard
+    chord, _idx = std_tree.query(obj_xyz)
+    closest = dict(sep=(2*np.arcsin(chord/2)*units.rad).to('deg'), name=std_tbl[_idx]['Name'],
+                   ra=std_tbl[_idx]['RA_2000'], dec=std_tbl[_idx]['DEC_2000'])
 
     # Standard star not found
     if check:
@@ -776,6 +769,41 @@ def find_standard_file(ra, dec, toler=20.*units.arcmin, check=False):
     return None
 
 
+@functools.lru_cache(maxsize=None)
+def load_standards_catalog():
+    """
+    Load the catalogue of all archived standard stars.
+
+    The calspec, ESO and XSHOOTER lists are read and combined on the
+    first call only; subsequent calls return the same (cached)
+    objects, which should not be modified.
+
+    Returns:
+        tuple: An `astropy.table.Table` with the path, File, Name,
+        RA_2000 and DEC_2000 of each standard, the file format flag
+        (fmt, also giving the search priority; see
+        :func:`find_standard_file`), and the Cartesian unit vector of
+        each star (xyz), and a `scipy.spatial.cKDTree` of the unit
+        vectors.
+    """
+    # Priority
+    std_sets = [load_calspec, load_esofil, load_xshooter]
+    std_file_fmt = [1, 2, 3]  # 1=Calspec style FITS binary table; 2=ESO ASCII format; 3= XSHOOTER ASCII format.
+    std_tbls = []
+    for qq, sset in enumerate(std_sets):
+        path, star_tbl = sset()
+        nstar = len(star_tbl)
+        std_tbls.append(Table([[path]*nstar, star_tbl['File'], star_tbl['Name'],
+                               star_tbl['RA_2000'], star_tbl['DEC_2000'],
+                               np.full(nstar, std_file_fmt[qq], dtype=int)],
+                              names=('path', 'File', 'Name', 'RA_2000', 'DEC_2000', 'fmt')))
+    std_tbl = vstack(std_tbls)
+    star_coords = coordinates.SkyCoord(std_tbl['RA_2000'], std_tbl['DEC_2000'],
+                                       unit=(units.hourangle, units.deg))
+    std_tbl['xyz'] = star_coords.cartesian.xyz.value.T
+    return std_tbl, cKDTree(std_tbl['xyz'].data)
+
+
 def load_calspec():
     """
     Load the list of calspec standards
@@ -857,12 +885,7 @@ def load_extinction_data(longitude, latitude, toler=5. * units.deg):
     # Mosaic coord
     mosaic_coord = coordinates.SkyCoord(longitude, latitude, frame='gcrs', unit=units.deg)
     # Read list
-    extinct_path = resource_filename('pypeit', '/data/extinction/')
-    extinct_summ = extinct_path + 'README'
-    extinct_files = Table.read(extinct_summ, comment='#', format='ascii')
-    # Coords
-    ext_coord = coordinates.SkyCoord(extinct_files['Lon'], extinct_files['Lat'], frame='gcrs',
-                                     unit=units.deg)
+    extinct_files, ext_coord = load_extinction_sites()
     # Match
     idx, d2d, d3d = coordinates.match_coordinates_sky(mosaic_coord, ext_coord, nthneighbor=1)
     if d2d < toler:
@@ -872,12 +895,52 @@ def load_extinction_data(longitude, latitude, toler=5. * units.deg):
         msgs.warn("No file found for extinction corrections.  Applying none")
         msgs.warn("You should generate a site-specific file")
         return None
-    # Read
-    extinct = Table.read(extinct_path + extinct_file, comment='#', format='ascii',
-                         names=('iwave', 'mag_ext'))
+    # Return a copy of the cached table
+    return load_extinction_file(extinct_file).copy()
+
+
+@functools.lru_cache(maxsize=None)
+def load_extinction_sites():
+    """
+    Load the list of sites with extinction files.
+
+    The list is only read on the first call; the returned objects
+    are cached and should not be modified.
+
+    Returns:
+        tuple: The `astropy.table.Table` read from the README of the
+        extinction data directory, and the `astropy.coordinates.SkyCoord`
+        of the sites.
+    """
+    extinct_summ = resource_filename('pypeit', os.path.join('data', 'extinction', 'README'))
+    extinct_files = Table.read(extinct_summ, comment='#', format='ascii')
+    # Coords
+    ext_coord = coordinates.SkyCoord(extinct_files['Lon'], extinct_files['Lat'], frame='gcrs',
+                                     unit=units.deg)
+    return extinct_files, ext_coord
+
+
+@functools.lru_cache(maxsize=None)
+def load_extinction_file(extinct_file):
+    """
+    Read an extinction file.
+
+    Each file is only read once; the returned table is cached and
+    should not be modified.
+
+    Args:
+        extinct_file (str):
+            Name of the file in the extinction data directory.
+
+    Returns:
+        `astropy.table.Table`: Table with the 'wave', 'mag_ext' data
+        for AM=1.
+    """
+    extinct = Table.read(resource_filename('pypeit', os.path.join('data', 'extinction',
+                                                                  extinct_file)),
+                         comment='#', format='ascii', names=('iwave', 'mag_ext'))
     wave = Column(np.array(extinct['iwave']) * units.AA, name='wave')
     extinct.add_column(wave)
-    # Return
     return extinct[['wave', 'mag_ext']]
 
 def load_filter_file(filter):
@@ -918,17 +981,33 @@ def load_filter_file(filter):
     if filter not in allowed_options:
         msgs.error("PypeIt is not ready for filter = {}".format(filter))
 
+    # Return copies of the cached curve
+    wave, instr = load_filter_curve(filter)
+    return wave.copy(), instr.copy()
+
+
+@functools.lru_cache(maxsize=None)
+def load_filter_curve(filter):
+    """
+    Read the system response curve of a filter from the filter curve
+    file.
+
+    Each curve is only read once; the returned arrays are cached and
+    should not be modified.  Use :func:`load_filter_file`.
+
+    Args:
+        filter (str): Name of filter
+
+    Returns:
+        ndarray, ndarray: wavelength, instrument throughput
+    """
     trans_file = resource_filename('pypeit', os.path.join('data', 'filters', 'filtercurves_20190215.fits'))
-    trans = fits.open(trans_file)
-    wave = trans[filter].data['lam']  # Angstroms
-    instr = trans[filter].data['Rlam']  # Am keeping in atmospheric terms
+    with fits.open(trans_file) as trans:
+        wave = np.array(trans[filter].data['lam'])  # Angstroms
+        instr = np.array(trans[filter].data['Rlam'])  # Am keeping in atmospheric terms
     keep = instr > 0.
     # Parse
-    wave = wave[keep]
-    instr = instr[keep]
-
-    # Return
-    return wave, instr
+    return wave[keep], instr[keep]
 
 def load_standard_file(std_dict):
     """Load standard star data
@@ -1027,6 +1106,7 @@ def scale_in_filter(xspec, scale_dict):
         linetools.spectra.xspectrum1d.XSpectrum1D:  Scaled spectrum
 
     """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
     # Parse the spectrum
     sig = xspec.sig
     gdx = sig > 0.
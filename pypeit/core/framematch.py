@@ -64,12 +64,13 @@ class FrameTypeBitMask(BitMask):
             same length for all frames.
         """
         _type_bits = np.atleast_1d(type_bits)
-        out = []
-        for b in _type_bits:
+        # Only construct the names once for each unique set of bits
+        uniq, inv = np.unique(_type_bits, return_inverse=True)
+        names = []
+        for b in uniq:
             n = self.flagged_bits(b)
-            if len(n) == 0:
-                n = ['None']
-            out += [','.join(n)] if join else [n]
+            names += [['None'] if len(n) == 0 else n]
+        out = [','.join(names[i]) for i in inv] if join else [list(names[i]) for i in inv]
         return out[0] if isinstance(type_bits, np.integer) else out
     
 
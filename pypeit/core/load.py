@@ -9,8 +9,6 @@ from astropy.time import Time
 from astropy.io import fits
 from astropy.table import Table
 
-from linetools.spectra.xspectrum1d import XSpectrum1D
-from linetools.spectra.utils import collate
 import linetools.utils
 
 
@@ -162,6 +160,7 @@ def load_spec_order(fname,objid=None,order=None,extract='OPT',flux=True):
     returns:
         spectrum_out : XSpectrum1D
     """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
     if objid is None:
         objid = 0
     if order is None:
@@ -216,6 +215,7 @@ def ech_load_spec(files,objid=None,order=None,extract='OPT',flux=True):
     returns:
         spectrum_out : XSpectrum1D
     """
+    from linetools.spectra.utils import collate
 
     nfiles = len(files)
     if objid is None:
@@ -274,6 +274,7 @@ def load_1dspec(fname, exten=None, extract='OPT', objname=None, flux=False):
     spec : XSpectrum1D
 
     """
+    from linetools.spectra.xspectrum1d import XSpectrum1D
 
     # Identify extension from objname?
     if objname is not None:
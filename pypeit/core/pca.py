@@ -3,8 +3,6 @@ import inspect
 
 import numpy as np
 
-from matplotlib import pyplot as plt
-
 from pypeit import msgs
 from pypeit import utils
 from pypeit.core import qa
@@ -320,6 +318,7 @@ def pc_plot_extcenwid(tempcen, cenwid, binval, plotsdir="Plots", pcatype="<unkno
     """
     Saves a few output png files of the PCA analysis for the target centroid/width definition
     """
+    from matplotlib import pyplot as plt
     npc = tempcen.shape[1]
     pages, npp = arqa.get_dimen(npc,maxp=maxp)
     x0=binval*np.arange(cenwid.shape[0])
@@ -420,6 +419,7 @@ def pca_plot(setup, inpar, ofit, prefix, maxp=25, pcadesc="", addOne=True,
     -------
 
     """
+    from matplotlib import pyplot as plt
 
     plt.rcdefaults()
     plt.rcParams['font.family']= 'times new roman'
@@ -566,6 +566,7 @@ def pca_arctilt(slf, tiltang, centval, tilts, maxp=25, maskval=-999999.9):
     maskval : float, (optional)
       Value used in arrays to indicate a masked value
     """
+    from matplotlib import pyplot as plt
     plt.rcdefaults()
     plt.rcParams['font.family']= 'times new roman'
     
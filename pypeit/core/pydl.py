@@ -1511,41 +1511,17 @@ class TraceSet(object):
             else:
                 self.upper = None
 
-            self.coeff = np.zeros((self.nTrace, self.ncoeff+1), dtype=xpos.dtype)
-            self.outmask = np.zeros(xpos.shape, dtype=np.bool)
-            self.yfit = np.zeros(xpos.shape, dtype=xpos.dtype)
-            for iTrace in range(self.nTrace):
-                xvec = self.xnorm(xpos[iTrace, :], do_jump)
-                if invvar is None:
-                    thisinvvar = None
-                else:
-                    thisinvvar = invvar[iTrace, :]
-
-                mask_djs, poly_coeff = utils.robust_polyfit_djs(xvec, ypos[iTrace, :], self.ncoeff,
-                                                                function=self.func, maxiter = self.maxiter,
-                                                                inmask = inmask[iTrace, :], invvar = thisinvvar,
-                                                                lower = self.lower, upper = self.upper,
-                                                                minx = self.xmin, maxx = self.xmax,
-                                                                sigma=None,maxdev=self.maxdev,maxrej=None,groupdim=None,
-                                                                groupsize=None,groupbadpix=None,grow=0,use_mad=False,sticky=False)
-                ycurfit_djs = utils.func_val(poly_coeff, xvec, self.func, minx=self.xmin, maxx=self.xmax)
-
-                ##Using robust_polyfit_djs to do the fitting and the following part are commented out by Feige
-                #while (not qdone) and (iIter <= maxiter):
-                #    res, ycurfit = func_fit(xvec, ypos[iTrace, :], self.ncoeff,
-                #        invvar=tempivar*thismask, function_name=self.func)#function_name='poly')
-                #    #ToDo: is this doing rejection? I think not???? THIS IS A MASSIVE BUG!!!! See IDL code.
-                #    # ADd kwargs_reject in here like with iterfit
-                #    thismask, qdone = djs_reject(ypos[iTrace, :], ycurfit,
-                #                                invvar=tempivar)
-                #    #thismask, qdone = djs_reject(ypos[iTrace, :], ycurfit,lower=3,upper=3)
-                #    iIter += 1
-                #self.yfit[iTrace, :] = ycurfit
-                #self.coeff[iTrace, :] = res
-                #self.outmask[iTrace, :] = thismask
-                self.yfit[iTrace, :] = ycurfit_djs #ycurfit
-                self.coeff[iTrace, :] = poly_coeff#[:-1] #res
-                self.outmask[iTrace, :] = mask_djs #thismask
+            # Fit all the traces at once; this is equivalent to
+            # calling utils.robust_polyfit_djs for each trace.  xnorm
+            # already maps x to [-1,1], so the fit must not normalize
+            # it again with xmin and xmax
+            xvec = self.xnorm(xpos, do_jump)
+            self.outmask, self.coeff = utils.robust_polyfit_batch(
+                xvec, ypos, self.ncoeff, function=self.func, maxiter=self.maxiter, inmask=inmask,
+                invvar=invvar, lower=self.lower, upper=self.upper, minx=-1., maxx=1.,
+                maxdev=self.maxdev)
+            self.yfit = utils.polyval_batch(self.coeff, xvec, function=self.func, minx=-1.,
+                                            maxx=1.)
 
         else:
             msgs.error('Wrong number of arguments to TraceSet!')
@@ -1575,7 +1551,7 @@ class TraceSet(object):
         for iTrace in range(self.nTrace):
             xvec = self.xnorm(xpos[iTrace, :], do_jump)
             #legarr = self._func_map[self.func](xvec, self.ncoeff+1) #need to be norder+1 for utils functions
-            ypos[iTrace, :] =  utils.func_val(self.coeff[iTrace, :], xvec, self.func, minx=self.xmin, maxx=self.xmax)
+            ypos[iTrace, :] =  utils.func_val(self.coeff[iTrace, :], xvec, self.func, minx=-1., maxx=1.)
 #            ypos[iTrace, :] = np.dot(legarr.T, self.coeff[iTrace, :])
         return (xpos, ypos)
 
@@ -4,6 +4,10 @@ import os
 import datetime
 import getpass
 import glob
+import pickle
+import traceback
+from concurrent import futures
+
 import numpy as np
 import yaml
 
@@ -11,6 +15,134 @@ import yaml
 #  THE HTML GENERATION OCCURS FROM msgs
 #from pypeit import msgs
 
+# QA rendering.  In 'inline' mode the QA plots are made as soon as
+# they are requested; in 'async' mode the plot payloads (arrays plus
+# metadata) are sent to a pool of processes that render them with the
+# Agg backend; in 'off' mode no QA plots are made.
+_qa_mode = 'inline'
+_qa_nproc = 1
+_qa_executor = None
+_qa_futures = []
+# Tracebacks of the failed QA plots not yet returned by finish_qa
+_qa_failures = []
+
+
+def valid_qa_modes():
+    """
+    Return the valid QA rendering modes.
+    """
+    return ['inline', 'async', 'off']
+
+
+def set_qa_mode(mode, nproc=None):
+    """
+    Set how the QA plots are rendered.
+
+    Any QA plots still being rendered are finished first.
+
+    Args:
+        mode (str):
+            QA rendering mode; see :func:`valid_qa_modes`.
+        nproc (:obj:`int`, optional):
+            Number of processes used to render the QA plots in
+            'async' mode.  If None, the current number is kept.
+    """
+    global _qa_mode, _qa_nproc
+    if mode not in valid_qa_modes():
+        raise ValueError('Unknown QA mode: {0}.  Options are: {1}'.format(
+                         mode, ', '.join(valid_qa_modes())))
+    if nproc is not None and nproc < 1:
+        raise ValueError('Number of QA processes must be at least 1.')
+    _wait_qa()
+    _qa_mode = mode
+    if nproc is not None:
+        _qa_nproc = nproc
+
+
+def get_qa_mode():
+    """
+    Return the current QA rendering mode.
+    """
+    return _qa_mode
+
+
+def _init_qa_worker():
+    import matplotlib
+    matplotlib.use('agg', force=True)
+
+
+def _render_qa(payload):
+    from matplotlib import pyplot as plt
+    func, args, kwargs = pickle.loads(payload)
+    try:
+        func(*args, **kwargs)
+    finally:
+        plt.close('all')
+
+
+def render_qa(func, *args, **kwargs):
+    """
+    Render a QA plot according to the current QA mode.
+
+    Args:
+        func (callable):
+            The QA plotting function.  In 'async' mode it must be a
+            module-level function, and it and its arguments must be
+            picklable.  The arguments are pickled immediately so they
+            can be changed by the caller once this function returns.
+            Plots that are shown interactively should not be sent
+            here.  The return value of ``func`` is not used.
+        *args, **kwargs:
+            The plot payload passed to ``func``.
+    """
+    global _qa_executor
+    if _qa_mode == 'off':
+        return
+    if _qa_mode == 'inline':
+        func(*args, **kwargs)
+        return
+    if _qa_executor is None:
+        _qa_executor = futures.ProcessPoolExecutor(max_workers=_qa_nproc,
+                                                   initializer=_init_qa_worker)
+    payload = pickle.dumps((func, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+    _qa_futures.append(_qa_executor.submit(_render_qa, payload))
+
+
+def _wait_qa():
+    """
+    Wait for all the QA plots sent to the rendering pool to be written
+    and keep the tracebacks of those that failed.
+    """
+    global _qa_executor, _qa_futures
+    if _qa_executor is None:
+        return
+    for future in futures.as_completed(_qa_futures):
+        try:
+            future.result()
+        except Exception:
+            _qa_failures.append(traceback.format_exc())
+    _qa_executor.shutdown()
+    _qa_executor = None
+    _qa_futures = []
+
+
+def finish_qa():
+    """
+    Wait for all the QA plots sent to the rendering pool to be written.
+
+    Failed plots do not raise an exception; their tracebacks are
+    returned so that the caller can log them.
+
+    Returns:
+        list: The tracebacks of the QA plots that failed since the
+        last call.
+    """
+    global _qa_failures
+    _wait_qa()
+    failures, _qa_failures = _qa_failures, []
+    return failures
+
+
 # TODO: Move these names to the appropriate class.  This always writes
 # to QA directory, even if the user sets something else...
 def set_qa_filename(root, method, det=None, slit=None, prefix=None, out_dir=None):
@@ -336,7 +468,7 @@ def gen_mf_html(pypeit_file):
     # Read calib file
     calib_file = pypeit_file.replace('.pypeit', '.calib')
     with open(calib_file, 'r') as infile:
-        calib_dict = yaml.load(infile)
+        calib_dict = yaml.safe_load(infile)
     # Parse
     setup = list(calib_dict.keys())[0]
     dets, cbsets = [], []
@@ -399,13 +531,22 @@ def gen_exp_html():
 
 
 def close_qa(pypeit_file):
+    """
+    Finish the QA plots and write the QA HTML pages.
+
+    Returns:
+        list: The tracebacks of the QA plots that failed; see
+        :func:`finish_qa`.
+    """
+    failures = finish_qa()
     if pypeit_file is None:
-        return
+        return failures
     try:
         gen_mf_html(pypeit_file)
     except:  # Likely crashed real early
         pass
     else:
         gen_exp_html()
+    return failures
 
 
@@ -14,11 +14,16 @@ import copy
 import linetools.utils
 from pypeit import msgs
 from pypeit import specobjs
+from pypeit.processimages import ProcessImagesBitMask
 from pypeit.core import parse
 
+# Quantization level used when tile-compressing the floating-point
+# spec2d images; see astropy.io.fits.CompImageHDU
+SPEC2D_QUANTIZE_LEVEL = 16.
+
 
 def save_all(sci_dict, master_key_dict, master_dir, spectrograph, head1d, head2d, scipath, basename,
-             refframe='heliocentric', update_det=None, binning='None'):
+             refframe='heliocentric', update_det=None, binning='None', spec2d_output='float64'):
     """
     Routine to save PypeIt 1d and 2d outputs
     Args:
@@ -45,6 +50,8 @@ def save_all(sci_dict, master_key_dict, master_dir, spectrograph, head1d, head2d
             the indicated detectors.  Useful for re-running on a subset of detectors
         binning: str, default = None
           String indicating the binning of the data
+        spec2d_output: str, default = 'float64'
+          Data model for the spec2d images; see :func:`save_2d_images`
 
     Returns:
 
@@ -85,7 +92,8 @@ def save_all(sci_dict, master_key_dict, master_dir, spectrograph, head1d, head2d
         save_obj_info(all_specobjs, spectrograph, objinfofile, binning=binning)
 
     # Write 2D images for the Science Frame
-    save_2d_images(sci_dict, head2d, spectrograph.spectrograph, master_key_dict, master_dir, outfile2d, update_det=update_det)
+    save_2d_images(sci_dict, head2d, spectrograph.spectrograph, master_key_dict, master_dir, outfile2d,
+                   update_det=update_det, output=spec2d_output)
 
     return
 
@@ -296,7 +304,8 @@ def save_obj_info(all_specobjs, spectrograph, outfile, binning='None'):
 #                each science frame.
 # tslits_dict -- flexure compensation implies that each frame will have a unique set of slit boundaries, so we probably need to
 #                 write these for each file as well. Alternatively we could just write the offsets to the header.
-def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir, outfile, clobber=True, update_det=None):
+def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir, outfile, clobber=True,
+                   update_det=None, output='float64'):
     """ Write 2D images to the hard drive
 
     Args:
@@ -306,10 +315,22 @@ def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir,
         mfdir (str):
         outfile (str):
         clobber: bool, optional
+        update_det (int or list, optional):
+        output (str, optional):
+          Data model for the images.  'float64' writes the images as
+          they are; 'float32' writes single-precision images and the
+          bitmask with the minimum integer type required by
+          :class:`pypeit.processimages.ProcessImagesBitMask`;
+          'compressed' additionally writes all images as tile-compressed
+          :class:`astropy.io.fits.CompImageHDU` extensions (quantized
+          floats, lossless bitmask).
 
     Returns:
 
     """
+    if output not in ['float64', 'float32', 'compressed']:
+        msgs.error('Unknown spec2d output data model: {0}'.format(output))
+
     hdus, prihdu = init_hdus(update_det, outfile)
     if hdus is None:
         # Primary HDU for output
@@ -346,8 +367,16 @@ def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir,
             prihdu.header['SKYSUB'] ='DIFF'
         else:
             prihdu.header['SKYSUB'] ='MODEL'
+    prihdu.header['S2DMODEL'] = (output, 'Data model of the spec2d images')
 
-
+    # Extensions to write for each detector: (sci_output key, extension
+    # suffix, is the bitmask)
+    extensions = [('sciimg', 'Processed', False),       # Processed frame
+                  ('sciivar', 'IVARRAW', False),        # Raw Inverse Variance
+                  ('skymodel', 'SKY', False),           # Background model
+                  ('objmodel', 'OBJ', False),           # Object model
+                  ('ivarmodel', 'IVARMODEL', False),    # Inverse Variance model
+                  ('outmask', 'MASK', True)]            # Final mask
 
     # Fill in the images
     ext = len(hdus) - 1
@@ -366,55 +395,12 @@ def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir,
         #    else:
         #        msgs.warn("Restricting the reduction to detector {:d}".format(det))
 
-        # Processed frame
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-Processed'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['sciimg']) #slf._sciframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-        # Raw Inverse Variance
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-IVARRAW'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['sciivar']) #slf._modelvarframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-        # Background model
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-SKY'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['skymodel']) #slf._modelvarframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-        # Object model
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-OBJ'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['objmodel']) #slf._modelvarframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-        # Inverse Variance model
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-IVARMODEL'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['ivarmodel'])  # slf._modelvarframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-        # Final mask
-        ext += 1
-        keywd = 'EXT{:04d}'.format(ext)
-        prihdu.header[keywd] = '{:s}-MASK'.format(sdet)
-        hdu = fits.ImageHDU(sci_output[det]['outmask'])  # slf._modelvarframe[det-1])
-        hdu.name = prihdu.header[keywd]
-        hdus.append(hdu)
-
-
+        for img_key, suffix, is_mask in extensions:
+            ext += 1
+            keywd = 'EXT{:04d}'.format(ext)
+            prihdu.header[keywd] = '{:s}-{:s}'.format(sdet, suffix)
+            hdus.append(spec2d_image_hdu(sci_output[det][img_key], prihdu.header[keywd],
+                                         output=output, is_mask=is_mask))
 
     # Finish
     hdulist = fits.HDUList(hdus)
@@ -422,6 +408,38 @@ def save_2d_images(sci_output, raw_header, spectrograph, master_key_dict, mfdir,
     msgs.info("Wrote: {:s}".format(outfile))
 
 
+def spec2d_image_hdu(data, name, output='float64', is_mask=False):
+    """
+    Construct the HDU for a single spec2d image.
+
+    Args:
+        data (`numpy.ndarray`_):
+            Image data
+        name (str):
+            Extension name
+        output (str, optional):
+            Data model; see :func:`save_2d_images`.
+        is_mask (bool, optional):
+            The image is a bitmask.  Bitmasks are never quantized.
+
+    Returns:
+        `astropy.io.fits.ImageHDU`_ or `astropy.io.fits.CompImageHDU`_:
+        The HDU to write.
+    """
+    if output == 'float64':
+        return fits.ImageHDU(data, name=name)
+
+    _data = np.asarray(data).astype(ProcessImagesBitMask().minimum_dtype() if is_mask
+                                    else np.float32)
+    if output == 'float32':
+        return fits.ImageHDU(_data, name=name)
+
+    # Integer tile compression is always lossless
+    return fits.CompImageHDU(_data, name=name, compression_type='RICE_1') if is_mask \
+                else fits.CompImageHDU(_data, name=name, compression_type='RICE_1',
+                                       quantize_level=SPEC2D_QUANTIZE_LEVEL)
+
+
 def init_hdus(update_det, outfile):
     hdus, prihdu = None, None
     if (update_det is not None) and os.path.isfile(outfile):
@@ -7,8 +7,6 @@ from pypeit import msgs, utils, processimages, ginga
 from pypeit.core import pixels, extract, pydl
 from pypeit import debugger
 
-from matplotlib import pyplot as plt
-
 from scipy.special import ndtr
 import scipy
 
@@ -206,6 +204,7 @@ def global_skysub(image, ivar, tilts, thismask, slit_left, slit_righ, inmask = N
     # ToDo This QA ceases to make sense I think for 2-d fits. I need to think about what the best QA would be here, but I think
     # probably looking at residuals as a function of spectral and spatial position like in the flat fielding code.
     if show_fit:
+        from matplotlib import pyplot as plt
         goodbk = skyset.mask
         # This is approximate
         yfit_bkpt = np.interp(skyset.breakpoints[goodbk], pix,yfit)
@@ -255,7 +254,7 @@ def skyoptimal(wave, data, ivar, oprof, sortpix, sigrej=3.0, npoly=1, spatial=No
     if nc != nx:
         raise ValueError('Object profile should have oprof.shape[0] equal to nx')
 
-    msgs.info('Iter     Chi^2     Rejected Pts')
+    msgs.debug('Iter     Chi^2     Rejected Pts')
     xmin = 0.0
     xmax = 1.0
 
@@ -294,8 +293,8 @@ def skyoptimal(wave, data, ivar, oprof, sortpix, sigrej=3.0, npoly=1, spatial=No
     chi2_sigrej = chi2_srt[sigind]
     mask1 = (chi2 < chi2_sigrej)
 
-    msgs.info('2nd round....')
-    msgs.info('Iter     Chi^2     Rejected Pts')
+    msgs.debug('2nd round....')
+    msgs.debug('Iter     Chi^2     Rejected Pts')
     if np.any(mask1):
         sset, outmask_good, yfit, red_chi, exit_status = \
             utils.bspline_profile(wave[good], data[good], ivar[good], profile_basis[good, :], inmask=mask1,
@@ -441,6 +440,7 @@ def optimal_bkpts(bkpts_optimal, bsp_min, piximg, sampmask, samp_frac=0.80,
 
 
     if debug:
+        from matplotlib import pyplot as plt
         plt.figure(figsize=(14, 6))
         sky = skyimage[sampmask]
         sky = sky[isrt]
@@ -678,8 +678,8 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img, t
         obj_profiles = np.zeros((nspec, nspat, objwork), dtype=float)
         sigrej_eff = sigrej
         for iiter in range(1, niter + 1):
-            msgs.info('--------------------------REDUCING: Iteration # ' + '{:2d}'.format(iiter) + ' of ' +
-                      '{:2d}'.format(niter) + '---------------------------------------------------')
+            msgs.info('--------------------------REDUCING: Iteration # {:2d} of {:2d}'
+                      '---------------------------------------------------', iiter, niter)
             img_minsky = sciimg - skyimage
             for ii in range(objwork):
                 iobj = group[ii]
@@ -687,8 +687,8 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img, t
                     # If this is the first iteration, print status message. Initiate profile fitting with a simple
                     # boxcar extraction.
                     msgs.info("----------------------------------- PROFILE FITTING --------------------------------------------------------")
-                    msgs.info("Fitting profile for obj # " + "{:}".format(sobjs[iobj].objid) + " of {:}".format(nobj))
-                    msgs.info("At x = {:5.2f}".format(sobjs[iobj].spat_pixpos) + " on slit # {:}".format(sobjs[iobj].slitid))
+                    msgs.info("Fitting profile for obj # {:} of {:}", sobjs[iobj].objid, nobj)
+                    msgs.info("At x = {:5.2f} on slit # {:}", sobjs[iobj].spat_pixpos, sobjs[iobj].slitid)
                     msgs.info("------------------------------------------------------------------------------------------------------------")
                     flux = extract.extract_boxcar(img_minsky * outmask, sobjs[iobj].trace_spat, box_rad,
                                           ycen=sobjs[iobj].trace_spec)
@@ -804,16 +804,14 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img, t
                     #  Maximum sigrej is sigrej_ceil (unless this is a standard)
                     #sigrej_eff = np.fmin(sigrej_eff, sigrej_ceil)
                     msgs.info('Measured effective rejection from distribution of chi^2')
-                    msgs.info('Instead of rejecting sigrej = {:5.2f}'.format(sigrej) +
-                              ', use threshold sigrej_eff = {:5.2f}'.format(sigrej_eff))
+                    msgs.info('Instead of rejecting sigrej = {:5.2f}, use threshold sigrej_eff = {:5.2f}',
+                              sigrej, sigrej_eff)
                     # Explicitly mask > sigrej outliers using the distribution of chi2 but only in the region that was actually fit.
                     # This prevents e.g. excessive masking of slit edges
                     outmask.flat[isub[igood1]] = outmask.flat[isub[igood1]] & (chi2[igood1] < chi2_sigrej) & (
                                 sciivar.flat[isub[igood1]] > 0.0)
                     nrej = outmask.flat[isub[igood1]].sum()
-                    msgs.info(
-                        'Iteration = {:d}'.format(iiter) + ', rejected {:d}'.format(nrej) + ' of ' + '{:d}'.format(
-                            igood1.sum()) + 'fit pixels')
+                    msgs.info('Iteration = {:d}, rejected {:d} of {:d}fit pixels', iiter, nrej, igood1.sum())
 
             else:
                 msgs.warn('ERROR: Bspline sky subtraction failed after 4 iterations of bkpt spacing')
@@ -826,9 +824,8 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img, t
         # loop over the objwork objects in this grouping and perform the final extractions.
         for ii in range(objwork):
             iobj = group[ii]
-            msgs.info('Extracting obj # {:d}'.format(iobj + 1) + ' of {:d}'.format(nobj) +
-                      ' with objid = {:d}'.format(sobjs[iobj].objid) + ' on slit # {:d}'.format(sobjs[iobj].slitid) +
-                      ' at x = {:5.2f}'.format(sobjs[iobj].spat_pixpos))
+            msgs.info('Extracting obj # {:d} of {:d} with objid = {:d} on slit # {:d} at x = {:5.2f}', iobj + 1,
+                      nobj, sobjs[iobj].objid, sobjs[iobj].slitid, sobjs[iobj].spat_pixpos)
             this_profile = obj_profiles[:, :, ii]
             trace = np.outer(sobjs[iobj].trace_spat, np.ones(nspat))
             objmask = ((spat_img >= (trace - 2.0 * box_rad)) & (spat_img <= (trace + 2.0 * box_rad)))
@@ -1000,6 +997,7 @@ def ech_local_skysub_extract(sciimg, sciivar, mask, tilts, waveimg, global_sky,
                                   fwhm_str.upper() +  ':{:<8d}{:<8d}{:>10.2f}{:>10.2f}'.format(iord, order, order_snr[iord,ibright], fwhm_this_ord) +
                                   msgs.newline() + dash_big)
                         if show_fwhm:
+                            from matplotlib import pyplot as plt
                             plt.plot(order_vec[other_orders][fit_mask], fwhm_here[other_orders][fit_mask], marker='o', linestyle=' ',
                             color='k', mfc='k', markersize=4.0, label='orders informing fit')
                             if np.any(np.invert(fit_mask)):
@@ -1044,7 +1042,7 @@ def ech_local_skysub_extract(sciimg, sciivar, mask, tilts, waveimg, global_sky,
         # For extractmask, True = Good, False = Bad
         iextract = (mask == 0) & (extractmask == False)
         # Undefined inverse variances
-        outmask[iextract] = bitmask.turn_on(outmask[iextract], 'EXTRACT')
+        bitmask.turn_on_inplace(outmask, 'EXTRACT', where=iextract)
 
         # Return
         return skymodel, objmodel, ivarmodel, outmask, sobjs
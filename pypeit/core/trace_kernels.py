@@ -0,0 +1,227 @@
+""" Compiled kernels for the flux- and Gaussian-weighted centroiding of
+traces and for the extraction of the flux along them.
+
+These are used by :func:`pypeit.core.trace_slits.trace_fweight`,
+:func:`pypeit.core.trace_slits.trace_gweight`,
+:func:`pypeit.core.trace_slits.trace_crude_init` and
+:func:`pypeit.core.extract.extract_asymbox2`, which import this
+module on first use so that importing them does not require importing
+numba.  The kernels take flattened, already checked inputs; see the
+calling functions for the meaning of the arguments and the semantics of
+the returned errors.
+"""
+import math
+
+import numpy as np
+import numba as nb
+
+
+@nb.jit(nopython=True, cache=True)
+def fweight(fimage, invvar, xinit, ycen, radius):
+    """ Flux-weighted centroids of the positions `xinit` in rows `ycen`
+
+    Args:
+        fimage (`numpy.ndarray`_):
+            Image with shape (nspec, nspat)
+        invvar (`numpy.ndarray`_):
+            Inverse variance of the image
+        xinit (`numpy.ndarray`_):
+            1D array with the initial positions
+        ycen (`numpy.ndarray`_):
+            1D integer array with the row of each position
+        radius (`numpy.ndarray`_):
+            1D array with the centroiding radius of each position
+
+    Returns:
+        tuple: The new positions and their errors, set to the input
+        positions and 999 where the centroiding failed.
+    """
+    nx = fimage.shape[1]
+    ncen = xinit.size
+    xnew = xinit.copy()
+    xerr = np.full(ncen, 999.0)
+
+    ix1 = np.empty(ncen, dtype=np.int64)
+    # The number of pixels in the window is set by the narrowest
+    # window
+    fullpix = -1
+    for i in range(ncen):
+        ix1[i] = int(math.floor(xinit[i] - radius[i] + 0.5))
+        width = int(math.floor(xinit[i] + radius[i] + 0.5)) - ix1[i] - 1
+        if fullpix < 0 or width < fullpix:
+            fullpix = width
+    fullpix = max(fullpix, 0)
+
+    for i in range(ncen):
+        y = ycen[i]
+        sumw = 0.
+        sumxw = 0.
+        sumsx1 = 0.
+        sumsx2 = 0.
+        qbad = False
+        for ii in range(fullpix+3):
+            spot = ix1[i] - 1 + ii
+            ih = min(max(spot, 0), nx-1)
+            xdiff = spot - xinit[i]
+            wt = min(max(radius[i] - abs(xdiff) + 0.5, 0.), 1.) * ((spot >= 0) & (spot < nx))
+            ivar = invvar[y,ih]
+            sumw = sumw + fimage[y,ih] * wt
+            sumxw = sumxw + fimage[y,ih] * xdiff * wt
+            var_term = wt**2 / (ivar + (ivar == 0))
+            sumsx2 = sumsx2 + var_term
+            sumsx1 = sumsx1 + xdiff**2 * var_term
+            qbad = qbad | (ivar <= 0)
+
+        if sumw > 0 and not qbad:
+            delta_x = sumxw/sumw
+            xnew[i] = delta_x + xinit[i]
+            xerr[i] = np.sqrt(sumsx1 + sumsx2*delta_x**2)/sumw
+
+        if abs(xnew[i]-xinit[i]) > radius[i] + 0.5 or xinit[i] < radius[i] - 0.5 \
+                or xinit[i] > nx - 0.5 - radius[i]:
+            xnew[i] = xinit[i]
+            xerr[i] = 999.0
+
+    return xnew, xerr
+
+
+@nb.jit(nopython=True, cache=True)
+def gweight(fimage, invvar, xinit, ycen, sigma):
+    """ Gaussian-weighted centroids of the positions `xinit` in rows
+    `ycen`
+
+    Args:
+        fimage (`numpy.ndarray`_):
+            Image with shape (nspec, nspat)
+        invvar (`numpy.ndarray`_):
+            Inverse variance of the image
+        xinit (`numpy.ndarray`_):
+            1D array with the initial positions
+        ycen (`numpy.ndarray`_):
+            1D integer array with the row of each position
+        sigma (`numpy.ndarray`_):
+            1D array with the Gaussian sigma of each position
+
+    Returns:
+        tuple: The new positions and their errors, set to the input
+        positions and 999 where the centroiding failed.
+    """
+    nx = fimage.shape[1]
+    ncen = xinit.size
+    xnew = xinit.copy()
+    xerr = np.full(ncen, 999.0)
+    sqrt2 = np.sqrt(2.0)
+
+    nstep = 2*int(3.0*np.max(sigma)) - 1
+    nby2 = nstep//2
+
+    for i in range(ncen):
+        y = ycen[i]
+        x_int = int(np.rint(xinit[i]))
+        weight = 0.
+        numer = 0.
+        numer_var = 0.
+        qbad = False
+        for k in range(nstep):
+            xh = x_int - nby2 + k
+            xtemp = (xh - xinit[i] - 0.5)/sigma[i]/sqrt2
+            g_int = (math.erf(xtemp+1./sigma[i]/sqrt2) - math.erf(xtemp))/2.
+            xs = min(max(xh, 0), nx-1)
+            ivar = invvar[y,xs]
+            inside = (xh >= 0) & (xh < nx)
+            cur_weight = fimage[y,xs] * (ivar > 0) * g_int * inside
+            weight += cur_weight
+            numer += cur_weight * xh
+            var = (ivar > 0.) / (abs(ivar) + (ivar == 0))
+            numer_var += var * (ivar > 0) * (g_int**2) * inside
+            qbad = qbad | (not inside)
+
+        if not qbad and weight > 0:
+            xnew[i] = numer/weight
+            xerr[i] = np.sqrt(numer_var)/weight
+
+        if abs(xnew[i]-xinit[i]) > 2*sigma[i] + 0.5 or xinit[i] < 2*sigma[i] - 0.5 \
+                or xinit[i] > nx - 0.5 - 2*sigma[i]:
+            xnew[i] = xinit[i]
+            xerr[i] = 999.0
+
+    return xnew, xerr
+
+
+@nb.jit(nopython=True, cache=True)
+def crude_walk(image, invvar, xset, xerr, ypass, radius, maxshift, maxerr):
+    """ Follow traces from row `ypass` to the top and bottom of the
+    image, recentering them row by row with :func:`fweight`.
+
+    Args:
+        image (`numpy.ndarray`_):
+            Image with shape (nspec, nspat)
+        invvar (`numpy.ndarray`_):
+            Inverse variance of the image
+        xset (`numpy.ndarray`_):
+            Trace positions with shape (nspec, ntrace).  Row `ypass`
+            must hold the starting positions; the others are filled in
+            place.
+        xerr (`numpy.ndarray`_):
+            Errors in the trace positions, filled in place
+        ypass (:obj:`int`):
+            Starting row
+        radius (`numpy.ndarray`_):
+            Centroiding radius of each trace
+        maxshift (:obj:`float`):
+            Maximum shift from one row to the next
+        maxerr (:obj:`float`):
+            Maximum error for a valid recentering
+    """
+    ny, ntrace = xset.shape
+    ycen = np.empty(ntrace, dtype=np.int64)
+    for direction in (1, -1):
+        iy = ypass + direction
+        while iy >= 0 and iy < ny:
+            xinit = xset[iy-direction,:].copy()
+            ycen[:] = iy
+            xfit, xfiterr = fweight(image, invvar, xinit, ycen, radius)
+            for j in range(ntrace):
+                good = xfiterr[j] < maxerr
+                xshift = min(max(xfit[j]-xinit[j], -1*maxshift), maxshift) * good
+                xset[iy,j] = xinit[j] + xshift
+                xerr[iy,j] = xfiterr[j] * good + 999.0 * (xfiterr[j] >= maxerr)
+            iy += direction
+
+
+@nb.jit(nopython=True, cache=True)
+def asymbox(image, left, right, ycen, nwindow):
+    """ Sum the flux between the boundaries `left` and `right` in rows
+    `ycen`, with the fractional pixel weights of
+    :func:`pypeit.core.extract.extract_asymbox2`.
+
+    Args:
+        image (`numpy.ndarray`_):
+            Image with shape (nspec, nspat)
+        left (`numpy.ndarray`_):
+            1D array with the left boundaries
+        right (`numpy.ndarray`_):
+            1D array with the right boundaries
+        ycen (`numpy.ndarray`_):
+            1D integer array with the row of each window
+        nwindow (:obj:`int`):
+            Number of pixels to consider in each window
+
+    Returns:
+        `numpy.ndarray`_: The summed flux in each window.
+    """
+    nspec, nspat = image.shape
+    nbox = left.size
+    fextract = np.zeros(nbox)
+    for i in range(nbox):
+        inrow = (ycen[i] >= 0) & (ycen[i] <= nspec - 1)
+        y = min(max(ycen[i], 0), nspec - 1)
+        for k in range(nwindow):
+            spot = k + left[i] - 1
+            fullspot = int(min(max(np.rint(spot + 1) - 1, 0), nspat - 1))
+            fracleft = max(min(fullspot - left[i], 0.5), -0.5)
+            fracright = max(min(right[i] - fullspot, 0.5), -0.5)
+            weight = min(max(fracleft + fracright, 0.), 1.) \
+                        * ((spot >= -0.5) & (spot < nspat - 0.5)) * inrow
+            fextract[i] += weight * image[y,fullspot]
+    return fextract
@@ -3,17 +3,14 @@ These should primarily be called by the TraceSlits class
 """
 import inspect
 import copy
+import functools
 from collections import Counter
 
 import numpy as np
 
 from scipy import ndimage
-from scipy.special import erf
 from scipy import signal
 
-import matplotlib.pyplot as plt
-from matplotlib import cm, font_manager
-
 
 from pypeit import msgs
 from pypeit.core import qa
@@ -23,7 +20,6 @@ from pypeit.core import pca
 from pypeit.core import pixels
 from pypeit.core import procimg
 from pypeit import debugger
-from pypeit.utils import calc_ivar
 from pypeit.core import extract
 from pypeit.core import arc
 from pypeit.core import pydl
@@ -648,10 +644,10 @@ def sync_edges(tc_dict, nspat, insert_buff=5, verbose=False):
 
     # Add em in and then sort
     for side in ['left', 'right']:
-        for kk, xval in enumerate(tc_dict[side]['new_xval']):
-            tc_dict[side]['xval'] = np.append(tc_dict[side]['xval'], xval)
-            tmp = tc_dict[side]['new_traces'][kk]
-            tc_dict[side]['traces'] = np.append(tc_dict[side]['traces'], np.resize(tmp, (tmp.size,1)), axis=1)
+        if len(tc_dict[side]['new_xval']) > 0:
+            tc_dict[side]['xval'] = np.append(tc_dict[side]['xval'], tc_dict[side]['new_xval'])
+            tc_dict[side]['traces'] = np.append(tc_dict[side]['traces'],
+                                                np.array(tc_dict[side]['new_traces']).T, axis=1)
 
         # Sort
         isrt = np.argsort(tc_dict[side]['xval'])
@@ -1575,6 +1571,9 @@ def match_edges(edgdet, ednum, mr=50):
     """  Label groups of edge pixels and give them
     a unique identifier.
 
+    The edges are followed pixel by pixel, which is compiled with
+    numba on the first call.
+
     Parameters
     ----------
     edgdet : ndarray
@@ -1592,8 +1591,24 @@ def match_edges(edgdet, ednum, mr=50):
     lcnt-2*ednum
     rcnt-2*ednum
     """
-    mrxarr = np.zeros(mr, dtype=int) -1  # -1 so as to be off the chip
-    mryarr = np.zeros(mr, dtype=int) -1  # -1 so as to be off the chip
+    return _jit_match_edges()(edgdet, ednum, mr)
+
+
+@functools.lru_cache(maxsize=None)
+def _jit_match_edges():
+    """ Compile :func:`_match_edges` with numba on first use, so that
+    importing this module does not require importing numba
+    """
+    import numba as nb
+    return nb.jit(nopython=True, cache=True)(_match_edges)
+
+
+def _match_edges(edgdet, ednum, mr):
+    """ Walk along each edge, see :func:`match_edges`.  This is the
+    pure python version of the compiled labelling.
+    """
+    mrxarr = np.zeros(mr, dtype=np.int64) -1  # -1 so as to be off the chip
+    mryarr = np.zeros(mr, dtype=np.int64) -1  # -1 so as to be off the chip
 
     sz_x, sz_y = edgdet.shape
 
@@ -1616,7 +1631,8 @@ def match_edges(edgdet, ednum, mr=50):
             yt = y
             while xs <= sz_x-1:
                 xr = 10 if xs + 10 < sz_x else sz_x - xs - 1
-                yn, yx = limit_yval(yt, sz_y)
+                yn = 0 if yt == 0 else (-yt if yt < 3 else -3)
+                yx = sz_y-yt if yt > sz_y-4 and yt < sz_y else 4
 
                 suc = 0
                 for s in range(xs, xs+xr):
@@ -1648,7 +1664,8 @@ def match_edges(edgdet, ednum, mr=50):
             yt = y
             while xs >= 0:
                 xr = xs if xs-10 < 0 else 10
-                yn, yx = limit_yval(yt, sz_y)
+                yn = 0 if yt == 0 else (-yt if yt < 3 else -3)
+                yx = sz_y-yt if yt > sz_y-4 and yt < sz_y else 4
 
                 suc = 0
                 for s in range(0, xr):
@@ -2637,26 +2654,12 @@ def trace_crude_init(image, xinit0, ypass, invvar=None, nave=5, radius=3.0,maxsh
     xset[ypass,:] = xinit + xshift
     xerr[ypass,:] = xfiterr * (xfiterr < maxerr)  + 999.0 * (xfiterr >= maxerr)
 
-    #    /* LOOP FROM INITIAL (COL,ROW) NUMBER TO LARGER ROW NUMBERS */
-    for iy in range(ypass+1, ny):
-        xinit = xset[iy-1, :]
-        ycen = iy * np.ones(ntrace,dtype=int)
-        xfit,xfiterr = trace_fweight(imgtemp, xinit, ycen = ycen, invvar=invtemp, radius=radius)
-        # Shift
-        xshift = np.clip(xfit-xinit, -1*maxshift, maxshift) * (xfiterr < maxerr)
-        # Save
-        xset[iy,:] = xinit + xshift
-        xerr[iy,:] = xfiterr * (xfiterr < maxerr)  + 999.0 * (xfiterr >= maxerr)
-    #      /* LOOP FROM INITIAL (COL,ROW) NUMBER TO SMALLER ROW NUMBERS */
-    for iy in range(ypass-1, -1,-1):
-        xinit = xset[iy+1, :]
-        ycen = iy * np.ones(ntrace,dtype=int)
-        xfit,xfiterr = trace_fweight(imgtemp, xinit, ycen = ycen, invvar=invtemp, radius=radius)
-        # Shift
-        xshift = np.clip(xfit-xinit, -1*maxshift, maxshift) * (xfiterr < maxerr)
-        # Save
-        xset[iy,:] = xinit + xshift
-        xerr[iy,:] = xfiterr * (xfiterr < maxerr) + 999.0 * (xfiterr >= maxerr)
+    # Follow the traces from the initial row to larger and then to
+    # smaller row numbers, recentering each row on the previous one
+    from pypeit.core import trace_kernels
+    trace_kernels.crude_walk(np.asarray(imgtemp, dtype=float), np.asarray(invtemp, dtype=float),
+                             xset, xerr, ypass, np.broadcast_to(radius, ntrace).astype(float),
+                             maxshift, maxerr)
 
     return xset, xerr
 
@@ -2718,9 +2721,6 @@ def trace_fweight(fimage, xinit_in, radius = 3.0, ycen=None, invvar=None):
 
     '''
 
-    # Init
-    nx = fimage.shape[1]
-
     # Checks on radius
     if isinstance(radius,(int, float)):
         radius_out = radius
@@ -2774,50 +2774,11 @@ def trace_fweight(fimage, xinit_in, radius = 3.0, ycen=None, invvar=None):
     if invvar is None:
         invvar = np.zeros_like(fimage) + 1.
 
-    x1 = xinit - radius_out + 0.5
-    x2 = xinit + radius_out + 0.5
-    ix1 = np.floor(x1).astype(int)
-    ix2 = np.floor(x2).astype(int)
-
-    fullpix = int(np.maximum(np.min(ix2-ix1)-1,0))
-
-    sumw = np.zeros_like(xinit)
-    sumxw = np.zeros_like(xinit)
-    sumwt = np.zeros_like(xinit)
-    sumsx1 = np.zeros_like(xinit)
-    sumsx2 = np.zeros_like(xinit)
-    qbad = np.zeros_like(xinit,dtype=bool)
-
-    # Compute
-    for ii in range(0,fullpix+3):
-        spot = ix1 - 1 + ii
-        ih = np.clip(spot,0,nx-1)
-        xdiff = spot - xinit
-        #
-        wt = np.clip(radius_out - np.abs(xdiff) + 0.5,0,1) * ((spot >= 0) & (spot < nx))
-        sumw = sumw + fimage[ycen_out,ih] * wt
-        sumwt = sumwt + wt
-        sumxw = sumxw + fimage[ycen_out,ih] * xdiff * wt
-        var_term = wt**2 / (invvar[ycen_out,ih] + (invvar[ycen_out,ih] == 0))
-        sumsx2 = sumsx2 + var_term
-        sumsx1 = sumsx1 + xdiff**2 * var_term
-        #qbad = qbad or (invvar[ycen_out,ih] <= 0)
-        #qbad = np.any([qbad, invvar[ycen_out,ih] <= 0], axis=0)
-        qbad = qbad | (invvar[ycen_out,ih] <= 0)
-
-
-
-    # Fill up
-    good = (sumw > 0) &  (~qbad)
-    if np.sum(good) > 0:
-        delta_x = sumxw[good]/sumw[good]
-        xnew[good] = delta_x + xinit[good]
-        xerr[good] = np.sqrt(sumsx1[good] + sumsx2[good]*delta_x**2)/sumw[good]
-
-    bad = np.any([np.abs(xnew-xinit) > radius_out + 0.5,xinit < radius_out - 0.5,xinit > nx - 0.5 - radius_out],axis=0)
-    if np.sum(bad) > 0:
-        xnew[bad] = xinit[bad]
-        xerr[bad] = 999.0
+    # Centroid all traces and rows in one compiled pass
+    from pypeit.core import trace_kernels
+    xnew, xerr = trace_kernels.fweight(np.asarray(fimage, dtype=float),
+                                       np.asarray(invvar, dtype=float), xnew, ycen_out,
+                                       np.broadcast_to(radius_out, dim).astype(float).ravel())
 
     # Reshape to the right size for output if more than one trace was input
     if ndim > 1:
@@ -2878,9 +2839,6 @@ def trace_gweight(fimage, xinit_in, sigma = 1.0, ycen = None, invvar=None, maskv
     '''
 
 
-    # Init
-    nx = fimage.shape[1]
-
     # Checks on radius
     if isinstance(sigma,(int,float)):
         sigma_out = sigma
@@ -2937,44 +2895,11 @@ def trace_gweight(fimage, xinit_in, sigma = 1.0, ycen = None, invvar=None, maskv
     if invvar is None:
         invvar = np.zeros_like(fimage) + 1.
 
-    var =calc_ivar(invvar)
-    # More setting up
-    x_int = np.rint(xinit).astype(int)
-    nstep = 2*int(3.0*np.max(sigma_out)) - 1
-
-    weight = np.zeros_like(xinit)
-    numer  = np.zeros_like(xinit)
-    numer_var  = np.zeros_like(xinit)
-    meanvar = np.zeros_like(xinit)
-    qbad = np.zeros_like(xinit).astype(bool)
-
-    nby2 = nstep//2
-    for i in range(nstep):
-        xh = x_int - nby2 + i
-        xtemp = (xh - xinit - 0.5)/sigma_out/np.sqrt(2.0)
-        g_int = (erf(xtemp+1./sigma_out/np.sqrt(2.0)) - erf(xtemp))/2.
-        xs = np.fmin(np.fmax(xh,0),(nx-1))
-        cur_weight = fimage[ycen_out, xs] * (invvar[ycen_out, xs] > 0) * g_int * ((xh >= 0) & (xh < nx))
-        weight += cur_weight
-        numer += cur_weight * xh
-        numer_var += var[ycen_out,xs]*(invvar[ycen_out, xs] > 0) * (g_int**2) *((xh >= 0) & (xh < nx))
-        # Below is Burles calculation of the error which I'm not following
-        meanvar += cur_weight * cur_weight * (xinit-xh)**2/(invvar[ycen_out, xs] + (invvar[ycen_out, xs] == 0))
-        qbad = qbad | (xh < 0) | (xh >= nx)
-        # bad = np.any([bad, xh < 0, xh >= nx], axis=0)
-
-    # Masking
-    good = (~qbad) & (weight > 0)
-    if np.sum(good) > 0:
-        xnew[good] = numer[good]/weight[good]
-        xerr[good] = np.sqrt(numer_var[good])/weight[good]
-#        xerr[good] = np.sqrt(meanvar[good])/weight[good] # Burles error which I don't follow
-
-    # For pixels with large deviations, simply reset to initial values and set large error as with trace_fweight
-    bad = np.any([np.abs(xnew-xinit) > 2*sigma_out + 0.5,xinit < 2*sigma_out - 0.5,xinit > nx - 0.5 - 2*sigma_out],axis=0)
-    if np.sum(bad) > 0:
-        xnew[bad] = xinit[bad]
-        xerr[bad] = 999.0
+    # Centroid all traces and rows in one compiled pass
+    from pypeit.core import trace_kernels
+    xnew, xerr = trace_kernels.gweight(np.asarray(fimage, dtype=float),
+                                       np.asarray(invvar, dtype=float), xnew, ycen_out,
+                                       np.broadcast_to(sigma_out, dim).astype(float).ravel())
 
     # Reshape to the right size for output if more than one trace was input
     if ndim > 1:
@@ -3173,6 +3098,9 @@ def slit_trace_qa(frame, ltrace, rtrace, slitmask, extslit, setup, desc="",
     normalize: bool, optional
       Normalize the flat?  If not, use zscale for output
     """
+    import matplotlib.pyplot as plt
+    from matplotlib import cm
+    from matplotlib import font_manager
 
     plt.rcdefaults()
     plt.rcParams['font.family']= 'times new roman'
@@ -4,7 +4,6 @@ import inspect
 import copy
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from pypeit import msgs
 from pypeit.core import arc
@@ -13,8 +12,6 @@ from pypeit.core import qa
 from pypeit.core import trace_slits
 from pypeit.core import extract
 from astropy.stats import sigma_clipped_stats
-import matplotlib as mpl
-from matplotlib.lines import Line2D
 import scipy
 from pypeit.core import pydl
 
@@ -104,6 +101,7 @@ def tilts_find_lines(arc_spec, slit_cen, tracethresh=10.0, sig_neigh=5.0, nfwhm_
 
 
     if debug_lines:
+        import matplotlib.pyplot as plt
         xrng = np.arange(nspec)
         plt.figure(figsize=(14, 6))
         plt.plot(xrng, arc_cont_sub, color='black', drawstyle='steps-mid', lw=3, label='arc', linewidth=1.0)
@@ -617,12 +615,18 @@ def fit_tilts(trc_tilt_dict, thismask, slit_cen, spat_order=3, spec_order=4, max
 
     # Now do some QA
     if doqa:
-        plot_tilt_2d(tilts_dspat, tilts, tilts_2dfit, tot_mask, rej_mask, spat_order, spec_order, rms_fit, fwhm,
-                     slit=slit, setup=master_key, show_QA=show_QA, out_dir=out_dir)
-        plot_tilt_spat(tilts_dspat, tilts, tilts_2dfit, tilts_spec, tot_mask, rej_mask, spat_order, spec_order, rms_fit, fwhm,
-                       slit=slit, setup=master_key, show_QA=show_QA, out_dir=out_dir)
-        plot_tilt_spec(tilts_spec, tilts, tilts_2dfit, tot_mask, rej_mask, rms_fit, fwhm, slit=slit,
-                       setup = master_key, show_QA=show_QA, out_dir=out_dir)
+        qa_kwargs = dict(slit=slit, setup=master_key, show_QA=show_QA, out_dir=out_dir)
+        qa_plots = [(plot_tilt_2d, (tilts_dspat, tilts, tilts_2dfit, tot_mask, rej_mask, spat_order, spec_order,
+                                    rms_fit, fwhm)),
+                    (plot_tilt_spat, (tilts_dspat, tilts, tilts_2dfit, tilts_spec, tot_mask, rej_mask, spat_order,
+                                      spec_order, rms_fit, fwhm)),
+                    (plot_tilt_spec, (tilts_spec, tilts, tilts_2dfit, tot_mask, rej_mask, rms_fit, fwhm))]
+        for plot_func, plot_args in qa_plots:
+            # Plots that are shown are made immediately
+            if show_QA:
+                plot_func(*plot_args, **qa_kwargs)
+            else:
+                qa.render_qa(plot_func, *plot_args, **qa_kwargs)
 
     return tilt_fit_dict, trc_tilt_dict_out
 
@@ -695,6 +699,7 @@ def plot_tilt_2d(tilts_dspat, tilts, tilts_model, tot_mask, rej_mask, spat_order
                  slit=0, setup='A', outfile=None, show_QA=False, out_dir=None):
 
 
+    import matplotlib.pyplot as plt
     plt.rcdefaults()
     plt.rcParams['font.family']= 'Helvetica'
 
@@ -744,6 +749,8 @@ def plot_tilt_spec(tilts_spec_fit, tilts, tilts_model, tot_mask, rej_mask, rms,
     Parameters
     ----------
     """
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
 
     plt.rcdefaults()
     plt.rcParams['font.family']= 'Helvetica'
@@ -786,9 +793,9 @@ def plot_tilt_spec(tilts_spec_fit, tilts, tilts_model, tot_mask, rej_mask, rms,
             ax.plot(tilts_spec_fit[igd][0], good_rms, marker='^', linestyle=' ', color='orange', mfc='orange', markersize=7.0)
 
     ax.text(0.90, 0.90, 'Slit {:d}:  Residual (pixels) = {:0.5f}'.format(slit, rms),
-            transform=ax.transAxes, size='large', ha='right', color='black',fontsize=16)
+            transform=ax.transAxes, ha='right', color='black',fontsize=16)
     ax.text(0.90, 0.80, ' Slit {:d}:  RMS/FWHM = {:0.5f}'.format(slit, rms/fwhm),
-            transform=ax.transAxes, size='large', ha='right', color='black',fontsize=16)
+            transform=ax.transAxes, ha='right', color='black',fontsize=16)
     # Label
     ax.set_xlabel('Spectral Pixel')
     ax.set_ylabel('RMS (pixels)')
@@ -820,6 +827,7 @@ def plot_tilt_spat(tilts_dspat, tilts, tilts_model, tilts_spec_fit, tot_mask, re
                    setup='A', slit=0, outfile=None, show_QA=False, out_dir=None):
 
 
+    import matplotlib.pyplot as plt
     import matplotlib as mpl
     from matplotlib.lines import Line2D
 
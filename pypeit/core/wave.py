@@ -1,21 +1,18 @@
 """ Routines related to flexure, air2vac, etc. """
 import inspect
+import functools
 
 import numpy as np
 import copy
 
-from matplotlib import pyplot as plt
-from matplotlib import gridspec
-
 from scipy import interpolate
+from scipy import signal
 
 from astropy import units
 from astropy.coordinates import solar_system, ICRS
 from astropy.coordinates import UnitSphericalRepresentation, CartesianRepresentation
 from astropy.time import Time
 
-from linetools.spectra import xspectrum1d
-
 from pypeit import msgs
 from pypeit.core import arc
 from pypeit.core import qa
@@ -35,17 +32,77 @@ def load_sky_spectrum(sky_file):
         sky_spec: XSpectrum1D
           spectrum
     """
+    from linetools.spectra import xspectrum1d
     sky_spec = xspectrum1d.XSpectrum1D.from_file(sky_file)
     return sky_spec
 
 
-def flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
+@functools.lru_cache(maxsize=4)
+def load_arx_sky(sky_file):
+    """
+    Load an archived sky spectrum and measure its brightest lines.
+
+    The result is cached so that the archive is only read and analyzed
+    once, regardless of the number of detectors and objects that are
+    corrected for flexure.  The returned objects must not be modified.
+
+    Args:
+        sky_file (str):
+            Archived sky spectrum file
+
+    Returns:
+        tuple: The sky spectrum (`linetools.spectra.xspectrum1d.XSpectrum1D`)
+        and the line measurements returned by :func:`sky_line_widths`.
+    """
+    arx_skyspec = load_sky_spectrum(sky_file)
+    return arx_skyspec, sky_line_widths(arx_skyspec)
+
+
+def sky_line_widths(skyspec, nkeep=5):
+    """
+    Measure the resolution of a sky spectrum using its brightest lines.
+
+    Args:
+        skyspec (`linetools.spectra.xspectrum1d.XSpectrum1D`):
+            Sky spectrum
+        nkeep (int, optional):
+            Number of the brightest lines to use
+
+    Returns:
+        dict: The dispersion (Angstrom per pixel) at each pixel
+        (`disp`), the pixel (`idx`), resolution (`res`; lambda/delta
+        lambda_FWHM) and squared Gaussian sigma in Angstrom (`sig2`) of
+        the brightest lines.
+    """
+    amp, amp_cont, cent, wid, _, w, yprep, nsig = arc.detect_lines(skyspec.flux.value)
+
+    # Keep only the brightest amplitude lines (keep is array of
+    # indices within w of the brightest)
+    keep = np.argsort(amp[w])[-nkeep:]
+
+    # Calculate wavelength (Angstrom per pixel)
+    wave = skyspec.wavelength.value
+    disp = np.append(wave[1]-wave[0], wave[1:]-wave[:-1])
+
+    # Calculate resolution (lambda/delta lambda_FWHM)..maybe don't need
+    # this? can just use sigmas
+    idx = (cent+0.5).astype(np.int)[w][keep]   # The +0.5 is for rounding
+    res = wave[idx]/(disp[idx]*(2*np.sqrt(2*np.log(2)))*wid[w][keep])
+    sig2 = np.power(disp[idx]*wid[w][keep], 2)
+    return dict(disp=disp, idx=idx, res=res, sig2=sig2)
+
+
+def flex_shift(obj_skyspec, arx_skyspec, mxshft=20, arx_lines=None):
     """ Calculate shift between object sky spectrum and archive sky spectrum
 
     Parameters
     ----------
     obj_skyspec
     arx_skyspec
+    arx_lines : dict, optional
+      Measurements of the archive sky lines from :func:`sky_line_widths`.
+      Provide these when correcting many objects against the same
+      archive to avoid repeating the line detection.
 
     Returns
     -------
@@ -55,32 +112,12 @@ def flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     flex_dict = {}
     # Determine the brightest emission lines
     msgs.warn("If we use Paranal, cut down on wavelength early on")
-    arx_amp, arx_amp_cont, arx_cent, arx_wid, _, arx_w, arx_yprep, nsig = arc.detect_lines(arx_skyspec.flux.value)
-    obj_amp, obj_amp_cont, obj_cent, obj_wid, _, obj_w, obj_yprep, nsig_obj= arc.detect_lines(obj_skyspec.flux.value)
-
-    # Keep only 5 brightest amplitude lines (xxx_keep is array of
-    # indices within arx_w of the 5 brightest)
-    arx_keep = np.argsort(arx_amp[arx_w])[-5:]
-    obj_keep = np.argsort(obj_amp[obj_w])[-5:]
-
-    # Calculate wavelength (Angstrom per pixel)
-    arx_disp = np.append(arx_skyspec.wavelength.value[1]-arx_skyspec.wavelength.value[0],
-                         arx_skyspec.wavelength.value[1:]-arx_skyspec.wavelength.value[:-1])
-    #arx_disp = (np.amax(arx_sky.wavelength.value)-np.amin(arx_sky.wavelength.value))/arx_sky.wavelength.size
-    obj_disp = np.append(obj_skyspec.wavelength.value[1]-obj_skyspec.wavelength.value[0],
-                         obj_skyspec.wavelength.value[1:]-obj_skyspec.wavelength.value[:-1])
-    #obj_disp = (np.amax(obj_sky.wavelength.value)-np.amin(obj_sky.wavelength.value))/obj_sky.wavelength.size
+    if arx_lines is None:
+        arx_lines = sky_line_widths(arx_skyspec)
+    obj_lines = sky_line_widths(obj_skyspec)
 
-    # Calculate resolution (lambda/delta lambda_FWHM)..maybe don't need
-    # this? can just use sigmas
-    arx_idx = (arx_cent+0.5).astype(np.int)[arx_w][arx_keep]   # The +0.5 is for rounding
-    arx_res = arx_skyspec.wavelength.value[arx_idx]/\
-              (arx_disp[arx_idx]*(2*np.sqrt(2*np.log(2)))*arx_wid[arx_w][arx_keep])
-    obj_idx = (obj_cent+0.5).astype(np.int)[obj_w][obj_keep]   # The +0.5 is for rounding
-    obj_res = obj_skyspec.wavelength.value[obj_idx]/ \
-              (obj_disp[obj_idx]*(2*np.sqrt(2*np.log(2)))*obj_wid[obj_w][obj_keep])
-    #obj_res = (obj_sky.wavelength.value[0]+(obj_disp*obj_cent[obj_w][obj_keep]))/(
-    #    obj_disp*(2*np.sqrt(2*np.log(2)))*obj_wid[obj_w][obj_keep])
+    arx_disp, arx_idx, arx_res = arx_lines['disp'], arx_lines['idx'], arx_lines['res']
+    obj_res = obj_lines['res']
 
     if not np.all(np.isfinite(obj_res)):
         msgs.warn('Failed to measure the resolution of the object spectrum, likely due to error '
@@ -90,11 +127,8 @@ def flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
                                                                      np.median(obj_res)))
 
     # Determine sigma of gaussian for smoothing
-    arx_sig2 = np.power(arx_disp[arx_idx]*arx_wid[arx_w][arx_keep], 2)
-    obj_sig2 = np.power(obj_disp[obj_idx]*obj_wid[obj_w][obj_keep], 2)
-
-    arx_med_sig2 = np.median(arx_sig2)
-    obj_med_sig2 = np.median(obj_sig2)
+    arx_med_sig2 = np.median(arx_lines['sig2'])
+    obj_med_sig2 = np.median(obj_lines['sig2'])
 
     if obj_med_sig2 >= arx_med_sig2:
         smooth_sig = np.sqrt(obj_med_sig2-arx_med_sig2)  # Ang
@@ -174,16 +208,17 @@ def flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     # Consider sharpness filtering (e.g. LowRedux)
     msgs.work("Consider taking median first [5 pixel]")
 
-    #Cross correlation of spectra
+    #Cross correlation of spectra; the FFT is identical to
+    #np.correlate(arx_sky_flux, obj_sky_flux, "same") but much faster
     #corr = np.correlate(arx_skyspec.flux, obj_skyspec.flux, "same")
-    corr = np.correlate(arx_sky_flux, obj_sky_flux, "same")
+    corr = signal.correlate(arx_sky_flux, obj_sky_flux, mode='same', method='fft')
 
     #Create array around the max of the correlation function for fitting for subpixel max
     # Restrict to pixels within maxshift of zero lag
     lag0 = corr.size//2
     #mxshft = settings.argflag['reduce']['flexure']['maxshift']
     max_corr = np.argmax(corr[lag0-mxshft:lag0+mxshft]) + lag0-mxshft
-    subpix_grid = np.linspace(max_corr-3., max_corr+3., 7.)
+    subpix_grid = np.linspace(max_corr-3., max_corr+3., 7)
 
     #Fit a 2-degree polynomial to peak of correlation function
     fit = utils.func_fit(subpix_grid, corr[subpix_grid.astype(np.int)], 'polynomial', 2)
@@ -270,14 +305,21 @@ def flexure_obj(specobjs, maskslits, method, sky_file, mxshft=None):
         Filled with a basically empty dict if the slit is skipped or there is no object
 
     """
+    from linetools.spectra import xspectrum1d
     sv_fdict = None
     msgs.work("Consider doing 2 passes in flexure as in LowRedux")
-    # Load Archive
-    sky_spectrum = load_sky_spectrum(sky_file)
+    # Load Archive and measure its lines; this is only done once
+    sky_spectrum, arx_lines = load_arx_sky(sky_file)
 
     nslits = len(maskslits)
     gdslits = np.where(~maskslits)[0]
 
+    # Group the objects by slit in a single pass
+    slit_sobjs = [[] for slit in range(nslits)]
+    for specobj in specobjs.specobjs:
+        if specobj is not None and 0 <= specobj.slitid < nslits:
+            slit_sobjs[specobj.slitid].append(specobj)
+
     # Loop on objects
     flex_list = []
 
@@ -287,8 +329,7 @@ def flexure_obj(specobjs, maskslits, method, sky_file, mxshft=None):
     # Loop over slits, and then over objects here
     for slit in range(nslits):
         msgs.info("Working on flexure in slit (if an object was detected): {:d}".format(slit))
-        indx = specobjs.slitid == slit
-        this_specobjs = specobjs[indx]
+        this_specobjs = slit_sobjs[slit]
         # Reset
         flex_dict = dict(polyfit=[], shift=[], subpix=[], corr=[],
                          corr_cen=[], spec_file=sky_file, smooth=[],
@@ -312,7 +353,7 @@ def flexure_obj(specobjs, maskslits, method, sky_file, mxshft=None):
             obj_sky = xspectrum1d.XSpectrum1D.from_tuple((sky_wave, sky_flux))
 
             # Calculate the shift
-            fdict = flex_shift(obj_sky, sky_spectrum, mxshft=mxshft)
+            fdict = flex_shift(obj_sky, sky_spectrum, mxshft=mxshft, arx_lines=arx_lines)
             punt = False
             if fdict is None:
                 msgs.warn("Flexure shift calculation failed for this spectrum.")
@@ -322,7 +363,7 @@ def flexure_obj(specobjs, maskslits, method, sky_file, mxshft=None):
                 else:
                     # One does not exist yet
                     # Save it for later
-                    return_later_sobjs.append([slit, ss])
+                    return_later_sobjs.append([slit, specobj])
                     punt = True
             else:
                 sv_fdict = copy.deepcopy(fdict)
@@ -346,9 +387,8 @@ def flexure_obj(specobjs, maskslits, method, sky_file, mxshft=None):
                 msgs.info("No flexure corrections could be made")
                 break
             # Setup
-            slit, ss = items
+            slit, specobj = items
             flex_dict = flex_list[slit]
-            specobj = specobjs[ss]
             sky_wave = specobj.boxcar['WAVE'] #.to('AA').value
             # Copy me
             fdict = copy.deepcopy(sv_fdict)
@@ -380,6 +420,7 @@ def flexure_obj_oldbuggyversion(specobjs, maskslits, method, sky_spectrum, sky_f
         Filled with a basically empty dict if the slit is skipped or there is no object
 
     """
+    from linetools.spectra import xspectrum1d
     msgs.work("Consider doing 2 passes in flexure as in LowRedux")
     # Load Archive
 #    skyspec_fil, arx_sky = flexure_archive(spectrograph=spectrograph, skyspec_fil=skyspec_fil)
@@ -622,6 +663,8 @@ def flexure_qa(specobjs, maskslits, basename, det, flex_list,
         out_dir:
 
     """
+    from matplotlib import pyplot as plt
+    from matplotlib import gridspec
     plt.rcdefaults()
     plt.rcParams['font.family']= 'times new roman'
 
@@ -768,6 +811,8 @@ def flexure_qa_oldbuggyversion(specobjs, maskslits, basename, det, flex_list, sl
     -------
 
     """
+    from matplotlib import pyplot as plt
+    from matplotlib import gridspec
     plt.rcdefaults()
     plt.rcParams['font.family']= 'times new roman'
 
@@ -1,9 +1,9 @@
 """ Module for basic utilties with holy grail
 """
+import functools
+
 import numpy as np
-import numba as nb
 
-from matplotlib import pyplot as plt
 from scipy.ndimage.filters import gaussian_filter
 from scipy.signal import resample
 import scipy
@@ -202,6 +202,7 @@ def xcorr_shift(inspec1,inspec2,smooth=1.0,percent_ceil=80.0, use_raw_arc=False,
     lag_max  = np.interp(pix_max, np.arange(lags.shape[0]),lags)
     if debug:
         # Interpolate for bad lines since the fitting code often returns nan
+        from matplotlib import pyplot as plt
         plt.figure(figsize=(14, 6))
         plt.plot(lags, corr_norm, color='black', drawstyle = 'steps-mid', lw=3, label = 'x-corr', linewidth = 1.0)
         plt.plot(lag_max[0], corr_max[0],'g+', markersize =6.0, label = 'peak')
@@ -320,6 +321,7 @@ def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ce
             result_out = int(result.success)
 
         if debug:
+            from matplotlib import pyplot as plt
             x1 = np.arange(nspec)
             y2_trans = shift_and_stretch(y2, shift_out, stretch_out)
             plt.figure(figsize=(14, 6))
@@ -334,7 +336,6 @@ def xcorr_shift_stretch(inspec1, inspec2, cc_thresh=-1.0, smooth=1.0, percent_ce
 
 
 
-@nb.jit(nopython=True, cache=True)
 def hist_wavedisp(waves, disps, dispbin=None, wavebin=None, scale=1.0, debug=False):
     """ Generates a flexible 2D histogram of central wavelength and
     dispersion, where the wavelength grid spacing depends on the
@@ -363,6 +364,20 @@ def hist_wavedisp(waves, disps, dispbin=None, wavebin=None, scale=1.0, debug=Fal
     cent_d : ndarray
       The value of the dispersion at the centre of each bin
     """
+    return _jit_hist_wavedisp()(waves, disps, dispbin=dispbin, wavebin=wavebin, scale=scale,
+                                debug=debug)
+
+
+@functools.lru_cache(maxsize=None)
+def _jit_hist_wavedisp():
+    """ Compile :func:`_hist_wavedisp` with numba on first use, so that
+    importing this module does not require importing numba
+    """
+    import numba as nb
+    return nb.jit(nopython=True, cache=True)(_hist_wavedisp)
+
+
+def _hist_wavedisp(waves, disps, dispbin=None, wavebin=None, scale=1.0, debug=False):
     if dispbin is None:
         dispbin = np.linspace(-3.0, 1.0, 1000)
     if wavebin is None:
@@ -373,16 +388,16 @@ def hist_wavedisp(waves, disps, dispbin=None, wavebin=None, scale=1.0, debug=Fal
     lin_disps = np.power(10.0, disps)
 
     # Determine how many elements will be used for the histogram
-    nelem = np.zeros(dispbin.size-1, dtype=nb.types.uint64)
+    nelem = np.zeros(dispbin.size-1, dtype=np.uint64)
     for dd in range(dispbin.size-1):
         dispval = 0.5*(lin_dispbin[dd] + lin_dispbin[dd+1])
         nelem[dd] = np.int(0.5 + scale*(wavebin[1]-wavebin[0])/dispval)
 
     # Generate a histogram
     nhistv = np.sum(nelem)
-    hist_wd = np.zeros(nhistv, dtype=nb.types.uint64)
-    cent_w = np.zeros(nhistv, dtype=nb.types.uint64)
-    cent_d = np.zeros(nhistv, dtype=nb.types.uint64)
+    hist_wd = np.zeros(nhistv, dtype=np.uint64)
+    cent_w = np.zeros(nhistv, dtype=np.uint64)
+    cent_d = np.zeros(nhistv, dtype=np.uint64)
     cntr = 0
     for dd in range(dispbin.size-1):
         wbin = np.linspace(wavebin[0], wavebin[1], nelem[dd]+1)
@@ -1,7 +1,6 @@
 """
 Module to setup the PypeIt debugger
 """
-import matplotlib.pyplot as plt
 import numpy as np
 
 # These need to be outside of the def's
@@ -38,6 +37,7 @@ def plot1d(*args, **kwargs):
       True for a scatter plot
     NOTE: Any extra parameters are fed as kwargs to plt.plot()
     """
+    from matplotlib import pyplot as plt
     # Error checking
     if len(args) == 0:
         print('x_guis.simple_splot: No arguments!')
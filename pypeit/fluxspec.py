@@ -4,7 +4,6 @@ import numpy as np
 import linetools
 import os
 import json
-import matplotlib.pyplot as plt
 
 #from importlib import reload
 
@@ -20,8 +20,6 @@ import subprocess
 #import pdb as debugger
 #from pypeit import scienceimage
 
-from ginga.util import grc
-
 from astropy.io import fits
 
 from pypeit import msgs
@@ -46,6 +44,7 @@ def connect_to_ginga(host='localhost', port=9000, raise_err=False, allow_new=Fal
     Returns:
         RemoteClient: connection to ginga viewer.
     """
+    from ginga.util import grc
     # Start
     viewer = grc.RemoteClient(host, port)
     # Test
@@ -20,7 +20,6 @@ from pypeit import msgs
 # writing to the header. See `initialize_header`
 import scipy
 import astropy
-import sklearn
 import pypeit
 
 class MasterFrame(object):
@@ -268,6 +267,7 @@ class MasterFrame(object):
             `astropy.io.fits.Header`: The initialized (or edited)
             fits header.
         """
+        import sklearn
         # Add versioning; this hits the highlights but should it add
         # the versions of all packages included in the requirements.txt
         # file?
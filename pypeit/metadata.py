@@ -4,6 +4,11 @@ Provides a class that handles the fits metadata required by PypeIt.
 import os
 import io
 import string
+import functools
+import json
+import hashlib
+
+from concurrent import futures
 
 import numpy as np
 import yaml
@@ -15,6 +20,7 @@ from astropy import table, coordinates, time
 
 from pypeit import msgs
 from pypeit import utils
+from pypeit import __version__
 from pypeit.core import framematch
 from pypeit.core import flux
 from pypeit.core import parse
@@ -272,24 +278,48 @@ class PypeItMetaData:
         data['directory'] = ['None']*len(_files)
         data['filename'] = ['None']*len(_files)
 
+        # Find the files with metadata in the persistent index
+        index = PypeItMetaDataIndex(self.spectrograph) if self.par['rdx']['metadata_cache'] \
+                    else None
+        cached = [None]*len(_files) if index is None else [index.get(f) for f in _files]
+        ncached = np.sum([c is not None for c in cached])
+        if ncached > 0:
+            msgs.info('Using indexed metadata for {0} of {1} files.'.format(ncached,
+                                                                             len(_files)))
+
+        # Read the fits headers of the remaining files
+        read_indx = [i for i,c in enumerate(cached) if c is None]
+        headarrs = [None]*len(_files)
+        for i, headarr in zip(read_indx, self._read_headers([_files[i] for i in read_indx],
+                                                             strict=strict)):
+            headarrs[i] = headarr
+
         # Build the table
-        for idx, ifile in enumerate(_files):
+        for idx, (ifile, headarr) in enumerate(zip(_files, headarrs)):
             # User data (for frame type)
             usr_row = None if usrdata is None else usrdata[idx]
 
             # Add the directory and file name to the table
             data['directory'][idx], data['filename'][idx] = os.path.split(ifile)
 
-            # Read the fits headers
-            headarr = self.spectrograph.get_headarr(ifile, strict=strict)
+            if cached[idx] is not None:
+                for meta_key in self.spectrograph.meta.keys():
+                    data[meta_key].append(cached[idx][meta_key])
+                continue
 
             # Grab Meta
+            meta = {}
             for meta_key in self.spectrograph.meta.keys():
-                value = self.spectrograph.get_meta_value(ifile, meta_key, headarr=headarr,
-                                                         required=strict, usr_row=usr_row,
+                meta[meta_key] = self.spectrograph.get_meta_value(ifile, meta_key,
+                                        headarr=headarr, required=strict, usr_row=usr_row,
                                         ignore_bad_header=self.par['rdx']['ignore_bad_headers'])
-                data[meta_key].append(value)
+                data[meta_key].append(meta[meta_key])
             msgs.info('Added metadata for {0}'.format(os.path.split(ifile)[1]))
+            if index is not None:
+                index.set(ifile, meta)
+
+        if index is not None:
+            index.write()
 
         # JFH Changed the below to now crash if some files have None in their MJD. This is the desired behavior
         # since if there are empty or corrupt files we still want this to run.
@@ -311,6 +341,42 @@ class PypeItMetaData:
         # Return
         return data
 
+    def _read_headers(self, files, strict=True):
+        """
+        Read the headers needed to construct the metadata for each file.
+
+        The number of concurrent workers is set by
+        ``par['rdx']['header_nproc']``.  Uncompressed files are read by a
+        pool of threads, which is sufficient because the work is
+        dominated by I/O.  If any of the files are gzipped, the
+        decompression is CPU bound and a pool of processes is used
+        instead.
+
+        Args:
+            files (:obj:`list`):
+                Files to read.
+            strict (:obj:`bool`, optional):
+                Function will fault if the header of any file cannot be
+                read; see
+                :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_headarr`.
+
+        Returns:
+            list: List with the header arrays for each file, in the
+            same order as `files`.
+        """
+        read = functools.partial(self.spectrograph.get_headarr, strict=strict)
+        nproc = min(self.par['rdx']['header_nproc'], len(files))
+        if nproc < 2:
+            return [read(f) for f in files]
+
+        use_processes = np.any([f.endswith('.gz') for f in files])
+        msgs.info('Reading {0} headers using {1} {2}'.format(len(files), nproc,
+                  'processes' if use_processes else 'threads'))
+        Executor = futures.ProcessPoolExecutor if use_processes else futures.ThreadPoolExecutor
+        with Executor(max_workers=nproc) as executor:
+            # Executor.map returns the results in the order of the input
+            return list(executor.map(read, files))
+
     def get_manual_extract(self, frames, det):
         """
         Parse the manual_extract column for a given frame and detector
@@ -457,7 +523,7 @@ class PypeItMetaData:
             raise KeyError('The user-provided table must have \'filename\' column!')
 
         # Make sure the data are correctly ordered
-        srt = [np.where(f == self.table['filename'])[0][0] for f in usrdata['filename']]
+        srt = self._filename_rows(usrdata['filename'])
 
         # Convert types if possible
         existing_keys = list(set(self.table.keys()) & set(usrdata.keys()))
@@ -479,6 +545,64 @@ class PypeItMetaData:
         for key in usrdata.keys():
             self.table[key] = usrdata[key][srt]
 
+    def _filename_rows(self, filenames):
+        """
+        Find the table rows with the provided file names.
+
+        Args:
+            filenames (array-like):
+                File names to find.
+
+        Returns:
+            `numpy.ndarray`_: The index of the (first) table row with
+            each file name.
+
+        Raises:
+            PypeItError:
+                Raised if any file name is not in the table.
+        """
+        # Build the lookup in reverse so that the first occurrence of
+        # a repeated file name is used
+        rows = {f:i for i,f in reversed(list(enumerate(self.table['filename'])))}
+        missing = [f for f in filenames if f not in rows]
+        if len(missing) > 0:
+            msgs.error('Files not in the metadata table: {0}'.format(', '.join(missing)))
+        return np.array([rows[f] for f in filenames], dtype=int)
+
+    def _unique_configuration_rows(self, cfg_keys):
+        """
+        Find the rows with identical values for the configuration keys.
+
+        This is the equivalent of :func:`numpy.unique` on the rows of
+        the table with the selected columns, except that the unique
+        rows are returned in the order they first appear in the table.
+
+        Args:
+            cfg_keys (:obj:`list`):
+                Metadata keys that define the configuration.
+
+        Returns:
+            tuple: Two `numpy.ndarray`_ objects with the index of the
+            first row with each unique set of values and the index in
+            this array that reconstructs all rows of the table.
+        """
+        # Column values as hashable tuples; the tuple conversion allows
+        # for arrays in the Table (e.g. binning)
+        if len(cfg_keys) == 0:
+            # All rows are identical
+            return np.zeros(min(len(self),1), dtype=int), np.zeros(len(self), dtype=int)
+        columns = [[tuple(v) if isinstance(v, list) else v for v in self.table[k].tolist()]
+                        for k in cfg_keys]
+        groups = {}
+        first = []
+        inv = np.empty(len(self), dtype=int)
+        for i, key in enumerate(zip(*columns)):
+            if key not in groups:
+                groups[key] = len(first)
+                first += [i]
+            inv[i] = groups[key]
+        return np.array(first, dtype=int), inv
+
     def finalize_usr_build(self, frametype, setup):
         """
         Finalize the build of the table based on user-provided data,
@@ -834,9 +958,49 @@ class PypeItMetaData:
             msgs.info('All files assumed to be from a single configuration.')
             return self.configs
 
+        # Frames with identical values for all the configuration keys
+        # must belong to the same configuration, so only the first
+        # frame of each group needs to be matched.  Groups are kept in
+        # the order they first appear so that the configurations are
+        # identical to matching each frame in turn.
+        _, inv = self._unique_configuration_rows(cfg_keys)
+        _, first = np.unique(inv[indx], return_index=True)
+        self.configs, reflexive = self._match_configurations(indx[np.sort(first)], cfg_keys)
+        if not reflexive:
+            # Some frames do not match their own configuration (e.g.,
+            # because of a None value) so they must be matched one at a
+            # time.
+            self.configs, _ = self._match_configurations(indx, cfg_keys)
+
+        msgs.info('Found {0} unique configurations.'.format(len(self.configs)))
+        return self.configs
+
+    def _match_configurations(self, indx, cfg_keys):
+        """
+        Construct the unique configurations by matching each selected
+        frame to the configurations already found.
+
+        Args:
+            indx (`numpy.ndarray`_):
+                Table rows to match, in order.
+            cfg_keys (:obj:`list`):
+                Metadata keys that define the configuration.
+
+        Returns:
+            tuple: The dictionary with the configurations and a flag
+            that each new configuration matches the frame used to
+            define it.
+        """
+        # Configuration identifiers are iterations through the
+        # upper-case letters: A, B, C, etc.
+        cfg_iter = string.ascii_uppercase
+        cfg_indx = 0
+
         # Use the first file to set the first unique configuration
-        self.configs = {}
-        self.configs[cfg_iter[cfg_indx]] = self.get_configuration(indx[0], cfg_keys=cfg_keys)
+        configs = {}
+        configs[cfg_iter[cfg_indx]] = self.get_configuration(indx[0], cfg_keys=cfg_keys)
+        reflexive = row_match_config(self.table[indx[0]], configs[cfg_iter[cfg_indx]],
+                                     self.spectrograph)
         cfg_indx += 1
 
         # Check if any of the other files show a different
@@ -846,19 +1010,19 @@ class PypeItMetaData:
         # TODO: Add a tolerance for floating point values?
         for i in indx[1:]:
             j = 0
-            for c in self.configs.values():
+            for c in configs.values():
                 if row_match_config(self.table[i], c, self.spectrograph):
                     break
                 j += 1
-            unique = j == len(self.configs)
+            unique = j == len(configs)
             if unique:
                 if cfg_indx == len(cfg_iter):
                     msgs.error('Cannot assign more than {0} configurations!'.format(len(cfg_iter)))
-                self.configs[cfg_iter[cfg_indx]] = self.get_configuration(i, cfg_keys=cfg_keys)
+                configs[cfg_iter[cfg_indx]] = self.get_configuration(i, cfg_keys=cfg_keys)
+                reflexive &= row_match_config(self.table[i], configs[cfg_iter[cfg_indx]],
+                                              self.spectrograph)
                 cfg_indx += 1
-
-        msgs.info('Found {0} unique configurations.'.format(len(self.configs)))
-        return self.configs
+        return configs, reflexive
 
     def set_configurations(self, configs=None, force=False, ignore_frames=None, fill=None):
         """
@@ -907,12 +1071,19 @@ class PypeItMetaData:
             if len(set(cfg.keys()) - set(self.keys())) > 0:
                 msgs.error('Configuration {0} defined using unavailable keywords!'.format(k))
 
-        self.table['setup'] = 'None'
-        nrows = len(self)
-        for i in range(nrows):
+        # Frames with identical values for all the configuration keys
+        # are assigned the same configuration, so only match the first
+        # frame of each group
+        cfg_keys = list(set().union(*[cfg.keys() for cfg in _configs.values()]))
+        first, inv = self._unique_configuration_rows(cfg_keys)
+        setup = np.full(len(first), 'None', dtype=object)
+        for j, i in enumerate(first):
             for d, cfg in _configs.items():
                 if row_match_config(self.table[i], cfg, self.spectrograph):
-                    self.table['setup'][i] = d
+                    setup[j] = d
+        self.table['setup'] = 'None'
+        if len(self) > 0:
+            self.table['setup'][:] = setup[inv]
         # Deal with ignored frames (e.g. bias)
         #  For now, we set them to setup=A
         not_setup = self.table['setup'] == 'None'
@@ -932,30 +1103,32 @@ class PypeItMetaData:
         # Find the number groups by searching for the maximum number
         # provided, regardless of whether or not a science frame is
         # assigned to that group.
+        # Only parse each unique string once
+        calib, inv = np.unique(np.asarray(self['calib']).astype(str), return_inverse=True)
         ngroups = 0
-        for i in range(len(self)):
-            if self['calib'][i] in ['all', 'None']:
+        for c in calib:
+            if c in ['all', 'None']:
                 # No information, keep going
                 continue
             # Convert to a list of numbers
-            l = np.amax([ 0 if len(n) == 0 else int(n)
-                                for n in self['calib'][i].replace(':',',').split(',')])
+            l = np.amax([ 0 if len(n) == 0 else int(n) for n in c.replace(':',',').split(',')])
             # Check against current maximum
             ngroups = max(l+1, ngroups)
 
         # Define the bitmask and initialize the bits
         self.calib_bitmask = BitMask(np.arange(ngroups))
-        self['calibbit'] = 0
+        calibbit = np.zeros(len(calib), dtype=int)
 
         # Set the calibration bits
-        for i in range(len(self)):
+        for i, c in enumerate(calib):
             # Convert the string to the group list
-            grp = parse.str2list(self['calib'][i], ngroups)
+            grp = parse.str2list(c, ngroups)
             if grp is None:
                 # No group selected
                 continue
             # Assign the group; ensure the integers are unique
-            self['calibbit'][i] = self.calib_bitmask.turn_on(self['calibbit'][i], grp)
+            calibbit[i] = self.calib_bitmask.turn_on(calibbit[i], grp)
+        self['calibbit'] = calibbit[inv]
 
     def _check_calib_groups(self):
         """
@@ -968,10 +1141,8 @@ class PypeItMetaData:
 
         """
         is_science = self.find_frames('science')
-        for i in range(len(self)):
-            if not is_science[i]:
-                continue
-            if len(self.calib_bitmask.flagged_bits(self['calibbit'][i])) > 1:
+        for b in np.unique(self['calibbit'][is_science]):
+            if len(self.calib_bitmask.flagged_bits(b)) > 1:
                 msgs.error('Science frames can only be assigned to a single calibration group.')
 
     @property
@@ -1264,8 +1435,13 @@ class PypeItMetaData:
             if len(user.keys()) != len(self):
                 raise ValueError('The user-provided dictionary does not match table length.')
             msgs.info('Using user-provided frame types.')
+            # Set the bits for all files with the same types at once
+            filenames = np.asarray(self['filename'])
+            ftype_files = {}
             for ifile,ftypes in user.items():
-                indx = self['filename'] == ifile
+                ftype_files.setdefault(ftypes, []).append(ifile)
+            for ftypes, files in ftype_files.items():
+                indx = np.isin(filenames, files)
                 type_bits[indx] = self.type_bitmask.turn_on(type_bits[indx], flag=ftypes.split(','))
             return self.set_frame_types(type_bits, merge=merge)
     
@@ -1734,3 +1910,153 @@ def row_match_config(row, config, spectrograph):
             match.append(np.all(config[k] == row[k]))
     # Check
     return np.all(match)
+
+
+class PypeItMetaDataIndex:
+    """
+    Persistent, on-disk index of the metadata read from raw files.
+
+    Each entry is keyed by the absolute path of the file and is only
+    used if the size and modification time of the file are unchanged.
+    The index is specific to a spectrograph, and it is discarded
+    entirely if the spectrograph's metadata definition
+    (:attr:`pypeit.spectrographs.spectrograph.Spectrograph.meta`) or
+    the PypeIt version changes.
+
+    Only files with a value for every metadata key are indexed.  Files
+    with missing values are always read again so that the checks
+    performed by
+    :func:`pypeit.spectrographs.spectrograph.Spectrograph.get_meta_value`
+    are repeated.
+
+    Args:
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`):
+            The spectrograph used to collect the data.
+        cache_dir (:obj:`str`, optional):
+            Directory for the index file.  If None, use
+            :func:`default_cache_dir`.
+
+    Attributes:
+        ofile (:obj:`str`):
+            Name of the index file.
+        meta_hash (:obj:`str`):
+            Hash of the metadata definition.
+        files (:obj:`dict`):
+            The indexed metadata.
+    """
+    def __init__(self, spectrograph, cache_dir=None):
+        _cache_dir = self.default_cache_dir() if cache_dir is None else cache_dir
+        self.ofile = os.path.join(_cache_dir, '{0}_metadata.json'.format(
+                                  spectrograph.spectrograph))
+        self.meta_hash = self.hash_meta(spectrograph.meta)
+        self.files = {}
+        self._updated = False
+        if not os.path.isfile(self.ofile):
+            return
+        try:
+            with open(self.ofile, 'r') as f:
+                index = json.load(f)
+        except (IOError, ValueError):
+            msgs.warn('Could not read metadata index {0}; it will be rebuilt.'.format(self.ofile))
+            return
+        if index.get('meta_hash') == self.meta_hash:
+            self.files = index['files']
+
+    @staticmethod
+    def default_cache_dir():
+        """
+        Return the default directory for the index.
+
+        This is set by the `PYPEIT_CACHE` environmental variable, if
+        defined, and is `~/.pypeit/cache` otherwise.
+        """
+        return os.environ['PYPEIT_CACHE'] if 'PYPEIT_CACHE' in os.environ \
+                    else os.path.join(os.path.expanduser('~'), '.pypeit', 'cache')
+
+    @staticmethod
+    def hash_meta(meta):
+        """
+        Construct a hash of a metadata definition.
+
+        Args:
+            meta (:obj:`dict`):
+                Metadata definition of a spectrograph.
+
+        Returns:
+            str: The hash of the definition and the PypeIt version.
+        """
+        _meta = json.dumps(meta, sort_keys=True, default=str) + __version__
+        return hashlib.md5(_meta.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_key(ifile):
+        """
+        Return the index key and file signature for a file.
+
+        Returns:
+            tuple: The absolute path to the file and a list with its
+            size and modification time.
+        """
+        stat = os.stat(ifile)
+        return os.path.abspath(ifile), [stat.st_size, stat.st_mtime]
+
+    def get(self, ifile):
+        """
+        Get the indexed metadata for a file.
+
+        Args:
+            ifile (:obj:`str`):
+                File name.
+
+        Returns:
+            dict: The metadata for the file, or None if the file is not
+            indexed or has been changed.
+        """
+        try:
+            key, signature = self.file_key(ifile)
+        except OSError:
+            return None
+        if key not in self.files or self.files[key]['signature'] != signature:
+            return None
+        return self.files[key]['meta']
+
+    def set(self, ifile, meta):
+        """
+        Add the metadata for a file to the index.
+
+        Args:
+            ifile (:obj:`str`):
+                File name.
+            meta (:obj:`dict`):
+                Metadata read for the file.  Not indexed if any value is
+                None or not a basic type.
+        """
+        if not np.all([isinstance(v, (str, int, float)) for v in meta.values()]):
+            return
+        try:
+            key, signature = self.file_key(ifile)
+        except OSError:
+            return
+        self.files[key] = dict(signature=signature, meta=meta)
+        self._updated = True
+
+    def write(self):
+        """
+        Write the index, if it has been updated.
+        """
+        if not self._updated:
+            return
+        try:
+            cache_dir = os.path.dirname(self.ofile)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            # Write to a temporary file and then move it to prevent
+            # concurrent runs from reading a partially written index
+            tmpfile = '{0}.{1}'.format(self.ofile, os.getpid())
+            with open(tmpfile, 'w') as f:
+                json.dump(dict(meta_hash=self.meta_hash, files=self.files), f)
+            os.replace(tmpfile, self.ofile)
+        except OSError:
+            msgs.warn('Could not write metadata index {0}.'.format(self.ofile))
+            return
+        self._updated = False
@@ -72,6 +72,7 @@ from astropy.time import Time
 from pypeit.par.parset import ParSet
 from pypeit.par import util
 from pypeit.core.framematch import FrameTypeBitMask
+from pypeit.core import qa
 
 # Needs this to determine the valid spectrographs TODO: This causes a
 # circular import.  Spectrograph specific parameter sets and where they
@@ -900,7 +901,8 @@ class ReducePar(ParSet):
     see :ref:`pypeitpar`.
     """
     def __init__(self, spectrograph=None, detnum=None, sortroot=None, calwin=None, scidir=None,
-                 qadir=None, redux_path=None, ignore_bad_headers=None):
+                 qadir=None, redux_path=None, ignore_bad_headers=None, spec2d_output=None,
+                 header_nproc=None, metadata_cache=None, qa_mode=None, qa_nproc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -952,6 +954,44 @@ class ReducePar(ParSet):
         dtypes['redux_path'] = str
         descr['redux_path'] = 'Path to folder for performing reductions.'
 
+        defaults['spec2d_output'] = 'float64'
+        options['spec2d_output'] = ReducePar.valid_spec2d_output()
+        dtypes['spec2d_output'] = str
+        descr['spec2d_output'] = 'Data model used to write the spec2d images.  float64 writes ' \
+                                 'double-precision images; float32 writes single-precision ' \
+                                 'images and the bitmask with its minimum integer type; ' \
+                                 'compressed also tile-compresses the float32 images ' \
+                                 '(quantized) and the bitmask (lossless).  Options are: ' \
+                                 '{0}'.format(', '.join(options['spec2d_output']))
+
+        defaults['header_nproc'] = 1
+        dtypes['header_nproc'] = int
+        descr['header_nproc'] = 'Number of concurrent workers used to read the raw file headers ' \
+                                'when building the metadata table.  Threads are used for ' \
+                                'uncompressed files and processes for gzipped files.  Set to 1 ' \
+                                'to read the headers serially.'
+
+        defaults['metadata_cache'] = False
+        dtypes['metadata_cache'] = bool
+        descr['metadata_cache'] = 'Keep a persistent index of the metadata read from each raw ' \
+                                  'file so that the headers of unchanged files are not read ' \
+                                  'again.  The index is kept in the directory set by the ' \
+                                  'PYPEIT_CACHE environment variable, or ~/.pypeit/cache, ' \
+                                  'outside of the reduction directory.'
+
+        defaults['qa_mode'] = 'async'
+        options['qa_mode'] = ReducePar.valid_qa_modes()
+        dtypes['qa_mode'] = str
+        descr['qa_mode'] = 'How the QA plots are rendered.  inline makes each plot when it is ' \
+                           'requested; async renders the plots in a pool of background ' \
+                           'processes while the reduction continues; off makes no QA plots.  ' \
+                           'Options are: {0}'.format(', '.join(options['qa_mode']))
+
+        defaults['qa_nproc'] = 2
+        dtypes['qa_nproc'] = int
+        descr['qa_nproc'] = 'Number of background processes used to render the QA plots when ' \
+                            'qa_mode is async.'
+
         # Instantiate the parameter set
         super(ReducePar, self).__init__(list(pars.keys()),
                                         values=list(pars.values()),
@@ -967,12 +1007,27 @@ class ReducePar(ParSet):
 
         # Basic keywords
         parkeys = [ 'spectrograph', 'detnum', 'sortroot', 'calwin', 'scidir', 'qadir',
-                    'redux_path', 'ignore_bad_headers']
+                    'redux_path', 'ignore_bad_headers', 'spec2d_output', 'header_nproc',
+                    'metadata_cache', 'qa_mode', 'qa_nproc']
         kwargs = {}
         for pk in parkeys:
             kwargs[pk] = cfg[pk] if pk in k else None
         return cls(**kwargs)
 
+    @staticmethod
+    def valid_spec2d_output():
+        """
+        Return the valid data models for the spec2d images.
+        """
+        return ['float64', 'float32', 'compressed']
+
+    @staticmethod
+    def valid_qa_modes():
+        """
+        Return the valid QA rendering modes.
+        """
+        return qa.valid_qa_modes()
+
     @staticmethod
     def valid_spectrographs():
         # WARNING: Needs this to determine the valid spectrographs.
@@ -990,7 +1045,10 @@ class ReducePar(ParSet):
                 'lbt_mods1r', 'lbt_mods1b', 'lbt_mods2r', 'lbt_mods2b', 'vlt_fors2']
 
     def validate(self):
-        pass
+        if self.data['header_nproc'] < 1:
+            raise ValueError('Number of header workers must be at least 1.')
+        if self.data['qa_nproc'] < 1:
+            raise ValueError('Number of QA processes must be at least 1.')
 
     
 class WavelengthSolutionPar(ParSet):
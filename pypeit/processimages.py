@@ -368,12 +368,7 @@ class ProcessImages(object):
         self.mspixelflat -- Modified internally
 
         """
-        # TODO: This is overkill when self.datasec is loaded, and this
-        # call is made for a few of the steps.  Can we be more
-        # efficient?
-        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det)
-        if trim:
-            datasec_img = procimg.trim_frame(datasec_img, datasec_img < 1)
+        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det, trim=trim)
         if self.stack.shape != datasec_img.shape:
             raise ValueError('Shape mismatch: {0} {1}'.format(self.stack.shape, datasec_img.shape))
         
@@ -420,6 +415,7 @@ class ProcessImages(object):
         # If trimming, get the image identifying amplifier used for the
         # data section
         datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det)
+        trim_mask = datasec_img < 1
         msgs.info("Bias subtracting your image(s)")
         # Reset proc_images -- Is there any reason we wouldn't??
         numamplifiers = self.spectrograph.detector[self.det-1]['numamplifiers']
@@ -429,7 +425,7 @@ class ProcessImages(object):
                 msgs.info("Subtracting bias image from raw frame")
                 # Trim?
                 if trim:
-                    image = procimg.trim_frame(image, datasec_img < 1)
+                    image = procimg.trim_frame(image, trim_mask)
                 temp = image-msbias
             elif isinstance(msbias, str) and msbias == 'overscan':
                 msgs.info("Using overscan to subtract")
@@ -439,7 +435,7 @@ class ProcessImages(object):
                                                  params=self.proc_par['overscan_par'])
                 # Trim?
                 if trim:
-                    temp = procimg.trim_frame(temp, datasec_img < 1)
+                    temp = procimg.trim_frame(temp, trim_mask)
             else:
                 msgs.error('Could not subtract bias level with the input bias approach.')
             # Save
@@ -551,13 +547,13 @@ class ProcessImages(object):
             # Trim even if not bias subtracting
             temp = self.raw_images[0]
             if trim:
-                datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det)
-                temp = procimg.trim_frame(temp, datasec_img < 1)
+                trim_mask = self.spectrograph.get_datasec_img(self.files[0], det=self.det) < 1
+                temp = procimg.trim_frame(temp, trim_mask)
             # Init proc_images array
             self.proc_images = np.zeros((temp.shape[0], temp.shape[1], self.nloaded))
             # Load it up
             for kk,image in enumerate(self.raw_images):
-                self.proc_images[:,:,kk] = procimg.trim_frame(image, datasec_img < 1) \
+                self.proc_images[:,:,kk] = procimg.trim_frame(image, trim_mask) \
                                                 if trim else image
         # Combine
         self.stack = self.proc_images[:,:,0] if self.proc_images.shape[2] == 1 else self.combine()
@@ -589,9 +585,7 @@ class ProcessImages(object):
 
         """
         msgs.info("Generating read noise image from detector properties and amplifier layout)")
-        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det)
-        if trim:
-            datasec_img = procimg.trim_frame(datasec_img, datasec_img < 1)
+        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det, trim=trim)
         detector = self.spectrograph.detector[self.det-1]
         self.rn2img = procimg.rn_frame(datasec_img, detector['gain'], detector['ronoise'], numamplifiers=detector['numamplifiers'])
 
@@ -613,9 +607,7 @@ class ProcessImages(object):
 
         """
         msgs.info("Generating raw variance frame (from detected counts [flat fielded])")
-        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det)
-        if trim:
-            datasec_img = procimg.trim_frame(datasec_img, datasec_img < 1)
+        datasec_img = self.spectrograph.get_datasec_img(self.files[0], det=self.det, trim=trim)
         detector = self.spectrograph.detector[self.det-1]
         self.rawvarframe = procimg.variance_frame(datasec_img, self.stack,
                                                     detector['gain'], detector['ronoise'],
@@ -686,37 +678,38 @@ class ProcessImages(object):
         # Instatiate the mask
         mask = np.zeros_like(sciimg, dtype=cls.bitmask.minimum_dtype(asuint=True))
 
+        # The bits are set in place, and the boolean selection arrays
+        # are reused, to limit the number of full-frame temporaries
+        indx = np.empty(mask.shape, dtype=bool)
+
         # Bad pixel mask
-        indx = bpm.astype(bool)
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'BPM')
+        cls.bitmask.turn_on_inplace(mask, 'BPM', where=bpm.astype(bool))
 
         # Cosmic rays
-        indx = crmask.astype(bool)
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'CR')
+        cls.bitmask.turn_on_inplace(mask, 'CR', where=crmask.astype(bool))
 
         # Saturated pixels
-        indx = sciimg >= saturation
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'SATURATION')
+        cls.bitmask.turn_on_inplace(mask, 'SATURATION',
+                                    where=np.greater_equal(sciimg, saturation, out=indx))
 
         # Minimum counts
-        indx = sciimg <= mincounts
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'MINCOUNTS')
+        cls.bitmask.turn_on_inplace(mask, 'MINCOUNTS',
+                                    where=np.less_equal(sciimg, mincounts, out=indx))
 
         # Undefined counts
-        indx = np.invert(np.isfinite(sciimg))
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'IS_NAN')
+        cls.bitmask.turn_on_inplace(mask, 'IS_NAN',
+                                    where=np.invert(np.isfinite(sciimg, out=indx), out=indx))
 
         # Bad inverse variance values
-        indx = np.invert(sciivar > 0.0)
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'IVAR0')
+        cls.bitmask.turn_on_inplace(mask, 'IVAR0',
+                                    where=np.invert(np.greater(sciivar, 0.0, out=indx), out=indx))
 
         # Undefined inverse variances
-        indx = np.invert(np.isfinite(sciivar))
-        mask[indx] = cls.bitmask.turn_on(mask[indx], 'IVAR_NAN')
+        cls.bitmask.turn_on_inplace(mask, 'IVAR_NAN',
+                                    where=np.invert(np.isfinite(sciivar, out=indx), out=indx))
 
         if slitmask is not None:
-            indx = slitmask == -1
-            mask[indx] = cls.bitmask.turn_on(mask[indx], 'OFFSLITS')
+            cls.bitmask.turn_on_inplace(mask, 'OFFSLITS', where=np.equal(slitmask, -1, out=indx))
 
         return mask
 
@@ -724,13 +717,9 @@ class ProcessImages(object):
     def update_mask_cr(cls, mask_old, crmask_new):
 
         # Unset the CR bit from all places where it was set
-        CR_old = (cls.bitmask.unpack(mask_old, flag='CR'))[0]
-        mask_new = np.copy(mask_old)
-        mask_new[CR_old] = cls.bitmask.turn_off(mask_new[CR_old], 'CR')
+        mask_new = cls.bitmask.turn_off_inplace(np.copy(mask_old), 'CR')
         # Now set the CR bit using the new crmask
-        indx = crmask_new.astype(bool)
-        mask_new[indx] = cls.bitmask.turn_on(mask_new[indx], 'CR')
-        return mask_new
+        return cls.bitmask.turn_on_inplace(mask_new, 'CR', where=crmask_new.astype(bool))
 
 
     # Do we still need this function?
@@ -738,10 +727,7 @@ class ProcessImages(object):
     def update_mask_slitmask(cls, mask_old, slitmask):
 
         # Pixels excluded from any slit.
-        mask_new = np.copy(mask_old)
-        indx = slitmask == -1
-        mask_new[indx] = cls.bitmask.turn_on(mask_new[indx], 'OFFSLITS')
-        return mask_new
+        return cls.bitmask.turn_on_inplace(np.copy(mask_old), 'OFFSLITS', where=slitmask == -1)
 
     @classmethod
     def read_stack(cls, files, bias, pixel_flat, bpm, det, proc_par, spectrograph, illum_flat=None, reject_cr=False,
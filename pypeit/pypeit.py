@@ -5,7 +5,6 @@ import time
 import os
 import numpy as np
 from collections import OrderedDict
-import IPython
 
 from astropy.io import fits
 from pypeit import msgs
@@ -13,6 +12,7 @@ from pypeit import calibrations
 from pypeit import scienceimage
 from pypeit import ginga
 from pypeit import reduce
+from pypeit import timing
 from pypeit.core import qa
 from pypeit.core import wave
 from pypeit.core import save
@@ -128,6 +128,7 @@ class PypeIt(object):
         msgs.info('Master calibration data output to: {0}'.format(self.calibrations_path))
         msgs.info('Science data output to: {0}'.format(self.science_path))
         msgs.info('Quality assessment plots output to: {0}'.format(self.qa_path))
+        qa.set_qa_mode(self.par['rdx']['qa_mode'], nproc=self.par['rdx']['qa_nproc'])
         # TODO: Is anything written to the qa dir or only to qa/PNGs?
         # Should we have separate calibration and science QA
         # directories?
@@ -167,8 +168,14 @@ class PypeIt(object):
 
     def build_qa(self):
         """
-        Generate QA wrappers
+        Generate QA wrappers, once all the QA plots have been rendered
         """
+        failures = qa.finish_qa()
+        for failure in failures:
+            msgs.warn('QA plot could not be rendered:' + msgs.newline()
+                      + failure.rstrip().replace('\n', msgs.newline()))
+        if len(failures) > 0:
+            msgs.warn('{0} QA plot(s) could not be rendered'.format(len(failures)))
         # TODO: pass qa path
         qa.gen_mf_html(self.pypeit_file)
         qa.gen_exp_html()
@@ -242,6 +249,7 @@ class PypeIt(object):
         self.par.validate_keys(required=required, can_be_None=can_be_None)
 
         self.tstart = time.time()
+        timing.reset()
 
         # Find the standard frames
         is_standard = self.fitstbl.find_frames('standard')
@@ -309,6 +317,7 @@ class PypeIt(object):
 
         # Finish
         self.print_end_time()
+        self.write_timing()
 
     # This is a static method to allow for use in coadding script 
     @staticmethod
@@ -398,20 +407,22 @@ class PypeIt(object):
         for self.det in detectors:
             msgs.info("Working on detector {0}".format(self.det))
             sci_dict[self.det] = {}
-            # Calibrate
-            #TODO Is the right behavior to just use the first frame?
-            self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
-            self.caliBrate.run_the_steps()
-            # Extract
-            # TODO: pass back the background frame, pass in background
-            # files as an argument. extract one takes a file list as an
-            # argument and instantiates science within
-            sci_dict[self.det]['sciimg'], sci_dict[self.det]['sciivar'], \
-                sci_dict[self.det]['skymodel'], sci_dict[self.det]['objmodel'], \
-                sci_dict[self.det]['ivarmodel'], sci_dict[self.det]['outmask'], \
-                sci_dict[self.det]['specobjs'], vel_corr \
-                        = self.extract_one(frames, self.det, bg_frames=bg_frames,
-                                           std_outfile=std_outfile)
+            # Steps timed within this block are tagged with the frame and detector
+            with timing.step('PypeIt.reduce_exposure', frame=frames[0], det=self.det):
+                # Calibrate
+                #TODO Is the right behavior to just use the first frame?
+                self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
+                self.caliBrate.run_the_steps()
+                # Extract
+                # TODO: pass back the background frame, pass in background
+                # files as an argument. extract one takes a file list as an
+                # argument and instantiates science within
+                sci_dict[self.det]['sciimg'], sci_dict[self.det]['sciivar'], \
+                    sci_dict[self.det]['skymodel'], sci_dict[self.det]['objmodel'], \
+                    sci_dict[self.det]['ivarmodel'], sci_dict[self.det]['outmask'], \
+                    sci_dict[self.det]['specobjs'], vel_corr \
+                            = self.extract_one(frames, self.det, bg_frames=bg_frames,
+                                               std_outfile=std_outfile)
             if vel_corr is not None:
                 sci_dict['meta']['vel_corr'] = vel_corr
 
@@ -420,6 +431,7 @@ class PypeIt(object):
         # Return
         return sci_dict
 
+    @timing.timed()
     def flexure_correct(self, sobjs, maskslits):
         """
         Correct for flexure
@@ -438,8 +450,8 @@ class PypeIt(object):
                                          mxshft=self.par['flexure']['maxshift'])
             # QA
             # TODO: Need to fix these QA paths...
-            wave.flexure_qa(sobjs, maskslits, self.basename, self.det, flex_list,
-                            out_dir=self.par['rdx']['redux_path'])
+            qa.render_qa(wave.flexure_qa, sobjs, maskslits, self.basename, self.det, flex_list,
+                         out_dir=self.par['rdx']['redux_path'])
         else:
             msgs.info('Skipping flexure correction.')
 
@@ -638,6 +650,7 @@ class PypeIt(object):
         return self.sciimg, self.sciivar, self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs, self.vel_corr
 
     # TODO: Why not use self.frame?
+    @timing.timed()
     def save_exposure(self, frame, sci_dict, basename):
         """
         Save the outputs from extraction for a given exposure
@@ -669,7 +682,8 @@ class PypeIt(object):
         save.save_all(sci_dict, self.caliBrate.master_key_dict, self.caliBrate.master_dir,
                       self.spectrograph, head1d, head2d, self.science_path, basename,
                       refframe=refframe, update_det=self.par['rdx']['detnum'],
-                      binning=self.fitstbl['binning'][frame])
+                      binning=self.fitstbl['binning'][frame],
+                      spec2d_output=self.par['rdx']['spec2d_output'])
 
     def msgs_reset(self):
         """
@@ -699,6 +713,15 @@ class PypeIt(object):
             scs = codetime - 60.0*mns - 3600.0*hrs
             msgs.info('Execution time: {0:d}h {1:d}m {2:.2f}s'.format(hrs, mns, scs))
 
+    def write_timing(self):
+        """
+        Write the time and memory used by each step of the reduction
+        to JSON and CSV files next to the log file (or the PypeIt file
+        if there is no log).
+        """
+        root = os.path.splitext(self.pypeit_file if self.logname is None else self.logname)[0]
+        timing.write_report(root)
+
     # TODO: Move this to fitstbl?
     def show_science(self):
         """
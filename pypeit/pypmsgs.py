@@ -10,7 +10,8 @@ import os
 import getpass
 import glob
 import textwrap
-import inspect
+import time
+import weakref
 
 # Imported for versioning
 import scipy
@@ -37,6 +38,28 @@ class Messages:
     For further details on colours see the following example:
     http://ascii-table.com/ansi-escape-sequences.php
 
+    Messages have a level (see :attr:`levels`) and are only formatted
+    and written if their level is at least the level set for the
+    module that issues them (see :func:`set_level`).  The default level
+    is ``'INFO'`` at all verbosities; debugging messages must be
+    enabled with ``set_level('DEBUG')``.  Any arguments
+    passed after the message are used to format it with
+    :func:`str.format`, such that messages that are not written cost
+    almost nothing::
+
+        msgs.info('Iteration {:d}: chi^2 = {:8.3f}', iiter, chi2)
+
+    A message issued from the same line of code more than
+    ``repeat_limit`` times within ``repeat_window`` seconds is
+    suppressed, and the number of suppressed messages is reported
+    once the window has passed.
+
+    The log file is opened in append mode and written one line at a
+    time, such that processes forked from the one that opened it
+    (e.g., the workers of a :class:`concurrent.futures.ProcessPoolExecutor`)
+    can safely write to it.  Their messages are tagged with their
+    process ID.
+
     Parameters
     ----------
     log : str or None
@@ -49,8 +72,18 @@ class Messages:
     colors : bool
       If true, the screen output will have colors, otherwise
       normal screen output will be displayed
+    repeat_limit : int or None
+      Maximum number of messages written from the same line of code
+      within repeat_window seconds.  If None, no messages are
+      suppressed.
+    repeat_window : float
+      Length in seconds of the window used to limit repeated
+      messages.
     """
-    def __init__(self, log=None, verbosity=None, colors=True):
+    levels = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+    def __init__(self, log=None, verbosity=None, colors=True, repeat_limit=50,
+                 repeat_window=10.):
 
         # Initialize other variables
         self._defverb = 1
@@ -67,6 +100,24 @@ class Messages:
         self.sciexp = None
         self.pypeit_file = None
 
+        # Message levels by module
+        self._level = None
+        self._module_levels = {}
+        self._level_cache = {}
+        self._set_default_level()
+
+        # Repeated messages
+        self.repeat_limit = repeat_limit
+        self.repeat_window = repeat_window
+        self._repeats = {}
+
+        # Tag for the messages of forked processes
+        self._pid = os.getpid()
+        self._proctag = ''
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
         # Initialize the log
         self._log = None
         self._initialize_log_file(log=log)
@@ -99,27 +150,128 @@ class Messages:
             msg = msg.replace(i, '')
         return msg
 
-    def _devmsg(self):
+    def _devmsg(self, frame):
         if self._verbosity == 2:
-            info = inspect.getouterframes(inspect.currentframe())[3]
-            devmsg = self._start + self._blue_CL + info[1].split('/')[-1] + ' ' + str(info[2]) \
-                        + ' ' + info[3] + '()' + self._end + ' - '
+            devmsg = self._start + self._blue_CL + frame.f_code.co_filename.split('/')[-1] + ' ' \
+                        + str(frame.f_lineno) + ' ' + frame.f_code.co_name + '()' + self._end \
+                        + ' - '
         else:
             devmsg = ''
         return devmsg
 
-    def _print(self, premsg, msg, last=True):
+    def _print(self, premsg, msg, last=True, frame=None):
         """
         Print to standard error and the log file
         """
-        devmsg = self._devmsg()
-        _msg = premsg+devmsg+msg
+        devmsg = self._devmsg(sys._getframe(2) if frame is None else frame)
+        _msg = premsg+self._proctag+devmsg+msg
         if self._verbosity != 0:
             print(_msg, file=sys.stderr)
         if self._log:
             clean_msg = self._cleancolors(_msg)
             self._log.write(clean_msg+'\n' if last else clean_msg)
 
+    def _after_fork(self):
+        """
+        Tag the messages of a forked process and reset its repeat counts
+        """
+        self._proctag = '(pid {0}) '.format(os.getpid())
+        self._repeats = {}
+
+    def _set_default_level(self):
+        # Debug messages are only written if requested with set_level,
+        # whatever the verbosity
+        self._level = self.levels['INFO']
+        self._level_cache = {}
+
+    def _module_level(self, module):
+        """
+        Return the level for a module, using the most specific module
+        level set (see :func:`set_level`).
+        """
+        try:
+            return self._level_cache[module]
+        except KeyError:
+            pass
+        level = self._level
+        name = module
+        while name:
+            if name in self._module_levels:
+                level = self._module_levels[name]
+                break
+            name = name.rpartition('.')[0]
+        self._level_cache[module] = level
+        return level
+
+    def _enabled(self, level, frame, limit=True):
+        """
+        Check if a message issued from ``frame`` should be written.
+        """
+        if self._verbosity == 0 and self._log is None:
+            return False
+        if level < self._module_level(frame.f_globals.get('__name__', '')):
+            return False
+        if not limit or self.repeat_limit is None:
+            return True
+        # Rate-limit messages from the same line of code
+        key = (frame.f_code.co_filename, frame.f_lineno)
+        now = time.monotonic()
+        repeat = self._repeats.get(key)
+        if repeat is None or now - repeat[0] > self.repeat_window:
+            if repeat is not None and repeat[2] > 0:
+                self._report_repeats(key, repeat[2], frame)
+            self._repeats[key] = [now, 1, 0]
+            return True
+        repeat[1] += 1
+        if repeat[1] > self.repeat_limit:
+            repeat[2] += 1
+            return False
+        return True
+
+    def _report_repeats(self, key, nsuppressed, frame):
+        premsg = self._start + self._green_CL + '[INFO]    ::' + self._end + ' '
+        self._print(premsg, 'Suppressed {0} repeated message(s) from {1}:{2}'.format(
+                    nsuppressed, os.path.basename(key[0]), key[1]), frame=frame)
+
+    def flush_repeats(self):
+        """
+        Report the number of repeated messages that were suppressed and
+        reset the counts.
+        """
+        repeats, self._repeats = self._repeats, {}
+        frame = sys._getframe(1)
+        for key, repeat in repeats.items():
+            if repeat[2] > 0:
+                self._report_repeats(key, repeat[2], frame)
+
+    def set_level(self, level, module=None):
+        """
+        Set the minimum level of the messages that are written.
+
+        Args:
+            level (:obj:`str`, :obj:`int`):
+                The level, either one of the keys of :attr:`levels` or
+                an integer.
+            module (:obj:`str`, optional):
+                Set the level only for this module (e.g.
+                ``'pypeit.core.skysub'``) and its submodules.  If
+                None, set the default level for all modules without
+                their own level.  Error messages are always written.
+        """
+        if isinstance(level, str):
+            if level.upper() not in self.levels:
+                raise ValueError('Unknown message level: {0}'.format(level))
+            level = self.levels[level.upper()]
+        if module is None:
+            self._level = level
+        else:
+            self._module_levels[module] = level
+        self._level_cache = {}
+
+    @staticmethod
+    def _format(msg, args):
+        return msg.format(*args) if len(args) > 0 else msg
+
     def _initialize_log_file(self, log=None):
         """
         Expects self._log is already None.
@@ -138,6 +290,11 @@ class Messages:
         self._log.write("You are using numpy version={:s}\n".format(numpy.__version__))
         self._log.write("You are using astropy version={:s}\n\n".format(astropy.__version__))
         self._log.write("------------------------------------------------------\n\n")
+        self._log.close()
+
+        # Reopen the log to append single lines such that it can be
+        # written by forked processes
+        self._log = open(log, 'a', buffering=1)
 
     def reset(self, log=None, verbosity=None, colors=True):
         """
@@ -148,6 +305,8 @@ class Messages:
         """
         # Initialize other variables
         self._verbosity = self._defverb if verbosity is None else verbosity
+        self._set_default_level()
+        self._repeats = {}
         self.reset_log_file(log)
         self.disablecolors()
         if colors:
@@ -221,7 +380,10 @@ class Messages:
         '''
         Close the log file before the code exits
         '''
-        close_qa(self.pypeit_file)
+        self.flush_repeats()
+        for failure in close_qa(self.pypeit_file):
+            self.warn('QA plot could not be rendered:' + self.newline()
+                      + failure.rstrip().replace('\n', self.newline()))
 #        from pypeit import arqa
 #        # QA HTML
 #        if self.pypeit_file is not None:  # Likely testing
@@ -246,10 +408,11 @@ class Messages:
 #            self.close()
 #            sys.exit()
 
-    def error(self, msg, usage=False):
+    def error(self, msg, *args, usage=False):
         """
         Print an error message
         """
+        msg = self._format(msg, args)
         premsg = '\n'+self._start + self._white_RD + '[ERROR]   ::' + self._end + ' '
         self._print(premsg, msg)
 
@@ -264,57 +427,89 @@ class Messages:
         raise PypeItError(msg)
         sys.exit(1)
 
-    def info(self, msg):
+    def info(self, msg, *args):
         """
         Print an information message
         """
-        premsg = self._start + self._green_CL + '[INFO]    ::' + self._end + ' '
-        self._print(premsg, msg)
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['INFO'], frame):
+            premsg = self._start + self._green_CL + '[INFO]    ::' + self._end + ' '
+            self._print(premsg, self._format(msg, args), frame=frame)
 
-    def info_update(self, msg, last=False):
+    def info_update(self, msg, *args, last=False):
         """
         Print an information message that needs to be updated
         """
-        premsg = '\r' + self._start + self._green_CL + '[INFO]    ::' + self._end + ' '
-        self._print(premsg, msg, last=last)
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['INFO'], frame, limit=False):
+            premsg = '\r' + self._start + self._green_CL + '[INFO]    ::' + self._end + ' '
+            self._print(premsg, self._format(msg, args), last=last, frame=frame)
 
-    def test(self, msg):
+    def debug_enabled(self):
+        """
+        Check if the debugging messages of the calling module are
+        written, e.g. to skip computing the arguments of
+        :func:`debug`.
+        """
+        frame = sys._getframe(1)
+        if self._verbosity == 0 and self._log is None:
+            return False
+        return self.levels['DEBUG'] >= self._module_level(frame.f_globals.get('__name__', ''))
+
+    def debug(self, msg, *args):
+        """
+        Print a debugging message
+        """
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['DEBUG'], frame):
+            premsg = self._start + self._blue_CL + '[DEBUG]   ::' + self._end + ' '
+            self._print(premsg, self._format(msg, args), frame=frame)
+
+    def test(self, msg, *args):
         """
         Print a test message
         """
-        if self._verbosity == 2:
+        frame = sys._getframe(1)
+        if self._verbosity == 2 and self._enabled(self.levels['DEBUG'], frame):
             premsg = self._start + self._white_BL + '[TEST]    ::' + self._end + ' '
-            self._print(premsg, msg)
+            self._print(premsg, self._format(msg, args), frame=frame)
 
-    def warn(self, msg):
+    def warn(self, msg, *args):
         """
         Print a warning message
         """
-        premsg = self._start + self._red_CL + '[WARNING] ::' + self._end + ' '
-        self._print(premsg, msg)
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['WARNING'], frame):
+            premsg = self._start + self._red_CL + '[WARNING] ::' + self._end + ' '
+            self._print(premsg, self._format(msg, args), frame=frame)
 
-    def bug(self, msg):
+    def bug(self, msg, *args):
         """
         Print a bug message
         """
-        premsg = self._start + self._white_BK + '[BUG]     ::' + self._end + ' '
-        self._print(premsg, msg)
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['WARNING'], frame):
+            premsg = self._start + self._white_BK + '[BUG]     ::' + self._end + ' '
+            self._print(premsg, self._format(msg, args), frame=frame)
 
-    def work(self, msg):
+    def work(self, msg, *args):
         """
         Print a work in progress message
         """
-        if self._verbosity == 2:
+        frame = sys._getframe(1)
+        if self._verbosity == 2 and self._enabled(self.levels['DEBUG'], frame):
             premsgp = self._start + self._black_CL + '[WORK IN ]::' + self._end + '\n'
             premsgs = self._start + self._yellow_CL + '[PROGRESS]::' + self._end + ' '
-            self._print(premsgp+premsgs, msg)
+            self._print(premsgp+premsgs, self._format(msg, args), frame=frame)
 
-    def prindent(self, msg):
+    def prindent(self, msg, *args):
         """
         Print an indent
         """
-        premsg = '             '
-        self._print(premsg, msg)
+        frame = sys._getframe(1)
+        if self._enabled(self.levels['INFO'], frame):
+            premsg = '             '
+            self._print(premsg, self._format(msg, args), frame=frame)
 
     def input(self):
         """
@@ -8,7 +8,8 @@ from astropy import stats
 from abc import ABCMeta
 
 from pypeit import ginga, utils, msgs, processimages, specobjs
-from pypeit.core import skysub, extract, trace_slits, pixels, wave
+from pypeit import timing
+from pypeit.core import skysub, extract, trace_slits, pixels, wave, qa
 
 from pypeit import debugger
 
@@ -196,6 +197,7 @@ class Reduce(object):
         # Return
         return manual_extract_dict
 
+    @timing.timed()
     def find_objects(self, image, ivar, std=False, ir_redux=False, std_trace=None, maskslits=None,
                           show_peaks=False, show_fits=False, show_trace=False, show=False,
                      manual_extract_dict=None):
@@ -239,6 +241,7 @@ class Reduce(object):
          """
         return None, None, None
 
+    @timing.timed()
     def global_skysub(self, sciimg, sciivar, tilts, std=False, skymask=None, update_crmask=True, maskslits=None, show_fit=False,
                       show=False, show_objs=False):
         """
@@ -292,16 +295,17 @@ class Reduce(object):
             thismask = (self.slitmask == slit)
             inmask = (self.mask == 0) & thismask & skymask_now
             # Find sky
-            self.global_sky[thismask] = skysub.global_skysub(self.sciimg, self.sciivar,
-                                                             self.tilts, thismask,
-                                                             self.tslits_dict['slit_left'][:,slit],
-                                                             self.tslits_dict['slit_righ'][:,slit],
-                                                             inmask=inmask,
-                                                             sigrej=sigrej,
-                                                             bsp=self.redux_par['bspline_spacing'],
-                                                             no_poly=self.redux_par['no_poly'],
-                                                             pos_mask = (not self.ir_redux),
-                                                             show_fit=show_fit)
+            with timing.step('skysub.global_skysub', slit=slit):
+                self.global_sky[thismask] = skysub.global_skysub(self.sciimg, self.sciivar,
+                                                                 self.tilts, thismask,
+                                                                 self.tslits_dict['slit_left'][:,slit],
+                                                                 self.tslits_dict['slit_righ'][:,slit],
+                                                                 inmask=inmask,
+                                                                 sigrej=sigrej,
+                                                                 bsp=self.redux_par['bspline_spacing'],
+                                                                 no_poly=self.redux_par['no_poly'],
+                                                                 pos_mask = (not self.ir_redux),
+                                                                 show_fit=show_fit)
             # Mask if something went wrong
             if np.sum(self.global_sky[thismask]) == 0.:
                 self.maskslits[slit] = True
@@ -324,6 +328,7 @@ class Reduce(object):
         # Return
         return self.global_sky
 
+    @timing.timed()
     def local_skysub_extract(self, sciimg, sciivar, tilts, waveimg, global_sky, rn2img, sobjs,
                              maskslits=None, model_noise=True, std=False,
                              show_profile=False, show_resids=False, show=False):
@@ -338,6 +343,7 @@ class Reduce(object):
         return None, None, None, None, None
 
 
+    @timing.timed()
     def flexure_correct(self, sobjs, basename):
         """ Correct for flexure
 
@@ -354,7 +360,8 @@ class Reduce(object):
                                          self.flex_par['spectrum'],
                                          mxshft=self.flex_par['maxshift'])
             # QA
-            wave.flexure_qa(sobjs, self.maskslits, basename, self.det, flex_list,out_dir=self.par['rdx']['redux_path'])
+            qa.render_qa(wave.flexure_qa, sobjs, self.maskslits, basename, self.det, flex_list,
+                         out_dir=self.par['rdx']['redux_path'])
         else:
             msgs.info('Skipping flexure correction.')
 
@@ -608,6 +615,7 @@ class MultiSlit(Reduce):
 
     # JFH TODO Should we reduce the number of iterations for standards or near-IR redux where the noise model is not
     # being updated?
+    @timing.timed()
     def local_skysub_extract(self, sciimg, sciivar, tilts, waveimg, global_sky, rn2img, sobjs,
                              spat_pix=None, maskslits=None, model_noise=True, std = False,
                              show_profile=False, show=False):
@@ -668,20 +676,21 @@ class MultiSlit(Reduce):
                 # True  = Good, False = Bad for inmask
                 inmask = (self.mask == 0) & thismask
                 # Local sky subtraction and extraction
-                self.skymodel[thismask], self.objmodel[thismask], self.ivarmodel[thismask], \
-                    self.extractmask[thismask] = skysub.local_skysub_extract(
-                    self.sciimg, self.sciivar, self.tilts, self.waveimg, self.global_sky, self.rn2img,
-                    thismask, self.tslits_dict['slit_left'][:,slit], self.tslits_dict['slit_righ'][:, slit],
-                    self.sobjs[thisobj], spat_pix=spat_pix, model_full_slit=self.redux_par['model_full_slit'],
-                    box_rad=self.redux_par['boxcar_radius']/self.spectrograph.detector[self.det-1]['platescale'],
-                    sigrej=self.redux_par['sky_sigrej'],
-                    model_noise=model_noise, std=std, bsp=self.redux_par['bspline_spacing'],
-                    sn_gauss=self.redux_par['sn_gauss'], inmask=inmask, show_profile=show_profile)
+                with timing.step('skysub.local_skysub_extract', slit=slit):
+                    self.skymodel[thismask], self.objmodel[thismask], self.ivarmodel[thismask], \
+                        self.extractmask[thismask] = skysub.local_skysub_extract(
+                        self.sciimg, self.sciivar, self.tilts, self.waveimg, self.global_sky, self.rn2img,
+                        thismask, self.tslits_dict['slit_left'][:,slit], self.tslits_dict['slit_righ'][:, slit],
+                        self.sobjs[thisobj], spat_pix=spat_pix, model_full_slit=self.redux_par['model_full_slit'],
+                        box_rad=self.redux_par['boxcar_radius']/self.spectrograph.detector[self.det-1]['platescale'],
+                        sigrej=self.redux_par['sky_sigrej'],
+                        model_noise=model_noise, std=std, bsp=self.redux_par['bspline_spacing'],
+                        sn_gauss=self.redux_par['sn_gauss'], inmask=inmask, show_profile=show_profile)
 
         # Set the bit for pixels which were masked by the extraction.
         # For extractmask, True = Good, False = Bad
         iextract = (self.mask == 0) & (self.extractmask == False)
-        self.outmask[iextract] = processimages.ProcessImages.bitmask.turn_on(self.outmask[iextract], 'EXTRACT')
+        processimages.ProcessImages.bitmask.turn_on_inplace(self.outmask, 'EXTRACT', where=iextract)
 
         # Step
         self.steps.append(inspect.stack()[0][3])
@@ -738,6 +747,7 @@ class Echelle(Reduce):
 
     # JFH TODO Should we reduce the number of iterations for standards or near-IR redux where the noise model is not
     # being updated?
+    @timing.timed()
     def local_skysub_extract(self, sciimg, sciivar, tilts, waveimg, global_sky, rn2img, sobjs,
                              spat_pix=None, model_noise=True, min_snr=2.0, std = False, fit_fwhm=False,
                              maskslits=None, show_profile=False, show_resids=False, show_fwhm=False, show=False):
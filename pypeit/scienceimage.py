@@ -1,6 +1,7 @@
 """ Module for the ScienceImage class"""
 import numpy as np
 from pypeit import msgs
+from pypeit import timing
 from pypeit import processimages
 from pypeit import utils
 from pypeit import ginga
@@ -117,6 +118,7 @@ class ScienceImage(processimages.ProcessImages):
 
 
     # JFH TODO This stuff should be eventually moved to processimages?
+    @timing.timed()
     def proc(self, bias, pixel_flat, bpm, illum_flat=None, sigrej=None, maxiters=5, show=False):
         """
         Primary wrapper for processing one or more science frames or science frames with bgframes
@@ -8,6 +8,8 @@ def parser(options=None):
     parser = argparse.ArgumentParser(description='Script to coadd a set of spec1D files and 1 or more slits and 1 or more objects. Current defaults use Optimal + Fluxed extraction. [v1.1]')
     parser.add_argument("infile", type=str, help="Input file (YAML)")
     parser.add_argument("--debug", default=False, action='store_true', help="Turn debugging on")
+    parser.add_argument("--arrays", default=False, action='store_true',
+                        help="Coadd longslit spectra with the array-based engine (faster for many exposures)")
 
     if options is None:
         args = parser.parse_args()
@@ -195,6 +197,12 @@ def main(args, unit_test=False, path=''):
             spec1d = coadd.ech_coadd(gdfiles, objids=gdobj, extract=ex_value, flux=flux_value, phot_scale_dicts=scale_dict,
                                      outfile=outfile, qafile=qafile,**gparam)
 
+        elif args.arrays:
+            waves, fluxes, sigs = coadd.load_spec_arrays(gdfiles, iextensions=extensions,
+                                                         extract=ex_value, flux=flux_value)
+            # Coadd!
+            coadd.coadd_spectra_arrays(waves, fluxes, sigs, qafile=qafile, outfile=outfile,
+                                       flux_scale=scale_dict, **gparam)
         else:
             spectra = coadd.load_spec(gdfiles, iextensions=extensions,
                                         extract=ex_value, flux=flux_value)
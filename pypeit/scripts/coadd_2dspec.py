@@ -86,6 +86,11 @@ def parser(options=None):
     parser.add_argument("--basename", type=str, default=None, help="Basename of files to save the parameters, spec1d, and spec2d")
     parser.add_argument('--samp_fact', default=1.0, type=float, help="Make the wavelength grid finer (samp_fact > 1.0) "
                                                                      "or coarser (samp_fact < 1.0) by this sampling factor")
+    parser.add_argument("--memmap", default=False, action="store_true",
+                        help="Memory-map the spec2d files and read the images slit by slit instead of "
+                             "loading full image stacks")
+    parser.add_argument("-n", "--nproc", default=1, type=int,
+                        help="Number of processors used to coadd the detectors and slits in parallel")
     parser.add_argument("--debug", default=False, action="store_true", help="show debug plots?")
 
     return parser.parse_args() if options is None else parser.parse_args(options)
@@ -170,20 +175,13 @@ def main(args):
         msgs.warn('Not reducing detectors: {0}'.format(' '.join([str(d) for d in
         set(np.arange(spectrograph.ndet)) - set(detectors)])))
 
-    # Loop on detectors
-    for det in detectors:
-        msgs.info("Working on detector {0}".format(det))
-        sci_dict[det] = {}
-
-        # Read in the images stacks and other clibration/meta data for this detector
-        stack_dict = coadd2d.load_coadd2d_stacks(spec2d_files, det)
-
-        sci_dict[det]['sciimg'], sci_dict[det]['sciivar'], sci_dict[det]['skymodel'], \
-                sci_dict[det]['objmodel'], sci_dict[det]['ivarmodel'], sci_dict[det]['outmask'], \
-                sci_dict[det]['specobjs'] \
-                        = coadd2d.extract_coadd2d(stack_dict, master_dir, ir_redux=ir_redux,
-                                                  par=par, show=args.show, show_peaks=args.peaks,
-                                                  std=args.std, samp_fact=args.samp_fact)
+    # Coadd the detectors
+    master_key_dict, det_dicts \
+            = coadd2d.coadd2d_detectors(spec2d_files, detectors, master_dir, nproc=args.nproc,
+                                        memmap=args.memmap, ir_redux=ir_redux, par=par,
+                                        show=args.show, show_peaks=args.peaks, std=args.std,
+                                        samp_fact=args.samp_fact)
+    sci_dict.update(det_dicts)
 
     # Make the new Science dir
     # TODO: This needs to be defined by the user
@@ -193,6 +191,6 @@ def main(args):
         os.makedirs(scipath)
 
     # Save the results
-    save.save_all(sci_dict, stack_dict['master_key_dict'], master_dir, spectrograph, head1d,
-                  head2d, scipath, basename)
+    save.save_all(sci_dict, master_key_dict, master_dir, spectrograph, head1d,
+                  head2d, scipath, basename, spec2d_output=par['rdx']['spec2d_output'])
 
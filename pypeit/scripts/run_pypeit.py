@@ -20,6 +20,9 @@ def parser(options=None):
                         help='PypeIt reduction file (must have .pypeit extension)')
     parser.add_argument('-v', '--verbosity', type=int, default=2,
                         help='Verbosity level between 0 [none] and 2 [all]')
+    parser.add_argument('--debug_msgs', default=False, action='store_true',
+                        help='Write the debugging messages, e.g. of each iteration of the '
+                             'sky-subtraction and profile fits')
     # JFH TODO Are the -t and -r keyword still valid given that run_pypeit no longer runs setup?
     parser.add_argument('-t', '--hdrframetype', default=False, action='store_true',
                         help='Use file headers and the instument-specific keywords to determine'
@@ -82,6 +85,8 @@ def main(args):
     pypeIt = pypeit.PypeIt(args.pypeit_file, verbosity=args.verbosity,
                            reuse_masters=args.use_masters, overwrite=args.overwrite,
                            logname=logname, show=args.show)
+    if args.debug_msgs:
+        msgs.set_level('DEBUG')
 
     # JFH I don't see why this is an optional argument here. We could allow the user to modify an infinite number of parameters
     # from the command line? Why do we have the PypeIt file then? This detector can be set in the pypeit file.
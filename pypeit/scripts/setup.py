@@ -33,6 +33,9 @@ def parser(options=None):
                         help='Include the background-pair columns for the user to edit')
     parser.add_argument('-v', '--verbosity', type=int, default=2,
                         help='Level of verbosity from 0 to 2; default is 2.')
+    parser.add_argument('-n', '--nproc', type=int, default=None,
+                        help='Number of concurrent workers used to read the file headers.  '
+                             'Default is set by the rdx header_nproc parameter.')
 #    parser.add_argument('-q', '--quick', default=False, help='Quick reduction',
 #                        action='store_true')
 #    parser.add_argument('-c', '--cpus', default=False,
@@ -74,6 +77,9 @@ def main(args):
         # Should never reach here
         raise IOError('Need to set -r !!')
 
+    if args.nproc is not None:
+        ps.par['rdx']['header_nproc'] = args.nproc
+
     # Run the setup
     ps.run(setup_only=True, sort_dir=sort_dir, write_bkg_pairs=args.background)
 
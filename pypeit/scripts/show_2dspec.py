@@ -16,7 +16,6 @@ from pypeit.masterframe import MasterFrame
 from pypeit.traceslits import TraceSlits
 import os
 import numpy as np
-import IPython
 
 from astropy.io import fits
 from astropy.stats import sigma_clipped_stats
@@ -82,14 +81,14 @@ def main(args):
         msgs.error('Requested detector {:s} was not processed.\n'
                    'Maybe you chose the wrong one to view?\n'
                    'Set with --det= or check file contents with --list'.format(sdet))
-    sciimg = hdu[exten].data
+    sciimg = hdu[exten].data.astype(float)
     try:
         exten = names.index('DET{:s}-SKY'.format(sdet))
     except:  # Backwards compatability
         msgs.error('Requested detector {:s} has no sky model.\n'
                    'Maybe you chose the wrong one to view?\n'
                    'Set with --det= or check file contents with --list'.format(sdet))
-    skymodel = hdu[exten].data
+    skymodel = hdu[exten].data.astype(float)
     try:
         exten = names.index('DET{:s}-MASK'.format(sdet))
     except ValueError:  # Backwards compatability
@@ -103,7 +102,7 @@ def main(args):
         msgs.error('Requested detector {:s} has no IVARMODEL.\n'
                    'Maybe you chose the wrong one to view?\n' +
                    'Set with --det= or check file contents with --list'.format(sdet))
-    ivarmodel = hdu[exten].data
+    ivarmodel = hdu[exten].data.astype(float)
     # Read in the object model for residual map
     try:
         exten = names.index('DET{:s}-OBJ'.format(sdet))
@@ -111,7 +110,7 @@ def main(args):
         msgs.error('Requested detector {:s} has no object model.\n'
                    'Maybe you chose the wrong one to view?\n' +
                    'Set with --det= or check file contents with --list'.format(sdet))
-    objmodel = hdu[exten].data
+    objmodel = hdu[exten].data.astype(float)
     # Get waveimg
     mdir = head0['PYPMFDIR']+'/'
     if not os.path.exists(mdir):
@@ -203,6 +202,7 @@ def main(args):
     out = shell.call_global_plugin_method('WCSMatch', 'set_reference_channel', [chname_resids], {})
 
     if args.embed:
+        import IPython
         IPython.embed()
         # Playing with some mask stuff
         #out = shell.start_operation('TVMask')
@@ -12,8 +12,6 @@ from astropy.table import Table
 from astropy.units import Quantity
 from astropy.utils import isiterable
 
-from linetools.spectra import xspectrum1d
-
 from pypeit import msgs
 from pypeit.core import parse
 
@@ -248,6 +246,7 @@ class SpecObj(object):
             np.ndarray:  New sky spectrum (mainly for QA)
 
         """
+        from linetools.spectra import xspectrum1d
         # Simple interpolation to apply
         npix = len(sky_wave)
         x = np.linspace(0., 1., npix)
@@ -282,6 +281,7 @@ class SpecObj(object):
             linetools.spectra.xspectrum1d.XSpectrum1D:  Spectrum object
 
         """
+        from linetools.spectra import xspectrum1d
         extract = getattr(self, extraction)
         if len(extract) == 0:
             msgs.warn("This object has not been extracted with extract={}".format(extraction))
@@ -614,6 +614,14 @@ class SpecObjs(object):
     def __len__(self):
         return len(self.specobjs)
 
+    # Pickling; needed because __getattr__ is overloaded and would
+    # otherwise be called before the object is restored
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     def keys(self):
         self.build_summary()
         return self.summary.keys()
@@ -543,6 +543,7 @@ class GeminiGMOSNE2VSpectrograph(GeminiGMOSNSpectrograph):
 
 
 # TODO: Put this inside the class or abstract it.
+@spectrograph.mosaic_reader()
 def read_gmos(raw_file, det=1):
     """
     Read the GMOS data file
@@ -652,6 +653,7 @@ def read_gmos(raw_file, det=1):
     head0['BZERO'] = 32768-obzero
 
     # Return, transposing array back to goofy Python indexing
+    hdu.close()
     return array, head0, (dsec, osec)
 
 
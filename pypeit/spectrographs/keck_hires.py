@@ -121,10 +121,8 @@ class KECKHIRESSpectrograph(spectrograph.Spectrograph):
         Overwrites base class function to use :func:`read_hires` to get
         the image sections.
 
-        .. todo ::
-            - It is really ineffiecient.  Can we parse
-              :func:`read_hires` into something that can give you the
-              image section directly?
+        The file is read only once per detector; see
+        :func:`pypeit.spectrographs.spectrograph.mosaic_reader`.
 
         This is done separately for the data section and the overscan
         section in case one is defined as a header keyword and the other
@@ -433,6 +431,7 @@ def hires_read_1chip(hdu,chipno):
     # Return
     return data, oscan
 
+@spectrograph.mosaic_reader()
 def read_hires(raw_file, det=None):
     """
     Read a raw HIRES data frame (one or more detectors)
@@ -518,5 +517,6 @@ def read_hires(raw_file, det=None):
         iosec = '[{:d}:{:d},{:d}:{:d}]'.format(o_y1, o_y2, o_x1, o_x2)
         dsec.append(idsec)
         osec.append(iosec)
+    hdu.close()
     # Return
     return image, head0, (dsec,osec)
@@ -197,10 +197,8 @@ class KeckLRISSpectrograph(spectrograph.Spectrograph):
         Overwrites base class function to use :func:`read_lris` to get
         the image sections.
 
-        .. todo ::
-            - It is really ineffiecient.  Can we parse
-              :func:`read_lris` into something that can give you the
-              image section directly?
+        The file is read only once per detector; see
+        :func:`pypeit.spectrographs.spectrograph.mosaic_reader`.
 
         This is done separately for the data section and the overscan
         section in case one is defined as a header keyword and the other
@@ -763,6 +761,7 @@ class KeckLRISRLSpectrograph(KeckLRISRSpectrograph):
         return [section], False, False, False
 
 
+@spectrograph.mosaic_reader()
 def read_lris(raw_file, det=None, TRIM=False):
     """
     Read a raw LRIS data frame (one or more detectors)
@@ -956,6 +955,7 @@ def read_lris(raw_file, det=None, TRIM=False):
 
     # Return, transposing array back to goofy Python indexing
     #from IPython import embed; embed()
+    hdu.close()
     return array.T, head0, (dsec, osec)
 
 
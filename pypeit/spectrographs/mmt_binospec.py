@@ -637,7 +637,10 @@ class MMTBINOSPECSpectrograph(spectrograph.Spectrograph):
 
         If arrays are provided for both `x`, `y`, and `wave`, the
         returned objects have the shape :math:`N_\lambda\times S_x`,
-        where :math:`S_x` is the shape of the x and y arrays.
+        where :math:`S_x` is the shape of the x and y arrays.  All the
+        coordinates and wavelengths are propagated through the optical
+        model together.  With `corners` and more than one wavelength,
+        the shape is :math:`N_\lambda\times N_{\rm slit}\times 4`.
 
         Args:
             x (array-like, optional):
@@ -719,8 +722,8 @@ class MMTBINOSPECSpectrograph(spectrograph.Spectrograph):
                                                                       order=order)
         # Reshape if computing the corner positions
         if corners:
-            x_img = x_img.reshape(self.slitmask.corners.shape[:2])
-            y_img = y_img.reshape(self.slitmask.corners.shape[:2])
+            x_img = x_img.reshape(x_img.shape[:-1] + self.slitmask.corners.shape[:2])
+            y_img = y_img.reshape(y_img.shape[:-1] + self.slitmask.corners.shape[:2])
 
         # Use the detector map to convert to the detector coordinates
         return (x_img, y_img) + self.detector_map.ccd_coordinates(x_img, y_img)
@@ -844,6 +847,7 @@ class DEIMOSDetectorMap(DetectorMap):
         # ccd_geom.pro has offsets by sys.CN_XERR, but these are all 0.
 
 
+@spectrograph.mosaic_reader()
 def read_deimos(raw_file, det=None):
     """
     Read a raw DEIMOS data frame (one or more detectors)
@@ -932,6 +936,7 @@ def read_deimos(raw_file, det=None):
         dsec.append(idsec)
         osec.append(iosec)
     # Return
+    hdu.close()
     return image, head0, (dsec, osec)
 
 
@@ -672,8 +672,7 @@ class DetectorMap:
         coo = numpy.array([_x, _y]).T - self.npix[None,:]/2
 
         # Rotatate and offset by the CCD center
-        coo = numpy.array([numpy.matmul(self.rot_matrix[d], c) for d,c in zip(_d,coo)]) \
-                    + self.ccd_center[_d,:]
+        coo = numpy.einsum('nij,nj->ni', self.rot_matrix[_d], coo) + self.ccd_center[_d,:]
 
         x_img = coo[0,0] if inp_shape is None else coo[:,0].reshape(inp_shape)
         y_img = coo[0,1] if inp_shape is None else coo[:,1].reshape(inp_shape)
@@ -724,8 +723,7 @@ class DetectorMap:
         coo = numpy.array([_x, _y]).T[None,:,:] - self.ccd_center[:,None,:]
 
         # Apply the rotation matrix and offset by the chip center
-        coo = numpy.array([[numpy.matmul(r.T, _c) for _c in c] \
-                                for r,c in zip(self.rot_matrix, coo)]) + self.npix[None,None,:]/2
+        coo = numpy.einsum('dji,dnj->dni', self.rot_matrix, coo) + self.npix[None,None,:]/2
 
         # Determine the associated detector (1-indexed)
         indx = numpy.all((coo > 0) & (coo <= self.npix[None,None,:]), axis=2)
@@ -738,8 +736,7 @@ class DetectorMap:
         d[numpy.sum(indx, axis=0) == 0] = -1
 
         # Pull out the coordinates for the correct detector
-        coo = numpy.array([coo[_d-1,i,:] if _d > 0 else numpy.full(coo.shape[2:],-1.) 
-                                for i,_d in enumerate(d)])
+        coo = numpy.where((d > 0)[:,None], coo[numpy.fmax(d-1,0),numpy.arange(d.size),:], -1.)
 
         # Return the coordinates
         return d if inp_shape is None else d.reshape(inp_shape), \
@@ -1,6 +1,8 @@
 """
 Module to define the SlitMask class
 """
+import warnings
+
 import numpy
 from scipy import optimize
 
@@ -267,6 +269,14 @@ class SlitRegister:
         Match each trace to the nearest slit position based on the
         provided or internal fit parameters.
 
+        The mask positions are sorted and the traces are merged into
+        them with `numpy.searchsorted`_, such that only the nearest mask
+        position on either side of each trace is considered.  This
+        avoids computing the separation between all traces and all
+        mask positions in each evaluation of the fit.  As with
+        `numpy.argmin`_, ties are resolved in favor of the lowest index
+        in :attr:`mask_spat`.
+
         Args:
             par (numpy.ndarray, optional):
                 The parameter vector.
@@ -279,11 +289,25 @@ class SlitRegister:
         """
         mask_pix = self.mask_to_trace_coo(par=par)
 
-        # Calculate the separation between each trace position with every mask position
-        sep = numpy.absolute(self.trace_spat[:,None] - mask_pix[None,:])
+        # Sort the mask positions; the stable sort keeps identical
+        # positions in index order
+        srt = numpy.argsort(mask_pix, kind='stable')
+        srt_pix = mask_pix[srt]
+
+        # Nearest mask position above and below each trace; use the
+        # first of any identical positions below the trace
+        upper = numpy.clip(numpy.searchsorted(srt_pix, self.trace_spat, side='left'), 0,
+                           srt.size-1)
+        lower = numpy.searchsorted(srt_pix, srt_pix[numpy.fmax(upper-1, 0)], side='left')
+
+        # Select the closest of the two
+        sep_upper = numpy.absolute(self.trace_spat - srt_pix[upper])
+        sep_lower = numpy.absolute(self.trace_spat - srt_pix[lower])
+        use_lower = (sep_lower < sep_upper) | ((sep_lower == sep_upper) & (srt[lower] < srt[upper]))
 
         # Return the minimum separation and the match index
-        return numpy.amin(sep, axis=1), numpy.argmin(sep, axis=1)
+        return numpy.where(use_lower, sep_lower, sep_upper), \
+                    numpy.where(use_lower, srt[lower], srt[upper])
     
     def find_best_match(self, guess_offset=None, guess_scale=None, offset_limits=None,
                         scale_limits=None, penalty=False):
@@ -28,7 +28,11 @@ provide instrument-specific:
 
 """
 import os
+import copy
+import glob
+import inspect
 import warnings
+import functools
 
 from abc import ABCMeta
 from pkg_resources import resource_filename
@@ -36,17 +40,132 @@ from pkg_resources import resource_filename
 import numpy as np
 from astropy.io import fits
 
-from linetools.spectra import xspectrum1d
-
 from pypeit import msgs
 from pypeit.core.wavecal import wvutils
 from pypeit.core import parse
 from pypeit.par import pypeitpar
 from pypeit.core import pixels
+from pypeit.core import procimg
 from pypeit.metadata import PypeItMetaData
 
 from pypeit import debugger
 
+
+def mosaic_reader(maxsize=2):
+    """
+    Decorator that caches the output of a reader of raw
+    multi-amplifier files, such as :func:`pypeit.spectrographs.keck_lris.read_lris`.
+
+    The reader must have the call signature ``reader(raw_file, det=None,
+    **kwargs)``, where the file is found by globbing ``raw_file+'*'``,
+    and return the image, the primary header and the image sections.
+    The image of a detector is usually read several times for each
+    exposure, by ``load_raw_img_head`` and then by ``get_image_section``
+    for the data and overscan sections.  With this decorator the file
+    is only opened and read the first time.
+
+    The results are cached by the name, modification time and size of
+    the file, the detector and the keyword arguments, so a file that
+    is rewritten is read again.  Reads of all the detectors (``det`` is
+    None) are not cached.  The cached image is read-only; the header
+    and sections are returned as copies.
+
+    Args:
+        maxsize (:obj:`int`, optional):
+            Number of reads to keep in the cache.
+    """
+    def decorator(reader):
+        default_det = inspect.signature(reader).parameters['det'].default
+
+        @functools.lru_cache(maxsize=maxsize)
+        def cached_read(raw_file, mtime, size, det, kwargs):
+            image, head0, secs = reader(raw_file, det=det, **dict(kwargs))
+            image.flags.writeable = False
+            return image, head0, secs
+
+        @functools.wraps(reader)
+        def wrapper(raw_file, det=default_det, **kwargs):
+            fil = glob.glob(raw_file+'*')
+            if det is None or len(fil) != 1:
+                # Let the reader deal with the missing file
+                return reader(raw_file, det=det, **kwargs)
+            stat = os.stat(fil[0])
+            image, head0, secs = cached_read(os.path.abspath(fil[0]), stat.st_mtime_ns,
+                                             stat.st_size, det, tuple(sorted(kwargs.items())))
+            return image, head0.copy(), copy.deepcopy(secs)
+
+        wrapper.cache_clear = cached_read.cache_clear
+        wrapper.cache_info = cached_read.cache_info
+        return wrapper
+    return decorator
+
+
+# Untrimmed shape, binning and data sections of the raw files read by
+# :func:`Spectrograph.get_raw_image_shape` and
+# :func:`Spectrograph.get_datasec_img`, keyed by :func:`raw_file_key`.
+# The entries are small, so the cache is not limited in size.
+_raw_geometry = {}
+
+
+def raw_file_key(spectrograph, filename, det):
+    """
+    Key of the cached geometry of a raw file.
+
+    The key is the name of the spectrograph, the detector and the
+    absolute path, modification time and size of the file, so a file
+    that is rewritten is read again.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        filename (:obj:`str`):
+            Name of the raw file.
+        det (:obj:`int`):
+            1-indexed detector number.
+
+    Returns:
+        :obj:`tuple`: The key, or None if ``filename`` is not an
+        existing file.
+    """
+    if not isinstance(filename, str) or not os.path.isfile(filename):
+        return None
+    stat = os.stat(filename)
+    return spectrograph, det, os.path.abspath(filename), stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=16)
+def datasec_image(shape, datasec, trim=False):
+    """
+    Image identifying the amplifier used to read each pixel.
+
+    The images are cached by their shape and data sections, so the
+    frames of a detector, and all the detectors with the same layout,
+    share one image.  The image is read-only.
+
+    Args:
+        shape (:obj:`tuple`):
+            Untrimmed shape of the image.
+        datasec (:obj:`tuple`):
+            The data section of each amplifier, given as a tuple with
+            the ``(start, stop, step)`` of the slice along each axis.
+            Binning must already be applied.
+        trim (:obj:`bool`, optional):
+            Trim the pixels outside the data sections from the image;
+            see :func:`pypeit.core.procimg.trim_frame`.
+
+    Returns:
+        `numpy.ndarray`_: Integer array with the 1-indexed amplifier
+        of each pixel; 0 means no amplifier.
+    """
+    img = np.zeros(shape, dtype=int)
+    for i, sec in enumerate(datasec):
+        img[tuple(slice(*s) for s in sec)] = i+1
+    if trim:
+        img = procimg.trim_frame(img, img < 1)
+    img.flags.writeable = False
+    return img
+
+
 class Spectrograph(object):
     """
     Abstract class whose derived classes dictate instrument-specific
@@ -218,6 +337,12 @@ class Spectrograph(object):
         if self.detector[det-1]['spatflip']:
             img = np.flip(img, axis=1)
 
+        # Keep the shape so that the file need not be read again by
+        # get_raw_image_shape
+        key = raw_file_key(self.spectrograph, raw_file, det)
+        if key is not None:
+            _raw_geometry.setdefault(key, {})['shape'] = img.shape
+
         # Return
         return img, head0
 
@@ -341,10 +466,15 @@ class Spectrograph(object):
 
         return image_sections, one_indexed, include_last
 
-    def get_datasec_img(self, filename, det=1, force=True):
+    def get_datasec_img(self, filename, det=1, force=False, trim=False):
         """
         Create an image identifying the amplifier used to read each pixel.
 
+        The untrimmed shape, binning and data sections of each file
+        are only read once, and the image is shared by all files with
+        the same layout (see :func:`datasec_image`).  The returned
+        image is therefore read-only.
+
         .. todo::
             - I find 1-indexing to be highly annoying...
             - Check for overlapping amplifiers?
@@ -358,17 +488,23 @@ class Spectrograph(object):
             det (int):
                 Detector number (1-indexed)
             force (:obj:`bool`, optional):
-                Force the image to be remade
+                Read the image size and data sections from the file,
+                even if they have already been read.
+            trim (:obj:`bool`, optional):
+                Trim the pixels outside the data sections from the
+                image.
 
         Returns:
             `numpy.ndarray`: Integer array identifying the amplifier
             used to read each pixel.
         """
-        if self.datasec_img is None or force:
-            # Check the detector is defined
-            self._check_detector()
+        # Check the detector is defined
+        self._check_detector()
+        key = raw_file_key(self.spectrograph, filename, det)
+        geometry = _raw_geometry.get(key, {}) if key is not None and not force else {}
+        if 'datasec' not in geometry:
             # Get the image shape
-            raw_naxis = self.get_raw_image_shape(filename, det=det)
+            raw_naxis = self.get_raw_image_shape(filename, det=det, force=force)
 
             # This *always* returns spectral then spatial
             binning = self.get_meta_value(filename, 'binning')
@@ -377,32 +513,28 @@ class Spectrograph(object):
             data_sections, one_indexed, include_end \
                     = self.get_image_section(filename, det, section='datasec')
 
-            # Initialize the image (0 means no amplifier)
-            self.datasec_img = np.zeros(raw_naxis, dtype=int)
+            # Convert the data sections from strings to slices
+            datasec = []
             for i in range(self.detector[det-1]['numamplifiers']):
-                # Convert the data section from a string to a slice
-                datasec = parse.sec2slice(data_sections[i], one_indexed=one_indexed,
-                                          include_end=include_end, require_dim=2,
-                                          binning=binning)
-                # Assign the amplifier
-                self.datasec_img[datasec] = i+1
-
+                datasec += [tuple((s.start, s.stop, s.step)
+                                  for s in parse.sec2slice(data_sections[i],
+                                                           one_indexed=one_indexed,
+                                                           include_end=include_end,
+                                                           require_dim=2, binning=binning))]
+            geometry = dict(shape=raw_naxis, datasec=tuple(datasec))
+            if key is not None:
+                _raw_geometry[key] = geometry
+
+        self.datasec_img = datasec_image(geometry['shape'], geometry['datasec'], trim=trim)
         return self.datasec_img
 
-    # TODO: There *has* to be a better way to do this.  We're reading a
-    # file just to get the size of the image, likely when the image has
-    # already been read (likely multiple times).
     def get_raw_image_shape(self, filename, det=None, force=False):
         """
         Get the *untrimmed* shape of the image data for a given detector using a
         file.  :attr:`detector` must be defined.
 
-        Fails if filename is None and the instance does not have a
-        predefined :attr:`naxis`.  If the filename is None, always
-        returns the predefined :attr:`naxis`.  If the filename is
-        provided, the header of the associated detector is used.  If the
-        the detector is set to None, the primary header of the file is
-        used.
+        The image is read to get its shape.  The shape is cached, so
+        each file is only read once.
         
         Args:
             filename (:obj:`str`, optional):
@@ -414,21 +546,20 @@ class Spectrograph(object):
                 extension to read.
             force (:obj:`bool`, optional):
                 Force the image shape to be redetermined.
-            null_kwargs (dict):
-                Used to catch any extraneous keyword arguments.
         
         Returns:
             tuple: Tuple of two integers with the length of each image
             axes.
-
-        Raises:
-            ValueError:
-                Raised if the image shape cannot be determined from the
-                input and available attributes.
         """
         # Use a file
         self._check_detector()
-        return (self.load_raw_frame(filename, det=det)[0]).shape
+        key = raw_file_key(self.spectrograph, filename, det)
+        if key is not None and not force and key in _raw_geometry:
+            return _raw_geometry[key]['shape']
+        shape = (self.load_raw_frame(filename, det=det)[0]).shape
+        if key is not None:
+            _raw_geometry[key] = dict(shape=shape)
+        return shape
 
     def empty_bpm(self, shape=None, filename=None, det=1):
         """
@@ -687,7 +818,9 @@ class Spectrograph(object):
             objects with the extension headers.
         """
         # Faster to open the whole file and then assign the headers,
-        # particularly for gzipped files (e.g., DEIMOS)
+        # particularly for gzipped files (e.g., DEIMOS).  The HDUs are
+        # loaded lazily, so only the first numhead header blocks are
+        # parsed and no data are read.
         try:
             hdu = fits.open(filename)
         except:
@@ -697,7 +830,8 @@ class Spectrograph(object):
                 msgs.warn('Problem opening {0}.'.format(filename) + msgs.newline()
                           + 'Proceeding, but should consider removing this file!')
                 return ['None']*self.numhead
-        return [ hdu[k].header for k in range(self.numhead) ]
+        with hdu:
+            return [ hdu[k].header for k in range(self.numhead) ]
 
 #    def get_match_criteria(self):
 #        msgs.error("You need match criteria for your spectrograph.")
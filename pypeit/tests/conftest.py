@@ -0,0 +1,11 @@
+"""
+Fixtures shared by all the tests.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def pypeit_cache(monkeypatch, tmpdir):
+    """ Keep any persistent cache written by a test out of the home
+    directory"""
+    monkeypatch.setenv('PYPEIT_CACHE', str(tmpdir.join('cache')))
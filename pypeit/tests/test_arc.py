@@ -5,10 +5,13 @@ import os
 import numpy as np
 import pytest
 
+from astropy.table import Table
+
 from linetools.spectra import xspectrum1d
 
 import pypeit
 from pypeit import metadata
+from pypeit import utils
 from pypeit.core import arc
 
 from pypeit.spectrographs.util import load_spectrograph
@@ -23,5 +26,56 @@ def test_detect_lines():
             = arc.detect_lines(arx_sky.flux.value)
     assert (len(arx_w[0]) > 3275)
 
+def test_fit2darc():
+    """ 2D wavelength solution of a synthetic echelle arc """
+    rstate = np.random.RandomState(1)
+    nspec = 2048
+    all_orders = np.repeat(np.arange(40, 60), 50).astype(float)
+    all_pix = rstate.uniform(0., nspec-1., all_orders.size)
+    # Grating equation: wavelength x order is a function of the pixel only
+    xn = all_pix/(nspec-1)
+    all_wv = (2.5e5 + 1.2e4*xn + 300.*xn**2)/all_orders + rstate.normal(0, 0.01, all_orders.size)
+    bad = rstate.uniform(size=all_orders.size) < 0.03
+    all_wv[bad] += 5.
+    fit_dict = arc.fit2darc(all_wv, all_pix, all_orders, nspec)
+    assert np.sum(np.invert(fit_dict['all_mask'][np.invert(bad)])) < 10
+    assert not np.any(fit_dict['all_mask'][bad])
+    assert np.array_equal(fit_dict['orders'], np.arange(40, 60))
+    assert fit_dict['coeffs'].shape == (5, 5)
+
+def fit_arcspec_lines(xarray, yarray, pixt, fitp):
+    """ Fit each arc line with func_fit, as fit_arcspec did before the
+    fits were batched
+    """
+    fit_interval = (fitp if fitp % 2 == 0 else fitp + 1)//2
+    ampl, cent, widt, centerr = -np.ones((4, pixt.size))
+    for p in range(pixt.size):
+        pmin = max(pixt[p] - fit_interval, 0)
+        pmax = min(pixt[p] + fit_interval + 1, yarray.size)
+        if pmax - pmin < fit_interval:
+            continue
+        try:
+            popt, pcov = utils.func_fit(xarray[pmin:pmax], yarray[pmin:pmax], 'gaussian', 3,
+                                        return_errors=True)
+        except RuntimeError:
+            continue
+        ampl[p], cent[p], widt[p] = popt
+        centerr[p] = pcov[1,1]
+    return ampl, cent, widt, centerr
+
+def test_fit_arcspec(monkeypatch):
+    """ The batched line fits find the same lines as fitting each line
+    on its own, including the narrow lines of an LRIS-red arc """
+    arxiv_file = pkg_resources.resource_filename('pypeit',
+                                                 'data/arc_lines/reid_arxiv/keck_lris_red_400.fits')
+    spec = np.asarray(Table.read(arxiv_file)['flux'], dtype=float)
+    _, _, tcent, twid, _, w, _, _ = arc.detect_lines(spec)
+    monkeypatch.setattr(arc, 'fit_arcspec', fit_arcspec_lines)
+    _, _, _tcent, _twid, _, _w, _, _ = arc.detect_lines(spec)
+    assert len(w[0]) == len(_w[0]) == 112
+    assert np.array_equal(w[0], _w[0])
+    assert np.sum(np.absolute(_twid[_w]) < 0.5) > 0
+    np.testing.assert_allclose(tcent[w], _tcent[_w], rtol=0, atol=1e-3)
+
 # Many more functions in pypeit.core.arc that need tests!
 
@@ -0,0 +1,79 @@
+"""
+Module to run tests on the BitMask class
+"""
+import numpy as np
+import pytest
+
+from pypeit.bitmask import BitMask
+from pypeit import processimages
+
+
+def test_flags():
+    """ Turn bits on and off and check which are flagged """
+    bm = BitMask(['a', 'b', 'NULL', 'c'])
+    assert bm.flag_value(['a', 'c']) == 9
+    assert bm.flag_value() == 11
+    with pytest.raises(ValueError):
+        bm.flag_value('d')
+    with pytest.raises(ValueError):
+        bm.flag_value('NULL')
+
+    value = np.zeros(10, dtype=bm.minimum_dtype(asuint=True))
+    value[:5] = bm.turn_on(value[:5], ['a', 'b'])
+    value[3:] = bm.turn_on(value[3:], 'c')
+    assert value.dtype == np.uint8
+    assert np.array_equal(bm.flagged(value, 'a'), np.arange(10) < 5)
+    assert np.array_equal(bm.flagged(value, ['a', 'c']), np.ones(10, dtype=bool))
+    assert np.array_equal(bm.unpack(value, flag=['b', 'c'])[1], np.arange(10) >= 3)
+    assert set(bm.flagged_bits(value[4])) == set(['a', 'b', 'c'])
+    off = bm.turn_off(value, 'a')
+    assert off.dtype == value.dtype and not np.any(bm.flagged(off, 'a'))
+    assert bm.toggle(bm.toggle(value, 'b'), 'b').tolist() == value.tolist()
+
+    # Same result in place
+    _value = np.zeros(10, dtype=bm.minimum_dtype(asuint=True))
+    bm.turn_on_inplace(_value, ['a', 'b'], where=np.arange(10) < 5)
+    bm.turn_on_inplace(_value, 'c', where=np.arange(10) >= 3)
+    assert np.array_equal(_value, value)
+    bm.turn_off_inplace(_value, 'a')
+    assert np.array_equal(_value, off)
+    with pytest.raises(TypeError):
+        bm.turn_on_inplace(3, 'a')
+
+
+def test_minimum_dtype():
+    """ The smallest integer type that holds all the bits """
+    assert BitMask(['a']*1).minimum_dtype(asuint=True) == np.uint8
+    assert BitMask([str(i) for i in range(8)]).minimum_dtype(asuint=True) == np.uint8
+    assert BitMask([str(i) for i in range(9)]).minimum_dtype(asuint=True) == np.uint16
+    assert BitMask([str(i) for i in range(8)]).minimum_dtype() == np.int16
+    assert BitMask([str(i) for i in range(16)]).minimum_dtype() == np.int32
+    assert BitMask([str(i) for i in range(32)]).minimum_dtype(asuint=True) == np.uint32
+
+
+def test_build_mask():
+    """ The science image mask is built in place """
+    rstate = np.random.RandomState(1)
+    shape = (50, 40)
+    sciimg = rstate.normal(100., 50., shape)
+    sciimg[rstate.uniform(size=shape) < 0.01] = np.nan
+    sciivar = rstate.uniform(-0.1, 1., shape)
+    bpm = rstate.uniform(size=shape) < 0.05
+    crmask = rstate.uniform(size=shape) < 0.05
+    slitmask = np.where(rstate.uniform(size=shape) < 0.1, -1, 0)
+    mask = processimages.ProcessImages.build_mask(sciimg, sciivar, crmask, bpm, saturation=180.,
+                                                  mincounts=20., slitmask=slitmask)
+    bm = processimages.ProcessImages.bitmask
+    assert mask.dtype == bm.minimum_dtype(asuint=True)
+    for flag, indx in [('BPM', bpm), ('CR', crmask), ('SATURATION', sciimg >= 180.),
+                       ('MINCOUNTS', sciimg <= 20.), ('IS_NAN', np.isnan(sciimg)),
+                       ('IVAR0', sciivar <= 0.), ('OFFSLITS', slitmask == -1)]:
+        assert np.array_equal(bm.flagged(mask, flag), indx)
+    assert not np.any(bm.flagged(mask, ['IVAR_NAN', 'EXTRACT']))
+
+    # Replace the cosmic rays
+    crmask_new = rstate.uniform(size=shape) < 0.05
+    mask_new = processimages.ProcessImages.update_mask_cr(mask, crmask_new)
+    assert np.array_equal(bm.flagged(mask_new, 'CR'), crmask_new)
+    assert np.array_equal(bm.turn_off(mask_new, 'CR'), bm.turn_off(mask, 'CR'))
+    assert np.array_equal(bm.flagged(mask, 'CR'), crmask)
@@ -287,6 +287,38 @@ def test_coadd():
     assert np.isclose(np.median(spec1d.flux.value), 1., atol=0.003)
 
 
+def test_coadd_arrays():
+    """ Test the array-based coadd engine"""
+    # Setup
+    dspec = dummy_spectra(s2n=10.)
+    dspec.data['flux'][0, 700] *= 1000.  # One bad pixel
+    dspec.data['sig'][0, 700] *= 500.
+    fluxes, sigs, waves = coadd.unpack_spec(dspec, all_wave=True)
+    # Rebinning matches linetools
+    cat_wave = coadd.new_wave_grid(dspec.data['wave'], wave_method='concatenate')
+    rspec = dspec.rebin(cat_wave*units.AA, all=True, do_sig=True, masking='none')
+    rfluxes, rsigs, _ = coadd.unpack_spec(rspec)
+    new_fluxes, new_sigs = coadd.rebin_arrays(waves, fluxes, sigs, cat_wave)
+    gd = (rsigs > 0.) & (new_sigs > 0.)
+    assert np.sum(gd) > 3700
+    np.testing.assert_allclose(new_fluxes[gd], rfluxes[gd], rtol=1e-5)
+    np.testing.assert_allclose(new_sigs[gd], rsigs[gd], rtol=1e-5)
+    # The weights match the per-spectrum calculation
+    gpm = new_sigs > 0.
+    for s2n in [10., 3.]:
+        scale = s2n/10.
+        rms_sn, weights = coadd.sn_weights(new_fluxes*scale, new_sigs, gpm, cat_wave)
+        _rms_sn, _weights = coadd.sn_weights_stack(new_fluxes*scale, new_sigs, gpm, cat_wave)
+        np.testing.assert_allclose(_rms_sn, rms_sn, rtol=1e-10)
+        np.testing.assert_allclose(_weights, weights, rtol=1e-10)
+    # Full coadd
+    wave, flux, sig = coadd.coadd_spectra_arrays(waves, fluxes, sigs,
+                                                 wave_grid_method='concatenate')
+    assert wave.size == flux.size == 1740
+    assert np.isclose(np.median(flux), 1., atol=0.003)
+    assert np.all(np.isfinite(flux))
+
+
 # TODO: This needs to be fixed.
 def test_coadd_with_fluxing():
     """ Test full coadd method with flux scaling"""
@@ -0,0 +1,106 @@
+"""
+Module to run tests on the 2d coadd slit cut-outs
+"""
+from concurrent import futures
+
+import numpy as np
+import pytest
+
+from astropy.io import fits
+
+from pypeit.core import coadd2d
+from pypeit.pypmsgs import PypeItError
+
+
+def fake_stack_dict(nimgs=3, nspec=60, nspat=50, seed=1):
+    """ Build a stack_dict with two slits and simple calibrations"""
+    rstate = np.random.RandomState(seed)
+    shape = (nimgs, nspec, nspat)
+    slitmask = np.full((nspec, nspat), -1, dtype=int)
+    slitmask[5:55, 4:20] = 0
+    slitmask[:, 25:45] = 1
+    spec_img = np.outer(np.arange(nspec), np.ones(nspat))
+    waveimg = 5000. + 2.*spec_img + 0.01*np.outer(np.ones(nspec), np.arange(nspat))
+    stack_dict = dict(slitmask=slitmask, hdu_stacks=None,
+                      slitmask_stack=np.broadcast_to(slitmask, shape),
+                      sciimg_stack=rstate.normal(size=shape) + 10.,
+                      sciivar_stack=np.full(shape, 4.),
+                      skymodel_stack=np.full(shape, 9.),
+                      mask_stack=(rstate.uniform(size=shape) > 0.95).astype(float),
+                      tilts_stack=np.broadcast_to(spec_img/(nspec-1), shape).copy(),
+                      waveimg_stack=np.broadcast_to(waveimg, shape).copy())
+    return stack_dict
+
+
+def run_slit(stack_dict, islit, trace_stack, wave_grid):
+    spec_slice, spat_slice, slit_stacks = coadd2d.get_slit_stacks(stack_dict, islit)
+    return coadd2d.coadd2d(trace_stack[:,spec_slice] - spat_slice.start,
+                           slit_stacks['sciimg_stack'], slit_stacks['sciivar_stack'],
+                           slit_stacks['skymodel_stack'], slit_stacks['mask_stack'] == 0,
+                           slit_stacks['tilts_stack'], slit_stacks['waveimg_stack'],
+                           slit_stacks['thismask_stack'], wave_grid=wave_grid)
+
+
+def memmap_stack_dict(stack_dict, tmpdir):
+    """ Write the stacks to disk and memory-map them"""
+    keys = ['sciimg', 'sciivar', 'skymodel', 'mask', 'tilts', 'waveimg']
+    # The (integer) masks are tile compressed
+    hdu_stacks = dict([(key, []) for key in keys])
+    hdulists = []
+    for img in range(stack_dict['sciimg_stack'].shape[0]):
+        ofile = str(tmpdir.join('stack{0}.fits'.format(img)))
+        hdus = [fits.PrimaryHDU()]
+        for key in keys:
+            data = stack_dict[key+'_stack'][img]
+            hdus.append(fits.CompImageHDU(data.astype(np.int16), name=key.upper())
+                            if key == 'mask' else fits.ImageHDU(data, name=key.upper()))
+        fits.HDUList(hdus).writeto(ofile)
+        hdul = fits.open(ofile, memmap=True)
+        hdulists.append(hdul)
+        for key in keys:
+            hdu_stacks[key].append(hdul[key.upper()])
+    return dict(slitmask=stack_dict['slitmask'], hdu_stacks=hdu_stacks, hdulists=hdulists)
+
+
+def test_slit_cutouts(tmpdir):
+    stack_dict = fake_stack_dict()
+    nimgs, nspec, nspat = stack_dict['sciimg_stack'].shape
+    wave_grid = np.arange(4990., 5130., 2.5)
+    mm_stack_dict = memmap_stack_dict(stack_dict, tmpdir)
+
+    for islit, center in zip([0, 1], [12., 35.]):
+        trace_stack = np.full((nimgs, nspec), center) + np.arange(nimgs)[:,None]
+        # Full detector stacks
+        full = coadd2d.coadd2d(trace_stack, stack_dict['sciimg_stack'],
+                               stack_dict['sciivar_stack'], stack_dict['skymodel_stack'],
+                               stack_dict['mask_stack'] == 0, stack_dict['tilts_stack'],
+                               stack_dict['waveimg_stack'],
+                               stack_dict['slitmask_stack'] == islit, wave_grid=wave_grid)
+        for sdict in [stack_dict, mm_stack_dict]:
+            cut = run_slit(sdict, islit, trace_stack, wave_grid)
+            for key in ['sciimg', 'sciivar', 'imgminsky', 'waveimg', 'tilts', 'dspat', 'wave_mid',
+                        'dspat_mid']:
+                assert np.allclose(cut[key], full[key], rtol=1e-10)
+            assert np.array_equal(cut['outmask'], full['outmask'])
+            assert np.array_equal(cut['nused'], full['nused'])
+
+
+def test_concurrent_cutouts(tmpdir):
+    stack_dict = fake_stack_dict()
+    mm_stack_dict = memmap_stack_dict(stack_dict, tmpdir)
+    slits = [0, 1]*8
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        cutouts = list(executor.map(lambda islit: coadd2d.get_slit_stacks(mm_stack_dict, islit),
+                                    slits))
+    for islit, (spec_slice, spat_slice, slit_stacks) in zip(slits, cutouts):
+        for key in ['sciimg', 'mask', 'waveimg']:
+            assert np.array_equal(slit_stacks[key+'_stack'],
+                                  stack_dict[key+'_stack'][:,spec_slice,spat_slice])
+    hdulists = mm_stack_dict['hdulists']
+    coadd2d.close_coadd2d_stacks(mm_stack_dict)
+    assert all([hdul.fileinfo(0)['file'].closed for hdul in hdulists])
+
+
+def test_no_detectors():
+    with pytest.raises(PypeItError):
+        coadd2d.coadd2d_detectors([], [], 'Masters')
@@ -5,6 +5,7 @@ import pytest
 
 import os
 import numpy as np
+from astropy.io import fits
 
 from pypeit.core import pixels
 from pypeit.core import procimg
@@ -32,3 +33,25 @@ def test_ampsec(spectrograph):
     #assert settings.spect[dnum]['oscansec01'] == [[0, 0], [2049, 2080]]
     #assert settings.spect[dnum]['datasec01'] == [[0, 0], [0, 1024]]
 
+
+
+def test_datasec_cache(spectrograph, tmpdir):
+    """ The amplifier image is read once and shared by all frames """
+    infile = data_path('b1.fits.gz')
+    datasec_img = spectrograph.get_datasec_img(infile, det=1)
+    assert not datasec_img.flags.writeable
+    assert spectrograph.get_datasec_img(infile, det=1) is datasec_img
+    assert np.array_equal(spectrograph.get_datasec_img(infile, det=1, trim=True),
+                          procimg.trim_frame(datasec_img, datasec_img < 1))
+    assert spectrograph.get_raw_image_shape(infile, det=1) == datasec_img.shape
+    # A copy of the file shares the image
+    hdu = fits.open(infile)
+    copyfile = str(tmpdir.join('b1.fits'))
+    hdu.writeto(copyfile)
+    assert spectrograph.get_datasec_img(copyfile, det=1) is datasec_img
+    # Unless the file changes
+    hdu[0].data = hdu[0].data[:-10]
+    hdu.writeto(copyfile, overwrite=True)
+    assert spectrograph.get_datasec_img(copyfile, det=1).shape != datasec_img.shape
+    # Forcing the read gives the same image
+    assert np.array_equal(spectrograph.get_datasec_img(infile, det=1, force=True), datasec_img)
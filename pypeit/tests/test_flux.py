@@ -84,6 +84,21 @@ def test_find_standard():
     assert std_dict is None
 
 
+def test_cached_lookups():
+    # The catalogue is only built once
+    std_tbl, std_tree = flux.load_standards_catalog()
+    assert flux.load_standards_catalog()[0] is std_tbl
+    assert np.all(np.diff(std_tbl['fmt']) >= 0)
+    np.testing.assert_allclose(np.sum(std_tbl['xyz']**2, axis=1), 1.)
+    # Callers receive copies of the cached data
+    extinct = flux.load_extinction_data(121.6428, 37.3413889)
+    extinct['mag_ext'][0] = 0.
+    np.testing.assert_allclose(flux.load_extinction_data(121.6428, 37.3413889)['mag_ext'][0], 1.084)
+    wave, instr = flux.load_filter_file('DECAM-R')
+    instr[:] = 0.
+    assert np.all(flux.load_filter_file('DECAM-R')[1] > 0.)
+
+
 def test_load_extinction():
     # Load
     extinct = flux.load_extinction_data(121.6428, 37.3413889)
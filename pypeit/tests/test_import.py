@@ -0,0 +1,50 @@
+"""
+Module to run tests on the import time of PypeIt
+"""
+import os
+import sys
+import subprocess
+
+# Modules imported by run_pypeit and the helper scripts before any data
+# are read
+startup_modules = ['pypeit.pypeit', 'pypeit.scripts.run_pypeit', 'pypeit.core.load',
+                   'pypeit.spectrographs.util', 'pypeit.ginga']
+
+# Plotting, viewers and optional libraries that should only be imported
+# by the QA or debug paths that need them
+deferred_modules = ['matplotlib', 'sklearn', 'IPython', 'numba', 'ginga',
+                    'linetools.spectra.xspectrum1d', 'PyQt5']
+
+
+def run_python(code, *args):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root, env.get('PYTHONPATH', '')])
+    return subprocess.run([sys.executable] + list(args) + ['-c', code], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+
+
+def test_deferred_imports():
+    code = 'import sys\n' + '\n'.join(['import {0}'.format(m) for m in startup_modules]) \
+            + '\nprint(",".join([m for m in {0} if m in sys.modules]))'.format(deferred_modules)
+    loaded = run_python(code).stdout.strip().split('\n')[-1]
+    assert loaded == '', 'Imported at start-up: {0}'.format(loaded)
+
+
+
+def test_deferred_pyplot():
+    # The plotting library is only imported by the debugging branches
+    # of the reduction steps
+    code = '\n'.join(['import sys', 'import numpy as np', 'import pypeit.pypeit',
+                      'from pypeit.core import arc',
+                      'from pypeit.core.wavecal import wvutils',
+                      'pix = np.arange(2048.)',
+                      'spec = np.zeros(pix.size)',
+                      'for c in np.linspace(100., 1900., 30):',
+                      '    spec += 1000.*np.exp(-0.5*((pix - c)/1.5)**2)',
+                      'arc.detect_lines(spec)',
+                      'wvutils.xcorr_shift_stretch(spec, np.roll(spec, 5), seed=1)',
+                      'print("matplotlib.pyplot" in sys.modules)'])
+    assert run_python(code).stdout.strip().split('\n')[-1] == 'False', \
+            'matplotlib.pyplot imported by a reduction step'
@@ -9,7 +9,7 @@ import numpy as np
 from pypeit.par.util import parse_pypeit_file
 from pypeit.pypeitsetup import PypeItSetup
 from pypeit.tests.tstutils import dev_suite_required, data_path
-from pypeit.metadata import PypeItMetaData
+from pypeit.metadata import PypeItMetaData, PypeItMetaDataIndex, row_match_config
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit.scripts import setup
 
@@ -53,6 +53,73 @@ def test_read_combid():
 
     shutil.rmtree(config_dir)
 
+def test_concurrent_headers():
+    # Use the same file several times to check the order is preserved
+    data_files = [data_path('b1.fits.gz'), data_path('b27.fits.gz')]*3
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()
+    serial = PypeItMetaData(spectrograph, par, files=data_files, strict=False)
+    par['rdx']['header_nproc'] = 3
+    concurrent = PypeItMetaData(spectrograph, par, files=data_files, strict=False)
+    for key in ['filename', 'mjd', 'exptime', 'target']:
+        assert np.array_equal(serial[key], concurrent[key]), \
+                'Concurrent header read changed {0}'.format(key)
+    headarrs = concurrent._read_headers(data_files)
+    assert [h[0]['OBSNUM'] for h in headarrs] == [1, 27]*3, 'Headers returned out of order'
+
+
+def test_metadata_index(monkeypatch, tmpdir):
+    monkeypatch.setenv('PYPEIT_CACHE', str(tmpdir))
+    data_files = [data_path('b1.fits.gz'), data_path('b27.fits.gz')]
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()
+    # The index is only kept if requested
+    PypeItMetaData(spectrograph, par, files=data_files)
+    assert not os.path.isfile(str(tmpdir.join('shane_kast_blue_metadata.json'))), \
+            'Index written by default'
+    par['rdx']['metadata_cache'] = True
+    fitstbl = PypeItMetaData(spectrograph, par, files=data_files)
+    assert os.path.isfile(str(tmpdir.join('shane_kast_blue_metadata.json'))), \
+            'Index not written'
+
+    # Headers should not be read for unchanged files
+    def no_read(*args, **kwargs):
+        raise AssertionError('Read headers of an indexed file')
+    monkeypatch.setattr(spectrograph, 'get_headarr', no_read)
+    indexed = PypeItMetaData(spectrograph, par, files=data_files)
+    for key in spectrograph.meta.keys():
+        assert np.array_equal(fitstbl[key], indexed[key]), 'Indexed {0} changed'.format(key)
+
+    # A changed definition of the metadata invalidates the index
+    assert PypeItMetaDataIndex(spectrograph).get(data_files[0]) is not None
+    spectrograph.meta['exptime'] = dict(ext=0, card='EXPOSURE')
+    assert PypeItMetaDataIndex(spectrograph).get(data_files[0]) is None
+
+
+def test_grouped_configurations():
+    spectrograph = load_spectrograph('keck_deimos')
+    rng = np.random.RandomState(2)
+    n = 200
+    data = dict(filename=['f{0:03d}.fits'.format(i) for i in range(n)],
+                dispname=rng.choice(['830G','1200G'], n), decker=rng.choice(['m1','m2'], n),
+                binning=rng.choice(['1,1','2,2'], n),
+                dispangle=rng.choice([7000., 7000.01, 8000.], n))
+    fitstbl = PypeItMetaData(spectrograph, spectrograph.default_pypeit_par(), data=data)
+    configs = fitstbl.unique_configurations()
+    fitstbl.set_configurations(configs)
+
+    # Compare to matching each row in turn
+    cfg_keys = spectrograph.configuration_keys()
+    expected = [fitstbl.get_configuration(0, cfg_keys=cfg_keys)]
+    for i in range(1,n):
+        if not np.any([row_match_config(fitstbl.table[i], c, spectrograph) for c in expected]):
+            expected += [fitstbl.get_configuration(i, cfg_keys=cfg_keys)]
+    assert list(configs.values()) == expected, 'Configurations changed'
+    for i in range(n):
+        assert row_match_config(fitstbl.table[i], configs[fitstbl['setup'][i]], spectrograph), \
+                'Frame assigned to the wrong configuration'
+
+
 @dev_suite_required
 def test_lris_red_multi_400():
     file_list = glob.glob(os.path.join(os.environ['PYPEIT_DEV'], 'RAW_DATA', 'Keck_LRIS_red',
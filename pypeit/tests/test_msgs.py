@@ -1,6 +1,9 @@
 """
 Module to run tests on armsgs
 """
+import os
+from concurrent import futures
+
 import numpy as np
 import pytest
 
@@ -32,3 +35,77 @@ def test_msgs():
     msgs.work("test 123")
     msgs.close()
 
+
+
+def test_lazy_levels(capsys):
+    msgs = pypmsgs.Messages(None, verbosity=1, colors=False)
+    # Debug messages are not written by default
+    msgs.debug('hidden {:d}', 1)
+    msgs.info('shown {:d} of {:d}', 1, 2)
+    # Messages without arguments are not formatted
+    msgs.info('not formatted {}')
+    # Per-module levels
+    msgs.set_level('WARNING', module=__name__.rpartition('.')[0])
+    msgs.info('hidden')
+    msgs.warn('warned {0}', 'here')
+    msgs.set_level('DEBUG', module=__name__)
+    msgs.debug('debugged')
+    msgs.close()
+    err = capsys.readouterr().err
+    assert 'hidden' not in err
+    assert 'shown 1 of 2' in err
+    assert 'not formatted {}' in err
+    assert 'warned here' in err
+    assert 'debugged' in err
+    with pytest.raises(ValueError):
+        msgs.set_level('LOUD')
+
+
+def test_default_level(capsys):
+    # Debug messages are not written at the highest verbosity either
+    msgs = pypmsgs.Messages(None, verbosity=2, colors=False)
+    msgs.debug('hidden {:d}', 2)
+    msgs.info('shown')
+    assert not msgs.debug_enabled()
+    msgs.set_level('DEBUG')
+    assert msgs.debug_enabled()
+    msgs.debug('debugged')
+    msgs.close()
+    err = capsys.readouterr().err
+    assert 'hidden' not in err
+    assert 'shown' in err
+    assert 'debugged' in err
+
+
+def test_repeat_limit(capsys):
+    msgs = pypmsgs.Messages(None, verbosity=1, colors=False, repeat_limit=3, repeat_window=100.)
+    for i in range(10):
+        msgs.info('repeat {:d}', i)
+    msgs.close()
+    err = capsys.readouterr().err
+    assert 'repeat 2' in err and 'repeat 3' not in err
+    assert 'Suppressed 7 repeated message(s)' in err
+
+
+worker_msgs = None
+
+def log_from_worker(i):
+    worker_msgs.info('worker message {:d}', i)
+    return os.getpid()
+
+
+def test_worker_log(tmpdir):
+    global worker_msgs
+    outfil = str(tmpdir.join('workers.log'))
+    worker_msgs = pypmsgs.Messages(outfil, verbosity=0, colors=False)
+    worker_msgs.info('parent message')
+    # The workers are forked from this process and share its log
+    with futures.ProcessPoolExecutor(max_workers=2) as executor:
+        pids = list(executor.map(log_from_worker, range(8)))
+    worker_msgs.info('parent done')
+    worker_msgs.close()
+    with open(outfil, 'r') as f:
+        lines = f.readlines()
+    assert sum(['parent message' in l for l in lines]) == 1
+    for i, pid in enumerate(pids):
+        assert sum(['(pid {0}) worker message {1}'.format(pid, i) in l for l in lines]) == 1
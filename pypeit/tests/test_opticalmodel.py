@@ -2,12 +2,15 @@
 Module to run tests on PypeItPar classes
 """
 import os
+import warnings
 import numpy
 
 import pytest
 
-from pypeit.spectrographs.opticalmodel import DetectorMap
+from pypeit.spectrographs.opticalmodel import DetectorMap, ReflectionGrating
 from pypeit.spectrographs.keck_deimos import DEIMOSCameraDistortion, KeckDEIMOSSpectrograph
+from pypeit.spectrographs.keck_deimos import DEIMOSDetectorMap
+from pypeit.spectrographs.slitmask import SlitMask
 
 from pypeit.tests.tstutils import dev_suite_required
 
@@ -22,6 +25,43 @@ def test_detectormap():
     assert numpy.all(numpy.isclose(_xpix, xpix) & numpy.isclose(_ypix, ypix)), 'I/O mismatch'
 
 
+def test_deimos_detectormap():
+    d = DEIMOSDetectorMap()
+    rstate = numpy.random.RandomState(1)
+    xpix = rstate.uniform(1, 2048, size=(5,8))
+    ypix = rstate.uniform(1, 4096, size=(5,8))
+    det = numpy.tile(numpy.arange(8)+1, (5,1))
+    ximg, yimg = d.image_coordinates(xpix, ypix, detector=det)
+    _det, _xpix, _ypix = d.ccd_coordinates(ximg, yimg)
+    assert numpy.array_equal(_det, det), 'Wrong detectors'
+    assert numpy.allclose(_xpix, xpix) and numpy.allclose(_ypix, ypix), 'I/O mismatch'
+    # Off all the detectors
+    with pytest.warns(UserWarning):
+        _det, _xpix, _ypix = d.ccd_coordinates(numpy.array([1e4]), numpy.array([0.]))
+    assert _det[0] == -1 and _xpix[0] == -1 and _ypix[0] == -1
+
+
+def test_deimos_corners_wavelengths():
+    spec = KeckDEIMOSSpectrograph()
+    roll, yaw, tilt = spec._grating_orientation(3, 831.90, 0.)
+    spec.grating = ReflectionGrating(831.90, tilt, roll, yaw, central_wave=8500.)
+    x = numpy.linspace(-300, 300, 10)
+    corners = numpy.stack([numpy.stack([x+2, numpy.full(10, -0.4)], axis=-1),
+                           numpy.stack([x-2, numpy.full(10, -0.4)], axis=-1),
+                           numpy.stack([x-2, numpy.full(10, 0.4)], axis=-1),
+                           numpy.stack([x+2, numpy.full(10, 0.4)], axis=-1)], axis=1)
+    spec.slitmask = SlitMask(corners)
+    wave = numpy.array([7000., 8500., 10000.])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        ximg, yimg, ccd, xpix, ypix = spec.mask_to_pixel_coordinates(wave=wave, corners=True)
+        # All wavelengths at once gives the result of one at a time
+        for i, w in enumerate(wave):
+            _ximg, _yimg, _ccd, _xpix, _ypix = spec.mask_to_pixel_coordinates(wave=w, corners=True)
+            assert numpy.allclose(ximg[i], _ximg) and numpy.array_equal(ccd[i], _ccd)
+    assert ximg.shape == (3,10,4) and ccd.shape == (3,10,4)
+
+
 def test_deimos_distortion():
     c = DEIMOSCameraDistortion()
     assert abs(c.apply_distortion(c.remove_distortion(0.5)) - 0.5) < 1e-5, \
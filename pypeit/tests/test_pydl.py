@@ -3,7 +3,8 @@ Module to run tests on pyidl functions
 """
 
 import numpy as np
-from pypeit.core.pydl import bspline
+from pypeit import utils
+from pypeit.core.pydl import bspline, xy2traceset
 import pytest
 
 try:
@@ -28,3 +29,31 @@ def test_bsplinetodict():
 
     assert np.max(np.array(bspline_dict['breakpoints'])-bspline_fromdict.breakpoints) == 0.
 
+
+
+def test_traceset():
+    """ The batched fits of a TraceSet match the fits of each trace
+    with robust_polyfit_djs
+    """
+    rstate = np.random.RandomState(4)
+    ntrace, nspec = 30, 4096
+    spec = np.tile(np.arange(nspec, dtype=float), (ntrace,1))
+    # Edge-like traces with a high-order curvature
+    coeff = np.column_stack((rstate.uniform(50, 2000, ntrace), rstate.normal(0, 30, (ntrace,5))))
+    truth = np.polynomial.legendre.legval(2*spec/(nspec-1)-1, coeff.T[...,None], tensor=False)
+    edges = truth + rstate.normal(0, 0.2, spec.shape)
+    edges[rstate.uniform(size=spec.shape) < 0.02] += 5.
+    invvar = (rstate.uniform(size=spec.shape) > 0.1).astype(float)
+    tset = xy2traceset(spec, edges, ncoeff=5, maxdev=1.0, maxiter=25, invvar=invvar)
+    for i in range(ntrace):
+        xvec = tset.xnorm(spec[i], False)
+        outmask, _coeff = utils.robust_polyfit_djs(xvec, edges[i], 5, function='legendre',
+                                                   maxiter=25, inmask=invvar[i] > 0,
+                                                   invvar=invvar[i], minx=-1., maxx=1.,
+                                                   maxdev=1.0, sticky=False, use_mad=False)
+        yfit = utils.func_val(_coeff, xvec, 'legendre', minx=-1., maxx=1.)
+        assert np.array_equal(tset.outmask[i], outmask)
+        np.testing.assert_allclose(tset.yfit[i], yfit, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(tset.xy()[1][i], yfit, rtol=0, atol=1e-6)
+    # The fits recover the traces
+    assert np.all(np.absolute(tset.yfit - truth) < 0.05)
@@ -1,9 +1,23 @@
 """
 Module to run tests on arqa
 """
+import os
+
+import numpy as np
+
 from pypeit import msgs
+from pypeit import pypmsgs
 from pypeit.core import qa
 
+
+def plot_payload(x, y, outfile=None):
+    from matplotlib import pyplot as plt
+    if np.any(y < 0):
+        raise ValueError('Bad payload')
+    plt.plot(x, y)
+    plt.savefig(outfile)
+    plt.close()
+
 def test_get_dimen():
     """ Get the plotting dimensions
     Returns
@@ -25,3 +39,43 @@ def test_get_dimen():
     assert (len(pages) == 4) and (pages[0][0] * pages[0][1] == maxp+1) and (pages[1][0] * pages[1][1] == maxp+1) \
         and (pages[2][0] * pages[2][1] == maxp + 1) and (pages[3][0] * pages[3][1] == 1)
     assert (len(npp) == 4) and (npp[0] == maxp) and (npp[1] == maxp) and (npp[2] == maxp) and (npp[3] == 1)
+
+
+def test_render_qa(tmpdir):
+    x = np.arange(10.)
+    try:
+        for mode in qa.valid_qa_modes():
+            qa.set_qa_mode(mode, nproc=2)
+            assert qa.get_qa_mode() == mode
+            outfiles = [str(tmpdir.join('{0}_{1}.png'.format(mode, i))) for i in range(4)]
+            for outfile in outfiles:
+                y = np.ones(x.size)
+                qa.render_qa(plot_payload, x, y, outfile=outfile)
+                # The payload is copied when the plot is requested
+                y[:] = -1.
+            if mode == 'async':
+                # Failed plots are counted
+                qa.render_qa(plot_payload, x, y, outfile=str(tmpdir.join('bad.png')))
+            failures = qa.finish_qa()
+            assert len(failures) == (1 if mode == 'async' else 0)
+            if mode == 'async':
+                # The traceback of the failed plot is returned
+                assert 'Traceback' in failures[0]
+            assert all([os.path.isfile(f) != (mode == 'off') for f in outfiles])
+    finally:
+        qa.set_qa_mode('inline', nproc=1)
+
+
+def test_qa_failure_log(tmpdir):
+    logfile = str(tmpdir.join('qa.log'))
+    log_msgs = pypmsgs.Messages(logfile, verbosity=0, colors=False)
+    try:
+        qa.set_qa_mode('async', nproc=1)
+        qa.render_qa(plot_payload, np.arange(3.), -np.ones(3), outfile=str(tmpdir.join('bad.png')))
+        # The failures still pending when the messages are closed are logged
+        log_msgs.close()
+    finally:
+        qa.set_qa_mode('inline', nproc=1)
+    with open(logfile, 'r') as f:
+        log = f.read()
+    assert 'QA plot could not be rendered' in log and 'Bad payload' in log
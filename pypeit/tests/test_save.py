@@ -74,6 +74,37 @@ def test_save2d_fits():
     assert 'PYPEIT' in head0['PIPELINE']
 
 
+def test_save2d_output_models():
+    spectrograph = 'shane_kast_blue'
+    rng = np.random.RandomState(1)
+    sci_dict = {}
+    sci_dict['meta'] = {}
+    sci_dict['meta']['vel_corr'] = 0.
+    sci_dict['meta']['ir_redux'] = False
+    sci_dict[1] = {}
+    for key in ['sciimg', 'sciivar', 'skymodel', 'objmodel', 'ivarmodel']:
+        sci_dict[1][key] = 100. + rng.normal(size=(100,100))
+    sci_dict[1]['outmask'] = rng.randint(0, 512, size=(100,100)).astype(np.uint16)
+    master_key_dict = dict(frame='', bpm='bpmkey',bias='',arc='',trace='',flat='')
+    raw_hdr = fits.Header()
+
+    for output in ['float64', 'float32', 'compressed']:
+        outfile = data_path('spec2d_{0}.fits'.format(output))
+        save.save_2d_images(sci_dict, raw_hdr, spectrograph, master_key_dict, data_path('MF'),
+                            outfile, output=output)
+        hdu = fits.open(outfile)
+        assert hdu[0].header['S2DMODEL'] == output
+        assert hdu['DET01-PROCESSED'].data.dtype.itemsize == (8 if output == 'float64' else 4)
+        # The mask is always lossless
+        assert np.array_equal(hdu['DET01-MASK'].data, sci_dict[1]['outmask'])
+        # Quantization is well below the noise
+        assert np.allclose(hdu['DET01-SKY'].data, sci_dict[1]['skymodel'], atol=0.1)
+        if output == 'compressed':
+            assert isinstance(hdu['DET01-SKY'], fits.CompImageHDU)
+        hdu.close()
+        os.remove(outfile)
+
+
 def test_save1d_fits():
     """ save1d to FITS and HDF5
     """
@@ -7,6 +7,7 @@ import numpy
 import pytest
 
 from pypeit.spectrographs.keck_deimos import KeckDEIMOSSpectrograph
+from pypeit.spectrographs.slitmask import SlitRegister
 from pypeit.tests.tstutils import dev_suite_required
 
 @dev_suite_required
@@ -17,3 +18,20 @@ def test_deimosslitmask():
     spec.get_slitmask(f)
     assert spec.slitmask.nslits == 106, 'Incorrect number of slits read!'
 
+
+def test_slitregister():
+    rstate = numpy.random.RandomState(1)
+    mask_spat = numpy.round(rstate.uniform(-300, 300, 120))
+    trace_spat = numpy.sort(rstate.choice(mask_spat, 30, replace=False)*11.6 + 2000.3)
+    register = SlitRegister(trace_spat, mask_spat)
+    # Matches are identical to a brute-force search, including ties
+    for par in [[2000., 11.6], [1500.5, -5.], [0., 0.], [2000.3, 11.6]]:
+        register._setup_to_fit(0., 1., None, None, False)
+        sep, indx = register.match(par=numpy.array(par))
+        _sep = numpy.absolute(trace_spat[:,None] - register.mask_to_trace_coo()[None,:])
+        assert numpy.array_equal(sep, numpy.amin(_sep, axis=1))
+        assert numpy.array_equal(indx, numpy.argmin(_sep, axis=1))
+    # Fit for the offset and scale
+    register.find_best_match(guess_offset=2003., guess_scale=11.61, penalty=True)
+    assert numpy.all(register.match_separation < 1.)
+    assert len(register.missing_from_trace()) > 0
@@ -61,3 +61,11 @@ def test_set():
     # Hennawi test
     idx = sobjs.det == 3
     sobjs[idx]['det'] = 1
+
+
+def test_pickle():
+    import pickle
+    sobjs = specobjs.SpecObjs([sobj1,sobj2])
+    _sobjs = pickle.loads(pickle.dumps(sobjs))
+    assert _sobjs.nobj == 2
+    assert _sobjs[1]['shape'] == shape
@@ -152,3 +152,39 @@ def test_whtisisblue():
     assert data.shape == bpm.shape, 'Image and BPM have different shapes!'
 
 
+
+
+def test_mosaic_reader():
+    """ Raw multi-amplifier reads are cached by file and detector """
+    import numpy as np
+    from astropy.io import fits
+    from pypeit.spectrographs.spectrograph import mosaic_reader
+
+    ofile = os.path.join(os.path.dirname(__file__), 'files', 'tst_mosaic.fits')
+    fits.PrimaryHDU(data=np.ones((10,10))).writeto(ofile, overwrite=True)
+
+    ncalls = []
+    @mosaic_reader()
+    def read_tst(raw_file, det=1):
+        ncalls.append(det)
+        with fits.open(glob.glob(raw_file+'*')[0]) as hdu:
+            return hdu[0].data*(1 if det is None else det), hdu[0].header, (['[:,:]'], ['[:,:]'])
+
+    img, head, secs = read_tst(ofile[:-5])
+    img2, head2, _ = read_tst(ofile, det=1)
+    assert ncalls == [1]
+    assert img is img2 and head is not head2
+    with pytest.raises(ValueError):
+        img[0,0] = 0.
+    # Different detector
+    img, _, _ = read_tst(ofile, det=2)
+    assert np.all(img == 2) and ncalls == [1,2]
+    # All detectors are not cached
+    read_tst(ofile, det=None)
+    read_tst(ofile, det=None)
+    assert ncalls == [1,2,None,None]
+    # A rewritten file is read again
+    fits.PrimaryHDU(data=np.ones((10,12))).writeto(ofile, overwrite=True)
+    img, _, _ = read_tst(ofile, det=2)
+    assert img.shape == (10,12) and ncalls == [1,2,None,None,2]
+    os.remove(ofile)
@@ -0,0 +1,57 @@
+"""
+Module to run tests on the timing of the reduction steps
+"""
+import csv
+import json
+
+import numpy as np
+
+from pypeit import timing
+
+
+class Reducer(object):
+    @timing.timed()
+    def proc(self, frame, det):
+        with timing.step('slit', slit=np.int64(3)):
+            np.ones((200, 200)).sum()
+        return det
+
+    @timing.timed(name='save')
+    def save(self, frame):
+        pass
+
+
+def test_timed_steps(tmpdir):
+    timer = timing.StepTimer()
+    with timer.step('outer', frame=1, det=2):
+        with timer.step('inner', slit=0):
+            pass
+    assert [r['step'] for r in timer.records] == ['inner', 'outer']
+    inner, outer = timer.records
+    assert (inner['frame'], inner['det'], inner['slit'], inner['depth']) == (1, 2, 0, 1)
+    assert (outer['frame'], outer['det'], outer['slit'], outer['depth']) == (1, 2, None, 0)
+    assert outer['wall'] >= inner['wall'] >= 0.
+    assert outer['cpu'] >= 0.
+
+
+def test_report(tmpdir):
+    timing.reset()
+    reducer = Reducer()
+    for det in [1, 2]:
+        assert reducer.proc(0, det=det) == det
+    reducer.save(0)
+    records = timing.timer.records
+    assert [r['step'] for r in records] == ['slit', 'Reducer.proc']*2 + ['save']
+    assert [r['det'] for r in records] == [1, 1, 2, 2, None]
+    assert records[0]['slit'] == 3
+
+    root = str(tmpdir.join('test'))
+    jsonfile, csvfile = timing.write_report(root)
+    with open(jsonfile) as f:
+        report = json.load(f)
+    assert report['summary']['Reducer.proc']['calls'] == 2
+    assert len(report['steps']) == 5
+    with open(csvfile) as f:
+        rows = list(csv.DictReader(f))
+    assert [r['step'] for r in rows] == [r['step'] for r in records]
+    assert rows[1]['det'] == '1'
@@ -13,6 +13,7 @@ from pypeit.tests.tstutils import cooked_required
 from pypeit.tests.tstutils import instant_traceslits
 from pypeit.spectrographs import util
 from pypeit.core import trace_slits
+from pypeit.core import extract
 
 def chk_for_files(root):
     files = glob.glob(root+'*')
@@ -140,3 +141,87 @@ def test_chk_deimos_slits():
         # Test
         assert traceSlits.nslit == norig
 
+
+
+def test_match_edges():
+    """ The compiled edge labelling matches the python version """
+    rstate = np.random.RandomState(1)
+    nspec, nspat = 1000, 400
+    edgearr = np.zeros((nspec, nspat), dtype=int)
+    spec = np.arange(nspec)
+    # Curved, slightly broken edges of 10 slits
+    for i, x0 in enumerate(np.linspace(20, 360, 10)):
+        for side, dx in zip([-1, 1], [0, 25]):
+            col = np.round(x0 + dx + 4*np.sin(np.pi*spec/nspec)).astype(int)
+            keep = rstate.uniform(size=nspec) > 0.1
+            edgearr[spec[keep], col[keep]] = side
+    # Spurious edge pixels and short edges
+    edgearr[rstate.randint(nspec, size=500), rstate.randint(nspat, size=500)] \
+            = rstate.choice([-1, 1], size=500)
+    edgearr[100:130, 390] = -1
+
+    ednum = 100000
+    _edgearr = edgearr.copy()
+    lcnt, rcnt = trace_slits.match_edges(edgearr, ednum)
+    _lcnt, _rcnt = trace_slits._match_edges(_edgearr, ednum, 50)
+    assert lcnt == _lcnt and rcnt == _rcnt
+    assert np.array_equal(edgearr, _edgearr)
+    assert lcnt >= 10 and rcnt >= 10
+    # Short edge was removed
+    assert np.all(edgearr[100:130, 390] == 0)
+
+
+def test_trace_centroid():
+    """ Flux- and Gaussian-weighted recentering of many traces """
+    rstate = np.random.RandomState(1)
+    nspec, nspat, ntrace = 500, 200, 8
+    spec = np.arange(nspec)
+    xtrue = np.linspace(20., 180., ntrace)[None,:] + 3.*np.sin(np.pi*spec/nspec)[:,None]
+    spat = np.arange(nspat)
+    image = np.full((nspec, nspat), 10.)
+    for itrace in range(ntrace):
+        image += 1000.*np.exp(-0.5*((spat[None,:] - xtrue[:,itrace,None])/1.3)**2)
+    invvar = np.ones_like(image)
+    # Masked rows and a trace that falls off the image
+    invvar[100:110,:] = 0.
+    xinit = xtrue + rstate.uniform(-0.5, 0.5, size=xtrue.shape)
+    xinit[:,-1] = nspat - 1.
+
+    xfw, xfw_err = trace_slits.trace_fweight(image, xinit, radius=3., invvar=invvar)
+    xgw, xgw_err = trace_slits.trace_gweight(image, xinit, sigma=1.3, invvar=invvar)
+    for xnew, xerr in [(xfw, xfw_err), (xgw, xgw_err)]:
+        assert xnew.shape == xinit.shape and xerr.shape == xinit.shape
+        good = xerr < 999.
+        # A single pass moves the guesses toward the true traces
+        assert np.mean(np.absolute(xnew[good] - xtrue[good])) \
+                    < np.mean(np.absolute(xinit[good] - xtrue[good]))
+        # Failed centroids are set to the initial guess
+        assert np.array_equal(xnew[~good], xinit[~good])
+        assert np.all(~good[:,-1])
+    assert np.all(xfw_err[100:110,:] == 999.)
+
+    # Single trace with a variable radius
+    xnew, xerr = trace_slits.trace_fweight(image, xinit[:,0], radius=np.full(nspec, 3.),
+                                           invvar=invvar)
+    assert np.array_equal(xnew, xfw[:,0]) and np.array_equal(xerr, xfw_err[:,0])
+
+    # Follow the traces from the middle row
+    xset, xerr = trace_slits.trace_crude_init(image, xtrue[nspec//2,:-1] + 0.3, nspec//2)
+    assert np.all(np.absolute(xset - xtrue[:,:-1]) < 0.5)
+
+
+def test_extract_asymbox2():
+    """ Flux between curved slit boundaries """
+    nspec, nspat = 300, 100
+    image = np.ones((nspec, nspat))
+    left = np.linspace(10.3, 60.1, 5)[None,:] + 2.*np.sin(np.pi*np.arange(nspec)/nspec)[:,None]
+    right = left + np.linspace(2., 8.5, 5)[None,:]
+    fextract = extract.extract_asymbox2(image, left, right)
+    assert fextract.shape == left.shape
+    assert np.allclose(fextract, right - left)
+    # Single trace that runs off the image
+    fextract = extract.extract_asymbox2(image, left[:,0] + 88., right[:,0] + 88.)
+    assert fextract.shape == (nspec,) and np.all(fextract < right[:,0] - left[:,0])
+    # Weighted mean
+    fextract = extract.extract_asymbox2(3.*image, left, right, weight_image=image)
+    assert np.allclose(fextract, 3.)
@@ -33,6 +33,88 @@ def test_func_fit():
         1.58666296,  2.22132814,  3.14159265,  3.14159265,  3.14159265], atol=1e-5)
 
 
+def test_gauss_lsqfit_batch():
+    """ Batched Gaussian fits match the single fits of func_fit
+    """
+    rstate = np.random.RandomState(1)
+    nfit = 20
+    x = np.arange(7, dtype=float)[None,:] + rstate.uniform(0, 100, size=nfit)[:,None]
+    cent = x[:,3] + rstate.uniform(-0.5, 0.5, size=nfit)
+    y = utils.gauss_3deg(x, rstate.uniform(100, 1000, size=nfit)[:,None], cent[:,None], 1.5) \
+            + rstate.normal(size=x.shape)
+    # A flat set that cannot be fit
+    y[-1] = 0.
+    popt, pcov, success = utils.gauss_lsqfit_batch(x, y)
+    assert popt.shape == (nfit,3) and pcov.shape == (nfit,3,3)
+    assert np.all(success[:-1]) and not success[-1]
+    for i in range(nfit-1):
+        _popt, _pcov = utils.func_fit(x[i], y[i], 'gaussian', 3, return_errors=True)
+        np.testing.assert_allclose(popt[i], _popt, rtol=1e-5)
+        np.testing.assert_allclose(pcov[i], _pcov, rtol=1e-3)
+
+
+def test_robust_polyfit_batch():
+    """ Batched robust fits match the single fits of robust_polyfit_djs
+    """
+    rstate = np.random.RandomState(2)
+    nfit, npix = 20, 500
+    x = np.tile(np.linspace(0., 2047., npix), (nfit,1))
+    y = np.polynomial.polynomial.polyval(x/2047., rstate.normal(0, 5, size=(4,nfit,1)),
+                                         tensor=False) + rstate.normal(0, 0.3, size=x.shape)
+    y[rstate.uniform(size=x.shape) < 0.03] += 20.
+    inmask = rstate.uniform(size=x.shape) > 0.1
+    # A fully masked set
+    inmask[-1] = False
+    for func in ['legendre', 'polynomial']:
+        for kwargs in [dict(maxdev=1.), dict(lower=3., upper=3.)]:
+            outmask, coeff = utils.robust_polyfit_batch(x, y, 3, function=func, minx=0.,
+                                                        maxx=2047., maxiter=25, inmask=inmask,
+                                                        **kwargs)
+            for i in range(nfit):
+                _outmask, _coeff = utils.robust_polyfit_djs(x[i], y[i], 3, function=func,
+                                                            minx=0., maxx=2047., maxiter=25,
+                                                            inmask=inmask[i], sticky=False,
+                                                            use_mad=False, **kwargs)
+                assert np.array_equal(outmask[i], _outmask)
+                np.testing.assert_allclose(coeff[i], _coeff, rtol=1e-7, atol=1e-8)
+
+
+def test_robust_polyfit2d():
+    """ The 2d robust fit matches robust_polyfit_djs and evaluates on a grid
+    """
+    rstate = np.random.RandomState(3)
+    npts = 2000
+    x = rstate.uniform(0., 1., npts)
+    x2 = rstate.randint(30, 70, npts).astype(float)
+    y = 5e5 + 3e4*x + 500*x**2 + 20*x2 + 0.3*x*x2 + rstate.normal(0, 0.05, npts)
+    y[rstate.uniform(size=npts) < 0.05] += 30.
+    inmask = rstate.uniform(size=npts) > 0.05
+    for func in ['legendre2d', 'polynomial2d']:
+        for use_mad in [True, False]:
+            outmask, coeff = utils.robust_polyfit2d(x, x2, y, (3,2), function=func, minx=0.,
+                                                    maxx=1., minx2=30., maxx2=69., maxiter=50,
+                                                    inmask=inmask, lower=3., upper=3.,
+                                                    use_mad=use_mad)
+            _outmask, _coeff = utils.robust_polyfit_djs(x, y, (3,2), x2=x2, function=func,
+                                                        minx=0., maxx=1., minx2=30., maxx2=69.,
+                                                        maxiter=50, inmask=inmask, lower=3.,
+                                                        upper=3., sticky=False, use_mad=use_mad)
+            assert np.array_equal(outmask, _outmask)
+            assert coeff.shape == _coeff.shape
+            assert np.allclose(utils.func_val(coeff, x, func, x2=x2, minx=0., maxx=1.,
+                                              minx2=30., maxx2=69.),
+                               utils.func_val(_coeff, x, func, x2=x2, minx=0., maxx=1.,
+                                              minx2=30., maxx2=69.), rtol=0, atol=1e-6)
+            # Grid evaluation
+            xg, x2g = np.linspace(0., 1., 50), np.arange(30., 70.)
+            grid = utils.func_val_grid(coeff, xg, x2g, func, minx=0., maxx=1., minx2=30.,
+                                       maxx2=69.)
+            assert grid.shape == (xg.size, x2g.size)
+            xg, x2g = np.meshgrid(xg, x2g, indexing='ij')
+            assert np.allclose(grid, utils.func_val(coeff, xg, func, x2=x2g, minx=0., maxx=1.,
+                                                    minx2=30., maxx2=69.))
+
+
 def test_calc_ivar():
     """ Run the parameter setup script
     """
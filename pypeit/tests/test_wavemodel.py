@@ -20,3 +20,26 @@ def test_transparency():
     tran_test = wavemodel.transparency(wave_test, debug=False)
 
     assert np.max(tran_test) - np.min(tran_test) == 1.
+
+
+def test_render_lines():
+    """ The windowed line rendering and the convolution to a given
+    resolution match their direct calculation.
+    """
+    rstate = np.random.RandomState(1)
+    wave = np.linspace(4000., 5000., 3000)
+    wl_line = rstate.uniform(3990., 5010., 200)
+    fl_line = rstate.uniform(1., 100., 200)
+    sigma = wl_line/2000./2.355
+    direct = np.sum(fl_line[:,None]*np.exp(-(wl_line[:,None]-wave[None,:])**2/2/sigma[:,None]**2),
+                    axis=0)
+    line_spec = wavemodel.render_lines(wave, wl_line, fl_line, sigma)
+    assert np.allclose(line_spec, direct, rtol=0, atol=1e-12)
+    # Unsorted grid
+    assert np.allclose(wavemodel.render_lines(wave[::-1], wl_line, fl_line, sigma),
+                       direct[::-1], rtol=0, atol=1e-12)
+
+    from astropy.convolution import convolve, Gaussian1DKernel
+    flux_conv, px_sigma, px_bin = wavemodel.conv2res(wave, line_spec, 1000.)
+    assert np.allclose(flux_conv, convolve(line_spec, Gaussian1DKernel(px_sigma)), rtol=0,
+                       atol=1e-10)
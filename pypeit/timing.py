@@ -0,0 +1,255 @@
+"""
+Instrumentation of the reduction steps.
+
+Each timed step records its wall-clock time, the CPU time used by the
+process and its peak resident memory, tagged with the frame, detector
+and slit being worked on.  Steps can be nested; a nested step inherits
+the frame, detector and slit of the step that encloses it.  The
+records are written to a JSON and a CSV file by :func:`write_report`.
+
+Usage::
+
+    from pypeit import timing
+
+    @timing.timed()
+    def get_arc(self):
+        ...
+
+    with timing.step('detector', frame=0, det=1):
+        ...
+"""
+import sys
+import csv
+import json
+import time
+import inspect
+import functools
+
+from contextlib import contextmanager
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from pypeit import msgs
+
+
+def max_rss():
+    """
+    Return the peak resident memory of the process in MB, or None if it
+    cannot be determined on this platform.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return rss/1024.**2 if sys.platform == 'darwin' else rss/1024.
+
+
+class StepTimer(object):
+    """
+    Registry of the timed steps of a reduction.
+
+    Attributes:
+        records (:obj:`list`):
+            One dictionary per completed step with the keys listed in
+            :attr:`columns`.
+        tstart (:obj:`float`):
+            Time at which the registry was last reset.
+    """
+    # Context tags recorded for each step
+    tags = ['frame', 'det', 'slit']
+    columns = ['step', 'depth'] + tags + ['start', 'wall', 'cpu', 'max_rss', 'rss_growth']
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Remove all records.
+        """
+        self.records = []
+        self._stack = []
+        self.tstart = time.time()
+
+    @property
+    def context(self):
+        """
+        The frame, detector and slit of the innermost running step.
+        """
+        return self._stack[-1] if len(self._stack) > 0 else dict.fromkeys(self.tags)
+
+    @contextmanager
+    def step(self, name, **context):
+        """
+        Context manager that times the enclosed block.
+
+        Args:
+            name (:obj:`str`):
+                Name of the step.
+            **context:
+                Frame, detector and/or slit being worked on.  Any not
+                provided are inherited from the enclosing step.
+        """
+        _context = dict(self.context)
+        _context.update(dict([(k, v) for k, v in context.items() if v is not None]))
+        self._stack.append(_context)
+        rss0 = max_rss()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        start = time.time() - self.tstart
+        try:
+            yield
+        finally:
+            cpu = time.process_time() - cpu0
+            wall = time.perf_counter() - wall0
+            rss = max_rss()
+            self._stack.pop()
+            record = OrderedDict([('step', name), ('depth', len(self._stack))])
+            record.update([(k, _context.get(k)) for k in self.tags])
+            record['start'] = start
+            record['wall'] = wall
+            record['cpu'] = cpu
+            record['max_rss'] = rss
+            record['rss_growth'] = None if rss is None else rss - rss0
+            self.records.append(record)
+
+    def timed(self, name=None):
+        """
+        Decorator that times each call of a function or method.
+
+        Arguments of the decorated function named ``frame``, ``det`` or
+        ``slit`` are used to tag the step.
+
+        Args:
+            name (:obj:`str`, optional):
+                Name of the step.  Defaults to the qualified name of the
+                function, e.g. ``Calibrations.get_arc``.
+        """
+        def decorator(func):
+            _name = func.__qualname__ if name is None else name
+            signature = inspect.signature(func)
+            tags = [t for t in self.tags if t in signature.parameters]
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                context = {}
+                if len(tags) > 0:
+                    arguments = signature.bind(*args, **kwargs).arguments
+                    context = dict([(t, arguments[t]) for t in tags if t in arguments])
+                with self.step(_name, **context):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """
+        Accumulate the records by step.
+
+        Returns:
+            :obj:`OrderedDict`: The number of calls, total wall-clock
+            and CPU time, and the peak memory of each step, in the
+            order the steps were first completed.
+        """
+        summary = OrderedDict()
+        for record in self.records:
+            if record['step'] not in summary:
+                summary[record['step']] = OrderedDict([('calls', 0), ('wall', 0.), ('cpu', 0.),
+                                                       ('max_rss', None)])
+            s = summary[record['step']]
+            s['calls'] += 1
+            s['wall'] += record['wall']
+            s['cpu'] += record['cpu']
+            if record['max_rss'] is not None:
+                s['max_rss'] = record['max_rss'] if s['max_rss'] is None \
+                                    else max(s['max_rss'], record['max_rss'])
+        return summary
+
+    def write(self, root):
+        """
+        Write the records to ``root.timing.json`` and
+        ``root.timing.csv``.
+
+        Args:
+            root (:obj:`str`):
+                Root of the output file names, typically the log file
+                without its extension.
+
+        Returns:
+            :obj:`tuple`: The names of the JSON and CSV files.
+        """
+        jsonfile = root + '.timing.json'
+        csvfile = root + '.timing.csv'
+        report = OrderedDict([('tstart', time.strftime('%Y-%m-%dT%H:%M:%S',
+                                                       time.localtime(self.tstart))),
+                              ('wall', time.time() - self.tstart),
+                              ('cpu', time.process_time()),
+                              ('max_rss', max_rss()),
+                              ('summary', self.summary()),
+                              ('steps', self.records)])
+        with open(jsonfile, 'w') as f:
+            json.dump(report, f, indent=1, default=_to_json)
+        with open(csvfile, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writeheader()
+            writer.writerows(self.records)
+        return jsonfile, csvfile
+
+
+def _to_json(obj):
+    """ Convert numpy scalars used as frame/detector/slit tags"""
+    try:
+        return obj.item()
+    except AttributeError:
+        raise TypeError('{0} is not JSON serializable'.format(type(obj)))
+
+
+# Registry used by the reduction
+timer = StepTimer()
+
+
+def step(name, **context):
+    """
+    Time a block of code; see :func:`StepTimer.step`.
+    """
+    return timer.step(name, **context)
+
+
+def timed(name=None):
+    """
+    Decorator to time a function; see :func:`StepTimer.timed`.
+    """
+    return timer.timed(name=name)
+
+
+def reset():
+    """
+    Remove all the timing records.
+    """
+    timer.reset()
+
+
+def write_report(root):
+    """
+    Write the timing records next to the log file and print a summary.
+
+    Args:
+        root (:obj:`str`):
+            Root of the output file names.
+
+    Returns:
+        :obj:`tuple`: The names of the JSON and CSV files.
+    """
+    jsonfile, csvfile = timer.write(root)
+    msg_string = '{0:<40s} {1:>6s} {2:>10s} {3:>10s} {4:>10s}'.format('Step', 'Calls', 'Wall (s)',
+                                                                   'CPU (s)', 'RSS (MB)')
+    for name, s in timer.summary().items():
+        msg_string += msgs.newline() + '{0:<40s} {1:6d} {2:10.2f} {3:10.2f} {4:>10s}'.format(
+                        name, s['calls'], s['wall'], s['cpu'],
+                        'None' if s['max_rss'] is None else '{0:.1f}'.format(s['max_rss']))
+    msgs.info('Timing summary:' + msgs.newline() + msg_string)
+    msgs.info('Timing report written to {0} and {1}'.format(jsonfile, csvfile))
+    return jsonfile, csvfile
@@ -7,7 +7,6 @@ Module for guiding Slit/Order tracing
 import os
 import inspect
 import copy
-import IPython
 
 import numpy as np
 
@@ -16,7 +15,7 @@ from scipy import ndimage
 from astropy.io import fits
 
 from pypeit import msgs
-from pypeit.core import parse, trace_slits, extract, pixels
+from pypeit.core import parse, trace_slits, extract, pixels, qa
 #from pypeit.core import io
 from pypeit import utils
 from pypeit import masterframe
@@ -936,10 +935,10 @@ class TraceSlits(masterframe.MasterFrame):
 
         """
         slitmask = pixels.tslits2mask(self.tslits_dict)
-        trace_slits.slit_trace_qa(self.mstrace, self.slit_left,
-                                   self.slit_righ, slitmask, self.extrapord, self.master_key,
-                                   desc="Trace of the slit edges D{:02d}".format(self.det),
-                                   use_slitid=use_slitid, out_dir=self.qa_path)
+        qa.render_qa(trace_slits.slit_trace_qa, self.mstrace, self.slit_left,
+                     self.slit_righ, slitmask, self.extrapord, self.master_key,
+                     desc="Trace of the slit edges D{:02d}".format(self.det),
+                     use_slitid=use_slitid, out_dir=self.qa_path)
 
 
     def __repr__(self):
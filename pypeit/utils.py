@@ -2,11 +2,11 @@
 General utility functions.
 
 .. _numpy.ndarray: https://docs.scipy.org/doc/numpy/reference/generated/numpy.ndarray.html
+.. _numpy.polynomial.polynomial.polyfit: https://docs.scipy.org/doc/numpy/reference/generated/numpy.polynomial.polynomial.polyfit.html
 """
 import os
 import warnings
 import itertools
-import matplotlib
 
 import numpy as np
 
@@ -14,7 +14,6 @@ from scipy.optimize import curve_fit
 from scipy import interpolate
 
 from astropy import units
-from matplotlib import pyplot as plt
 
 # Imports for fast_running_median
 from collections import deque
@@ -71,6 +70,7 @@ def pyplot_rcparams():
     Returns:
 
     """
+    from matplotlib import pyplot as plt
     # set some plotting parameters
     plt.rcParams["xtick.top"] = True
     plt.rcParams["ytick.right"] = True
@@ -103,6 +103,7 @@ def pyplot_rcparams_default():
     Returns:
 
     """
+    import matplotlib
     matplotlib.rcParams.update(matplotlib.rcParamsDefault)
 
 
@@ -373,9 +374,9 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, inmask = None, upper=5,
         inmask = (invvar > 0)
 
     nin = np.sum(inmask)
-    msgs.info("Fitting npoly =" + "{:3d}".format(npoly) + " profile basis functions, nin=" + "{:3d}".format(nin) + " good pixels")
-    msgs.info("******************************  Iter  Chi^2  # rejected  Rel. fact   ******************************")
-    msgs.info("                              ----  -----  ----------  --------- ")
+    msgs.info("Fitting npoly ={:3d} profile basis functions, nin={:3d} good pixels", npoly, nin)
+    msgs.debug("******************************  Iter  Chi^2  # rejected  Rel. fact   ******************************")
+    msgs.debug("                              ----  -----  ----------  --------- ")
 
 
     maskwork = outmask & inmask & (invvar > 0)
@@ -454,11 +455,12 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, inmask = None, upper=5,
                                          upper=upper*relative_factor,
                                          lower=lower*relative_factor, **kwargs_reject)
             tempin = np.copy(maskwork)
-            msgs.info("                             {:4d}".format(iiter) + "{:8.3f}".format(reduced_chi) +
-                      "  {:7d}".format((maskwork == 0).sum()) + "      {:6.2f}".format(relative_factor))
+            if msgs.debug_enabled():
+                msgs.debug("                             {:4d}{:8.3f}  {:7d}      {:6.2f}", iiter,
+                           reduced_chi, np.sum(maskwork == 0), relative_factor)
 
         else:
-            msgs.info("                             {:4d}".format(iiter) + "    ---    ---    ---    ---")
+            msgs.debug("                             {:4d}    ---    ---    ---    ---", iiter)
 
     if iiter == (maxiter + 1):
         exit_status = 1
@@ -470,10 +472,9 @@ def bspline_profile(xdata, ydata, invvar, profile_basis, inmask = None, upper=5,
     #    3 = all break points were dropped
     #    4 = Number of good data points fewer than nord
 
-    msgs.info("***************************************************************************************************")
-    msgs.info(
-        "Final fit after " + "{:2d}".format(iiter) + " iterations: reduced_chi = " + "{:8.3f}".format(reduced_chi) +
-        ", rejected = " + "{:7d}".format((maskwork == 0).sum()) + ", relative_factor = {:6.2f}".format(relative_factor))
+    msgs.debug("***************************************************************************************************")
+    msgs.info("Final fit after {:2d} iterations: reduced_chi = {:8.3f}, rejected = {:7d}, relative_factor = {:6.2f}",
+              iiter, reduced_chi, np.sum(maskwork == 0), relative_factor)
     # Finish
     outmask = np.copy(maskwork)
     # Return
@@ -952,6 +953,121 @@ def guess_gauss(x,y):
     return ampl, cent, sigma
 
 
+def guess_gauss_batch(x, y):
+    """
+    Vectorized version of :func:`guess_gauss` for many sets of points.
+
+    Args:
+        x (ndarray): x-values with shape (nfit, npix)
+        y (ndarray): y-values with shape (nfit, npix)
+
+    Returns:
+        ndarray: Amplitude, centroid and sigma of each set, with shape
+        (nfit, 3)
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ypos = y - y.min(axis=1, keepdims=True)
+        norm = np.sum(ypos, axis=1)
+        cent = np.sum(ypos*x, axis=1)/norm
+        sigma = np.sqrt(np.abs(np.sum((x-cent[:,None])**2*ypos, axis=1)/norm))
+        # Calculate ampl from pixels within +/- sigma/2
+        cen_pix = np.abs(x-cent[:,None]) < sigma[:,None]/2
+    ampl = y.max(axis=1)
+    has_cen = np.any(cen_pix, axis=1)
+    if np.any(has_cen):
+        ampl[has_cen] = np.nanmedian(np.where(cen_pix, y, np.nan)[has_cen], axis=1)
+    return np.stack([ampl, cent, sigma], axis=1)
+
+
+def gauss_lsqfit_batch(x, y, p0=None, maxiter=200, ftol=1.49012e-8, xtol=1.49012e-8):
+    """
+    Fit a 3 parameter Gaussian (:func:`gauss_3deg`) to many sets of
+    points at once.
+
+    All sets are fit simultaneously with a vectorized Levenberg-Marquardt
+    minimization of the unweighted chi-square, giving the same best-fit
+    parameters and covariance as calling :func:`func_fit` with
+    ``func='gaussian'`` and ``deg=3`` for each set, to within the
+    tolerance of the fit.
+
+    Args:
+        x (ndarray): x-values with shape (nfit, npix)
+        y (ndarray): y-values with shape (nfit, npix)
+        p0 (ndarray, optional): Initial amplitude, centroid and sigma
+            with shape (nfit, 3).  Default is from
+            :func:`guess_gauss_batch`.
+        maxiter (int, optional): Maximum number of iterations
+        ftol (float, optional): Relative reduction in the chi-square
+            below which a fit has converged
+        xtol (float, optional): Relative change in the parameters below
+            which a fit has converged
+
+    Returns:
+        ndarray, ndarray, ndarray: The best-fit parameters with shape
+        (nfit, 3), their covariance with shape (nfit, 3, 3), and a
+        boolean array that is False for fits that did not converge.  As
+        for `scipy.optimize.curve_fit`_, the covariance is scaled by the
+        reduced chi-square and is infinite if it cannot be determined.
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    nfit, npix = y.shape
+    p = guess_gauss_batch(x, y) if p0 is None else np.array(p0, dtype=float)
+
+    def _chi2_jac(_p, _x, _y):
+        ampl, cent, sigm = _p[:,0,None], _p[:,1,None], _p[:,2,None]
+        expo = np.exp(-1.*(cent-_x)**2/2/sigm**2)
+        resid = _y - ampl*expo
+        jac = np.stack([expo, -ampl*expo*(cent-_x)/sigm**2, ampl*expo*(cent-_x)**2/sigm**3],
+                       axis=2)
+        return np.sum(resid**2, axis=1), resid, jac
+
+    lam = np.full(nfit, 1e-3)
+    success = np.zeros(nfit, dtype=bool)
+    active = np.all(np.isfinite(p), axis=1) & (npix >= 3)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        chi2 = _chi2_jac(p, x, y)[0]
+        for it in range(maxiter):
+            indx = np.where(active)[0]
+            if indx.size == 0:
+                break
+            _chi2, resid, jac = _chi2_jac(p[indx], x[indx], y[indx])
+            alpha = np.einsum('nki,nkj->nij', jac, jac)
+            beta = np.einsum('nki,nk->ni', jac, resid)
+            diag = np.einsum('nii->ni', alpha)
+            curv = alpha + lam[indx,None,None]*diag[:,:,None]*np.eye(3)[None,:,:]
+            ok = np.all(np.isfinite(curv), axis=(1,2)) & (np.abs(np.linalg.det(curv)) > 0)
+            delta = np.zeros_like(beta)
+            if np.any(ok):
+                delta[ok] = np.linalg.solve(curv[ok], beta[ok,:,None])[...,0]
+            pnew = p[indx] + delta
+            chi2_new = _chi2_jac(pnew, x[indx], y[indx])[0]
+            better = ok & np.isfinite(chi2_new) & (chi2_new <= _chi2)
+            # Accepted steps
+            acc = indx[better]
+            p[acc] = pnew[better]
+            chi2[acc] = chi2_new[better]
+            lam[acc] /= 10.
+            done = better & (((_chi2 - chi2_new) <= ftol*_chi2)
+                             | np.all(np.abs(delta) <= xtol*(np.abs(pnew) + xtol), axis=1))
+            # Rejected steps; stop once no step improves the fit
+            rej = indx[~better]
+            lam[rej] *= 10.
+            done |= ~better & (lam[indx] > 1e16)
+            success[indx[done]] = True
+            active[indx[done]] = False
+
+        # Covariance scaled by the reduced chi-square, as in curve_fit
+        pcov = np.full((nfit, 3, 3), np.inf)
+        _, _, jac = _chi2_jac(p, x, y)
+        alpha = np.einsum('nki,nkj->nij', jac, jac)
+        ok = np.all(np.isfinite(alpha), axis=(1,2)) & (np.abs(np.linalg.det(alpha)) > 0)
+        if npix > 3 and np.any(ok):
+            pcov[ok] = np.linalg.inv(alpha[ok]) * (chi2[ok]/(npix-3))[:,None,None]
+    success &= np.all(np.isfinite(p), axis=1)
+    return p, pcov, success
+
+
 
 
 
@@ -1214,6 +1330,385 @@ def robust_polyfit_djs(xarray, yarray, order, x2 = None, function = 'polynomial'
 
     return outmask, ct
 
+def _vander_batch(x, order, function, minx=None, maxx=None, mask=None):
+    """
+    Pseudo-Vandermonde matrices, with shape (nvec, npix, order+1), of
+    the rows of `x` for :func:`polyfit_batch`.
+
+    As in :func:`func_fit` and :func:`func_val`, the Legendre and
+    Chebyshev series are evaluated in `x` normalized by `minx` and
+    `maxx`, or by the range of each row (limited to the points selected
+    by `mask`) if these are not provided.
+    """
+    vander = dict(polynomial=np.polynomial.polynomial.polyvander,
+                  legendre=np.polynomial.legendre.legvander,
+                  chebyshev=np.polynomial.chebyshev.chebvander)
+    if function not in vander.keys():
+        msgs.error('Batch fitting not available for function {:s}'.format(function))
+    if function != 'polynomial':
+        if minx is None or maxx is None:
+            _mask = np.ones(x.shape, dtype=bool) if mask is None else mask
+            xmin = np.min(np.where(_mask, x, np.inf), axis=1, keepdims=True)
+            xmax = np.max(np.where(_mask, x, -np.inf), axis=1, keepdims=True)
+            few = np.sum(_mask, axis=1) < 2
+            xmin[few], xmax[few] = -1., 1.
+        else:
+            xmin, xmax = minx, maxx
+        x = 2.0 * (x-xmin)/(xmax-xmin) - 1.0
+    return vander[function](x, order)
+
+
+def polyfit_batch(xarray, yarray, order, function='polynomial', minx=None, maxx=None, w=None,
+                  inmask=None):
+    """
+    Fit a polynomial, Legendre or Chebyshev series to many vectors at
+    once.
+
+    Each row is fit by weighted least-squares as in :func:`func_fit`,
+    but the fits are done together by solving the (column-scaled)
+    normal equations of all rows in one set of array operations.  Rows
+    with fewer good points than coefficients, or whose normal equations
+    are too poorly conditioned to be solved accurately, are fit
+    individually with :func:`func_fit`.
+
+    Args:
+        xarray (ndarray): Independent variable with shape (nvec, npix)
+        yarray (ndarray): Dependent variable with shape (nvec, npix)
+        order (int): Order of the fit
+        function (str, optional): 'polynomial', 'legendre' or
+            'chebyshev'
+        minx, maxx (float, optional): Range used to normalize `xarray`
+            for the Legendre and Chebyshev fits.  If not provided, the
+            range of the good points in each row is used.
+        w (ndarray, optional): Weights with shape (nvec, npix), applied
+            to the residuals as in `numpy.polynomial.polynomial.polyfit`_
+        inmask (ndarray, optional): Boolean mask with shape (nvec,
+            npix); True for points to include in the fit
+
+    Returns:
+        ndarray: Coefficients of the fits with shape (nvec, order+1)
+    """
+    x = np.asarray(xarray, dtype=float)
+    y = np.asarray(yarray, dtype=float)
+    mask = np.ones(y.shape, dtype=bool) if inmask is None else np.asarray(inmask, dtype=bool)
+    wgt = mask.astype(float) if w is None else np.asarray(w, dtype=float)*mask
+
+    # Normal equations of all rows, with the columns scaled as in
+    # numpy's polyfit to keep them well conditioned
+    lhs = _vander_batch(x, order, function, minx=minx, maxx=maxx, mask=mask) * wgt[...,None]
+    alpha = np.matmul(np.swapaxes(lhs, 1, 2), lhs)
+    beta = np.matmul(np.swapaxes(lhs, 1, 2), (y*wgt)[...,None])[...,0]
+    scl = np.sqrt(np.einsum('nii->ni', alpha))
+    scl[scl == 0] = 1.
+    alpha /= scl[:,:,None]*scl[:,None,:]
+    coeff = np.zeros(beta.shape, dtype=float)
+    solve = np.sum(wgt != 0, axis=1) > order
+    # The normal equations square the condition number of the fit;
+    # leave the rows that would lose more than half of the precision
+    # to the least-squares solution of func_fit
+    solve[solve] = np.linalg.cond(alpha[solve]) < 1/np.sqrt(np.finfo(float).eps)
+    if np.any(solve):
+        coeff[solve] = np.linalg.solve(alpha[solve], beta[solve]/scl[solve])/scl[solve]
+    for i in np.where(np.invert(solve) & np.any(mask, axis=1))[0]:
+        coeff[i] = func_fit(xarray[i], yarray[i], function, order, minx=minx, maxx=maxx,
+                            w=None if w is None else w[i], inmask=mask[i])
+    return coeff
+
+
+def polyval_batch(coeff, xarray, function='polynomial', minx=None, maxx=None):
+    """
+    Evaluate the fits returned by :func:`polyfit_batch` or
+    :func:`robust_polyfit_batch`.
+
+    Args:
+        coeff (ndarray): Coefficients with shape (nvec, order+1)
+        xarray (ndarray): Positions with shape (nvec, npix)
+        function (str, optional): 'polynomial', 'legendre' or
+            'chebyshev'
+        minx, maxx (float, optional): Normalization range for the
+            Legendre and Chebyshev series.  If not provided, the range
+            of each row of `xarray` is used, as in :func:`func_val`.
+
+    Returns:
+        ndarray: The fits evaluated at `xarray`, with shape (nvec, npix)
+    """
+    vander = _vander_batch(np.asarray(xarray, dtype=float), coeff.shape[1]-1, function,
+                           minx=minx, maxx=maxx)
+    return np.einsum('npi,ni->np', vander, coeff)
+
+
+def robust_polyfit_batch(xarray, yarray, order, function='polynomial', minx=None, maxx=None,
+                         maxiter=10, inmask=None, invvar=None, lower=None, upper=None,
+                         maxdev=None):
+    """
+    Robust polynomial fits of many vectors at once.
+
+    This gives the result of calling :func:`robust_polyfit_djs` for each
+    row of `yarray` (with ``sigma=None``, ``maxrej=None``, ``grow=0``,
+    ``sticky=False`` and ``use_mad=False``), but the fits and the
+    rejection iterations of all rows are done together with
+    :func:`polyfit_batch`.  Rows stop iterating independently, once the
+    rejection no longer changes their mask.
+
+    Args:
+        xarray (ndarray): Independent variable with shape (nvec, npix)
+        yarray (ndarray): Dependent variable with shape (nvec, npix)
+        order (int): Order of the fit
+        function (str, optional): 'polynomial', 'legendre' or
+            'chebyshev'
+        minx, maxx (float, optional): Normalization range for the
+            Legendre and Chebyshev fits
+        maxiter (int, optional): Maximum number of rejection iterations
+        inmask (ndarray, optional): Input mask; True for good points
+        invvar (ndarray, optional): Inverse variance, used to weight the
+            fit and to reject points with `lower` and `upper`.  If None,
+            the standard deviation of the residuals of each row is used
+            for the rejection.
+        lower, upper (float, optional): Rejection thresholds in units of
+            sigma
+        maxdev (float, optional): Reject points with an absolute
+            deviation above this value
+
+    Returns:
+        ndarray, ndarray: The output mask with shape (nvec, npix) and
+        the coefficients with shape (nvec, order+1)
+    """
+    x = np.asarray(xarray, dtype=float)
+    y = np.asarray(yarray, dtype=float)
+    nvec = y.shape[0]
+    inmask = np.ones(y.shape, dtype=bool) if inmask is None else np.asarray(inmask, dtype=bool)
+    weights = np.ones(y.shape, dtype=float) if invvar is None else np.asarray(invvar, dtype=float)
+
+    thismask = inmask.copy()
+    coeff = np.zeros((nvec, order+1), dtype=float)
+    active = np.ones(nvec, dtype=bool)
+    # Rows that are completely masked during the iterations are
+    # returned without a final fit, as in robust_polyfit_djs
+    empty = np.zeros(nvec, dtype=bool)
+    iIter = 0
+    while np.any(active) and iIter < maxiter:
+        indx = np.where(active)[0]
+        ngood = np.sum(thismask[indx], axis=1)
+        if np.any(ngood <= order + 1):
+            msgs.warn("More parameters than data points for {:d} fits - ".format(np.sum(ngood <= order + 1))
+                      + "fits might be undesirable")
+        if np.any(ngood == 0):
+            msgs.warn("All points were masked for {:d} fits. Masking all of their ".format(np.sum(ngood == 0))
+                      + "points. These fits are likely undesirable")
+            empty[indx[ngood == 0]] = True
+            active[indx[ngood == 0]] = False
+            indx = indx[ngood > 0]
+        if indx.size == 0:
+            break
+        coeff[indx] = polyfit_batch(x[indx], y[indx], order, function=function, minx=minx,
+                                    maxx=maxx, w=weights[indx], inmask=thismask[indx])
+        ymodel = polyval_batch(coeff[indx], x[indx], function=function, minx=minx, maxx=maxx)
+        diff = y[indx] - ymodel
+
+        # Rejection, as in pydl.djs_reject
+        badness = np.zeros(diff.shape, dtype=float)
+        if lower is not None or upper is not None:
+            if invvar is None:
+                good = inmask[indx] & thismask[indx]
+                ngood = np.sum(good, axis=1)
+                mean = np.sum(diff*good, axis=1)/np.fmax(ngood, 1)
+                sigma = np.sqrt(np.sum(((diff - mean[:,None])*good)**2, axis=1)/np.fmax(ngood, 1))
+                chi = diff/(sigma + (sigma == 0))[:,None]
+                if lower is not None:
+                    badness += np.fmax(-chi, 0.0) * (diff < (-lower * sigma[:,None]))
+                if upper is not None:
+                    badness += np.fmax(chi, 0.0) * (diff > (upper * sigma[:,None]))
+            else:
+                chi = diff*np.sqrt(invvar[indx])
+                if lower is not None:
+                    badness += np.fmax(-chi, 0.0) * (chi < -lower)
+                if upper is not None:
+                    badness += np.fmax(chi, 0.0) * (chi > upper)
+        if maxdev is not None:
+            badness += np.absolute(diff) / maxdev * (np.absolute(diff) > maxdev)
+        newmask = (badness == 0.0) & inmask[indx]
+        qdone = np.all(newmask == thismask[indx], axis=1)
+        thismask[indx] = newmask
+        active[indx[qdone]] = False
+        iIter += 1
+
+    if (iIter == maxiter) & (maxiter != 0) & np.any(active):
+        msgs.warn('Maximum number of iterations maxiter={:}'.format(maxiter)
+                  + ' reached in robust_polyfit_batch for {:d} fits'.format(np.sum(active)))
+    outmask = thismask.copy()
+    final = np.invert(empty)
+    if np.any(np.sum(outmask[final], axis=1) == 0):
+        msgs.warn('All points were rejected for some fits!!! They will be zero everywhere.')
+    # Do the final fit
+    coeff[final] = polyfit_batch(x[final], y[final], order, function=function, minx=minx,
+                                 maxx=maxx, w=weights[final], inmask=outmask[final])
+    return outmask, coeff
+
+
+def _vander2d(x, x2, order, function, minx=None, maxx=None, minx2=None, maxx2=None):
+    """
+    Tensor-product pseudo-Vandermonde matrix of a 2d fit, with shape
+    (npts, (order[0]+1)*(order[1]+1)), in the coefficient order of
+    :func:`func_val`.
+    """
+    vander = dict(polynomial=np.polynomial.polynomial.polyvander2d,
+                  legendre=np.polynomial.legendre.legvander2d,
+                  chebyshev=np.polynomial.chebyshev.chebvander2d)
+    if function[-2:] != '2d' or function[:-2] not in vander.keys():
+        msgs.error('Function {0:s} has not yet been implemented for 2d fits'.format(function))
+    if function[:-2] != 'polynomial':
+        x = scale_minmax(x, minx=minx, maxx=maxx)
+        x2 = scale_minmax(x2, minx=minx2, maxx=maxx2)
+    return vander[function[:-2]](x, x2, order)
+
+
+def func_val_grid(c, x, x2, func, minx=None, maxx=None, minx2=None, maxx2=None):
+    """
+    Evaluate a 2d fit on the grid of all pairs of `x` and `x2`.
+
+    This gives ``func_val(c, X, func, x2=X2, ...)`` for the mesh ``X,
+    X2`` of the two vectors, but the series are only evaluated along
+    each vector and combined with two matrix products.  It is used, for
+    example, to evaluate an echelle wavelength solution for all spectral
+    pixels of all orders in one call.
+
+    Args:
+        c (ndarray): Coefficients of the 2d fit with shape
+            (order[0]+1, order[1]+1)
+        x (ndarray): Positions along the first dimension
+        x2 (ndarray): Positions along the second dimension
+        func (str): 'polynomial2d', 'legendre2d' or 'chebyshev2d'
+        minx, maxx, minx2, maxx2 (float, optional): Normalization
+            ranges, as in :func:`func_val`
+
+    Returns:
+        ndarray: The fit evaluated on the grid, with shape (x.size,
+        x2.size)
+    """
+    vander = dict(polynomial=np.polynomial.polynomial.polyvander,
+                  legendre=np.polynomial.legendre.legvander,
+                  chebyshev=np.polynomial.chebyshev.chebvander)
+    if func[-2:] != '2d' or func[:-2] not in vander.keys():
+        msgs.error('Function {0:s} has not yet been implemented for 2d fits'.format(func))
+    x = np.atleast_1d(np.asarray(x, dtype=float))
+    x2 = np.atleast_1d(np.asarray(x2, dtype=float))
+    if func[:-2] != 'polynomial':
+        x = scale_minmax(x, minx=minx, maxx=maxx)
+        x2 = scale_minmax(x2, minx=minx2, maxx=maxx2)
+    c = np.asarray(c)
+    return vander[func[:-2]](x, c.shape[0]-1) @ c @ vander[func[:-2]](x2, c.shape[1]-1).T
+
+
+def robust_polyfit2d(xarray, x2, yarray, order, function='legendre2d', minx=None, maxx=None,
+                     minx2=None, maxx2=None, maxiter=10, inmask=None, lower=None, upper=None,
+                     maxdev=None, use_mad=True):
+    """
+    Robust 2d polynomial fit.
+
+    This gives the result of :func:`robust_polyfit_djs` for a 2d
+    function (with ``sigma=None``, ``invvar=None``, ``maxrej=None``,
+    ``grow=0`` and ``sticky=False``), but the design matrix of the fit
+    is only built once.  The normal equations are then updated in each
+    rejection iteration by adding and removing the rows of only the
+    points whose mask changed, so that an iteration costs little more
+    than the evaluation of the residuals.
+
+    Args:
+        xarray (ndarray): First independent variable
+        x2 (ndarray): Second independent variable
+        yarray (ndarray): Dependent variable
+        order (tuple): Order of the fit along each dimension
+        function (str, optional): 'polynomial2d', 'legendre2d' or
+            'chebyshev2d'
+        minx, maxx, minx2, maxx2 (float, optional): Normalization
+            ranges, as in :func:`func_fit`
+        maxiter (int, optional): Maximum number of rejection iterations
+        inmask (ndarray, optional): Input mask; True for good points
+        lower, upper (float, optional): Rejection thresholds in units of
+            sigma
+        maxdev (float, optional): Reject points with an absolute
+            deviation above this value
+        use_mad (bool, optional): Use the median absolute deviation of
+            the residuals for sigma, instead of their standard deviation
+
+    Returns:
+        ndarray, ndarray: The output mask and the coefficients, with
+        shape (order[0]+1, order[1]+1)
+    """
+    y = np.asarray(yarray, dtype=float)
+    inmask = np.ones(y.size, dtype=bool) if inmask is None else np.asarray(inmask, dtype=bool)
+    order = np.asarray(order)
+    vander = _vander2d(np.asarray(xarray, dtype=float), np.asarray(x2, dtype=float), order,
+                       function, minx=minx, maxx=maxx, minx2=minx2, maxx2=maxx2)
+
+    # Normal equations of the good points
+    thismask = inmask.copy()
+    alpha = vander[thismask].T @ vander[thismask]
+    beta = vander[thismask].T @ y[thismask]
+
+    def _solve(mask):
+        if function[:-2] == 'polynomial':
+            # The unscaled power series can be too badly conditioned for
+            # the normal equations
+            return np.linalg.lstsq(vander[mask], y[mask], rcond=None)[0]
+        scl = np.sqrt(np.diag(alpha))
+        scl[scl == 0] = 1.
+        try:
+            return np.linalg.solve(alpha/scl[:,None]/scl[None,:], beta/scl)/scl
+        except np.linalg.LinAlgError:
+            return np.linalg.lstsq(vander[mask], y[mask], rcond=None)[0]
+
+    iIter = 0
+    qdone = False
+    while (not qdone) and (iIter < maxiter):
+        ngood = np.sum(thismask)
+        if ngood <= np.sum(order) + 1:
+            msgs.warn("More parameters than data points - fit might be undesirable")
+        if ngood == 0:
+            msgs.warn("All points were masked. Returning current fit and masking all points. "
+                      "Fit is likely undesirable")
+            return thismask, np.zeros(order + 1)
+        coeff = _solve(thismask)
+        diff = y - vander @ coeff
+
+        # Rejection, as in pydl.djs_reject
+        badness = np.zeros(y.size, dtype=float)
+        if lower is not None or upper is not None:
+            good_diff = diff[thismask]
+            sigma = 1.4826*np.median(np.absolute(good_diff)) if use_mad else np.std(good_diff)
+            chi = diff/(sigma + (sigma == 0))
+            if lower is not None:
+                badness += np.fmax(-chi, 0.0) * (diff < -lower * sigma)
+            if upper is not None:
+                badness += np.fmax(chi, 0.0) * (diff > upper * sigma)
+        if maxdev is not None:
+            badness += np.absolute(diff) / maxdev * (np.absolute(diff) > maxdev)
+        newmask = (badness == 0.0) & inmask
+
+        # Update the normal equations with the points that changed
+        added = newmask & np.invert(thismask)
+        removed = thismask & np.invert(newmask)
+        qdone = not (np.any(added) or np.any(removed))
+        if not qdone:
+            alpha += vander[added].T @ vander[added] - vander[removed].T @ vander[removed]
+            beta += vander[added].T @ y[added] - vander[removed].T @ y[removed]
+        thismask = newmask
+        iIter += 1
+
+    if (iIter == maxiter) & (maxiter != 0):
+        msgs.warn('Maximum number of iterations maxiter={:}'.format(maxiter) + ' reached in robust_polyfit2d')
+    outmask = thismask.copy()
+    if np.sum(outmask) == 0:
+        msgs.warn('All points were rejected!!! The fits will be zero everywhere.')
+        return outmask, np.zeros(order + 1)
+
+    # The final fit; this is the last fit unless the mask changed in the
+    # last iteration
+    if not qdone:
+        coeff = _solve(outmask)
+    return outmask, coeff.reshape(order + 1)
+
+
 def robust_optimize(ydata, fitfunc, arg_dict, maxiter=10, inmask=None, sigma=None, invvar=None,
                     lower=None, upper=None, maxdev=None, maxrej=None, groupdim=None,
                     groupsize=None, groupbadpix=False, grow=0, sticky=True, use_mad=True,
@@ -7,14 +7,12 @@ import inspect
 
 import numpy as np
 
-from matplotlib import pyplot as plt
-
 import linetools.utils
 
 from pypeit import msgs
 from pypeit import masterframe
 from pypeit.core import arc, qa, pixels
-from pypeit.core.wavecal import autoid, waveio
+from pypeit.core.wavecal import waveio
 
 from pypeit import debugger
 
@@ -148,6 +146,7 @@ class WaveCalib(masterframe.MasterFrame):
         Returns:
             dict:  self.wv_calib
         """
+        from pypeit.core.wavecal import autoid
         # Obtain a list of good slits
         ok_mask = np.where(~self.maskslits)[0]
 
@@ -228,7 +227,7 @@ class WaveCalib(masterframe.MasterFrame):
             for slit in ok_mask:
                 outfile = qa.set_qa_filename(self.master_key, 'arc_fit_qa', slit=slit,
                                              out_dir=self.qa_path)
-                autoid.arc_fit_qa(self.wv_calib[str(slit)], outfile = outfile)
+                qa.render_qa(autoid.arc_fit_qa, self.wv_calib[str(slit)], outfile=outfile)
 
         # Return
         self.steps.append(inspect.stack()[0][3])
@@ -466,6 +465,8 @@ class WaveCalib(masterframe.MasterFrame):
         Returns:
 
         """
+        from pypeit.core.wavecal import autoid
+        from matplotlib import pyplot as plt
         if item == 'spec':
             # spec
             spec = self.wv_calib[str(slit)]['spec']
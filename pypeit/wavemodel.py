@@ -5,9 +5,9 @@ Module to create models of arc lines.
 import astropy
 import re
 import scipy
+from scipy import signal
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from pkg_resources import resource_filename
 from astropy.io import fits
@@ -39,6 +39,7 @@ def blackbody(wavelength, T_BB=250., debug=False):
     blackbody_counts : np.array
         Same as above but in flux density
     """
+    import matplotlib.pyplot as plt
 
     # Define constants in cgs
     PLANCK  = astropy.constants.h.cgs.value    # erg*s
@@ -73,6 +74,65 @@ def blackbody(wavelength, T_BB=250., debug=False):
     return blackbody, blackbody_counts
 
 
+def render_lines(wavelength, wl_line, fl_line, sigma, nsig=10., chunk=10000000):
+    """ Sum a set of Gaussian lines on a wavelength grid.
+
+    All the lines are evaluated at once, each one only within `nsig`
+    sigma of its center, and added to the grid with a single weighted
+    histogram.  The result is the same as summing the full profiles of
+    the lines one by one, apart from the far wings (below
+    exp(-nsig**2/2) of the peak) that are left out.
+
+    Parameters
+    ----------
+    wavelength : np.array
+        wavelength grid
+    wl_line, fl_line : np.arrays
+        central wavelength and peak flux of each line
+    sigma : np.array
+        sigma of each line, in the units of wavelength
+    nsig : float
+        half-width of the window of each line in units of its sigma.
+        Default nsig=10.
+    chunk : int
+        maximum number of line pixels evaluated at a time, which sets
+        the memory used. Default chunk=10000000
+
+    Returns
+    -------
+    line_spec : np.array
+        Sum of the lines on the wavelength grid
+    """
+    wave = np.asarray(wavelength, dtype=float)
+    line_spec = np.zeros(wave.size, dtype=float)
+    if np.size(wl_line) == 0:
+        return line_spec
+    # The windows are found on the sorted grid
+    isort = None if np.all(np.diff(wave) >= 0) else np.argsort(wave)
+    if isort is not None:
+        wave = wave[isort]
+    wl_line = np.asarray(wl_line, dtype=float)
+    fl_line = np.asarray(fl_line, dtype=float)
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), wl_line.shape)
+
+    lo = np.searchsorted(wave, wl_line - nsig*sigma, side='left')
+    hi = np.searchsorted(wave, wl_line + nsig*sigma, side='right')
+    nwin = max(int(np.max(hi - lo)), 1)
+    step = max(chunk // nwin, 1)
+    for i in range(0, wl_line.size, step):
+        s = slice(i, i+step)
+        indx = lo[s,None] + np.arange(nwin)[None,:]
+        inwin = indx < hi[s,None]
+        indx = np.fmin(indx, wave.size-1)
+        profile = fl_line[s,None] * np.exp(-np.power((wl_line[s,None]-wave[indx]),2.)
+                                           / (2.*np.power(sigma[s,None],2.)))
+        line_spec += np.bincount(indx[inwin], weights=profile[inwin], minlength=wave.size)
+
+    if isort is not None:
+        line_spec[isort] = line_spec.copy()
+    return line_spec
+
+
 def addlines2spec(wavelength, wl_line, fl_line, resolution,
                   scale_spec=1., debug=False):
     """ Create a spectrum with a set of (gaussian) emission lines.
@@ -99,7 +159,7 @@ def addlines2spec(wavelength, wl_line, fl_line, resolution,
         Spectrum with lines
 
     """
-    line_spec = np.zeros_like(wavelength)
+    import matplotlib.pyplot as plt
     wl_line_min, wl_line_max = np.min(wavelength), np.max(wavelength)
     good_lines = (wl_line>wl_line_min) & (wl_line<wl_line_max)
     wl_line_good = wl_line[good_lines]
@@ -109,9 +169,7 @@ def addlines2spec(wavelength, wl_line, fl_line, resolution,
     sigma = wl_line_good / resolution / 2.355
 
     msgs.info("Creating line spectrum")
-    for ii in np.arange(len(wl_line_good)):
-        line_spec += scale_spec*fl_line_good[ii]*\
-                     np.exp(-np.power((wl_line_good[ii]-wavelength),2.)/(2.*np.power(sigma[ii],2.)))
+    line_spec = render_lines(wavelength, wl_line_good, scale_spec*fl_line_good, sigma)
 
     if debug:
         utils.pyplot_rcparams()
@@ -163,6 +221,7 @@ def transparency(wavelength, debug=False):
         Transmission of the sky over the considered wavelength rage.
         1. means fully transparent and 0. fully opaque
     """
+    import matplotlib.pyplot as plt
 
     msgs.info("Reading in the atmospheric transmission model")
     skisim_dir = resource_filename('pypeit', 'data/skisim/')
@@ -306,6 +365,7 @@ def nearIR_modelsky(resolution, waveminmax=(0.8,2.6), dlam=40.0,
     wave, sky_model : np.arrays
         wavelength (in Ang.) and flux of the final model of the sky.
     """
+    import matplotlib.pyplot as plt
 
     # Create the wavelength array:
     wv_min = waveminmax[0]
@@ -450,6 +510,7 @@ def optical_modelThAr(resolution, waveminmax=(3000.,10500.), dlam=40.0,
     wave, thar_model : np.arrays
         wavelength (in Ang.) and flux of the final model of the ThAr lamp emission.
     """
+    import matplotlib.pyplot as plt
 
     # Create the wavelength array:
     wv_min = waveminmax[0]
@@ -560,6 +621,7 @@ def conv2res(wavelength, flux, resolution, central_wl='midpt',
     px_bin : float
         Size of one pixel at central_wl
     """
+    import matplotlib.pyplot as plt
 
     if central_wl is 'midpt':
         wl_cent = np.median(wavelength)
@@ -573,7 +635,13 @@ def conv2res(wavelength, flux, resolution, central_wl='midpt',
 
     msgs.info("Covolving with a Gaussian kernel with sigma = {} pixels".format(px_sigma))
     gauss_kernel = Gaussian1DKernel(px_sigma)
-    flux_convolved = convolve(flux, gauss_kernel)
+    if np.all(np.isfinite(flux)):
+        # Same as astropy's convolve (with the default zero padding
+        # of the edges), but done with FFTs when that is faster
+        flux_convolved = signal.convolve(flux, gauss_kernel.array, mode='same')
+    else:
+        # Let astropy interpolate over the non-finite values
+        flux_convolved = convolve(flux, gauss_kernel)
 
     if debug:
         utils.pyplot_rcparams()